@@ -0,0 +1,493 @@
+"""
+Benchmarks of MozTrap's hot paths, for use with a synthetic dataset.
+
+Each benchmark times one operation against the existing data (such as that
+made by the ``generate_dataset`` command) and counts its queries. Operations
+that write do so on objects created for the purpose by the benchmark's
+``setup`` (which isn't timed), and ``teardown`` removes them again; requests
+are made by a throwaway superuser that is deleted (with its API key and
+session) when the benchmarks finish, so the database is left as it was found.
+
+"""
+import json
+import time
+import urllib
+import uuid
+
+from django.core.urlresolvers import reverse
+from django.db import connection, reset_queries
+from django.db.models import Max
+from django.test.client import Client, FakePayload
+
+from moztrap import model
+
+
+
+# prefix of the username of the throwaway user making benchmark requests
+USERNAME_PREFIX = "benchmark-"
+
+# default fractional slowdown counted as a regression
+THRESHOLD = 0.2
+
+
+
+class Benchmark(object):
+    """
+    A timed operation.
+
+    Subclasses implement ``run``, and may implement ``setup`` and
+    ``teardown``, which are called before and after each run.
+
+    """
+    name = None
+
+
+    def __init__(self, data):
+        """Benchmark against ``BenchmarkData`` ``data``."""
+        self.data = data
+
+
+    def setup(self):
+        pass
+
+
+    def run(self):
+        raise NotImplementedError()
+
+
+    def teardown(self):
+        pass
+
+
+    def measure(self):
+        """Return tuple of (seconds, number of queries) for one run."""
+        self.setup()
+        old = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        reset_queries()
+        try:
+            start = time.time()
+            self.run()
+            seconds = time.time() - start
+            queries = len(connection.queries)
+        finally:
+            connection.use_debug_cursor = old
+            self.teardown()
+        return seconds, queries
+
+
+
+class BenchmarkData(object):
+    """
+    The objects benchmarks operate on, found in the existing data.
+
+    Also creates a throwaway superuser, with an API key and a logged-in
+    client; ``close()`` deletes them again.
+
+    """
+    def __init__(self):
+        self.run = model.Run.objects.filter(
+            status=model.Run.STATUS.active).order_by("id")[0]
+        self.productversion = self.run.productversion
+        self.product = self.productversion.product
+        self.environment = self.run.environments.order_by("id")[0]
+        self.tag = model.Tag.objects.filter(
+            product=self.product).order_by("id")[0]
+        password = uuid.uuid4().hex
+        self.user = self.create_user(password)
+        self.client = None
+        try:
+            self.apikey = model.ApiKey.generate(owner=self.user)
+            self.client = Client()
+            self.client.login(username=self.user.username, password=password)
+            # the first request after login saves the session
+            self.client.get(reverse("home"))
+        except Exception:
+            self.close()
+            raise
+
+
+    def create_user(self, password):
+        """Return a new superuser with a unique name and ``password``."""
+        username = USERNAME_PREFIX + uuid.uuid4().hex[:12]
+        user = model.User(
+            username=username,
+            email="{0}@example.com".format(username),
+            is_superuser=True,
+            )
+        user.set_password(password)
+        user.save()
+        return user
+
+
+    def close(self):
+        """Delete the benchmark user, its API keys and its session."""
+        if self.client is not None:
+            self.client.logout()
+        model.ApiKey.everything.filter(owner=self.user).delete(permanent=True)
+        self.user.delete()
+
+
+
+class PageBenchmark(Benchmark):
+    """Get a page; subclasses set ``url_name`` and implement ``params``."""
+    url_name = None
+
+
+    def url(self):
+        return reverse(self.url_name)
+
+
+    def params(self):
+        return {}
+
+
+    def run(self):
+        response = self.data.client.get(self.url(), self.params())
+        assert response.status_code == 200, response.status_code
+
+
+
+class CaseList(PageBenchmark):
+    name = "case_list"
+    url_name = "manage_cases"
+
+
+
+class CaseListFiltered(PageBenchmark):
+    name = "case_list_filtered"
+    url_name = "manage_cases"
+
+
+    def params(self):
+        return {
+            "filter-productversion": self.data.productversion.id,
+            "filter-status": "active",
+            "filter-tag": self.data.tag.id,
+            }
+
+
+
+class CaseListSearch(PageBenchmark):
+    name = "case_list_search"
+    url_name = "manage_cases"
+
+
+    def params(self):
+        return {
+            "filter-product": self.data.product.id,
+            "filter-name": "open",
+            }
+
+
+
+class ResultsList(PageBenchmark):
+    name = "results_list"
+    url_name = "results_runcaseversions"
+
+
+    def params(self):
+        return {"filter-run": self.data.run.id}
+
+
+
+class ResultsListFiltered(PageBenchmark):
+    name = "results_list_filtered"
+    url_name = "results_runcaseversions"
+
+
+    def params(self):
+        return {
+            "filter-productversion": self.data.productversion.id,
+            "filter-status": "active",
+            "filter-name": "open",
+            }
+
+
+
+class RunTests(PageBenchmark):
+    name = "runtests"
+
+
+    def url(self):
+        return reverse(
+            "runtests_run",
+            kwargs={
+                "run_id": self.data.run.id,
+                "env_id": self.data.environment.id,
+                },
+            )
+
+
+
+class CompareRuns(PageBenchmark):
+    name = "compare_runs"
+    url_name = "results_compare_runs"
+
+
+    def params(self):
+        # the run with itself is as much work as with any run its size
+        return {
+            "before": self.data.run.id,
+            "after": self.data.run.id,
+            "format": "json",
+            }
+
+
+
+class ReorderVersions(Benchmark):
+    name = "reorder_versions"
+
+
+    def run(self):
+        self.data.product.reorder_versions()
+
+
+
+class RunActivation(Benchmark):
+    """Activate a draft clone of the benchmark run."""
+    name = "run_activation"
+
+
+    def setup(self):
+        self.clone = self.data.run.clone(user=self.data.user)
+
+
+    def run(self):
+        self.clone.activate(user=self.data.user)
+
+
+    def teardown(self):
+        self.clone.delete(permanent=True)
+
+
+
+class CloneRun(Benchmark):
+    name = "clone_run"
+
+
+    def run(self):
+        self.clone = self.data.run.clone(user=self.data.user)
+
+
+    def teardown(self):
+        self.clone.delete(permanent=True)
+
+
+
+class CloneProductVersion(Benchmark):
+    name = "clone_productversion"
+
+
+    def run(self):
+        self.clone = self.data.productversion.clone(user=self.data.user)
+
+
+    def teardown(self):
+        self.clone.delete(permanent=True)
+
+
+
+class SoftDelete(Benchmark):
+    """Soft-delete a clone of the product version, with its case versions."""
+    name = "soft_delete"
+
+
+    def setup(self):
+        self.clone = self.data.productversion.clone(user=self.data.user)
+
+
+    def run(self):
+        self.clone.delete(user=self.data.user)
+
+
+    def teardown(self):
+        model.ProductVersion.everything.get(pk=self.clone.pk).delete(
+            permanent=True)
+
+
+
+class NewObjectsMixin(object):
+    """Teardown permanently deletes objects created since setup."""
+    created_models = []
+
+
+    def setup(self):
+        self.last_ids = dict(
+            (m, m.everything.aggregate(Max("id"))["id__max"] or 0)
+            for m in self.created_models
+            )
+
+
+    def teardown(self):
+        for m in self.created_models:
+            m.everything.filter(id__gt=self.last_ids[m]).delete(
+                permanent=True)
+
+
+
+class ImportCases(NewObjectsMixin, Benchmark):
+    """Import 200 cases, with steps, tags and suites."""
+    name = "import"
+    created_models = [model.Suite, model.Case, model.Tag]
+
+
+    def run(self):
+        from moztrap.model.library.importer import Importer
+        Importer().import_data(
+            self.data.productversion,
+            {
+                "suites": [
+                    {"name": "Benchmark suite {0}".format(s)}
+                    for s in range(5)
+                    ],
+                "cases": [
+                    {
+                        "name": "Benchmark case {0}".format(c),
+                        "description": "Imported for benchmarking.",
+                        "tags": ["benchmark tag {0}".format(c % 10)],
+                        "suites": ["Benchmark suite {0}".format(c % 5)],
+                        "steps": [
+                            {
+                                "instruction": "Do step {0}".format(s),
+                                "expected": "Step {0} works".format(s),
+                                }
+                            for s in range(3)
+                            ],
+                        }
+                    for c in range(200)
+                    ],
+                },
+            )
+
+
+
+class ResultPatch(Benchmark):
+    """Submit 100 results in one PATCH to the result API."""
+    name = "result_patch"
+
+
+    def setup(self):
+        self.clone = self.data.run.clone(user=self.data.user)
+        self.clone.activate(user=self.data.user)
+        cases = self.clone.runcaseversions.values_list(
+            "caseversion__case", flat=True)[:100]
+        self.payload = json.dumps(
+            {
+                "objects": [
+                    {
+                        "case": case_id,
+                        "environment": self.data.environment.id,
+                        "run_id": self.clone.id,
+                        "status": "passed",
+                        }
+                    for case_id in cases
+                    ]
+                }
+            )
+
+
+    def run(self):
+        response = self.data.client.request(
+            REQUEST_METHOD="PATCH",
+            PATH_INFO=reverse(
+                "api_dispatch_list",
+                kwargs={
+                    "resource_name": "result",
+                    "api_name": model.API_VERSION,
+                    },
+                ),
+            QUERY_STRING=urllib.urlencode(
+                {
+                    "format": "json",
+                    "username": self.data.user.username,
+                    "api_key": self.data.apikey.key,
+                    }
+                ),
+            CONTENT_TYPE="application/json",
+            CONTENT_LENGTH=len(self.payload),
+            **{"wsgi.input": FakePayload(self.payload)}
+            )
+        assert response.status_code == 202, response.status_code
+
+
+    def teardown(self):
+        self.clone.delete(permanent=True)
+
+
+
+# all benchmarks, in the order they are run
+BENCHMARKS = [
+    RunActivation,
+    ReorderVersions,
+    CaseList,
+    CaseListFiltered,
+    CaseListSearch,
+    ResultsList,
+    ResultsListFiltered,
+    RunTests,
+    CompareRuns,
+    ResultPatch,
+    ImportCases,
+    CloneRun,
+    CloneProductVersion,
+    SoftDelete,
+    ]
+
+
+
+def run_benchmarks(names=None, repeat=3):
+    """
+    Run benchmarks (those named in ``names``, default all) ``repeat`` times.
+
+    Returns dictionary mapping benchmark name to a dictionary with the median
+    and minimum "seconds" and "min_seconds" of the runs, and the "queries" of
+    the last run.
+
+    """
+    data = BenchmarkData()
+    results = {}
+    try:
+        for cls in BENCHMARKS:
+            if names and cls.name not in names:
+                continue
+            benchmark = cls(data)
+            timings = []
+            for i in range(repeat):
+                seconds, queries = benchmark.measure()
+                timings.append(seconds)
+            timings.sort()
+            results[cls.name] = {
+                "seconds": timings[len(timings) // 2],
+                "min_seconds": timings[0],
+                "queries": queries,
+                }
+    finally:
+        data.close()
+    return results
+
+
+
+def regressions(results, baseline, threshold=THRESHOLD):
+    """
+    Return list of descriptions of regressions of ``results`` from baseline.
+
+    A benchmark has regressed if its median time is more than ``threshold``
+    (a fraction) slower than in ``baseline``, or if it makes more queries.
+    Benchmarks missing from either are ignored.
+
+    """
+    found = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["seconds"] > base["seconds"] * (1 + threshold):
+            found.append(
+                "{0}: {1:.3f}s, was {2:.3f}s".format(
+                    name, result["seconds"], base["seconds"]))
+        if result["queries"] > base["queries"]:
+            found.append(
+                "{0}: {1} queries, was {2}".format(
+                    name, result["queries"], base["queries"]))
+    return found
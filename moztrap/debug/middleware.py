@@ -1,9 +1,20 @@
+from collections import Counter
+import logging
+import re
+from time import time
+
 from django.conf import settings
 from django.core.exceptions import MiddlewareNotUsed
+from django.core.urlresolvers import resolve
+from django.db import connections
 from django.http import HttpResponse
 
 
 
+logger = logging.getLogger("moztrap.debug.metrics")
+
+
+
 class AjaxTracebackMiddleware(object):
     def __init__(self):
         if not settings.DEBUG:
@@ -14,3 +25,171 @@ class AjaxTracebackMiddleware(object):
         if request.is_ajax():
             import traceback
             return HttpResponse(traceback.format_exc().replace("\n", "<br>\n"))
+
+
+
+# quoted strings and numbers in SQL
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# parenthesized lists of placeholders, as in "IN (?, ?, ?)"
+_PLACEHOLDER_LISTS = re.compile(r"\(\?(?:, \?)*\)")
+
+
+
+def fingerprint(sql):
+    """Return ``sql`` with its literal values replaced by placeholders."""
+    return _PLACEHOLDER_LISTS.sub("(...)", _LITERALS.sub("?", sql))
+
+
+
+class RequestMetricsMiddleware(object):
+    """
+    Logs the database and rendering work done for each request.
+
+    Enabled by the ``REQUEST_METRICS`` setting; for best accuracy it should be
+    the first middleware. For each request it logs, to the
+    ``moztrap.debug.metrics`` logger at INFO level, a line of ``key=value``
+    pairs: the view's URL name (or dotted path), response status, number of
+    SQL queries, milliseconds spent in the database, number of queries
+    repeating an earlier query with different values (a sign of per-object
+    queries), milliseconds spent rendering a ``TemplateResponse``, total
+    milliseconds, and response size in bytes. The values are also attached to
+    the log record as its ``metrics`` attribute.
+
+    If the ``REQUEST_METRICS_SERVER_TIMING`` setting is True, the timings are
+    also sent in a ``Server-Timing`` response header.
+
+    The ``REQUEST_BUDGETS`` setting maps view URL names or dotted paths to a
+    dictionary of limits on "queries", "db_ms" and "total_ms"; a request
+    exceeding any of its view's limits is logged at WARNING level, with its
+    most-repeated queries.
+
+    """
+    def __init__(self):
+        if not getattr(settings, "REQUEST_METRICS", False):
+            raise MiddlewareNotUsed
+        self.server_timing = getattr(
+            settings, "REQUEST_METRICS_SERVER_TIMING", False)
+        self.budgets = getattr(settings, "REQUEST_BUDGETS", {})
+
+
+    def process_request(self, request):
+        """Start recording queries on all database connections."""
+        request._metrics = {
+            "start": time(),
+            "connections": [
+                (c, c.use_debug_cursor, len(c.queries))
+                for c in connections.all()
+                ],
+            "view": None,
+            "view_path": None,
+            "render_ms": None,
+            }
+        for c in connections.all():
+            c.use_debug_cursor = True
+
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Record the name of the view."""
+        if hasattr(request, "_metrics"):
+            path = "{0}.{1}".format(
+                view_func.__module__,
+                getattr(view_func, "__name__", type(view_func).__name__),
+                )
+            match = resolve(
+                request.path_info, getattr(request, "urlconf", None))
+            request._metrics["view_path"] = path
+            request._metrics["view"] = match.url_name or path
+
+
+    def process_template_response(self, request, response):
+        """Time the rendering of a ``TemplateResponse``."""
+        if hasattr(request, "_metrics"):
+            start = time()
+
+            def rendered(response):
+                request._metrics["render_ms"] = (time() - start) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+    def process_response(self, request, response):
+        """Log metrics for the request; check budget; add header."""
+        recorded = getattr(request, "_metrics", None)
+        if recorded is None:
+            return response
+
+        queries = []
+        for connection, use_debug_cursor, start in recorded["connections"]:
+            queries.extend(connection.queries[start:])
+            connection.use_debug_cursor = use_debug_cursor
+
+        repeated = Counter(fingerprint(q["sql"]) for q in queries)
+        if response._is_string:
+            size = len(response.content)
+        else:
+            size = response.get("Content-Length")
+
+        metrics = {
+            "view": recorded["view"],
+            "status": response.status_code,
+            "queries": len(queries),
+            "db_ms": sum(float(q["time"]) for q in queries) * 1000,
+            "duplicates": sum(n - 1 for n in repeated.values()),
+            "render_ms": recorded["render_ms"],
+            "total_ms": (time() - recorded["start"]) * 1000,
+            "size": size,
+            }
+        logger.info(
+            " ".join(
+                "{0}={1}".format(
+                    key,
+                    "{0:.1f}".format(metrics[key])
+                    if isinstance(metrics[key], float) else metrics[key],
+                    )
+                for key in [
+                    "view",
+                    "status",
+                    "queries",
+                    "db_ms",
+                    "duplicates",
+                    "render_ms",
+                    "total_ms",
+                    "size",
+                    ]
+                ),
+            extra={"metrics": metrics},
+            )
+
+        budget = self.budgets.get(recorded["view"]) or self.budgets.get(
+            recorded["view_path"], {})
+        exceeded = [
+            "{0} {1:.0f} > {2}".format(key, metrics[key], limit)
+            for key, limit in sorted(budget.items())
+            if metrics.get(key) is not None and metrics[key] > limit
+            ]
+        if exceeded:
+            logger.warning(
+                "Budget exceeded by %s: %s; most repeated queries: %s",
+                recorded["view"],
+                ", ".join(exceeded),
+                "; ".join(
+                    "{0}x {1}".format(n, sql)
+                    for sql, n in repeated.most_common(3) if n > 1
+                    ) or "none",
+                extra={"metrics": metrics},
+                )
+
+        if self.server_timing:
+            timings = [
+                'db;dur={0:.1f};desc="{1} queries"'.format(
+                    metrics["db_ms"], metrics["queries"]),
+                ]
+            if metrics["render_ms"] is not None:
+                timings.append("render;dur={0:.1f}".format(
+                    metrics["render_ms"]))
+            timings.append("total;dur={0:.1f}".format(metrics["total_ms"]))
+            response["Server-Timing"] = ", ".join(timings)
+
+        return response
@@ -10,11 +10,17 @@ from .mtmodel import ConcurrencyError
 from .core.models import Product, ProductVersion, ApiKey
 from .core.auth import User, Role, Permission
 from .environments.models import Environment, Profile, Element, Category
-from .execution.models import Run, RunSuite, RunCaseVersion, Result, StepResult
+from .execution.models import (
+    Run, RunSuite, RunCaseVersion, Result, LatestResult, StepResult,
+    ArchivedResult)
 from .library.bulk import BulkParser
 from .library.models import (
-    Case, CaseVersion, CaseAttachment, CaseStep, Suite, SuiteCase)
+    Case, CaseVersion, CaseAttachment, CaseStep, CaseVersionTerm, Suite,
+    SuiteCase)
 from .tags.models import Tag
 
+# registers the signal handlers that keep autocomplete indexes current
+from . import autocomplete
+
 # version of the REST endpoint APIs for TastyPie
 API_VERSION = "v1"
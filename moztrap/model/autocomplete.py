@@ -0,0 +1,225 @@
+"""
+In-process autocomplete indexes for tags, elements and users.
+
+Each index holds every name of its model in memory, ordered by usage, with a
+trigram posting list pointing into that order. It is rebuilt whenever the write
+generation of one of its models has changed since it was built; with the
+``AUTOCOMPLETE_REBUILD`` setting at "background" (the default), searches keep
+using the previous index meanwhile, so only a process's first search waits for
+the database. Write generations are kept in the cache, so a process only sees
+writes made by other processes if the cache backend is shared by all of them
+(e.g. memcached); with a local-memory cache each process sees only its own
+writes.
+
+"""
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.contrib.auth.models import User as BaseUser
+
+from .mtmodel import generation, bump_generation
+from .core.auth import User
+from .environments.models import Element, Environment
+from .library.models import CaseVersion
+from .tags.models import Tag
+
+
+
+# default maximum number of suggestions returned
+LIMIT = 20
+
+# length of indexed substrings
+GRAM = 3
+
+
+
+def grams(text):
+    """Return set of all ``GRAM``-length substrings of ``text``."""
+    return set(text[i:i + GRAM] for i in range(len(text) - GRAM + 1))
+
+
+
+class AutocompleteIndex(object):
+    """
+    Case-insensitive substring index over the names of one model.
+
+    Subclasses set ``models`` (whose writes invalidate the index) and implement
+    ``load()``.
+
+    """
+    models = []
+
+
+    def __init__(self):
+        self._key = None
+        self._index = ([], {})
+        self._rebuilding = threading.Lock()
+
+
+    def load(self):
+        """Return iterable of item dicts, each with at least ``name``."""
+        raise NotImplementedError()
+
+
+    def build(self):
+        """Load all items and index their names."""
+        entries = []
+        index = {}
+        for i, item in enumerate(self.load()):
+            lowered = item["name"].lower()
+            entries.append((lowered, item))
+            for gram in grams(lowered):
+                index.setdefault(gram, []).append(i)
+        # replace both at once, for the benefit of concurrent searches
+        self._index = (entries, index)
+
+
+    def refresh(self, key):
+        """Build the index and record the generations ``key`` it reflects."""
+        self.build()
+        self._key = key
+
+
+    def refresh_in_background(self, key):
+        """Refresh the index in a thread, unless a refresh is running."""
+        if not self._rebuilding.acquire(False):
+            return
+        thread = threading.Thread(target=self._refresh_thread, args=(key,))
+        thread.daemon = True
+        thread.start()
+
+
+    def _refresh_thread(self, key):
+        try:
+            self.refresh(key)
+        finally:
+            for connection in connections.all():
+                connection.close()
+            self._rebuilding.release()
+
+
+    def current(self):
+        """Refresh the index if any of its models have been written to."""
+        key = tuple(generation(m) for m in self.models)
+        if key == self._key:
+            return
+        if (self._key is None or
+                settings.AUTOCOMPLETE_REBUILD != "background"):
+            self.refresh(key)
+        else:
+            self.refresh_in_background(key)
+
+
+    def search(self, text, limit=LIMIT, predicate=None):
+        """
+        Return up to ``limit`` items whose name contains ``text``.
+
+        Items are returned in usage order; if ``predicate`` is given, only
+        items for which it returns True are included. Short queries scan the
+        entries in order; longer ones walk only the shortest posting list of
+        their trigrams, so the work done is proportional to the number of
+        candidates rather than the size of the table.
+
+        """
+        self.current()
+        entries, index = self._index
+        text = text.lower()
+        if not text:
+            return []
+        if len(text) < GRAM:
+            candidates = xrange(len(entries))
+        else:
+            candidates = min(
+                [index.get(g, []) for g in grams(text)], key=len)
+        found = []
+        for i in candidates:
+            lowered, item = entries[i]
+            if text in lowered and (predicate is None or predicate(item)):
+                found.append(item)
+                if len(found) >= limit:
+                    break
+        return found
+
+
+
+class TagIndex(AutocompleteIndex):
+    """Tags, most-used first."""
+    models = [Tag]
+
+
+    def load(self):
+        return Tag.objects.annotate(usage=Count("caseversions")).order_by(
+            "-usage", "name").values("id", "name", "product", "usage")
+
+
+    def search(self, text, limit=LIMIT, product_id=None):
+        """Return matching tags global or belonging to given product."""
+        predicate = None
+        if product_id is not None:
+            product_id = unicode(product_id)
+            predicate = lambda item: (
+                item["product"] is None or
+                unicode(item["product"]) == product_id)
+        return super(TagIndex, self).search(text, limit, predicate)
+
+
+
+class ElementIndex(AutocompleteIndex):
+    """Environment elements, most-used first."""
+    models = [Element]
+
+
+    def load(self):
+        return Element.objects.annotate(usage=Count("environments")).order_by(
+            "-usage", "name").values("id", "name", "usage")
+
+
+
+class UserIndex(AutocompleteIndex):
+    """Active users by username, most recently active first."""
+    models = [BaseUser, User]
+
+
+    def load(self):
+        return (
+            {"id": u["id"], "name": u["username"]}
+            for u in User.objects.filter(is_active=True).order_by(
+                "-last_login", "username").values("id", "username")
+            )
+
+
+
+tags = TagIndex()
+elements = ElementIndex()
+users = UserIndex()
+
+
+
+def _bump_tags(sender, action, **kwargs):
+    """Tag usage changes when case versions are tagged or untagged."""
+    if action.startswith("post_"):
+        bump_generation(Tag)
+
+
+
+def _bump_elements(sender, action, **kwargs):
+    """Element usage changes when environments gain or lose elements."""
+    if action.startswith("post_"):
+        bump_generation(Element)
+
+
+
+def _bump_users(sender, **kwargs):
+    """Users are not MTModels, so track their writes here."""
+    bump_generation(sender)
+
+
+
+m2m_changed.connect(_bump_tags, sender=CaseVersion.tags.through)
+m2m_changed.connect(_bump_elements, sender=Environment.elements.through)
+for _sender in [BaseUser, User]:
+    post_save.connect(_bump_users, sender=_sender)
+    post_delete.connect(_bump_users, sender=_sender)
@@ -0,0 +1,35 @@
+"""
+Move superseded results to cold storage.
+
+A result is superseded once its tester records a newer result of the same
+case in the same environment. Superseded results not modified for ``--days``
+days are moved to the archive, where the results list of a case still shows
+them; ``restore_results`` moves them back. Intended to be run periodically.
+
+"""
+import datetime
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from moztrap.model.execution import archive
+from moztrap.model.mtmodel import utcnow
+
+
+
+class Command(BaseCommand):
+    help = "Archives superseded results that haven't been modified recently."
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--days",
+            type="int",
+            default=365,
+            help="Archive results unmodified for this many days "
+            "(default 365)."),
+        )
+
+
+    def handle(self, *args, **options):
+        before = utcnow() - datetime.timedelta(days=options["days"])
+        count = archive.archive(before)
+        self.stdout.write("Archived {0} results.\n".format(count))
@@ -0,0 +1,86 @@
+"""
+Benchmark MozTrap's hot paths against the current database.
+
+Only runs against a database populated by ``generate_dataset`` (one whose
+products were all generated), never against real data. Results are written
+as JSON to the named file, or to standard output. Given a ``--baseline`` file
+of earlier results, exits with an error if any benchmark has regressed.
+
+"""
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap.debug import benchmarks
+from moztrap.model import dataset
+
+
+
+class Command(BaseCommand):
+    args = "[<benchmark_name> ...]"
+    help = (
+        "Runs the named benchmarks (default all), optionally comparing the "
+        "results to a baseline")
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--output",
+            dest="output",
+            help="File to write JSON results to (default standard output)."),
+        make_option(
+            "--baseline",
+            dest="baseline",
+            help="JSON results file to compare against."),
+        make_option(
+            "--threshold",
+            type="float",
+            default=benchmarks.THRESHOLD,
+            help="Fractional slowdown counted as a regression (default "
+            "{0}).".format(benchmarks.THRESHOLD)),
+        make_option(
+            "--repeat",
+            type="int",
+            default=3,
+            help="Number of times to run each benchmark (default 3)."),
+        )
+
+
+    def handle(self, *args, **options):
+        known = [b.name for b in benchmarks.BENCHMARKS]
+        for name in args:
+            if name not in known:
+                raise CommandError(
+                    'Unknown benchmark "{0}"; choose from {1}'.format(
+                        name, ", ".join(known)))
+
+        if not dataset.is_generated():
+            raise CommandError(
+                "This database wasn't built by generate_dataset; refusing to "
+                "benchmark it.")
+
+        baseline = None
+        if options.get("baseline"):
+            try:
+                with open(options["baseline"]) as fh:
+                    baseline = json.load(fh)
+            except (IOError, ValueError) as e:
+                raise CommandError(
+                    'Could not read baseline "{0}": {1}'.format(
+                        options["baseline"], e))
+
+        results = benchmarks.run_benchmarks(
+            names=args, repeat=options["repeat"])
+
+        output = json.dumps(results, indent=2, sort_keys=True) + "\n"
+        if options.get("output"):
+            with open(options["output"], "w") as fh:
+                fh.write(output)
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            found = benchmarks.regressions(
+                results, baseline, options["threshold"])
+            if found:
+                raise CommandError(
+                    "Regressions:\n{0}".format("\n".join(found)))
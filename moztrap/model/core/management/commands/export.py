@@ -0,0 +1,81 @@
+"""
+Export Suite and Case data for a given Product Version.
+
+The output is in the JSON format accepted by the ``import`` command (or, with
+``--format=ndjson`` or a ``.ndjson``/``.jsonl`` filename, newline-delimited
+JSON), and is written to the named file, or to standard output if no filename
+is given.
+
+Cases are read from the database in chunks and written as they are read, so
+memory use stays constant however large the library is.
+
+"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap.model.core.models import Product, ProductVersion
+from moztrap.model.library import exporter, readers
+
+
+
+class Command(BaseCommand):
+    args = "<product_name> <product_version> [<filename>]"
+    help = (
+        "Exports the suites and cases of the specified Product Version "
+        "as JSON or NDJSON")
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--format",
+            dest="format",
+            choices=sorted(exporter.WRITERS),
+            help="Output format (default: guessed from file extension, "
+            "else JSON)."),
+        )
+
+
+    def handle(self, *args, **options):
+        if not len(args) in [2, 3]:
+            raise CommandError("Usage: {0}".format(self.args))
+
+        try:
+            product = Product.objects.get(name=args[0])
+        except Product.DoesNotExist:
+            raise CommandError('Product "{0}" does not exist'.format(args[0]))
+
+        try:
+            product_version = ProductVersion.objects.get(
+                product=product, version=args[1])
+        except ProductVersion.DoesNotExist:
+            raise CommandError(
+                'Version "{0}" of product "{1}" does not exist'.format(
+                    args[1], args[0])
+                )
+
+        file_format = options.get("format")
+        if file_format is None:
+            file_format = "json"
+            if len(args) == 3:
+                file_format = readers.guess_format(args[2])
+        if file_format not in exporter.WRITERS:
+            raise CommandError(
+                "Cannot export {0}; use --format".format(file_format.upper()))
+
+        if len(args) == 3:
+            try:
+                fh = open(args[2], "wb")
+            except IOError as (errno, strerror):
+                raise CommandError(
+                    'Could not open "{0}", I/O error {1}: {2}'.format(
+                        args[2], errno, strerror)
+                    )
+        else:
+            fh = self.stdout
+
+        try:
+            for chunk in exporter.WRITERS[file_format](
+                    exporter.export_items(product_version)):
+                fh.write(chunk)
+        finally:
+            if fh is not self.stdout:
+                fh.close()
@@ -0,0 +1,75 @@
+"""
+Generate a large synthetic dataset, for benchmarking.
+
+The same seed and sizes always generate the same data. Rows are inserted with
+multi-row INSERTs a table at a time, so a dataset of a million results takes
+minutes even on SQLite; for example::
+
+    ./manage.py generate_dataset --products=5 --versions=4 --cases=2000 \\
+        --runs=5 --results=10000
+
+"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from moztrap.model import dataset
+
+
+
+class Command(BaseCommand):
+    help = "Generates a synthetic dataset of the given size."
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--seed",
+            type="int",
+            default=0,
+            help="Seed for the random choices (default 0)."),
+        make_option(
+            "--no-index",
+            action="store_false",
+            dest="index",
+            default=True,
+            help="Don't rebuild the search index for generated cases."),
+        ) + tuple(
+        make_option(
+            "--{0}".format(name),
+            type="float" if name == "deleted" else "int",
+            default=default,
+            help=help + " (default {0}).".format(default))
+        for name, default, help in [
+            ("products", dataset.DEFAULTS["products"],
+             "Number of products"),
+            ("versions", dataset.DEFAULTS["versions"],
+             "Number of versions per product"),
+            ("cases", dataset.DEFAULTS["cases"],
+             "Number of cases per product"),
+            ("steps", dataset.DEFAULTS["steps"],
+             "Number of steps per case version"),
+            ("suites", dataset.DEFAULTS["suites"],
+             "Number of suites per product"),
+            ("categories", dataset.DEFAULTS["categories"],
+             "Number of environment categories"),
+            ("elements", dataset.DEFAULTS["elements"],
+             "Number of elements per category"),
+            ("runs", dataset.DEFAULTS["runs"],
+             "Number of runs per product version"),
+            ("results", dataset.DEFAULTS["results"],
+             "Number of results per run"),
+            ("testers", dataset.DEFAULTS["testers"],
+             "Number of testers"),
+            ("tags", dataset.DEFAULTS["tags"],
+             "Number of tags per product"),
+            ("deleted", dataset.DEFAULTS["deleted"],
+             "Fraction of cases, suites and runs soft-deleted"),
+            ]
+        )
+
+
+    def handle(self, *args, **options):
+        sizes = dict(
+            (name, options[name]) for name in dataset.DEFAULTS)
+        counts = dataset.generate(
+            seed=options["seed"], index=options["index"], **sizes)
+        for name, count in sorted(counts.items()):
+            self.stdout.write("{0}: {1}\n".format(name, count))
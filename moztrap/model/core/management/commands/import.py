@@ -2,7 +2,7 @@
 Import Suite and Case data for a given Product Version.
 
 The "suites" or "cases" sections are optional.
-The data must be in JSON format and structured like this::
+By default the data is in JSON format, structured like this::
 
     {
         "suites": [
@@ -28,22 +28,66 @@ The data must be in JSON format and structured like this::
         ]
     }
 
-"""
+Pass ``--bulk`` to import cases in chunks with multi-row inserts; this is much
+faster for large files.
 
-from django.core.management.base import BaseCommand, CommandError
+The file is read incrementally, so files larger than available memory can be
+imported in bulk mode. Other accepted formats (see ``readers``) are:
+
+* ``ndjson``: newline-delimited JSON, one case object per line, or
+  ``{"suite": {...}}`` for a suite.
+* ``csv``: a header row naming the columns (name, description, created_by,
+  tags, suites, instruction, expected), then one row per step; rows with a
+  name start a new case.
+* ``text``: the "Test that... When... Then..." format of the bulk case entry
+  form.
 
+The format is guessed from the file extension (``.ndjson``, ``.jsonl``,
+``.csv``, ``.txt``) or else from the file contents, or can be given with
+``--format``.
+
+In bulk mode each chunk is committed separately. With ``--checkpoint=FILE``,
+progress is recorded in FILE after each chunk; if the import is interrupted,
+running the same command again resumes after the last committed chunk. The
+checkpoint file is removed when the import completes.
+
+"""
+from optparse import make_option
 import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
 
 from moztrap.model.core.models import Product, ProductVersion
-from moztrap.model.library.importer import Importer
+from moztrap.model.library import readers
+from moztrap.model.library.importer import Importer, ImportResult
+from moztrap.model.mtmodel import bump_pending_generations
 
 
 
 class Command(BaseCommand):
     args = "<product_name> <product_version> <filename>"
     help = (
-        "Imports the cases from a JSON file into "
+        "Imports the cases from a JSON, NDJSON, CSV or text file into "
         "the specified Product Version")
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--bulk",
+            action="store_true",
+            dest="bulk",
+            default=False,
+            help="Import cases in chunks using multi-row inserts."),
+        make_option(
+            "--format",
+            dest="format",
+            choices=sorted(readers.READERS),
+            help="Input format (default: guessed from file extension)."),
+        make_option(
+            "--checkpoint",
+            dest="checkpoint",
+            help="Record bulk import progress in this file, and resume "
+            "from it if it exists."),
+        )
 
 
     def handle(self, *args, **options):
@@ -65,25 +109,90 @@ class Command(BaseCommand):
                 )
 
         try:
-            with open(args[2]) as fh:
-
-                # try to import this as JSON
-                try:
-                    case_data = json.load(fh)   # pragma: no branch
-                except ValueError as e:
-                    raise CommandError(
-                        "Could not parse JSON: {0}".format(str(e)))
-
-                # @@@: support importing as CSV.  Rather than returning an
-                # error above, just try CSV import instead.
-
+            fh = open(args[2], "rb")
         except IOError as (errno, strerror):
             raise CommandError(
                 'Could not open "{0}", I/O error {1}: {2}'.format(
                     args[2], errno, strerror)
                 )
 
-        result_list = Importer().import_data(
-            product_version, case_data).get_as_list()
+        file_format = (
+            options.get("format") or readers.guess_format(args[2], fh))
+
+        checkpoint = None
+        start, result = 0, None
+        if options.get("bulk") and options.get("checkpoint"):
+            checkpoint = Checkpoint(options["checkpoint"], args)
+            start, result = checkpoint.load()
+
+        with fh:
+            try:
+                result = Importer(bulk=options.get("bulk")).import_items(
+                    product_version,
+                    readers.READERS[file_format](fh),
+                    start=start,
+                    result=result,
+                    checkpoint=checkpoint,
+                    )
+            except readers.ParseError as e:
+                raise CommandError(
+                    "Could not parse {0}: {1}".format(
+                        file_format.upper(), str(e)))
+
+        bump_pending_generations()
+
+        if checkpoint is not None:
+            checkpoint.remove()
+
+        result_list = result.get_as_list()
         result_list.append("")
         self.stdout.write("\n".join(result_list))
+
+
+
+class Checkpoint(object):
+    """Records and restores the progress of a bulk import in a file."""
+
+    def __init__(self, path, args):
+        """Store checkpoint file ``path`` for import with command ``args``."""
+        self.path = path
+        self.args = list(args[:2]) + [os.path.abspath(args[2])]
+
+
+    def load(self):
+        """Return (items consumed, ImportResult) to resume from, if any."""
+        try:
+            with open(self.path) as fh:
+                data = json.load(fh)
+        except IOError:
+            return 0, None
+        except ValueError:
+            raise CommandError(
+                'Could not read checkpoint file "{0}"'.format(self.path))
+        if data["args"] != self.args:
+            raise CommandError(
+                'Checkpoint file "{0}" is for a different import: {1}'.format(
+                    self.path, " ".join(data["args"]))
+                )
+        return data["position"], ImportResult.from_dict(data["result"])
+
+
+    def __call__(self, position, result):
+        """Record that ``position`` items were imported with ``result``."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(
+                {
+                    "args": self.args,
+                    "position": position,
+                    "result": result.as_dict(),
+                    },
+                fh,
+                )
+        os.rename(tmp, self.path)
+
+
+    def remove(self):
+        """Remove the checkpoint file."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
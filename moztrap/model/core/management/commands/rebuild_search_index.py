@@ -0,0 +1,22 @@
+"""
+Rebuild the case search index.
+
+Only needed after upgrading an existing database, or if the index is
+suspected to be out of sync; saving a case version or step keeps its own
+index rows current.
+
+"""
+
+from django.core.management.base import BaseCommand
+
+from moztrap.model.library.models import CaseVersionTerm
+
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index for all case versions."
+
+
+    def handle(self, *args, **options):
+        count = CaseVersionTerm.objects.rebuild()
+        self.stdout.write("Indexed {0} case versions.\n".format(count))
@@ -0,0 +1,36 @@
+"""
+Restore archived results to the results table.
+
+Restores all archived results, or those of the run given by ``--run``.
+
+"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from moztrap.model.execution import archive
+from moztrap.model.execution.models import Run, ArchivedResult
+
+
+
+class Command(BaseCommand):
+    help = "Restores archived results (default all) to the results table."
+    option_list = BaseCommand.option_list + (
+        make_option(
+            "--run",
+            type="int",
+            help="Only restore results of the run with this id."),
+        )
+
+
+    def handle(self, *args, **options):
+        archived = ArchivedResult.everything.all()
+        if options.get("run") is not None:
+            try:
+                run = Run.everything.get(pk=options["run"])
+            except Run.DoesNotExist:
+                raise CommandError(
+                    "There is no run with id {0}.".format(options["run"]))
+            archived = archived.filter(runcaseversion__run=run)
+        count = archive.restore(archived)
+        self.stdout.write("Restored {0} results.\n".format(count))
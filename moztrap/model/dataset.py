@@ -0,0 +1,506 @@
+"""
+Generation of large synthetic datasets, for benchmarking.
+
+``generate`` creates products, versions, environments, cases, suites, runs and
+results whose content is determined entirely by a seed and the size
+parameters, and inserts them a table at a time with ``bulk_insert``; no model
+``save()`` methods are called.
+
+"""
+import datetime
+import itertools
+import random
+
+from django.db import transaction
+
+from .core.auth import User
+from .core.models import Product, ProductVersion
+from .environments.models import Profile, Category, Element, Environment
+from .execution.models import (
+    Run, RunSuite, RunCaseVersion, Result, LatestResult, StepResult)
+from .library.models import (
+    Case, CaseVersion, CaseStep, CaseVersionTerm, Suite, SuiteCase)
+from .mtmodel import bulk_insert
+from .tags.models import Tag
+
+
+
+# default size parameters
+DEFAULTS = {
+    "products": 1,
+    "versions": 2,
+    "cases": 50,
+    "steps": 3,
+    "suites": 5,
+    "categories": 2,
+    "elements": 2,
+    "runs": 2,
+    "results": 200,
+    "testers": 5,
+    "tags": 10,
+    "deleted": 0.05,
+    }
+
+# relative frequency of each result status
+RESULT_STATUSES = [
+    (Result.STATUS.passed, 70),
+    (Result.STATUS.failed, 15),
+    (Result.STATUS.invalidated, 5),
+    (Result.STATUS.started, 5),
+    (Result.STATUS.assigned, 5),
+    ]
+
+# generated product names start with this
+PRODUCT_PREFIX = "Synthetic "
+
+# all generated timestamps count up from here, a second at a time
+EPOCH = datetime.datetime(2012, 1, 1)
+
+WORDS = (
+    "open close save load click type check verify page menu button dialog "
+    "list item search filter sort scroll select submit cancel upload link "
+    "image video sound text field error message window tab account profile"
+    ).split()
+
+
+
+def generate(seed=0, index=True, **sizes):
+    """
+    Generate a dataset; return dictionary of number of objects per model.
+
+    The sizes (see ``DEFAULTS`` for the defaults) are: "products"; "versions"
+    per product; "cases" per product, each with a version per product version
+    and "steps" steps; "suites" per product, each case being in one of them;
+    "categories" of "elements" each, whose combinations are the environments;
+    "runs" per product version, each including every suite of the product;
+    "results" per run, spread over its case/environment combinations by
+    "testers" users; "tags" per product, up to two per case version; and the
+    fraction of cases, suites and runs that are "deleted" (soft-deleted with
+    everything in them).
+
+    Unless ``index`` is False, the search index is rebuilt for generated case
+    versions.
+
+    """
+    for key in sizes:
+        if key not in DEFAULTS:
+            raise TypeError("Unknown size {0!r}".format(key))
+    params = dict(DEFAULTS, **sizes)
+    generator = DatasetGenerator(seed, params)
+    with transaction.commit_on_success():
+        generator.generate()
+        if index:
+            CaseVersionTerm.objects.rebuild(
+                CaseVersion.everything.filter(
+                    productversion__product__in=generator.product_ids))
+    return generator.counts
+
+
+
+def is_generated():
+    """
+    Return True if the database looks like it was built by ``generate``.
+
+    That is, it has products, and every one of them is a generated product.
+
+    """
+    names = Product.everything.values_list("name", flat=True)
+    return bool(names) and all(n.startswith(PRODUCT_PREFIX) for n in names)
+
+
+
+class DatasetGenerator(object):
+    """Generates one dataset; see ``generate``."""
+    def __init__(self, seed, params):
+        self.seed = seed
+        self.params = params
+        self.random = random.Random(seed)
+        self.seconds = itertools.count()
+        self.counts = {}
+        self.product_ids = []
+
+
+    def stamp(self):
+        """Return the next timestamp."""
+        return EPOCH + datetime.timedelta(seconds=self.seconds.next())
+
+
+    def text(self, words):
+        """Return ``words`` random words as a string."""
+        return " ".join(self.random.choice(WORDS) for i in range(words))
+
+
+    def insert(self, objs):
+        """Bulk-insert ``objs`` and count them; return them."""
+        objs = bulk_insert(objs)
+        if objs:
+            name = objs[0]._meta.object_name
+            self.counts[name] = self.counts.get(name, 0) + len(objs)
+        return objs
+
+
+    def mt(self, model, user=None, deleted=False, **kwargs):
+        """Return unsaved MTModel instance with timestamps and users set."""
+        stamp = self.stamp()
+        return model(
+            created_on=stamp,
+            created_by=user,
+            modified_on=stamp,
+            modified_by=user,
+            deleted_on=stamp if deleted else None,
+            deleted_by=user if deleted else None,
+            **kwargs)
+
+
+    def deleted(self):
+        """Return True for the configured fraction of calls."""
+        return self.random.random() < self.params["deleted"]
+
+
+    def generate(self):
+        """Generate the whole dataset."""
+        self.testers = self.users()
+        self.environments = self.environment_matrix()
+        for number in range(1, self.params["products"] + 1):
+            self.product(number)
+
+
+    def users(self):
+        """Return list of testers, creating any that don't exist."""
+        users = []
+        for number in range(1, self.params["testers"] + 1):
+            username = "synthetic-{0}-{1}".format(self.seed, number)
+            user, created = User.objects.get_or_create(
+                username=username,
+                defaults={"email": "{0}@example.com".format(username)},
+                )
+            users.append(user)
+        return users
+
+
+    def environment_matrix(self):
+        """Create a profile with all combinations of elements; return envs."""
+        profile = self.insert(
+            [self.mt(Profile, name="Synthetic {0}".format(self.seed))])[0]
+        categories = self.insert(
+            [
+                self.mt(Category, name="Category {0}-{1}".format(
+                    self.seed, c))
+                for c in range(1, self.params["categories"] + 1)
+                ]
+            )
+        elements = [
+            self.insert(
+                [
+                    self.mt(
+                        Element,
+                        category=category,
+                        name="{0} Element {1}".format(category.name, e),
+                        )
+                    for e in range(1, self.params["elements"] + 1)
+                    ]
+                )
+            for category in categories
+            ]
+        combinations = list(itertools.product(*elements))
+        environments = self.insert(
+            [self.mt(Environment, profile=profile) for c in combinations])
+        through = Environment.elements.through
+        self.insert(
+            [
+                through(environment_id=env.id, element_id=element.id)
+                for env, combination in zip(environments, combinations)
+                for element in combination
+                ]
+            )
+        return environments
+
+
+    def link_environments(self, model, objs):
+        """Link each of ``objs`` to every environment."""
+        through = model.environments.through
+        column = "{0}_id".format(model._meta.module_name)
+        self.insert(
+            [
+                through(**{column: obj.id, "environment_id": env.id})
+                for obj in objs
+                for env in self.environments
+                ]
+            )
+
+
+    def product(self, number):
+        """Generate a product with its versions, library and runs."""
+        user = self.random.choice(self.testers)
+        product = self.insert(
+            [
+                self.mt(
+                    Product,
+                    user=user,
+                    name="{0}{1}-{2}".format(
+                        PRODUCT_PREFIX, self.seed, number),
+                    description=self.text(10),
+                    )
+                ]
+            )[0]
+        self.product_ids.append(product.id)
+        versions = self.insert(
+            [
+                self.mt(
+                    ProductVersion,
+                    user=user,
+                    product=product,
+                    version="{0}.0".format(v),
+                    order=v,
+                    latest=(v == self.params["versions"]),
+                    )
+                for v in range(1, self.params["versions"] + 1)
+                ]
+            )
+        self.link_environments(ProductVersion, versions)
+        tags = self.insert(
+            [
+                self.mt(
+                    Tag,
+                    user=user,
+                    product=product,
+                    name="{0} tag {1}".format(product.name, t),
+                    )
+                for t in range(1, self.params["tags"] + 1)
+                ]
+            )
+
+        suites, suitecases = self.library(product, versions, tags)
+        for version in versions:
+            for number in range(1, self.params["runs"] + 1):
+                self.run(version, number, suites, suitecases)
+
+
+    def library(self, product, versions, tags):
+        """
+        Generate the cases and suites of ``product``.
+
+        Returns tuple of list of suites, and dictionary mapping each suite's
+        id to a list of the active latest case versions in it, per product
+        version, for cases and suites that are not deleted.
+
+        """
+        suites = self.insert(
+            [
+                self.mt(
+                    Suite,
+                    user=self.random.choice(self.testers),
+                    deleted=self.deleted(),
+                    product=product,
+                    name="Suite {0}".format(s),
+                    description=self.text(8),
+                    status=Suite.STATUS.active,
+                    )
+                for s in range(1, self.params["suites"] + 1)
+                ]
+            )
+
+        cases = self.insert(
+            [
+                self.mt(
+                    Case,
+                    user=self.random.choice(self.testers),
+                    deleted=self.deleted(),
+                    product=product,
+                    )
+                for c in range(self.params["cases"])
+                ]
+            )
+
+        caseversions = self.insert(
+            [
+                self.mt(
+                    CaseVersion,
+                    user=case.created_by,
+                    deleted=bool(case.deleted_on),
+                    case=case,
+                    productversion=version,
+                    name="{0} {1}".format(self.text(4), c),
+                    description=self.text(20),
+                    status=(
+                        CaseVersion.STATUS.draft
+                        if self.random.random() < 0.1
+                        else CaseVersion.STATUS.active
+                        ),
+                    latest=(version is versions[-1]),
+                    )
+                for c, case in enumerate(cases, 1)
+                for version in versions
+                ]
+            )
+        self.link_environments(CaseVersion, caseversions)
+        self.insert(
+            [
+                CaseVersion.tags.through(
+                    caseversion_id=cv.id, tag_id=tag.id)
+                for cv in caseversions
+                for tag in self.random.sample(
+                    tags, min(len(tags), self.random.randint(0, 2)))
+                ]
+            )
+        self.steps = {}
+        for step in self.insert(
+                [
+                    self.mt(
+                        CaseStep,
+                        user=cv.created_by,
+                        deleted=bool(cv.deleted_on),
+                        caseversion=cv,
+                        number=n,
+                        instruction=self.text(8),
+                        expected=self.text(6),
+                        )
+                    for cv in caseversions
+                    for n in range(1, self.params["steps"] + 1)
+                    ]
+                ):
+            self.steps.setdefault(step.caseversion_id, step)
+
+        suitecases = {}
+        links = []
+        by_case = dict(
+            ((cv.case_id, cv.productversion_id), cv) for cv in caseversions)
+        if suites:
+            for order, case in enumerate(cases, 1):
+                suite = self.random.choice(suites)
+                links.append(
+                    self.mt(
+                        SuiteCase,
+                        deleted=bool(case.deleted_on or suite.deleted_on),
+                        suite=suite,
+                        case=case,
+                        order=order,
+                        )
+                    )
+                if suite.deleted_on or case.deleted_on:
+                    continue
+                for version in versions:
+                    cv = by_case[(case.id, version.id)]
+                    if cv.status == CaseVersion.STATUS.active:
+                        suitecases.setdefault(
+                            (suite.id, version.id), []).append(cv)
+        self.insert(links)
+
+        return suites, suitecases
+
+
+    def run(self, version, number, suites, suitecases):
+        """Generate an active run of ``version`` with results."""
+        user = self.random.choice(self.testers)
+        deleted = self.deleted()
+        run = self.insert(
+            [
+                self.mt(
+                    Run,
+                    user=user,
+                    deleted=deleted,
+                    productversion=version,
+                    name="{0} run {1}".format(version.version, number),
+                    description=self.text(10),
+                    status=Run.STATUS.active,
+                    start=EPOCH.date(),
+                    )
+                ]
+            )[0]
+        self.link_environments(Run, [run])
+        self.insert(
+            [
+                self.mt(
+                    RunSuite,
+                    user=user,
+                    deleted=deleted,
+                    run=run,
+                    suite=suite,
+                    order=order,
+                    )
+                for order, suite in enumerate(suites, 1)
+                ]
+            )
+
+        included = [
+            (suite, cv)
+            for suite in suites
+            for cv in suitecases.get((suite.id, version.id), [])
+            ]
+        rcvs = self.insert(
+            [
+                self.mt(
+                    RunCaseVersion,
+                    user=user,
+                    deleted=deleted,
+                    run=run,
+                    caseversion=cv,
+                    order=order,
+                    )
+                for order, (suite, cv) in enumerate(included, 1)
+                ]
+            )
+        self.link_environments(RunCaseVersion, rcvs)
+        self.insert(
+            [
+                RunCaseVersion.suites.through(
+                    runcaseversion_id=rcv.id, suite_id=suite.id)
+                for rcv, (suite, cv) in zip(rcvs, included)
+                ]
+            )
+        if rcvs:
+            self.results(rcvs, deleted)
+
+
+    def results(self, rcvs, deleted):
+        """Generate results for ``rcvs``, latest last for each tester."""
+        combinations = [
+            (rcv, env) for rcv in rcvs for env in self.environments]
+        self.random.shuffle(combinations)
+        statuses = list(itertools.chain.from_iterable(
+            [status] * weight for status, weight in RESULT_STATUSES))
+        results = []
+        latest = {}
+        for i in range(self.params["results"]):
+            rcv, env = combinations[i % len(combinations)]
+            tester = self.random.choice(self.testers)
+            results.append(
+                self.mt(
+                    Result,
+                    user=tester,
+                    deleted=deleted,
+                    tester=tester,
+                    runcaseversion=rcv,
+                    environment=env,
+                    status=self.random.choice(statuses),
+                    )
+                )
+            latest[(rcv.id, env.id, tester.id)] = results[-1]
+        self.insert(results)
+        self.insert(
+            [
+                LatestResult(
+                    runcaseversion=result.runcaseversion,
+                    environment=result.environment,
+                    tester=result.tester,
+                    result=result,
+                    )
+                for result in latest.values()
+                ]
+            )
+        self.insert(
+            [
+                self.mt(
+                    StepResult,
+                    user=result.tester,
+                    deleted=deleted,
+                    result=result,
+                    step=self.steps[result.runcaseversion.caseversion_id],
+                    status=StepResult.STATUS.failed,
+                    bug_url="http://example.com/bug/{0}".format(result.id),
+                    )
+                for result in results
+                if result.status == Result.STATUS.failed and
+                result.runcaseversion.caseversion_id in self.steps
+                ]
+            )
@@ -0,0 +1,152 @@
+"""
+Cold storage of superseded results.
+
+Every restart or re-run of a case creates a new Result, and the previous one
+is only of interest to audits. ``archive`` moves results that are no longer
+the latest of their tester, environment and runcaseversion, and haven't been
+modified since a cutoff, out of the Result and StepResult tables into
+``ArchivedResult``: one row per result, with its step results packed into
+JSON. Archived results keep their ids, and ``restore`` moves them back.
+
+Both work ``chunk_size`` results at a time, each chunk in a transaction of
+a few queries, so they can be run on a live database of any size.
+
+"""
+import json
+
+from django.db import router, transaction
+from django.db.models.sql import DeleteQuery
+
+from ..mtmodel import (
+    BULK_CHUNK_SIZE, bulk_insert, bump_generation, bump_pending_generations,
+    utcnow)
+from .models import Result, StepResult, ArchivedResult
+
+
+
+# fields of a Result, all of which an ArchivedResult also has
+RESULT_FIELDS = [f.attname for f in Result._meta.fields]
+
+# fields of a StepResult kept in the archive (its result is implied)
+STEPRESULT_FIELDS = dict(
+    (f.attname, f) for f in StepResult._meta.fields if f.name != "result")
+
+
+
+def archive(before, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Archive superseded results last modified before ``before``.
+
+    Soft-deleted results are archived too (and stay deleted). Returns the
+    number of results archived.
+
+    """
+    results = Result.everything.filter(
+        latest__isnull=True, modified_on__lt=before)
+    return _move(results, archive_chunk, chunk_size)
+
+
+
+def restore(archived, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Restore ``archived``, a queryset of ArchivedResults, to the Result table.
+
+    Returns the number of results restored.
+
+    """
+    return _move(archived, restore_chunk, chunk_size)
+
+
+
+def _move(queryset, move_chunk, chunk_size):
+    """Call ``move_chunk`` on ids in ``queryset``, a chunk at a time."""
+    queryset = queryset.order_by("id")
+    count = 0
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last_id).values_list(
+                "id", flat=True)[:chunk_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        count += move_chunk(ids)
+        bump_pending_generations()
+    return count
+
+
+
+@transaction.commit_on_success
+def archive_chunk(ids):
+    """Move Results with given ``ids``, and their steps, to the archive."""
+    steps = {}
+    for stepresult in StepResult.everything.filter(
+            result__in=ids).order_by("id"):
+        steps.setdefault(stepresult.result_id, []).append(
+            values(stepresult, STEPRESULT_FIELDS))
+
+    now = utcnow()
+    archived = []
+    for result in Result.everything.filter(id__in=ids):
+        stepresults = steps.get(result.id, [])
+        archived.append(
+            ArchivedResult(
+                stepresults=json.dumps(stepresults, default=unicode),
+                bugs="\n".join(
+                    sorted(set(s["bug_url"] for s in stepresults) - set([""]))
+                    ),
+                archived_on=now,
+                **values(result, RESULT_FIELDS)
+                )
+            )
+    bulk_insert(archived)
+
+    delete(StepResult, ids, field="result")
+    delete(Result, ids)
+    return len(archived)
+
+
+
+@transaction.commit_on_success
+def restore_chunk(ids):
+    """Move ArchivedResults with given ``ids`` back to Result and steps."""
+    results = []
+    stepresults = []
+    for archived in ArchivedResult.everything.filter(id__in=ids):
+        results.append(Result(**values(archived, RESULT_FIELDS)))
+        for data in json.loads(archived.stepresults):
+            stepresults.append(
+                StepResult(
+                    result_id=archived.id,
+                    **dict(
+                        (str(name), STEPRESULT_FIELDS[name].to_python(value))
+                        for name, value in data.items()
+                        )
+                    )
+                )
+    bulk_insert(results, keep_pks=True)
+    bulk_insert(stepresults, keep_pks=True)
+
+    delete(ArchivedResult, ids)
+    return len(results)
+
+
+
+def values(obj, names):
+    """Return dictionary of the values of attributes ``names`` of ``obj``."""
+    return dict((name, getattr(obj, name)) for name in names)
+
+
+
+def delete(model, ids, field=None):
+    """
+    Delete instances of ``model`` with ``ids`` (or ``field`` in ``ids``).
+
+    Deletes directly, without the cascade collector's queries; nothing else
+    refers to superseded results once their step results are gone, nor to
+    archived results.
+
+    """
+    field = model._meta.get_field(field) if field else None
+    DeleteQuery(model).delete_batch(ids, router.db_for_write(model), field)
+    bump_generation(model)
@@ -0,0 +1,187 @@
+"""
+Comparison of the results of two runs, or of two product versions.
+
+Each side of a comparison is a set of cells, one per case and environment
+the side's runs cover, and each cell has the status of its latest completed
+result (the most recent of its testers' latest results), if any.
+
+``compare`` reads each side with a single grouped query, as a stream of
+cells ordered by case and environment, and merges the two streams in a
+single pass, classifying every cell by its transition from the "before"
+side to the "after" side. It takes two queries however many cells there
+are, and no more memory than the list of cells it returns.
+
+"""
+from django.db import connections
+
+from model_utils import Choices
+
+from ..core.models import ProductVersion
+from .models import RunCaseVersion, LatestResult, Result
+
+
+
+# pseudo-statuses of a cell with no completed result, and of a cell that
+# isn't in a side at all
+NOTRUN = "notrun"
+ABSENT = "absent"
+
+TRANSITION = Choices(
+    ("newfail", "newly failing"),
+    ("fixed", "fixed"),
+    ("stillfail", "still failing"),
+    ("notrun", "not run"),
+    ("invalidated", "invalidated"),
+    ("newpass", "newly passing"),
+    ("stillpass", "still passing"),
+    ("removed", "removed"),
+    )
+
+
+
+def compare(before, after):
+    """
+    Compare the latest results of ``before`` and ``after``.
+
+    Each of ``before`` and ``after`` is a Run or a ProductVersion (meaning
+    all of its runs). Returns a list of ``(case_id, environment_id,
+    before_status, after_status, transition)`` tuples, one per cell of
+    either side, in order of case and environment id. A status is a
+    completed result status, ``NOTRUN`` or ``ABSENT``; ``transition`` is one
+    of ``TRANSITION``.
+
+    """
+    return [
+        key + (b, a, TRANSITIONS[b, a])
+        for key, b, a in merge(cells(before), cells(after))
+        ]
+
+
+
+def summarize(compared):
+    """Return dictionary mapping each transition to its count of cells."""
+    counts = dict((t, 0) for t, label in TRANSITION)
+    for cell in compared:
+        counts[cell[4]] += 1
+    return counts
+
+
+
+def transition(before, after):
+    """Return the transition of a cell from ``before`` to ``after`` status."""
+    if after == Result.STATUS.failed:
+        if before == Result.STATUS.failed:
+            return TRANSITION.stillfail
+        return TRANSITION.newfail
+    if after == Result.STATUS.passed:
+        if before == Result.STATUS.failed:
+            return TRANSITION.fixed
+        if before == Result.STATUS.passed:
+            return TRANSITION.stillpass
+        return TRANSITION.newpass
+    if after == Result.STATUS.invalidated:
+        return TRANSITION.invalidated
+    if after == NOTRUN:
+        return TRANSITION.notrun
+    return TRANSITION.removed
+
+
+
+# every status of a side, and the transition of each pair, looked up once
+STATUSES = Result.COMPLETED_STATES + [NOTRUN, ABSENT]
+TRANSITIONS = dict(
+    ((b, a), transition(b, a)) for b in STATUSES for a in STATUSES)
+
+
+
+def cells(side):
+    """
+    Yield ``((case_id, environment_id), status)`` of cells of ``side``.
+
+    Cells are yielded once each, in order of case and environment id, from
+    a single query grouping the side's run case version environments by
+    case and environment, with the most recent of their completed latest
+    results (so where several runs of a product version have the same cell,
+    the most recent result wins).
+
+    """
+    cells = RunCaseVersion.environments.through._default_manager.filter(
+        **prefixed("runcaseversion__", rcv_filter(side))).values_list(
+        "runcaseversion__caseversion__case",
+        "environment",
+        "runcaseversion",
+        ).order_by()
+    cells_sql, cells_params = cells.query.get_compiler(cells.db).as_sql()
+
+    qn = connections[cells.db].ops.quote_name
+    opts = Result._meta
+    latest_opts = LatestResult._meta
+    sql = (
+        "SELECT g.case_id, g.environment_id, s.{0} FROM ("
+        "SELECT c.case_id AS case_id, c.environment_id AS environment_id, "
+        "MAX(r.{1}) AS result_id FROM ({2}) c "
+        "LEFT OUTER JOIN {3} l ON l.{4} = c.runcaseversion_id "
+        "AND l.{5} = c.environment_id "
+        "LEFT OUTER JOIN {6} r ON r.{1} = l.{7} "
+        "AND r.{8} IS NULL AND r.{0} IN ({9}) "
+        "GROUP BY c.case_id, c.environment_id"
+        ") g LEFT OUTER JOIN {6} s ON s.{1} = g.result_id "
+        "ORDER BY g.case_id, g.environment_id".format(
+            qn(opts.get_field("status").column),
+            qn(opts.pk.column),
+            cells_sql,
+            qn(latest_opts.db_table),
+            qn(latest_opts.get_field("runcaseversion").column),
+            qn(latest_opts.get_field("environment").column),
+            qn(opts.db_table),
+            qn(latest_opts.get_field("result").column),
+            qn(opts.get_field("deleted_on").column),
+            ", ".join(["%s"] * len(Result.COMPLETED_STATES)),
+            )
+        )
+
+    cursor = connections[cells.db].cursor()
+    cursor.execute(sql, list(cells_params) + Result.COMPLETED_STATES)
+    for case_id, environment_id, status in cursor:
+        yield (case_id, environment_id), status or NOTRUN
+
+
+
+def merge(before, after):
+    """
+    Merge two ordered streams of cells into ``(key, before, after)``.
+
+    A cell in only one of the streams is ``ABSENT`` from the other.
+
+    """
+    b = next(before, None)
+    a = next(after, None)
+    while b is not None or a is not None:
+        if a is None or (b is not None and b[0] < a[0]):
+            yield b[0], b[1], ABSENT
+            b = next(before, None)
+        elif b is None or a[0] < b[0]:
+            yield a[0], ABSENT, a[1]
+            a = next(after, None)
+        else:
+            yield b[0], b[1], a[1]
+            b = next(before, None)
+            a = next(after, None)
+
+
+
+def rcv_filter(side):
+    """Return filter arguments for the run case versions of ``side``."""
+    if isinstance(side, ProductVersion):
+        return {
+            "run__productversion": side,
+            "run__deleted_on__isnull": True,
+            "deleted_on__isnull": True,
+            }
+    return {"run": side, "deleted_on__isnull": True}
+
+
+
+def prefixed(prefix, filters):
+    """Return ``filters`` with ``prefix`` added to each key."""
+    return dict((prefix + k, v) for k, v in filters.items())
@@ -0,0 +1,188 @@
+"""
+Flaky case analytics over the result history of a product.
+
+A case is flaky if its results flip between passed and failed from run to
+run in the same environment. ``rank`` reads the history of a product (the
+latest passed and failed results of its cases, in order of case, environment
+and run) in a single streaming query into parallel columns, one entry per
+result, and computes per-case statistics with whole-column operations:
+comparing each column with itself shifted by one, and summing columns by
+case with ``bincount``. For each case with a flip it reports:
+
+- ``failure_rate``: the fraction of its results that failed;
+- ``flip_rate``: the fraction of its consecutive pairs of results (in the
+  same environment) whose statuses differ;
+- ``confidence``: the lower bound of the Wilson score interval of its flip
+  rate, so that a case flipping often over many runs ranks above one that
+  flipped once in two.
+
+Rankings are cached until results or runs are next written.
+
+"""
+from array import array
+from itertools import izip
+import math
+
+from django.core.cache import cache
+
+from ..mtmodel import generation
+from .models import Run, RunCaseVersion, LatestResult, Result
+
+
+
+# seconds a product's ranking is cached for, at most
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# normal quantile of the confidence interval (95%)
+Z = 1.96
+
+
+
+def rank(product):
+    """
+    Return list of dicts of statistics of flaky cases of ``product``.
+
+    Each dict has the ``case`` id, its number of ``results``, ``failures``
+    and ``flips``, and its ``failure_rate``, ``flip_rate`` and
+    ``confidence``. Cases are in order of decreasing confidence (then flip
+    rate); cases that never flipped are left out.
+
+    """
+    key = "flaky:{0}:{1}".format(
+        product.id,
+        ":".join(
+            str(generation(m)) for m in [Result, RunCaseVersion, Run]),
+        )
+    ranking = cache.get(key)
+    if ranking is None:
+        ranking = statistics(*history(product))
+        cache.set(key, ranking, CACHE_TIMEOUT)
+    return ranking
+
+
+
+def history(product):
+    """
+    Return the result history of ``product`` as parallel columns.
+
+    Returns a tuple ``(cases, case_index, series, failed)``: the ids of the
+    distinct cases, and columns giving for each result (in order of case,
+    environment and run) the index of its case in ``cases``, the index of
+    its (case, environment) series, and 1 if it failed, else 0. Of several
+    testers' latest results in the same run, the earliest comes first.
+
+    """
+    rows = LatestResult.objects.filter(
+        runcaseversion__run__productversion__product=product,
+        runcaseversion__run__deleted_on__isnull=True,
+        runcaseversion__deleted_on__isnull=True,
+        result__deleted_on__isnull=True,
+        result__status__in=[Result.STATUS.passed, Result.STATUS.failed],
+        ).values_list(
+        "runcaseversion__caseversion__case",
+        "environment",
+        "result__status",
+        ).order_by(
+        "runcaseversion__caseversion__case",
+        "environment",
+        "runcaseversion__run__start",
+        "runcaseversion__run",
+        "result",
+        )
+
+    cases = []
+    case_index = array("l")
+    series = array("l")
+    failed = array("b")
+    last_case = last_series = None
+    series_id = -1
+    for case_id, environment_id, status in rows.iterator():
+        if case_id != last_case:
+            cases.append(case_id)
+            last_case = case_id
+        if (case_id, environment_id) != last_series:
+            series_id += 1
+            last_series = (case_id, environment_id)
+        case_index.append(len(cases) - 1)
+        series.append(series_id)
+        failed.append(status == Result.STATUS.failed)
+    return cases, case_index, series, failed
+
+
+
+def statistics(cases, case_index, series, failed):
+    """
+    Return ranked statistics of flaky cases, given history columns.
+
+    See ``history`` for the columns, and ``rank`` for the statistics.
+
+    """
+    # consecutive results in the same series, and which of them flipped
+    paired = array("b", map(
+        lambda a, b: a == b, series[1:], series[:-1]))
+    flipped = array("b", map(
+        lambda p, a, b: p and a != b, paired, failed[1:], failed[:-1]))
+
+    n = len(cases)
+    results = bincount(case_index, None, n)
+    failures = bincount(case_index, failed, n)
+    pairs = bincount(case_index[1:], paired, n)
+    flips = bincount(case_index[1:], flipped, n)
+
+    failure_rate = map(ratio, failures, results)
+    flip_rate = map(ratio, flips, pairs)
+    confidence = map(wilson_lower_bound, flips, pairs)
+
+    ranking = [
+        {
+            "case": cases[i],
+            "results": results[i],
+            "failures": failures[i],
+            "flips": flips[i],
+            "failure_rate": failure_rate[i],
+            "flip_rate": flip_rate[i],
+            "confidence": confidence[i],
+            }
+        for i in xrange(n)
+        if flips[i]
+        ]
+    ranking.sort(
+        key=lambda c: (-c["confidence"], -c["flip_rate"], c["case"]))
+    return ranking
+
+
+
+def bincount(index, weights, length):
+    """
+    Return list of sums of ``weights`` by ``index``, ``length`` long.
+
+    ``weights`` of None counts each index once (like ``numpy.bincount``).
+
+    """
+    totals = [0] * length
+    if weights is None:
+        for i in index:
+            totals[i] += 1
+    else:
+        for i, weight in izip(index, weights):
+            totals[i] += weight
+    return totals
+
+
+
+def ratio(part, whole):
+    """Return ``part`` over ``whole``, or 0 if ``whole`` is 0."""
+    return float(part) / whole if whole else 0.0
+
+
+
+def wilson_lower_bound(successes, trials, z=Z):
+    """Return lower bound of Wilson score interval of a proportion."""
+    if not trials:
+        return 0.0
+    p = float(successes) / trials
+    z2 = z * z
+    return (
+        p + z2 / (2 * trials)
+        - z * math.sqrt((p * (1 - p) + z2 / (4 * trials)) / trials)
+        ) / (1 + z2 / trials)
@@ -5,11 +5,12 @@ Models for test execution (runs, results).
 import datetime
 
 from django.core.exceptions import ValidationError
-from django.db import connection, models
+from django.db import connections, models, router, transaction
 
 from model_utils import Choices
 
-from ..mtmodel import MTModel, TeamModel, DraftStatusModel
+from ..mtmodel import (
+    MTModel, TeamModel, DraftStatusModel, bulk_insert, chunks, utcnow)
 from ..core.auth import User
 from ..core.models import ProductVersion
 from ..environments.models import Environment, HasEnvironmentsModel
@@ -153,10 +154,10 @@ class Run(MTModel, TeamModel, DraftStatusModel, HasEnvironmentsModel):
         """Return fraction of case/env combos that have a completed result."""
         total = RunCaseVersion.environments.through._default_manager.filter(
             runcaseversion__run=self).count()
-        completed = Result.objects.filter(
-            status__in=Result.COMPLETED_STATES,
-            runcaseversion__run=self).values(
-            "runcaseversion", "environment").distinct().count()
+        completed = completed_count(
+            Result.objects.filter(runcaseversion__run=self),
+            ArchivedResult.objects.filter(runcaseversion__run=self),
+            )
 
         try:
             return float(completed) / total
@@ -196,11 +197,15 @@ class RunCaseVersion(HasEnvironmentsModel, MTModel):
 
     def bug_urls(self):
         """Returns set of bug URLs associated with this run/caseversion."""
-        return set(
+        urls = set(
             StepResult.objects.filter(
                 result__runcaseversion=self).exclude(
                 bug_url="").values_list("bug_url", flat=True).distinct()
             )
+        for bugs in self.archivedresults.exclude(bugs="").values_list(
+                "bugs", flat=True):
+            urls.update(bugs.split())
+        return urls
 
 
     class Meta:
@@ -237,9 +242,8 @@ class RunCaseVersion(HasEnvironmentsModel, MTModel):
     def completion(self):
         """Return fraction of environments that have a completed result."""
         total = self.environments.count()
-        completed = self.results.filter(
-            status__in=Result.COMPLETED_STATES).values(
-            "environment").distinct().count()
+        completed = completed_count(
+            self.results.all(), self.archivedresults.all())
 
         try:
             return float(completed) / total
@@ -323,6 +327,83 @@ class RunCaseVersion(HasEnvironmentsModel, MTModel):
         self.save(force_update=True, user=user)
 
 
+    @classmethod
+    @transaction.commit_on_success
+    def bulk_result(cls, actions, environment=None, user=None):
+        """
+        Record the results of many ``actions`` at once, in one transaction.
+
+        ``actions`` is a list of (runcaseversion, method name, kwargs) tuples,
+        where the method is one of ``start``, ``result_pass``,
+        ``result_invalid`` or ``result_fail`` and ``kwargs`` are its arguments
+        other than ``environment`` and ``user``. The outcome is the same as
+        calling each method in turn, but takes a few queries per
+        ``BULK_CHUNK_SIZE`` cases, rather than several per action.
+
+        Returns list of the new Results, in the order of ``actions``.
+
+        """
+        statuses = {
+            "start": Result.STATUS.started,
+            "result_pass": Result.STATUS.passed,
+            "result_invalid": Result.STATUS.invalidated,
+            "result_fail": Result.STATUS.failed,
+            }
+        results = []
+        for rcv, action, kwargs in actions:
+            result = Result(
+                runcaseversion=rcv,
+                tester=user,
+                environment=environment,
+                status=statuses[action],
+                comment=kwargs.get("comment", ""),
+                created_by=user,
+                modified_by=user,
+                )
+            results.append(result)
+        if not results:
+            return results
+
+        bulk_insert(results)
+        LatestResult.objects.point(results)
+
+        # failures record the failed step, and touch the runcaseversion
+        failed = set()
+        numbered = []
+        for result, (rcv, action, kwargs) in zip(results, actions):
+            if action != "result_fail":
+                continue
+            failed.add(rcv.id)
+            try:
+                number = int(kwargs.get("stepnumber"))
+            except (TypeError, ValueError):
+                continue
+            numbered.append(
+                (result, rcv.caseversion_id, number, kwargs.get("bug", "")))
+        steps = {}
+        numbers = list(set(n[2] for n in numbered))
+        for cv_ids in chunks(list(set(n[1] for n in numbered))):
+            for step in CaseStep.objects.filter(
+                    caseversion__in=cv_ids, number__in=numbers):
+                steps[(step.caseversion_id, step.number)] = step
+        bulk_insert(
+            StepResult(
+                result=result,
+                step=steps[(cv_id, number)],
+                status=StepResult.STATUS.failed,
+                bug_url=bug,
+                created_by=user,
+                modified_by=user,
+                )
+            for (result, cv_id, number, bug) in numbered
+            if (cv_id, number) in steps
+            )
+        for ids in chunks(list(failed)):
+            cls.objects.filter(pk__in=ids).update(user=user)
+
+        return results
+
+
 
 class RunSuite(MTModel):
     """
@@ -361,7 +442,6 @@ class Result(MTModel):
     status = models.CharField(
         max_length=50, db_index=True, choices=STATUS, default=STATUS.assigned)
     comment = models.TextField(blank=True)
-    is_latest = models.BooleanField(default=True)
 
     review = models.CharField(
         max_length=50, db_index=True, choices=REVIEW, default=REVIEW.pending)
@@ -388,25 +468,117 @@ class Result(MTModel):
 
 
     def save(self, *args, **kwargs):
-        if self.pk is None:
+        """Save instance; a new result is the latest of its tester/env/rcv."""
+        adding = self.pk is None
+        ret = super(Result, self).save(*args, **kwargs)
+        if adding:
             self.set_latest()
-        super(Result, self).save(*args, **kwargs)
+        return ret
 
 
     def set_latest(self):
+        """Make this the latest result of its tester, env and rcv."""
+        LatestResult.objects.point([self])
+
+
+
+class LatestResultManager(models.Manager):
+    """Maintains the pointers to the latest results."""
+    def point(self, results):
         """
-        Set this result to latest, and unset all others with this env/user/rcv
+        Make each of saved ``results`` the latest of its tester/env/rcv.
+
+        Where ``results`` has several of the same tester, environment and
+        runcaseversion, the last of them is the latest. On MySQL the pointers
+        are upserted with multi-row ``INSERT ... ON DUPLICATE KEY UPDATE``;
+        elsewhere the existing pointers are deleted and new ones inserted.
 
         """
+        latest = {}
+        for result in results:
+            key = (
+                result.runcaseversion_id,
+                result.environment_id,
+                result.tester_id,
+                )
+            latest[key] = result.id
+        if not latest:
+            return
+
+        connection = connections[router.db_for_write(self.model)]
+        if connection.vendor == "mysql":
+            self._upsert(latest.items(), connection)
+            return
+
+        rcv_ids = {}
+        for rcv_id, env_id, tester_id in latest:
+            rcv_ids.setdefault((env_id, tester_id), []).append(rcv_id)
+        for (env_id, tester_id), ids in rcv_ids.items():
+            for chunk in chunks(ids):
+                self.filter(
+                    environment=env_id,
+                    tester=tester_id,
+                    runcaseversion__in=chunk,
+                    ).delete()
+        bulk_insert(
+            self.model(
+                runcaseversion_id=rcv_id,
+                environment_id=env_id,
+                tester_id=tester_id,
+                result_id=result_id,
+                )
+            for (rcv_id, env_id, tester_id), result_id in latest.items()
+            )
+
+
+    def _upsert(self, pointers, connection):
+        """Upsert ``pointers``, a list of ((rcv, env, tester), result) ids."""
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        columns = [
+            qn(opts.get_field(name).column)
+            for name in ["runcaseversion", "environment", "tester", "result"]]
+        cursor = connection.cursor()
+        for chunk in chunks(pointers):
+            cursor.execute(
+                "INSERT INTO {0} ({1}) VALUES {2} "
+                "ON DUPLICATE KEY UPDATE {3} = VALUES({3})".format(
+                    qn(opts.db_table),
+                    ", ".join(columns),
+                    ", ".join(["(%s, %s, %s, %s)"] * len(chunk)),
+                    columns[-1],
+                    ),
+                [i for key, result_id in chunk for i in key + (result_id,)],
+                )
+        transaction.commit_unless_managed(using=connection.alias)
+
+
+
+class LatestResult(models.Model):
+    """
+    Points to the latest Result of a tester for a RunCaseVersion in an Env.
+
+    There is at most one per tester, environment and runcaseversion, so the
+    latest result is found by its unique key rather than by ordering results.
+
+    """
+    runcaseversion = models.ForeignKey(
+        RunCaseVersion, related_name="latestresults")
+    environment = models.ForeignKey(
+        Environment, related_name="latestresults")
+    tester = models.ForeignKey(User, related_name="latestresults")
+    result = models.OneToOneField(Result, related_name="latest")
+
 
-        Result.objects.filter(
-            tester=self.tester,
-            runcaseversion=self.runcaseversion,
-            environment=self.environment,
-            is_latest=True,
-            ).exclude(pk=self.pk).update(is_latest=False)
+    objects = LatestResultManager()
 
-        self.is_latest=True
+
+    def __unicode__(self):
+        return u"Latest: {0}".format(self.result_id)
+
+
+    class Meta:
+        unique_together = [("runcaseversion", "environment", "tester")]
 
 
 
@@ -427,6 +599,48 @@ class StepResult(MTModel):
 
 
 
+class ArchivedResult(MTModel):
+    """
+    A superseded Result, moved out of the results table into cold storage.
+
+    Has the id and all the fields of the Result it was, so lists, filters and
+    templates of results work unchanged on archived results. Its step results
+    are kept as JSON in ``stepresults`` (and their bug URLs, one per line, in
+    ``bugs``), so it can be restored as it was. See ``archive.py``.
+
+    """
+    id = models.IntegerField(primary_key=True)
+    tester = models.ForeignKey(User, related_name="archivedresults")
+    runcaseversion = models.ForeignKey(
+        RunCaseVersion, related_name="archivedresults")
+    environment = models.ForeignKey(
+        Environment, related_name="archivedresults")
+    status = models.CharField(
+        max_length=50, choices=Result.STATUS, default=Result.STATUS.assigned)
+    comment = models.TextField(blank=True)
+    review = models.CharField(
+        max_length=50, choices=Result.REVIEW, default=Result.REVIEW.pending)
+    reviewed_by = models.ForeignKey(
+        User, related_name="+", blank=True, null=True,
+        on_delete=models.SET_NULL)
+
+    stepresults = models.TextField(default="[]")
+    bugs = models.TextField(blank=True)
+    archived_on = models.DateTimeField(default=utcnow)
+
+
+    def __unicode__(self):
+        """Return unicode representation."""
+        return "%s, run by %s in %s: %s (archived)" % (
+            self.runcaseversion, self.tester, self.environment, self.status)
+
+
+    def bug_urls(self):
+        """Returns set of bug URLs of this result's step results."""
+        return set(self.bugs.split())
+
+
+
 def result_summary(results):
     """
     Given a queryset of results, return a dict summarizing their states.
@@ -434,17 +648,33 @@ def result_summary(results):
     """
     states = Result.COMPLETED_STATES
 
-    result_ids = results.filter(is_latest=True).values_list("id", flat=True)
+    counts = dict(
+        results.filter(latest__isnull=False, status__in=states).values_list(
+            "status").annotate(models.Count("id")).order_by()
+        )
+
+    return dict((s, counts.get(s, 0)) for s in states)
 
-    if not result_ids:
-        return dict((s, 0) for s in states)
 
-    cols = ["COUNT(CASE WHEN status=%s THEN 1 ELSE NULL END)"] * len(states)
-    sql = "SELECT {0} FROM {1} WHERE id IN ({2})".format(
-        ",".join(cols), Result._meta.db_table, ",".join(map(str, result_ids))
-        )
 
-    cursor = connection.cursor()
-    cursor.execute(sql, states)
+def completed_count(results, archived):
+    """
+    Count runcaseversion/environment pairs with a completed result.
+
+    Counts the distinct pairs with a completed result in either the
+    ``results`` or the ``archived`` results queryset, in a single query.
 
-    return dict(zip(states, cursor.fetchone()))
+    """
+    queries = [
+        qs.filter(status__in=Result.COMPLETED_STATES).order_by().values_list(
+            "runcaseversion", "environment").query.get_compiler(
+            qs.db).as_sql()
+        for qs in [results, archived]
+        ]
+    cursor = connections[results.db].cursor()
+    cursor.execute(
+        "SELECT COUNT(*) FROM ({0} UNION {1}) completed".format(
+            queries[0][0], queries[1][0]),
+        list(queries[0][1]) + list(queries[1][1]),
+        )
+    return cursor.fetchone()[0]
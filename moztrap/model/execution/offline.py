@@ -0,0 +1,245 @@
+"""
+Offline running of tests: run packages, and upload of the results recorded.
+
+``package_chunks`` yields the JSON text of a self-contained package of the
+cases of a run in one environment, with their steps and the tester's current
+results, generated a chunk of cases at a time. ``upload_results`` records a
+batch of results from such a package in bulk, skipping (and reporting) any
+whose case has a newer result on the server than the one the package had.
+
+An uploaded batch looks like this::
+
+    {
+        "results": [
+            {"id": 12, "result": null, "status": "passed"},
+            {"id": 14, "result": 503, "status": "invalidated",
+             "comment": "why u no make sense??"},
+            {"id": 15, "result": null, "status": "failed",
+             "comment": "why u no pass?", "stepnumber": 2,
+             "bug": "http://www.example.com/bug/1"}
+        ]
+    }
+
+where "id" is the id of a case in the package, and "result" is the id of its
+result in the package (or null if it had none).
+
+"""
+import json
+
+from ..mtmodel import BULK_CHUNK_SIZE, chunks, utcnow
+from ..library.models import CaseStep
+from .models import RunCaseVersion, Result
+
+
+
+# maps result status to the RunCaseVersion method recording it
+STATUS_ACTIONS = {
+    Result.STATUS.started: "start",
+    Result.STATUS.passed: "result_pass",
+    Result.STATUS.failed: "result_fail",
+    Result.STATUS.invalidated: "result_invalid",
+    }
+
+
+
+class UploadError(Exception):
+    """An uploaded batch of results is invalid; ``errors`` says why."""
+    def __init__(self, errors):
+        self.errors = errors
+        super(UploadError, self).__init__("; ".join(errors))
+
+
+
+def package_chunks(run, environment, user, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Yield JSON text of the package of ``run`` in ``environment`` for ``user``.
+
+    Run case versions are read ``chunk_size`` at a time in order of id, and
+    the steps and latest results of a chunk are looked up with one query
+    each, so memory use and queries per chunk don't depend on the size of the
+    run.
+
+    """
+    header = {
+        "run": {
+            "id": run.id,
+            "name": run.name,
+            "description": run.description,
+            "product": run.productversion.product.name,
+            "version": run.productversion.version,
+            },
+        "environment": {
+            "id": environment.id,
+            "elements": [e.name for e in environment.ordered_elements()],
+            },
+        "tester": user.username,
+        "exported_on": utcnow().isoformat(),
+        }
+    yield json.dumps(header)[:-1] + ',\n"cases": ['
+
+    rcvs = RunCaseVersion.objects.filter(
+        run=run, environments=environment).order_by("id").values(
+        "id", "order", "caseversion", "caseversion__case",
+        "caseversion__name", "caseversion__description")
+    last_id = 0
+    first = True
+    while True:
+        chunk = list(rcvs.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1]["id"]
+        for data in package_chunk(chunk, environment, user):
+            yield ("\n" if first else ",\n") + json.dumps(data)
+            first = False
+        if len(chunk) < chunk_size:
+            break
+    yield "\n]}\n"
+
+
+
+def package_chunk(rcvs, environment, user):
+    """Return list of case dictionaries for a list of runcaseversion values."""
+    steps = {}
+    for cv_id, number, instruction, expected in CaseStep.objects.filter(
+            caseversion__in=set(rcv["caseversion"] for rcv in rcvs)).order_by(
+            "caseversion", "number").values_list(
+            "caseversion", "number", "instruction", "expected"):
+        steps.setdefault(cv_id, []).append({
+            "number": number,
+            "instruction": instruction,
+            "expected": expected,
+            })
+
+    results = latest_results(
+        [rcv["id"] for rcv in rcvs], environment, user)
+
+    cases = []
+    for rcv in rcvs:
+        cases.append({
+            "id": rcv["id"],
+            "order": rcv["order"],
+            "case": rcv["caseversion__case"],
+            "name": rcv["caseversion__name"],
+            "description": rcv["caseversion__description"],
+            "steps": steps.get(rcv["caseversion"], []),
+            "result": results.get(rcv["id"]),
+            })
+    return cases
+
+
+
+def latest_results(rcv_ids, environment, user):
+    """
+    Return map of runcaseversion id to ``user``'s latest result data.
+
+    The result data is a dictionary with the "id", "status", "comment" and
+    "modified_on" (ISO 8601) of the latest result in ``environment``.
+
+    """
+    results = {}
+    for ids in chunks(rcv_ids):
+        for r in Result.objects.filter(
+                latest__runcaseversion__in=ids,
+                latest__environment=environment,
+                latest__tester=user,
+                ).values(
+                "id", "runcaseversion", "status", "comment", "modified_on"):
+            rcv_id = r.pop("runcaseversion")
+            r["modified_on"] = r["modified_on"].isoformat()
+            results[rcv_id] = r
+    return results
+
+
+
+def upload_results(run, environment, user, data):
+    """
+    Record the results in uploaded ``data`` for ``user`` in ``environment``.
+
+    Results whose case has a latest result other than the one it was based on
+    (as recorded in the package) are conflicts, and are not recorded; the
+    others are recorded in bulk, in one transaction. Uploading a conflicting
+    result again, based on the server's result, overwrites that.
+
+    Returns a dictionary with the number of results "recorded", and a list
+    of "conflicts", each with the "id" of the case and its current "result"
+    on the server. Raises ``UploadError`` (and records nothing) if ``data`` is
+    not a valid batch for this run and environment.
+
+    """
+    uploaded = validate_upload(data)
+    ids = [item["id"] for item in uploaded]
+    rcvs = {}
+    for chunk in chunks(ids):
+        rcvs.update(
+            RunCaseVersion.objects.filter(
+                run=run, environments=environment).in_bulk(chunk))
+    unknown = [rcv_id for rcv_id in ids if rcv_id not in rcvs]
+    if unknown:
+        raise UploadError(
+            ["{0} is not a case of this run and environment.".format(rcv_id)
+             for rcv_id in unknown])
+
+    current = latest_results(ids, environment, user)
+    actions = []
+    conflicts = []
+    for item in uploaded:
+        server = current.get(item["id"])
+        if (server and server["id"]) != item["result"]:
+            conflicts.append({"id": item["id"], "result": server})
+            continue
+        kwargs = dict(
+            (k, item[k])
+            for k in ["comment", "stepnumber", "bug"] if k in item
+            )
+        actions.append(
+            (rcvs[item["id"]], STATUS_ACTIONS[item["status"]], kwargs))
+
+    RunCaseVersion.bulk_result(actions, environment=environment, user=user)
+
+    return {"recorded": len(actions), "conflicts": conflicts}
+
+
+
+def validate_upload(data):
+    """Return list of uploaded results in ``data``, or raise UploadError."""
+    try:
+        uploaded = data["results"]
+    except (KeyError, TypeError):
+        raise UploadError(["Uploaded data has no results."])
+    if not isinstance(uploaded, list):
+        raise UploadError(["Uploaded results must be a list."])
+
+    errors = []
+    seen = set()
+    for i, item in enumerate(uploaded):
+        if not isinstance(item, dict):
+            errors.append("Result {0} is not an object.".format(i))
+            continue
+        if not isinstance(item.get("id"), (int, long)):
+            errors.append("Result {0} has no case id.".format(i))
+        elif item["id"] in seen:
+            errors.append(
+                "Result {0}: case {1} has more than one result.".format(
+                    i, item["id"]))
+        else:
+            seen.add(item["id"])
+        if item.get("status") not in STATUS_ACTIONS:
+            errors.append(
+                'Result {0}: "{1}" is not a valid status.'.format(
+                    i, item.get("status")))
+        item.setdefault("result", None)
+        if item["result"] is not None and not isinstance(
+                item["result"], (int, long)):
+            errors.append(
+                "Result {0}: result must be an id or null.".format(i))
+        for key in ["comment", "bug"]:
+            if key in item and not isinstance(item[key], basestring):
+                errors.append(
+                    "Result {0}: {1} must be a string.".format(i, key))
+        if item.get("stepnumber") is not None and not isinstance(
+                item["stepnumber"], (int, long)):
+            errors.append(
+                "Result {0}: stepnumber must be a number or null.".format(i))
+    if errors:
+        raise UploadError(errors)
+    return uploaded
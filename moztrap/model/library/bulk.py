@@ -26,43 +26,69 @@ class BulkParser(object):
     and/or possibly an "error" key containing an error message encountered in
     parsing.
 
+    For large inputs, ``iter_parse`` accepts any iterable of lines (such as a
+    file object) and yields each case as soon as it is complete.
+
     """
     def parse(self, text):
         """Parse given text and return list of data dictionaries."""
+        data = list(self.iter_parse(text.splitlines()))
+        for item in data:
+            item.pop("line", None)
+        return data
+
+
+    def iter_parse(self, lines):
+        """
+        Parse given iterable of lines, yielding a data dictionary per case.
+
+        Each case is yielded once the line starting the next case (or the end
+        of input) is reached. If an error is encountered, the case being parsed
+        is yielded with an "error" key containing the error message and a
+        "line" key containing the line number, and parsing stops.
+
+        """
+        # holds the case being parsed, and briefly the one it completes
         data = []
         state = self.begin
+        lineno = 0
 
-        lines = text.splitlines()
-        error = False
-
-        for line in lines:
+        for lineno, line in enumerate(lines, 1):
             line = line.strip()
             if line:
                 try:
                     state = state(line.lower(), line, data)
                 except ParsingError as e:
-                    data = data or [{}]
+                    data = data[-1:] or [{}]
                     data[-1]["error"] = str(e)
-                    error = True
-                    break
+                    data[-1]["line"] = lineno
+                    yield self.finish(data[-1])
+                    return
+                while len(data) > 1:
+                    yield self.finish(data.pop(0))
 
-        if not error and not state.expect_end:
+        if not state.expect_end:
             if not data:
                 data.append({})
             data[-1]["error"] = (
                 "Unexpected end of input, looking for %s"
                 % " or ".join(repr(k.title()) for k in state.keys)
                 )
+            data[-1]["line"] = lineno
 
         for item in data:
-            if "description" in item:
-                item["description"] = "\n".join(item["description"])
-            for step in item.get("steps", []):
-                step["instruction"] = "\n".join(step["instruction"])
-                if "expected" in step:
-                    step["expected"] = "\n".join(step["expected"])
-
-        return data
+            yield self.finish(item)
+
+
+    def finish(self, item):
+        """Join the lists of lines in a parsed case; return the case."""
+        if "description" in item:
+            item["description"] = "\n".join(item["description"])
+        for step in item.get("steps", []):
+            step["instruction"] = "\n".join(step["instruction"])
+            if "expected" in step:
+                step["expected"] = "\n".join(step["expected"])
+        return item
 
 
     def begin(self, lc, orig, data):
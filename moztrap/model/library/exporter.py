@@ -0,0 +1,128 @@
+"""
+Export of a product version's suites and cases, the inverse of importing.
+
+``export_items`` yields ``(kind, data)`` pairs in the same form the
+``readers`` produce, and the writers turn them into JSON text in the format
+accepted by ``Importer``, or newline-delimited JSON. Everything is generated
+incrementally, so memory use doesn't grow with the size of the library.
+
+"""
+import json
+
+from ..mtmodel import BULK_CHUNK_SIZE
+from .models import CaseVersion, CaseStep, Suite, SuiteCase
+
+
+
+def export_items(productversion, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Yield the suites of ``productversion``'s product, then its cases.
+
+    Case versions are read ``chunk_size`` at a time in order of id, each chunk
+    continuing from the last id of the previous one; the steps, tags and
+    suites of a chunk are looked up with one query each. Memory use and the
+    number of queries per chunk don't depend on the size of the library.
+
+    """
+    suites = Suite.objects.filter(product=productversion.product).order_by(
+        "name").values("name", "description")
+    for suite in suites.iterator():
+        yield "suite", suite
+
+    caseversions = CaseVersion.objects.filter(
+        productversion=productversion).order_by("id").values(
+        "id", "case", "name", "description", "created_by__email")
+    last_id = 0
+    while True:
+        chunk = list(caseversions.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1]["id"]
+        for data in export_chunk(chunk):
+            yield "case", data
+        if len(chunk) < chunk_size:
+            break
+
+
+
+def export_chunk(caseversions):
+    """Return list of case dictionaries for a list of case version values."""
+    ids = [cv["id"] for cv in caseversions]
+
+    steps = {}
+    for cv_id, instruction, expected in CaseStep.objects.filter(
+            caseversion__in=ids).order_by("caseversion", "number").values_list(
+            "caseversion", "instruction", "expected"):
+        steps.setdefault(cv_id, []).append(
+            {"instruction": instruction, "expected": expected})
+
+    tags = {}
+    for cv_id, name in CaseVersion.tags.through.objects.filter(
+            caseversion__in=ids, tag__deleted_on__isnull=True).order_by(
+            "tag__name").values_list("caseversion", "tag__name"):
+        tags.setdefault(cv_id, []).append(name)
+
+    suites = {}
+    for case_id, name in SuiteCase.objects.filter(
+            case__in=[cv["case"] for cv in caseversions],
+            suite__deleted_on__isnull=True).order_by(
+            "suite__name").values_list("case", "suite__name"):
+        suites.setdefault(case_id, []).append(name)
+
+    cases = []
+    for cv in caseversions:
+        data = {"name": cv["name"], "description": cv["description"]}
+        if cv["created_by__email"]:
+            data["created_by"] = cv["created_by__email"]
+        if cv["id"] in tags:
+            data["tags"] = tags[cv["id"]]
+        if cv["case"] in suites:
+            data["suites"] = suites[cv["case"]]
+        if cv["id"] in steps:
+            data["steps"] = steps[cv["id"]]
+        cases.append(data)
+    return cases
+
+
+
+def json_chunks(items):
+    """
+    Yield JSON text of a "suites"/"cases" object containing ``items``.
+
+    All suites in ``items`` must precede all cases, as they do in the output
+    of ``export_items``.
+
+    """
+    kind = None
+    for item_kind, data in items:
+        if item_kind == kind:
+            yield ",\n"
+        else:
+            yield "{" if kind is None else "\n],"
+            yield '\n"{0}s": [\n'.format(item_kind)
+            kind = item_kind
+        yield json.dumps(data)
+    yield "{}\n" if kind is None else "\n]}\n"
+
+
+
+def ndjson_chunks(items):
+    """Yield newline-delimited JSON text of ``items``, one per line."""
+    for kind, data in items:
+        if kind == "suite":
+            data = {"suite": data}
+        yield json.dumps(data) + "\n"
+
+
+
+# map of format name to writer
+WRITERS = {
+    "json": json_chunks,
+    "ndjson": ndjson_chunks,
+    }
+
+# map of format name to content type
+CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    }
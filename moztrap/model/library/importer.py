@@ -1,10 +1,14 @@
 """Importer for suites and cases from a dictionary."""
 
 from django.db import transaction
+from django.db.models import Q
 
 from ..core.auth import User
+from ..mtmodel import (
+    BULK_CHUNK_SIZE, bulk_insert, bump_generation, bump_pending_generations)
 from ..tags.models import Tag
-from .models import Case, CaseVersion, CaseStep, Suite, SuiteCase
+from .models import (
+    Case, CaseVersion, CaseStep, CaseVersionTerm, Suite, SuiteCase)
 
 
 
@@ -51,8 +55,20 @@ class Importer(object):
     * suites: the number of suites imported
     * warnings: list of warnings about the imported items, if any.
 
+    Pass ``bulk=True`` to import cases in chunks with multi-row inserts (see
+    ``BulkCaseImporter``); this is much faster for large imports.
+
+    Data too large to hold in memory can be imported from a stream of
+    ``("suite", dict)`` and ``("case", dict)`` pairs (see ``readers``) with
+    ``import_items``.
+
     """
 
+    def __init__(self, bulk=False):
+        """Construct an Importer; ``bulk`` selects bulk import mode."""
+        self.bulk = bulk
+
+
     @transaction.commit_on_success
     def import_data(self, productversion, case_data):
         """
@@ -71,17 +87,24 @@ class Importer(object):
         # the result object used to keep track of import status
         result = ImportResult()
 
+        if self.bulk:
+            suite_importer_class = BulkSuiteImporter
+            case_importer_class = BulkCaseImporter
+        else:
+            suite_importer_class = SuiteImporter
+            case_importer_class = CaseImporter
+
         # importer for suites.
         suite_importer = None
         if "suites" in case_data:
-            suite_importer = SuiteImporter(productversion.product)
+            suite_importer = suite_importer_class(productversion.product)
             suite_importer.add_dicts(case_data["suites"])
 
 
         # no reason why the data couldn't include ONLY suites.  So function
         # gracefully if no cases.
         if "cases" in case_data:
-            case_importer = CaseImporter(productversion, suite_importer)
+            case_importer = case_importer_class(productversion, suite_importer)
             result.append(case_importer.import_cases(case_data["cases"]))
 
         # now create the suites and add cases to them
@@ -91,6 +114,66 @@ class Importer(object):
         return result
 
 
+    def import_items(self, productversion, items, start=0, result=None,
+                     checkpoint=None, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Import a stream of ``(kind, dict)`` items; kind is "suite" or "case".
+
+        Return an ``ImportResult``, as for ``import_data``.
+
+        In bulk mode the items are consumed ``chunk_size`` cases at a time,
+        and each chunk is committed in its own transaction; after each commit
+        ``checkpoint``, if given, is called with the number of items consumed
+        so far and the ``ImportResult`` so far. To resume an interrupted
+        import, pass those back in as ``start`` and ``result``; the first
+        ``start`` items are then skipped.
+
+        Without bulk mode, all items are collected and passed to
+        ``import_data``, so they are imported in a single transaction.
+
+        """
+        if not self.bulk:
+            case_data = {}
+            for kind, data in items:
+                case_data.setdefault(kind + "s", []).append(data)
+            return self.import_data(productversion, case_data)
+
+        if result is None:
+            result = ImportResult()
+        suite_importer = BulkSuiteImporter(productversion.product)
+        case_importer = BulkCaseImporter(
+            productversion, suite_importer, chunk_size)
+
+        def commit(chunk, position):
+            with transaction.commit_on_success():
+                result.append(case_importer.import_chunk(chunk))
+                suite_importer.import_suites()
+            bump_pending_generations()
+            result.append(suite_importer.result)
+            suite_importer.result = ImportResult()
+            if checkpoint is not None:
+                checkpoint(position, result)
+
+        chunk = []
+        position = committed = start
+        for i, (kind, data) in enumerate(items):
+            if i < start:
+                continue
+            if kind == "suite":
+                suite_importer.add_dicts([data])
+            else:
+                chunk.append(data)
+            position = i + 1
+            if len(chunk) >= case_importer.chunk_size:
+                commit(chunk, position)
+                chunk = []
+                committed = position
+        if position > committed:
+            commit(chunk, position)
+
+        return result
+
+
 
 class CaseImporter(object):
     """Imports cases and links to or creates associated tags, suites."""
@@ -273,6 +356,188 @@ class CaseImporter(object):
 
 
 
+class BulkCaseImporter(CaseImporter):
+    """
+    Imports cases in chunks, using a few queries per chunk instead of per case.
+
+    Each chunk is validated up front against the existing case names and the
+    users, tags and suites it refers to (all looked up with one query per
+    chunk), then cases, versions, environments, steps, tags and suite links are
+    inserted with ``bulk_insert``. Reports the same per-case warnings as
+    ``CaseImporter``, but a case that fails validation is never created.
+
+    """
+
+    def __init__(self, productversion, suite_importer=None,
+                 chunk_size=BULK_CHUNK_SIZE):
+        """
+        Construct a BulkCaseImporter.
+
+        Takes the same arguments as ``CaseImporter``, plus ``chunk_size``, the
+        number of cases to validate and insert at a time.
+
+        """
+        # if we create our own suite importer, we report its results
+        self.owns_suite_importer = suite_importer is None
+        super(BulkCaseImporter, self).__init__(
+            productversion,
+            suite_importer or BulkSuiteImporter(productversion.product),
+            )
+        self.tag_importer = BulkTagImporter(self.productversion.product)
+        self.chunk_size = chunk_size
+
+        # names of cases imported so far, to catch duplicates in the data
+        self.names = set()
+        # ids of environments new case versions inherit; loaded on first use
+        self.environment_ids = None
+
+
+    def import_cases(self, case_dict_list):
+        """
+        Import the test cases in ``case_dict_list``, a chunk at a time.
+
+        ``case_dict_list`` may be any iterable of case dictionaries, in the
+        format accepted by ``CaseImporter.import_cases``.
+
+        """
+        result = ImportResult()
+
+        chunk = []
+        for new_case in case_dict_list:
+            chunk.append(new_case)
+            if len(chunk) >= self.chunk_size:
+                result.append(self.import_chunk(chunk))
+                chunk = []
+        if chunk:
+            result.append(self.import_chunk(chunk))
+
+        if self.owns_suite_importer:
+            result.append(self.suite_importer.result)
+
+        return result
+
+
+    def import_chunk(self, case_dicts):
+        """Validate and insert a list of case dictionaries."""
+        result = ImportResult()
+
+        # names compare as under MySQL's case-insensitive collation, as the
+        # database's own check does in ``CaseImporter``
+        existing = set(
+            name.lower() for name in CaseVersion.objects.filter(
+                productversion=self.productversion,
+                name__in=[c["name"] for c in case_dicts if "name" in c],
+                ).values_list("name", flat=True)
+            )
+        self.user_cache.preload(
+            [c["created_by"] for c in case_dicts if "created_by" in c])
+
+        # (case data, Case, CaseVersion) for each case that passes validation
+        new = []
+        for new_case in case_dicts:
+            if not "name" in new_case:
+                result.warn(
+                    ImportResult.SKIP_CASE_NO_NAME,
+                    new_case,
+                    )
+                continue
+
+            name = new_case["name"]
+            if name.lower() in existing or name.lower() in self.names:
+                result.warn(
+                    ImportResult.SKIP_CASE_NAME_CONFLICT,
+                    new_case,
+                    )
+                continue
+
+            user = None
+            if "created_by" in new_case:
+                try:
+                    email = new_case["created_by"]
+                    user = self.user_cache.get_user(email)
+
+                except User.DoesNotExist:
+                    result.warn(
+                        ImportResult.WARN_USER_NOT_FOUND,
+                        email,
+                        )
+
+            if any("instruction" not in s for s in new_case.get("steps", [])):
+                result.warn(
+                    ImportResult.SKIP_STEP_NO_INSTRUCTION,
+                    new_case,
+                    )
+                continue
+
+            self.names.add(name.lower())
+            caseversion = CaseVersion(
+                productversion=self.productversion,
+                name=name,
+                description=new_case.get("description", ""),
+                created_by=user,
+                modified_by=user,
+                # a new case's only version is its latest
+                latest=True,
+                )
+
+            if "steps" not in new_case:
+                result.warn(
+                    ImportResult.WARN_NO_STEPS,
+                    caseversion,
+                    )
+
+            case = Case(product=self.productversion.product)
+            new.append((new_case, case, caseversion))
+
+        if not new:
+            return result
+
+        bulk_insert(case for (new_case, case, caseversion) in new)
+        for new_case, case, caseversion in new:
+            caseversion.case = case
+        caseversions = bulk_insert(cv for (new_case, case, cv) in new)
+
+        # new case versions inherit the product version's environments
+        if self.environment_ids is None:
+            self.environment_ids = list(
+                self.productversion.environments.values_list("id", flat=True))
+        CaseVersionEnvironment = CaseVersion.environments.through
+        bulk_insert(
+            CaseVersionEnvironment(caseversion=cv, environment_id=env_id)
+            for cv in caseversions
+            for env_id in self.environment_ids
+            )
+
+        bulk_insert(
+            CaseStep(
+                caseversion=caseversion,
+                number=step_num+1,
+                instruction=new_step["instruction"],
+                expected=new_step.get("expected", ""),
+                )
+            for (new_case, case, caseversion) in new
+            for step_num, new_step in enumerate(new_case.get("steps", []))
+            )
+
+        for new_case, case, caseversion in new:
+            if "tags" in new_case:
+                self.tag_importer.add_names(caseversion, new_case["tags"])
+
+            if "suites" in new_case:
+                self.suite_importer.add_names(case, new_case["suites"])
+
+        self.tag_importer.import_tags()
+        self.suite_importer.import_suites()
+
+        CaseVersionTerm.objects.rebuild(
+            CaseVersion.everything.filter(
+                id__in=[cv.id for cv in caseversions]))
+
+        result.num_cases += len(new)
+        return result
+
+
+
 class UserCache(object):
     """
     Cache of emails to User objects.
@@ -286,6 +551,29 @@ class UserCache(object):
         """Create a UserCache with an internal dictionary cache."""
 
         self.cache = {}
+        # emails preloaded with no matching user, not yet reported
+        self.missing = set()
+
+
+    def preload(self, emails):
+        """
+        Look up all given emails that aren't cached yet, with one query.
+
+        Found users are cached; emails with no matching user will raise
+        ``User.DoesNotExist`` from the next ``get_user`` call, as usual.
+
+        """
+        emails = set(emails).difference(self.cache).difference(self.missing)
+        if not emails:
+            return
+        users = User.objects.filter(email__in=emails)
+        by_email = dict((u.email.lower(), u) for u in users)
+        for email in emails:
+            user = by_email.get(email.lower())
+            if user is None:
+                self.missing.add(email)
+            else:
+                self.cache[email] = user
 
 
     def get_user(self, email):
@@ -308,6 +596,12 @@ class UserCache(object):
         if email in self.cache:
             return self.cache[email]
 
+        elif email in self.missing:
+            self.missing.remove(email)
+            self.cache[email] = None
+            raise User.DoesNotExist(
+                "User with email {0} does not exist.".format(email))
+
         else:
             try:
                 user = User.objects.get(email=email)
@@ -391,6 +685,57 @@ class TagImporter(object):
 
 
 
+class BulkTagImporter(TagImporter):
+    """Imports tags, finding and creating them for all added names at once."""
+
+    def __init__(self, product):
+        """Store the Product, and create the internal map and tag cache."""
+
+        super(BulkTagImporter, self).__init__(product)
+        # tag names to Tag objects, kept across imports
+        self.tags = {}
+
+
+    def import_tags(self):
+        """
+        Import all added tags.
+
+        Uses or creates tags with the same priority as ``TagImporter``; tags
+        and tag assignments are each inserted with a single query.
+
+        """
+        names = [n for n in self.map if n not in self.tags]
+        if names:
+            # product tags sort after global tags, so they take precedence
+            for tag in Tag.objects.filter(
+                    Q(product=self.product) | Q(product__isnull=True),
+                    name__in=names).order_by("product"):
+                self.tags[tag.name] = tag
+            new_tags = bulk_insert(
+                Tag(name=n, product=self.product)
+                for n in names if n not in self.tags
+                )
+            for tag in new_tags:
+                self.tags[tag.name] = tag
+
+        CaseVersionTag = CaseVersion.tags.through
+        links = set(
+            (caseversion.id, self.tags[tag_name].id)
+            for tag_name, caseversions in self.map.items()
+            for caseversion in caseversions
+            )
+        bulk_insert(
+            CaseVersionTag(caseversion_id=cv_id, tag_id=tag_id)
+            for (cv_id, tag_id) in sorted(links)
+            )
+        # tag usage is used for autocomplete ranking
+        bump_generation(Tag)
+
+        # we have imported these items.  clear them out now.
+        self.map.clear()
+
+
+
 class SuiteImporter(object):
     """
     Imports suites based on lists and dicts of suites used to build it.
@@ -507,6 +852,50 @@ class SuiteImporter(object):
 
 
 
+class BulkSuiteImporter(SuiteImporter):
+    """Imports suites, finding and creating them for all names at once."""
+
+    def __init__(self, product):
+        """Construct a BulkSuiteImporter, with a cache of suites by name."""
+
+        super(BulkSuiteImporter, self).__init__(product)
+        self.suites = {}
+
+
+    def import_suites(self):
+        """Import all mapped suites, using one query for each step."""
+
+        names = [n for n in self.map if n not in self.suites]
+        if names:
+            # if there are duplicate names, the oldest suite wins
+            for suite in Suite.objects.filter(
+                    name__in=names, product=self.product).order_by("-id"):
+                self.suites[suite.name] = suite
+            new_suites = bulk_insert(
+                Suite(
+                    name=n,
+                    product=self.product,
+                    description=self.map[n].get("description", ""),
+                    )
+                for n in names if n not in self.suites
+                )
+            for suite in new_suites:
+                self.suites[suite.name] = suite
+            self.result.num_suites += len(new_suites)
+
+        bulk_insert(
+            SuiteCase(case=case, suite=self.suites[suite_name])
+            for suite_name, suite_data in self.map.items()
+            for case in suite_data.get("cases", [])
+            )
+
+        # we have imported (or warned on) these items, so reset ourself.
+        self.map.clear()
+
+        return self.result
+
+
+
 class ImportResult(object):
     """
     Results of the import process.
@@ -554,6 +943,37 @@ class ImportResult(object):
         self.warnings.append({"reason": reason, "item": item})
 
 
+    def as_dict(self):
+        """
+        Return a JSON-serializable dictionary of this result.
+
+        Warning items are replaced with their string representations.
+
+        """
+        return {
+            "num_cases": self.num_cases,
+            "num_suites": self.num_suites,
+            "warnings": [
+                {"reason": w["reason"], "item": u"{0}".format(w["item"])}
+                for w in self.warnings
+                ],
+            }
+
+
+    @classmethod
+    def from_dict(cls, data):
+        """Return an ImportResult from a dictionary made by ``as_dict``."""
+        result = cls()
+        result.num_cases = data["num_cases"]
+        result.num_suites = data["num_suites"]
+        # items are formatted as bytestrings, as model objects would be
+        result.warnings = [
+            {"reason": w["reason"], "item": w["item"].encode("utf-8")}
+            for w in data["warnings"]
+            ]
+        return result
+
+
     def append(self, result):
         """Append the results object into this results object."""
 
@@ -3,13 +3,14 @@ Models for test-case library (cases, suites).
 
 """
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, router, transaction
 
 from ..attachments.models import Attachment
 from ..mtmodel import MTModel, DraftStatusModel
 from ..core.models import Product, ProductVersion
 from ..environments.models import HasEnvironmentsModel
 from ..tags.models import Tag
+from .search import term_counts
 
 
 
@@ -73,8 +74,38 @@ class Case(MTModel):
 
 
     def latest_version(self):
-        """Return latest version of this case."""
-        return self.versions.get(latest=True)
+        """Return latest version of this case (as preloaded, if it was)."""
+        try:
+            return self._latest_version_cache
+        except AttributeError:
+            return self.versions.get(latest=True)
+
+
+    @classmethod
+    def preload_latest_versions(cls, cases):
+        """
+        Load the latest versions of ``cases``, with their tags, in bulk.
+
+        Afterwards ``latest_version`` returns the loaded version without a
+        query, and the version's ``tag_list`` attribute is a list of its tags.
+
+        """
+        CaseVersion = cls.versions.related.model
+        versions = dict(
+            (cv.id, cv) for cv in CaseVersion.objects.filter(
+                case__in=[c.id for c in cases], latest=True)
+            )
+        for cv in versions.values():
+            cv.tag_list = []
+        for link in CaseVersion.tags.through.objects.filter(
+                caseversion__in=versions.keys(),
+                tag__deleted_on__isnull=True).select_related(
+                "tag").order_by("tag__name"):
+            versions[link.caseversion_id].tag_list.append(link.tag)
+        by_case = dict((cv.case_id, cv) for cv in versions.values())
+        for case in cases:
+            if case.id in by_case:
+                case._latest_version_cache = by_case[case.id]
 
 
 
@@ -115,9 +146,11 @@ class CaseVersion(MTModel, DraftStatusModel, HasEnvironmentsModel):
     def save(self, *args, **kwargs):
         """Save CaseVersion, updating latest version."""
         skip_set_latest = kwargs.pop("skip_set_latest", False)
+        created = self.pk is None
         super(CaseVersion, self).save(*args, **kwargs)
         if not skip_set_latest:
             self.case.set_latest_version(update_instance=self)
+        CaseVersionTerm.objects.index_caseversion(self, created=created)
 
 
     def delete(self, *args, **kwargs):
@@ -205,13 +238,20 @@ class CaseVersion(MTModel, DraftStatusModel, HasEnvironmentsModel):
 
     def bug_urls(self):
         """Returns set of bug URLs associated with this caseversion."""
-        Result = self.runcaseversions.model.results.related.model
+        RunCaseVersion = self.runcaseversions.model
+        Result = RunCaseVersion.results.related.model
+        ArchivedResult = RunCaseVersion.archivedresults.related.model
         StepResult = Result.stepresults.related.model
-        return set(
+        urls = set(
             StepResult.objects.filter(
                 result__runcaseversion__caseversion=self).exclude(
                 bug_url="").values_list("bug_url", flat=True).distinct()
             )
+        for bugs in ArchivedResult.objects.filter(
+                runcaseversion__caseversion=self).exclude(
+                bugs="").values_list("bugs", flat=True):
+            urls.update(bugs.split())
+        return urls
 
 
 
@@ -232,6 +272,13 @@ class CaseStep(MTModel):
         return u"step #%s" % (self.number,)
 
 
+    def save(self, *args, **kwargs):
+        """Save CaseStep, updating the search index."""
+        created = self.pk is None
+        super(CaseStep, self).save(*args, **kwargs)
+        CaseVersionTerm.objects.index_step(self, created=created)
+
+
     def clean(self):
         """
         Validate uniqueness of caseversion/number combo.
@@ -261,6 +308,126 @@ class CaseStep(MTModel):
 
 
 
+class CaseVersionTermManager(models.Manager):
+    """Maintains the case version full-text search index."""
+    def index_caseversion(self, caseversion, created=False):
+        """
+        Replace name and description terms for ``caseversion``.
+
+        If ``created`` is True there can be no existing terms to remove.
+
+        """
+        if not created:
+            self.filter(caseversion=caseversion, step__isnull=True).delete()
+        self._insert(
+            [
+                (caseversion.id, None, field, term, count)
+                for field in ["name", "description"]
+                for term, count in term_counts(
+                    getattr(caseversion, field)).items()
+                ]
+            )
+
+
+    def index_step(self, step, created=False):
+        """
+        Replace instruction and expected-result terms for ``step``.
+
+        If ``created`` is True there can be no existing terms to remove.
+
+        """
+        if not created:
+            self.filter(step=step).delete()
+        self._insert(
+            [
+                (step.caseversion_id, step.id, field, term, count)
+                for field in ["instruction", "expected"]
+                for term, count in term_counts(getattr(step, field)).items()
+                ]
+            )
+
+
+    def rebuild(self, caseversions=None, chunk_size=500):
+        """
+        Rebuild the index for ``caseversions`` (default all); return count.
+
+        Case versions are indexed ``chunk_size`` at a time, with one query for
+        their steps per chunk.
+
+        """
+        if caseversions is None:
+            caseversions = CaseVersion.everything.all()
+        ids = list(caseversions.order_by().values_list("id", flat=True))
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            self.filter(caseversion__in=chunk).delete()
+            rows = []
+            for cv in CaseVersion.everything.filter(id__in=chunk).values(
+                    "id", "name", "description"):
+                for field in ["name", "description"]:
+                    rows.extend(
+                        (cv["id"], None, field, term, count)
+                        for term, count in term_counts(cv[field]).items())
+            for step in CaseStep.everything.filter(
+                    caseversion__in=chunk).values(
+                    "id", "caseversion", "instruction", "expected"):
+                for field in ["instruction", "expected"]:
+                    rows.extend(
+                        (step["caseversion"], step["id"], field, term, count)
+                        for term, count in term_counts(step[field]).items())
+            self._insert(rows)
+        return len(ids)
+
+
+    def _insert(self, rows):
+        """Insert term ``rows`` with a single multi-row statement."""
+        if not rows:
+            return
+        opts = self.model._meta
+        columns = [
+            opts.get_field(name).column
+            for name in ["caseversion", "step", "field", "term", "weight"]]
+        connection = connections[router.db_for_write(self.model)]
+        qn = connection.ops.quote_name
+        cursor = connection.cursor()
+        cursor.executemany(
+            "INSERT INTO {0} ({1}) VALUES ({2})".format(
+                qn(opts.db_table),
+                ", ".join(qn(c) for c in columns),
+                ", ".join(["%s"] * len(columns)),
+                ),
+            rows,
+            )
+        transaction.commit_unless_managed(using=connection.alias)
+
+
+
+class CaseVersionTerm(models.Model):
+    """
+    A term in the full-text search index of case versions.
+
+    Name and description terms have no ``step``; instruction and
+    expected-result terms record the step they came from, so that a single
+    step can be re-indexed (and deleting a step deletes its terms).
+
+    """
+    caseversion = models.ForeignKey(CaseVersion, related_name="terms")
+    step = models.ForeignKey(
+        CaseStep, related_name="terms", blank=True, null=True)
+    field = models.CharField(max_length=20)
+    term = models.CharField(max_length=50, db_index=True)
+    # number of occurrences of the term in the field
+    weight = models.IntegerField(default=1)
+
+
+    objects = CaseVersionTermManager()
+
+
+    def __unicode__(self):
+        return u"{0}: {1}".format(self.field, self.term)
+
+
+
 class Suite(MTModel, DraftStatusModel):
     """An ordered suite of test cases."""
     DEFAULT_STATUS = DraftStatusModel.STATUS.active
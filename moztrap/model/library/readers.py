@@ -0,0 +1,298 @@
+"""
+Readers that turn import files into streams of suites and cases.
+
+Each reader takes a file object and yields ``(kind, data)`` pairs, where kind
+is ``"suite"`` or ``"case"`` and data is a dictionary in the format accepted by
+``Importer``. Readers consume their input incrementally, so memory use doesn't
+grow with the size of the file.
+
+"""
+import codecs
+import csv
+import json
+
+from .bulk import BulkParser
+
+
+
+class ParseError(ValueError):
+    """The input could not be parsed."""
+    pass
+
+
+
+class JSONStream(object):
+    """Incrementally decodes JSON values from a file object."""
+
+    def __init__(self, fh, bufsize=65536):
+        """Wrap file ``fh``, reading ``bufsize`` characters at a time."""
+        self.fh = codecs.getreader("utf-8")(fh)
+        self.bufsize = bufsize
+        self.buf = u""
+        self.pos = 0
+        # number of characters discarded from the front of ``buf``
+        self.offset = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+
+    def fill(self):
+        """Read more input; return False if there is none."""
+        if self.eof:
+            return False
+        data = self.fh.read(self.bufsize)
+        if not data:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+
+    def peek(self):
+        """Return next non-whitespace character, or None at end of input."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+
+    def expect(self, *chars):
+        """Consume and return next character, which must be in ``chars``."""
+        char = self.peek()
+        if char is None or char not in chars:
+            raise ParseError(
+                "Expecting {0} (char {1})".format(
+                    " or ".join("'{0}'".format(c) for c in chars),
+                    self.offset + self.pos,
+                    )
+                )
+        self.pos += 1
+        return char
+
+
+    def decode(self):
+        """Decode and return the next complete JSON value."""
+        if self.peek() is None:
+            raise ParseError(
+                "Expecting value (char {0})".format(self.offset + self.pos))
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError as e:
+                # the value may just be incomplete; read more and retry
+                if not self.fill():
+                    raise ParseError(str(e))
+                continue
+            # a number at the end of the buffer may continue past it
+            if end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+
+def json_items(fh, bufsize=65536):
+    """
+    Yield suites and cases from a JSON object with "suites"/"cases" arrays.
+
+    The arrays are decoded one element at a time; any other top-level keys are
+    ignored. For suite descriptions to be applied, the "suites" array must
+    precede the "cases" array. The file is read ``bufsize`` characters at a
+    time.
+
+    """
+    stream = JSONStream(fh, bufsize)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.decode()
+        stream.expect(":")
+        if key in ["suites", "cases"]:
+            kind = key[:-1]
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield kind, stream.decode()
+                    if stream.expect(",", "]") == "]":
+                        break
+        else:
+            stream.decode()
+        if stream.expect(",", "}") == "}":
+            break
+
+
+
+def ndjson_items(fh):
+    """
+    Yield suites and cases from newline-delimited JSON.
+
+    Each non-blank line is a case dictionary, or an object with a single
+    "suite" key whose value is a suite dictionary.
+
+    """
+    for lineno, line in enumerate(fh, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            raise ParseError("Line {0}: {1}".format(lineno, e))
+        if not isinstance(data, dict):
+            raise ParseError("Line {0}: Expecting object".format(lineno))
+        if data.keys() == ["suite"]:
+            yield "suite", data["suite"]
+        else:
+            yield "case", data
+
+
+
+def csv_items(fh):
+    """
+    Yield cases from CSV with a header row, encoded as UTF-8.
+
+    Recognized columns (matched case-insensitively; others are ignored) are
+    "name", "description", "created_by", "tags", "suites", "instruction" and
+    "expected". Each row with a name starts a new case; following rows with no
+    name add further steps to it. Tags and suites are comma-separated lists.
+
+    """
+    reader = csv.reader(fh)
+    try:
+        columns = [c.strip().lower() for c in reader.next()]
+    except StopIteration:
+        return
+    except csv.Error as e:
+        raise ParseError("Line 1: {0}".format(e))
+    if "name" not in columns:
+        raise ParseError("Line 1: Expecting a 'name' column")
+
+    case = None
+    while True:
+        try:
+            row = reader.next()
+        except StopIteration:
+            break
+        except csv.Error as e:
+            raise ParseError("Line {0}: {1}".format(reader.line_num, e))
+        values = dict(
+            (col, cell.decode("utf-8").strip())
+            for col, cell in zip(columns, row)
+            if cell.strip()
+            )
+        if not values:
+            continue
+
+        if "name" in values:
+            if case is not None:
+                yield "case", case
+            case = dict(
+                (key, values[key])
+                for key in ["name", "description", "created_by"]
+                if key in values
+                )
+            for key in ["tags", "suites"]:
+                if key in values:
+                    case[key] = [
+                        v.strip() for v in values[key].split(",") if v.strip()]
+        elif case is None:
+            raise ParseError(
+                "Line {0}: Expecting a name".format(reader.line_num))
+
+        step = dict(
+            (key, values[key])
+            for key in ["instruction", "expected"]
+            if key in values
+            )
+        if step:
+            case.setdefault("steps", []).append(step)
+
+    if case is not None:
+        yield "case", case
+
+
+
+def text_items(fh):
+    """
+    Yield cases from UTF-8 text in the "Test that... When... Then" format.
+
+    See ``BulkParser`` for the format. The file is parsed a line at a time.
+
+    """
+    for data in BulkParser().iter_parse(codecs.getreader("utf-8")(fh)):
+        if "error" in data:
+            raise ParseError(
+                "Line {0}: {1}".format(data["line"], data["error"]))
+        yield "case", data
+
+
+
+# map of format name to reader
+READERS = {
+    "json": json_items,
+    "ndjson": ndjson_items,
+    "csv": csv_items,
+    "text": text_items,
+    }
+
+# map of file extension to format name
+EXTENSIONS = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+    ".txt": "text",
+    }
+
+
+
+def guess_format(filename, fh=None):
+    """
+    Return format name for ``filename``, based on its extension.
+
+    If the extension isn't recognized and a seekable file object ``fh`` is
+    given, the format is guessed from the start of its contents (see
+    ``sniff_format``); otherwise JSON is assumed.
+
+    """
+    for ext, name in EXTENSIONS.items():
+        if filename.lower().endswith(ext):
+            return name
+    if fh is None:
+        return "json"
+    start = fh.tell()
+    head = fh.read(4096)
+    fh.seek(start)
+    return sniff_format(head)
+
+
+
+def sniff_format(head):
+    """
+    Return format name for a file beginning with ``head``.
+
+    JSON and newline-delimited JSON both begin with "{"; it's NDJSON if the
+    first line is a complete object other than a "suites"/"cases" wrapper. Text
+    in the bulk format begins with "Test that"; anything else is taken to be
+    CSV.
+
+    """
+    head = head.lstrip()
+    if head.startswith("{"):
+        try:
+            data = json.loads(head.splitlines()[0])
+        except ValueError:
+            return "json"
+        if "suites" in data or "cases" in data:
+            return "json"
+        return "ndjson"
+    if head.lower().startswith("test that "):
+        return "text"
+    return "csv"
@@ -0,0 +1,35 @@
+"""
+Text analysis for the case version full-text search index.
+
+Case version names and descriptions, and step instructions and expected
+results, are split into lowercased word terms; ``CaseVersionTerm`` rows record
+how often each term occurs in each field.
+
+"""
+import re
+
+
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# longer words are truncated to this length (the width of the term column)
+MAX_TERM_LENGTH = 50
+
+# indexed fields
+FIELDS = ["name", "description", "instruction", "expected"]
+
+
+
+def tokenize(text):
+    """Return list of lowercased, truncated terms in ``text``, in order."""
+    return [
+        t[:MAX_TERM_LENGTH] for t in TERM_RE.findall((text or u"").lower())]
+
+
+
+def term_counts(text):
+    """Return dict mapping each term in ``text`` to its occurrence count."""
+    counts = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
@@ -6,11 +6,14 @@ creation, modification, and soft-deletion.
 
 """
 import datetime
+import threading
+import time
 
-from django.db import models, router
+from django.core.cache import cache
+from django.db import connections, models, router, transaction
 from django.db.models.deletion import Collector
 from django.db.models.query import QuerySet
-from django.db.models.signals import class_prepared
+from django.db.models.signals import class_prepared, m2m_changed
 
 from model_utils import Choices
 
@@ -28,6 +31,266 @@ def utcnow():
 
 
 
+def _generation_key(model):
+    """Return cache key for the write generation of ``model``."""
+    return "mtmodel:generation:{0}.{1}".format(
+        model._meta.app_label, model._meta.object_name)
+
+
+
+def generation(model):
+    """
+    Return the current write generation of ``model``.
+
+    The generation changes whenever rows of ``model`` are written through
+    ``MTModel`` or ``MTQuerySet``, so it can be included in cache keys for data
+    derived from the table. If the counter has been evicted from the cache it
+    is re-seeded from the clock, so it never goes backwards.
+
+    """
+    key = _generation_key(model)
+    gen = cache.get(key)
+    if gen is None:
+        cache.add(key, int(time.time() * 1000))
+        gen = cache.get(key, 0)
+    return gen
+
+
+
+# models written to within a managed transaction, per thread
+_pending = threading.local()
+
+
+
+def _bump(model):
+    """Change the write generation of ``model``."""
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000))
+
+
+
+def _pending_models():
+    """Return the set of models with writes not yet known to be committed."""
+    if not hasattr(_pending, "models"):
+        _pending.models = set()
+    return _pending.models
+
+
+
+def bump_generation(*models):
+    """
+    Record a write to each of the given ``models``.
+
+    Until a managed transaction commits, other connections still read the old
+    rows and may cache them under the new generation; so writes made within
+    one are recorded again by ``bump_pending_generations``, which must be
+    called after the commit (see ``moztrap.view.middleware``).
+
+    """
+    for model in set(models):
+        _bump(model)
+        if transaction.is_managed(using=router.db_for_write(model)):
+            _pending_models().add(model)
+
+
+
+def bump_pending_generations():
+    """Record again the writes made in this thread's committed transaction."""
+    models = _pending_models()
+    while models:
+        _bump(models.pop())
+
+
+
+# maximum number of rows inserted by a single statement in ``bulk_insert``
+BULK_CHUNK_SIZE = 500
+
+
+
+def chunks(items, size=BULK_CHUNK_SIZE):
+    """Yield successive lists of at most ``size`` of list ``items``."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+
+def bulk_insert(objs, chunk_size=BULK_CHUNK_SIZE, using=None, keep_pks=False):
+    """
+    Insert unsaved model instances ``objs`` using multi-row INSERTs.
+
+    All of ``objs`` must be instances of the same model. No ``save()`` methods
+    are called and no signals are sent, so callers are responsible for any
+    denormalized data and for setting ``created_by``/``modified_by``. Primary
+    keys are set on the instances, relying on the auto-increment values of a
+    single statement being consecutive (see ``consecutive_ids``); where they
+    may not be, rows are inserted one at a time. With ``keep_pks`` the
+    instances' own primary keys are inserted instead.
+
+    Returns the list of inserted instances.
+
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    model = objs[0].__class__
+    opts = model._meta
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    fields = [
+        f for f in opts.local_fields
+        if keep_pks or not isinstance(f, models.AutoField)]
+    sql = "INSERT INTO {0} ({1}) VALUES ".format(
+        qn(opts.db_table), ", ".join(qn(f.column) for f in fields))
+    row = "({0})".format(", ".join(["%s"] * len(fields)))
+    if connection.vendor == "sqlite":
+        # SQLite allows at most 999 parameters in one statement
+        chunk_size = max(1, min(chunk_size, 999 // len(fields)))
+    if not (keep_pks or consecutive_ids(connection)):
+        chunk_size = 1
+
+    cursor = connection.cursor()
+    for start in range(0, len(objs), chunk_size):
+        chunk = objs[start:start + chunk_size]
+        params = []
+        for obj in chunk:
+            params.extend(
+                f.get_db_prep_save(
+                    f.pre_save(obj, True), connection=connection)
+                for f in fields)
+        cursor.execute(sql + ", ".join([row] * len(chunk)), params)
+        if opts.has_auto_field and not keep_pks:
+            if connection.vendor == "sqlite":
+                first = cursor.lastrowid - len(chunk) + 1
+            elif connection.vendor == "mysql":
+                first = cursor.lastrowid
+            else:
+                first = connection.ops.last_insert_id(
+                    cursor, opts.db_table, opts.pk.column)
+            for i, obj in enumerate(chunk):
+                setattr(obj, opts.pk.attname, first + i)
+
+    transaction.commit_unless_managed(using=using)
+    bump_generation(model)
+    return objs
+
+
+
+# database aliases mapped to whether a multi-row INSERT gets consecutive ids
+_consecutive_ids = {}
+
+
+
+def consecutive_ids(connection):
+    """
+    Return True if a multi-row INSERT on ``connection`` gets consecutive ids.
+
+    True for SQLite, and for MySQL unless ``innodb_autoinc_lock_mode`` is 2
+    ("interleaved"), which is looked up once per connection; False on other
+    backends.
+
+    """
+    alias = connection.alias
+    if alias not in _consecutive_ids:
+        if connection.vendor == "sqlite":
+            consecutive = True
+        elif connection.vendor == "mysql":
+            cursor = connection.cursor()
+            cursor.execute("SELECT @@innodb_autoinc_lock_mode")
+            consecutive = int(cursor.fetchone()[0]) != 2
+        else:
+            consecutive = False
+        _consecutive_ids[alias] = consecutive
+    return _consecutive_ids[alias]
+
+
+
+def sync_ordered(model, parent_field, parent, member_field, members,
+                 user=None):
+    """
+    Make ``members`` the ordered members of ``parent`` via ``model`` rows.
+
+    ``model`` is an association model with foreign keys ``parent_field`` and
+    ``member_field`` and an integer ``order`` field. Existing rows are diffed
+    against ``members``: rows for members no longer present are permanently
+    deleted, rows for new members are inserted with ``bulk_insert``, and rows
+    whose position changed are reordered with a single UPDATE. Rows that
+    remain keep their primary keys and creation audit fields.
+
+    """
+    opts = model._meta
+    member_attname = opts.get_field(member_field).attname
+    positions = {}
+    for i, member in enumerate(members):
+        positions.setdefault(member.pk, i)
+
+    to_delete = []
+    to_reorder = {}
+    for pk, member_id, order in model.objects.filter(
+            **{parent_field: parent}).order_by("id").values_list(
+            "id", member_attname, "order"):
+        # a member that is listed twice keeps only its first row
+        position = positions.pop(member_id, None)
+        if position is None:
+            to_delete.append(pk)
+        elif position != order:
+            to_reorder[pk] = position
+
+    for start in range(0, len(to_delete), BULK_CHUNK_SIZE):
+        model.everything.filter(
+            pk__in=to_delete[start:start + BULK_CHUNK_SIZE]).delete(
+            permanent=True)
+
+    if to_reorder:
+        _update_order(model, to_reorder, user)
+
+    bulk_insert(
+        model(
+            order=position,
+            created_by=user,
+            modified_by=user,
+            **{parent_field: parent, member_attname: member_id})
+        for member_id, position in sorted(
+            positions.items(), key=lambda item: item[1])
+        )
+
+
+
+def _update_order(model, orders, user):
+    """Set ``order`` of ``model`` rows from ``orders`` map of pk to order."""
+    opts = model._meta
+    using = router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    # the pks and orders are integers, so they can safely be inlined
+    sql = (
+        "UPDATE {table} SET {order} = CASE {pk} {whens} END, "
+        "{modified_by} = %s, {modified_on} = %s, {cc} = {cc} + 1 "
+        "WHERE {pk} IN ({pks})"
+        ).format(
+        table=qn(opts.db_table),
+        order=qn(opts.get_field("order").column),
+        pk=qn(opts.pk.column),
+        whens=" ".join(
+            "WHEN {0:d} THEN {1:d}".format(pk, order)
+            for pk, order in orders.items()),
+        modified_by=qn(opts.get_field("modified_by").column),
+        modified_on=qn(opts.get_field("modified_on").column),
+        cc=qn(opts.get_field("cc_version").column),
+        pks=", ".join("{0:d}".format(pk) for pk in orders),
+        )
+    modified_on = opts.get_field("modified_on").get_db_prep_save(
+        utcnow(), connection=connection)
+    connection.cursor().execute(
+        sql, [user.pk if user is not None else None, modified_on])
+    transaction.commit_unless_managed(using=using)
+    bump_generation(model)
+
+
+
 class SoftDeleteCollector(Collector):
     """
     A variant of Django's default delete-cascade collector that implements soft
@@ -50,13 +313,19 @@ class SoftDeleteCollector(Collector):
         """
         Soft-delete all collected instances.
 
+        Collected instances of models that don't support soft-deletion (such
+        as index tables) are left alone.
+
         """
         now = utcnow()
         for model, instances in self.data.iteritems():
+            if not issubclass(model, MTModel):
+                continue
             pk_list = [obj.pk for obj in instances]
             model._base_manager.filter(
                 pk__in=pk_list, deleted_on__isnull=True).update(
                 deleted_by=user, deleted_on=now)
+        bump_generation(*self.data.keys())
 
 
     def undelete(self, user=None):
@@ -68,10 +337,13 @@ class SoftDeleteCollector(Collector):
         # deleted in one of these same cascade batches should be undeleted.
         deletion_times = set([o.deleted_on for o in self.root_objs])
         for model, instances in self.data.iteritems():
+            if not issubclass(model, MTModel):
+                continue
             pk_list = [obj.pk for obj in instances]
             model._base_manager.filter(
                 pk__in=pk_list, deleted_on__in=deletion_times).update(
                 deleted_by=None, deleted_on=None)
+        bump_generation(*self.data.keys())
 
 
 
@@ -100,7 +372,9 @@ class MTQuerySet(QuerySet):
             kwargs["modified_on"] = utcnow()
         # increment the concurrency control version for all updated objects
         kwargs["cc_version"] = models.F("cc_version") + 1
-        return super(MTQuerySet, self).update(*args, **kwargs)
+        rows = super(MTQuerySet, self).update(*args, **kwargs)
+        bump_generation(self.model)
+        return rows
 
 
     def delete(self, user=None, permanent=False):
@@ -109,7 +383,9 @@ class MTQuerySet(QuerySet):
 
         """
         if permanent:
-            return super(MTQuerySet, self).delete()
+            super(MTQuerySet, self).delete()
+            bump_generation(self.model)
+            return
         collector = SoftDeleteCollector(using=self.db)
         collector.collect(self)
         collector.delete(user)
@@ -216,8 +492,11 @@ class MTModel(models.Model):
                     "No row with id {0} and version {1} updated.".format(
                         self.id, previous_version)
                     )
+            bump_generation(self.__class__)
         else:
-            return super(MTModel, self).save(*args, **kwargs)
+            ret = super(MTModel, self).save(*args, **kwargs)
+            bump_generation(self.__class__)
+            return ret
 
 
     def clone(self, cascade=None, overrides=None, user=None):
@@ -288,7 +567,9 @@ class MTModel(models.Model):
 
         """
         if permanent:
-            return super(MTModel, self).delete()
+            super(MTModel, self).delete()
+            bump_generation(self.__class__)
+            return
         self._collector.delete(user)
 
 
@@ -441,3 +722,13 @@ def set_default_status(sender, **kwargs):
 
 
 class_prepared.connect(set_default_status)
+
+
+
+def bump_through_generation(sender, action, **kwargs):
+    """Record a write to the through model of a many-to-many relation."""
+    if action.startswith("post_"):
+        bump_generation(sender)
+
+
+m2m_changed.connect(bump_through_generation)
@@ -94,6 +94,7 @@ TEMPLATE_CONTEXT_PROCESSORS = [
 MIDDLEWARE_CLASSES = [
     "django.middleware.common.CommonMiddleware",
     "djangosecure.middleware.SecurityMiddleware",
+    "moztrap.view.middleware.GenerationMiddleware",
     "django.middleware.transaction.TransactionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -143,6 +144,10 @@ INSTALLED_APPS = [
     "moztrap.view.runtests",
 ]
 
+# Model write generations (see moztrap.model.mtmodel.generation) are kept in
+# the cache; autocomplete indexes and "cached" pagination counts only see
+# writes made by other processes if all processes share a cache backend (e.g.
+# memcached) rather than this per-process one.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -156,6 +161,27 @@ AUTHENTICATION_BACKENDS = [
 
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 
+# How list pagination counts totals: "exact" (count every request), "cached"
+# (cache exact counts per list and filters until a table they read is written
+# to), or "estimated" (use database statistics for unfiltered lists). Only use
+# "cached" with a cache backend shared by all processes (e.g. memcached), or
+# writes in one process won't invalidate counts cached by another.
+PAGINATION_COUNT = "exact"
+
+# When autocomplete indexes (see moztrap.model.autocomplete) are rebuilt after
+# writes: "background" (in a thread, answering from the previous index until
+# it's done) or "request" (before answering the next search).
+AUTOCOMPLETE_REBUILD = "background"
+
+# Log the queries, database time and render time of each request (see
+# moztrap.debug.middleware.RequestMetricsMiddleware), optionally sending the
+# timings in a Server-Timing header too. REQUEST_BUDGETS maps view URL names
+# to limits, e.g. {"runtests_run": {"queries": 50, "db_ms": 200}}; requests
+# exceeding them are logged as warnings.
+REQUEST_METRICS = False
+REQUEST_METRICS_SERVER_TIMING = False
+REQUEST_BUDGETS = {}
+
 # A sample logging configuration. The only tangible logging
 # performed by this configuration is to send an email to
 # the site admins on every HTTP 500 error.
@@ -18,6 +18,10 @@ if DEBUG:
 
     LOGGING["root"] = {"handlers": ["console"]}
 
+if REQUEST_METRICS:
+    MIDDLEWARE_CLASSES.insert(
+        0, "moztrap.debug.middleware.RequestMetricsMiddleware")
+
 try:
     HMAC_KEYS
 except NameError:
@@ -14,7 +14,11 @@ class ProductFilterSet(filters.FilterSet):
     filters = [
         filters.KeywordFilter("name"),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
@@ -26,12 +30,17 @@ class ProductVersionFilterSet(filters.FilterSet):
         filters.KeywordFilter("version"),
         filters.KeywordFilter("codename"),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         ]
 
 
@@ -51,16 +60,22 @@ class RunFilterSet(filters.FilterSet):
         filters.ModelFilter(
             "suite",
             lookup="suites",
-            queryset=model.Suite.objects.all()),
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         filters.KeywordExactFilter(
             "case id", lookup="suites__cases__id", key="case", coerce=int),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         ]
 
 
@@ -74,40 +89,54 @@ class RunCaseVersionFilterSet(filters.FilterSet):
             choices=model.CaseVersion.STATUS),
         filters.KeywordExactFilter(
             "id", lookup="caseversion__case__id", coerce=int),
-        filters.KeywordFilter("name", lookup="caseversion__name"),
+        cases.SearchFilter(
+            "name", lookup="caseversion__name", field="name", via="caseversion"),
         filters.ModelFilter(
             "tag",
             lookup="caseversion__tags",
-            queryset=model.Tag.objects.all()),
+            queryset=model.Tag.objects.all(),
+            lazy=True),
         filters.ModelFilter(
             "product",
             lookup="caseversion__case__product",
             queryset=model.Product.objects.all()),
-        filters.ModelFilter("run", queryset=model.Run.objects.all()),
+        filters.ModelFilter(
+            "run",
+            queryset=model.Run.objects.all(),
+            lazy=True),
         filters.ModelFilter(
             "product version",
             lookup="run__productversion",
             key="productversion",
             queryset=model.ProductVersion.objects.all()),
-        filters.KeywordFilter(
-            "instruction", lookup="caseversion__steps__instruction"),
-        filters.KeywordFilter(
+        cases.SearchFilter(
+            "instruction",
+            lookup="caseversion__steps__instruction",
+            field="instruction",
+            via="caseversion"),
+        cases.SearchFilter(
             "expected result",
             lookup="caseversion__steps__expected",
-            key="expected"),
+            key="expected",
+            field="expected",
+            via="caseversion"),
         filters.ModelFilter(
             "creator",
             lookup="caseversion__created_by",
-            queryset=model.User.objects.all()),
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         filters.ModelFilter(
             "suite",
             lookup="suites",
-            queryset=model.Suite.objects.all()),
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         ]
 
 
@@ -117,25 +146,35 @@ class RunTestsRunCaseVersionFilterSet(filters.FilterSet):
     filters = [
         filters.KeywordExactFilter(
             "id", lookup="caseversion__case__id", coerce=int),
-        filters.KeywordFilter("name", lookup="caseversion__name"),
+        cases.SearchFilter(
+            "name", lookup="caseversion__name", field="name", via="caseversion"),
         filters.ModelFilter(
             "tag",
             lookup="caseversion__tags",
-            queryset=model.Tag.objects.all()),
-        filters.KeywordFilter(
-            "instruction", lookup="caseversion__steps__instruction"),
-        filters.KeywordFilter(
+            queryset=model.Tag.objects.all(),
+            lazy=True),
+        cases.SearchFilter(
+            "instruction",
+            lookup="caseversion__steps__instruction",
+            field="instruction",
+            via="caseversion"),
+        cases.SearchFilter(
             "expected result",
             lookup="caseversion__steps__expected",
-            key="expected"),
+            key="expected",
+            field="expected",
+            via="caseversion"),
         filters.ModelFilter(
             "creator",
             lookup="caseversion__created_by",
-            queryset=model.User.objects.all()),
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "suite",
             lookup="suites",
-            queryset=model.Suite.objects.all()),
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         ]
 
 
@@ -144,13 +183,18 @@ class ResultFilterSet(filters.FilterSet):
     """FilterSet for results."""
     filters = [
         filters.ChoicesFilter("status", choices=model.Result.STATUS),
-        filters.ModelFilter("tester", queryset=model.User.objects.all()),
+        filters.ModelFilter(
+            "tester",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.KeywordFilter("comment"),
         filters.ModelFilter(
             "environment element",
             lookup="environment__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         ]
 
 
@@ -163,14 +207,18 @@ class SuiteFilterSet(filters.FilterSet):
         filters.ModelFilter(
             "run",
             lookup="runs",
-            queryset=model.Run.objects.all()
-            ),
+            queryset=model.Run.objects.all(),
+            lazy=True),
         filters.KeywordFilter("name"),
         filters.KeywordFilter("description"),
         filters.KeywordExactFilter(
             "case id", lookup="cases__id", key="case", coerce=int),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
@@ -195,9 +243,12 @@ class CaseVersionFilterSet(filters.FilterSet):
     filters = [
         filters.ChoicesFilter("status", choices=model.CaseVersion.STATUS),
         cases.PrefixIDFilter("id"),
-        filters.KeywordFilter("name"),
+        cases.SearchFilter("name", field="name"),
         filters.ModelFilter(
-            "tag", lookup="tags", queryset=model.Tag.objects.all()),
+            "tag",
+            lookup="tags",
+            queryset=model.Tag.objects.all(),
+            lazy=True),
         filters.ModelFilter(
             "product",
             lookup="case__product",
@@ -207,20 +258,30 @@ class CaseVersionFilterSet(filters.FilterSet):
             lookup="productversion",
             key="productversion",
             queryset=model.ProductVersion.objects.all()),
-        filters.KeywordFilter("instruction", lookup="steps__instruction"),
-        filters.KeywordFilter(
+        cases.SearchFilter(
+            "instruction", lookup="steps__instruction", field="instruction"),
+        cases.SearchFilter(
             "expected result",
             lookup="steps__expected",
-            key="expected"),
+            key="expected",
+            field="expected"),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         filters.ModelFilter(
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         filters.ModelFilter(
-            "suite", lookup="case__suites", queryset=model.Suite.objects.all()),
+            "suite",
+            lookup="case__suites",
+            queryset=model.Suite.objects.all(),
+            lazy=True),
         ]
 
 
@@ -231,7 +292,11 @@ class TagFilterSet(filters.FilterSet):
         filters.KeywordFilter("name"),
         filters.ModelFilter("product", queryset=model.Product.objects.all()),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
@@ -244,9 +309,14 @@ class ProfileFilterSet(filters.FilterSet):
             "environment element",
             lookup="environments__elements",
             key="envelement",
-            queryset=model.Element.objects.all()),
+            queryset=model.Element.objects.all(),
+            lazy=True),
         filters.ModelFilter(
-            "creator", lookup="created_by", queryset=model.User.objects.all()),
+            "creator",
+            lookup="created_by",
+            queryset=model.User.objects.all(),
+            lazy=True,
+            search="username"),
         ]
 
 
@@ -1,6 +1,10 @@
 from filters import KeywordFilter
+from django.db import connections
 from django.db.models import Q
 
+from moztrap import model
+from moztrap.model.library.search import tokenize
+
 class PrefixIDFilter(KeywordFilter):
     """
     A string and an int, separated by a delimiter.
@@ -45,6 +49,132 @@ class PrefixIDFilter(KeywordFilter):
             query_filters = query_filters | Q(**kwargs)
 
         if values:
-            return queryset.filter(query_filters).distinct()
+            return queryset.filter(query_filters)
+
+        return queryset
+
+
+
+# indexed fields whose terms come from case steps
+STEP_FIELDS = ["instruction", "expected"]
+
+
+
+def with_relevance(queryset):
+    """
+    Add a zero "relevance" score to ``queryset`` so it can be sorted on.
+
+    ``SearchFilter`` adds to this score for each matching term; adding it to
+    the unfiltered queryset allows the sort decorator (which runs before
+    filtering) to order by it.
+
+    """
+    return queryset.extra(select={"relevance": "0"})
+
+
+
+class SearchFilter(KeywordFilter):
+    """
+    A KeywordFilter answered from the case version full-text search index.
+
+    Every word of each value must match the start of a word in the indexed
+    ``field`` ("name", "description", "instruction" or "expected"), so "brow"
+    matches "browser". Words of step fields may match in different steps of
+    the same case version; deleted steps are ignored. ``via`` is the lookup
+    from the filtered model to its case version ("pk" when filtering case
+    versions themselves). Values with no words in them fall back to the plain
+    ``icontains`` search on ``lookup``.
+
+    Matching terms are also summed into a "relevance" score on the queryset
+    (see ``with_relevance``).
+
+    """
+    def __init__(self, name, field, via="pk", **kwargs):
+        """Looks for ``field`` and ``via`` arguments."""
+        self.field = field
+        self.via = via
+        super(SearchFilter, self).__init__(name, **kwargs)
+
+
+    def filter(self, queryset, values):
+        """Values are ANDed; each of their words must match an index term."""
+        all_terms = []
+        for value in values:
+            terms = tokenize(value)
+            if not terms:
+                queryset = super(SearchFilter, self).filter(queryset, [value])
+                continue
+            for term in terms:
+                matching = self.terms().filter(
+                    term__startswith=term).values("caseversion")
+                queryset = queryset.filter(
+                    **{"{0}__in".format(self.via): matching})
+            all_terms.extend(terms)
+
+        if all_terms:
+            queryset = self.add_relevance(queryset, all_terms)
 
         return queryset
+
+
+    def terms(self):
+        """
+        Return queryset of index terms of our field.
+
+        Terms of deleted steps are kept in the index (so undeleting a step
+        needs no re-indexing), but excluded here.
+
+        """
+        terms = model.CaseVersionTerm.objects.filter(field=self.field)
+        if self.field in STEP_FIELDS:
+            terms = terms.filter(step__deleted_on__isnull=True)
+        return terms
+
+
+    def add_relevance(self, queryset, terms):
+        """Add the weight of ``terms`` matched in our field to relevance."""
+        connection = connections[queryset.db]
+        qn = connection.ops.quote_name
+        like = connection.operators["startswith"]
+        opts = queryset.model._meta
+        if self.via == "pk":
+            column = opts.pk.column
+        else:
+            column = opts.get_field(self.via).column
+        term_opts = model.CaseVersionTerm._meta
+        step_opts = model.CaseStep._meta
+
+        join = ""
+        if self.field in STEP_FIELDS:
+            join = (
+                "INNER JOIN {0} mtstep ON mtstep.{1} = mtterm.{2} "
+                "AND mtstep.{3} IS NULL ".format(
+                    qn(step_opts.db_table),
+                    qn(step_opts.pk.column),
+                    qn(term_opts.get_field("step").column),
+                    qn(step_opts.get_field("deleted_on").column),
+                    )
+                )
+        sql = (
+            "SELECT COALESCE(SUM(mtterm.weight), 0) FROM {0} mtterm {1}"
+            "WHERE mtterm.{2} = {3}.{4} AND mtterm.field = %s "
+            "AND ({5})".format(
+                qn(term_opts.db_table),
+                join,
+                qn(term_opts.get_field("caseversion").column),
+                qn(opts.db_table),
+                qn(column),
+                " OR ".join(["mtterm.term " + like] * len(terms)),
+                )
+            )
+        params = [self.field] + [
+            connection.ops.prep_for_like_query(t) + "%" for t in terms]
+
+        previous = queryset.query.extra.get("relevance")
+        if previous is not None:
+            sql = u"({0}) + ({1})".format(previous[0], sql)
+            params = list(previous[1]) + params
+        else:
+            sql = u"({0})".format(sql)
+        return queryset.extra(
+            select={"relevance": sql}, select_params=params)
@@ -6,6 +6,8 @@ from collections import namedtuple
 from functools import wraps
 
 from django.core.urlresolvers import reverse, resolve
+from django.db.models import Q
+from django.db.models.fields import FieldDoesNotExist
 from django.utils.datastructures import MultiValueDict
 
 
@@ -42,6 +44,51 @@ def filter_url(path_or_view, obj):
 
 
 
+def is_multivalued(model, lookup):
+    """
+    Return True if ``lookup`` on ``model`` traverses a multi-valued relation.
+
+    Lookups that traverse a many-to-many or reverse foreign key relation can
+    match several related rows per object, so a JOIN on them duplicates rows.
+
+    """
+    opts = model._meta
+    for part in lookup.split("__"):
+        try:
+            field, _, direct, m2m = opts.get_field_by_name(part)
+        except FieldDoesNotExist:
+            # "pk", or a lookup type such as "in" or "icontains"
+            return False
+        if m2m or not direct:
+            return True
+        if field.rel is None:
+            return False
+        opts = field.rel.to._meta
+    return False
+
+
+
+def filter_lookup(queryset, lookup, value, within=None):
+    """
+    Filter ``queryset`` on ``lookup=value`` without duplicating rows.
+
+    Lookups across multi-valued relations are compiled to a ``pk IN (SELECT
+    ...)`` subquery rather than a JOIN, so the result never needs
+    ``.distinct()``; single-valued lookups are applied directly. ``within`` is
+    an optional dictionary of further lookups applied in the same subquery, so
+    that they constrain the same related row as ``lookup``.
+
+    """
+    if within or is_multivalued(queryset.model, lookup):
+        lookups = dict(within or {})
+        lookups[lookup] = value
+        matching = queryset.model._base_manager.filter(
+            **lookups).values("pk")
+        return queryset.filter(pk__in=matching)
+    return queryset.filter(**{lookup: value})
+
+
+
 def filter(ctx_name, filters=None, filterset_class=None):
     """
     View decorator that handles filtering of a queryset.
@@ -238,7 +285,7 @@ class Filter(object):
     cls = ""
 
 
-    def __init__(self, name, lookup=None, key=None, coerce=None):
+    def __init__(self, name, lookup=None, key=None, coerce=None, within=None):
         """
         Instantiate the Filter.
 
@@ -247,20 +294,23 @@ class Filter(object):
         this filter is found in the provided filter data. Both ``lookup`` and
         ``key`` default to ``name`` if not provided. ``coerce`` is a
         one-argument function to coerce values to the correct type for this
-        filter; it may raise ValueError or TypeError.
+        filter; it may raise ValueError or TypeError. ``within`` is an optional
+        dictionary of lookups the related row matched by ``lookup`` must also
+        satisfy (see ``filter_lookup``).
 
         """
         self.name = name
         self.lookup = name if lookup is None else lookup
         self.key = name if key is None else key
         self._coerce_func = coerce
+        self.within = within
 
 
     def filter(self, queryset, values):
         """Given queryset and selected values, return filtered queryset."""
         if values:
-            return queryset.filter(
-                **{"{0}__in".format(self.lookup): values}).distinct()
+            return filter_lookup(
+                queryset, "{0}__in".format(self.lookup), values, self.within)
         return queryset
 
 
@@ -339,21 +389,35 @@ class ModelFilter(BaseChoicesFilter):
     By default, assumes the model has a numeric primary key; if not an
     alternative ``coerce`` function should be provided at instantiation.
 
+    A ``lazy`` ModelFilter never loads its whole queryset: only the selected
+    values are resolved when filtering, and other options are found on demand
+    through ``search`` (served to the filter UI by the ``filter_options``
+    view).
+
     """
     def __init__(self, *args, **kwargs):
         """
-        Looks for ``queryset`` and ``label`` keyword arguments.
+        Looks for ``queryset``, ``label``, ``lazy`` and ``search`` arguments.
 
         ``queryset`` should contain the model instances that are the options
         available for this filter; ``label`` is an optional one-argument
         callable that returns the display label for each object, given the
-        object.
+        object. If ``lazy`` is True, options are not listed up front;
+        ``search`` is the field name (or list of field names) matched by
+        prefix when searching options, default "name".
 
         """
         self.queryset = kwargs.pop("queryset")
         self.label_func = kwargs.pop("label", lambda o: unicode(o))
+        self.lazy = kwargs.pop("lazy", False)
+        search = kwargs.pop("search", "name")
+        if isinstance(search, basestring):
+            search = [search]
+        self.search_fields = search
         kwargs.setdefault("coerce", int)
         super(ModelFilter, self).__init__(*args, **kwargs)
+        if self.lazy:
+            self.cls = "lazy"
 
 
     def get_choices(self):
@@ -362,6 +426,54 @@ class ModelFilter(BaseChoicesFilter):
         return [(obj.pk, self.label_func(obj)) for obj in self.queryset.all()]
 
 
+    def options(self, values):
+        """Given list of selected values, return options to display."""
+        if not self.lazy:
+            return super(ModelFilter, self).options(values)
+        if not values:
+            return []
+        return [
+            (obj.pk, self.label_func(obj))
+            for obj in self.queryset.filter(pk__in=values)
+            ]
+
+
+    def values(self, data):
+        """Given data dict, return list of selected values."""
+        if not self.lazy:
+            return super(ModelFilter, self).values(data)
+        values = [
+            v for v in Filter.values(self, data) if v is not None]
+        if not values:
+            return []
+        valid = set(
+            self.queryset.filter(pk__in=values).values_list("pk", flat=True))
+        return [v for v in values if v in valid]
+
+
+    def search(self, text, pagenumber=1, pagesize=20):
+        """
+        Return (options, more) for objects whose search fields start with text.
+
+        ``options`` is a list of (value, label) tuples for the requested page,
+        ``more`` is True if there are further pages.
+
+        """
+        qs = self.queryset.all()
+        if text:
+            q = Q()
+            for field in self.search_fields:
+                q = q | Q(**{"{0}__istartswith".format(field): text})
+            qs = qs.filter(q)
+        qs = qs.order_by(*self.search_fields)
+        low = (pagenumber - 1) * pagesize
+        objs = list(qs[low:low + pagesize + 1])
+        return (
+            [(obj.pk, self.label_func(obj)) for obj in objs[:pagesize]],
+            len(objs) > pagesize,
+            )
+
+
 
 class KeywordExactFilter(Filter):
     """Allows user to input arbitrary filter values; no pre-set options list."""
@@ -381,10 +493,11 @@ class KeywordFilter(KeywordExactFilter):
     def filter(self, queryset, values):
         """Values are ANDed in a 'contains' search of the field text."""
         for value in values:
-            queryset = queryset.filter(
-                **{"{0}__icontains".format(self.lookup): value})
-
-        if values:
-            return queryset.distinct()
+            queryset = filter_lookup(
+                queryset,
+                "{0}__icontains".format(self.lookup),
+                value,
+                self.within,
+                )
 
         return queryset
@@ -2,8 +2,17 @@
 List pagination utilities.
 
 """
+import hashlib
 import math
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, DatabaseError
+from django.db.models import get_models
+from django.db.models.sql.query import Query
+
+from moztrap.model.mtmodel import generation
+
 from ..utils.querystring import update_querystring
 
 
@@ -11,6 +20,12 @@ from ..utils.querystring import update_querystring
 PAGESIZES = [10, 20, 50, 100]
 DEFAULT_PAGESIZE = 20
 
+# seconds an exact count is cached for a given list view and filter set
+COUNT_CACHE_TIMEOUT = 60
+
+# tables estimated to be smaller than this are always counted exactly
+ESTIMATE_THRESHOLD = 1000
+
 
 
 def from_request(request):
@@ -36,13 +51,254 @@ def pagenumber_url(url, pagenumber):
 
 
 
+def count_key(request):
+    """
+    Return a key identifying the list view and filters of ``request``.
+
+    Only filter parameters affect the count of a list, so pagination and
+    sorting parameters are ignored, and filter keys and values are sorted so
+    that equivalent querystrings produce the same key.
+
+    """
+    GET = request.GET
+    params = []
+    for key in sorted(k for k in GET.keys() if k.startswith("filter-")):
+        try:
+            values = GET.getlist(key)
+        except AttributeError:
+            values = [GET[key]]
+        params.extend(u"{0}={1}".format(key, v) for v in sorted(values))
+    return u"{0}?{1}".format(request.path, u"&".join(params))
+
+
+
+def counter_from_request(request, strategy=None):
+    """
+    Return the count strategy to use for paginating a list in ``request``.
+
+    ``strategy`` is one of "exact", "cached" or "estimated"; if not given, the
+    ``PAGINATION_COUNT`` setting is used (default "exact").
+
+    """
+    if strategy is None:
+        strategy = getattr(settings, "PAGINATION_COUNT", "exact")
+    if strategy == "exact":
+        return ExactCount()
+    if strategy == "cached":
+        return CachedCount(count_key(request))
+    if strategy == "estimated":
+        filtered = any(k.startswith("filter-") for k in request.GET.keys())
+        return EstimatedCount(filtered=filtered)
+    raise ValueError("Unknown pagination count strategy {0!r}".format(strategy))
+
+
+
+class ExactCount(object):
+    """Counts the queryset exactly each time a Pager needs a total."""
+    def count(self, queryset):
+        """Return tuple (total, estimated) for ``queryset``."""
+        return queryset.count(), False
+
+
+
+class CachedCount(ExactCount):
+    """
+    Caches exact counts under a key identifying the list and its filters.
+
+    Cached counts expire after ``timeout`` seconds, and are invalidated by any
+    write to a table the queryset reads (via the write generations of every
+    model of the table, so writes through proxy models and many-to-many
+    relations count). Counts are only invalidated across processes if the
+    cache backend is shared by all of them.
+
+    """
+    def __init__(self, key, timeout=None):
+        """Initialize with a list ``key`` (see ``count_key``) and timeout."""
+        self.key = key
+        self.timeout = COUNT_CACHE_TIMEOUT if timeout is None else timeout
+
+
+    def cache_key(self, queryset):
+        """Return the cache key for the count of ``queryset``."""
+        generations = u"&".join(
+            u"{0}.{1}={2}".format(
+                model._meta.app_label,
+                model._meta.object_name,
+                generation(model),
+                )
+            for model in table_models(query_tables(queryset.query))
+            )
+        return "pagination:count:{0}".format(
+            hashlib.md5(
+                u"{0}|{1}".format(self.key, generations).encode("utf-8")
+                ).hexdigest()
+            )
+
+
+    def count(self, queryset):
+        """Return tuple (total, estimated), from cache if possible."""
+        key = self.cache_key(queryset)
+        total = cache.get(key)
+        if total is None:
+            total = queryset.count()
+            cache.set(key, total, self.timeout)
+        return total, False
+
+
+
+def query_tables(query):
+    """Return set of the tables ``query`` reads, including in subqueries."""
+    tables = set([query.model._meta.db_table])
+    tables.update(join[0] for join in query.alias_map.values())
+    nodes = [query.where]
+    while nodes:
+        node = nodes.pop()
+        for child in node.children:
+            if hasattr(child, "children"):
+                nodes.append(child)
+                continue
+            try:
+                constraint, lookup_type, annotation, value = child
+            except (TypeError, ValueError):
+                continue
+            subquery = getattr(value, "query", value)
+            if isinstance(subquery, Query):
+                tables.update(query_tables(subquery))
+    return tables
+
+
+
+def table_models(tables):
+    """
+    Return list of models (including proxy and through models) of ``tables``.
+
+    Models are in order of app label and name.
+
+    """
+    return sorted(
+        [
+            m for m in get_models(include_auto_created=True)
+            if m._meta.db_table in tables
+            ],
+        key=lambda m: (m._meta.app_label, m._meta.object_name),
+        )
+
+
+
+class EstimatedCount(object):
+    """
+    Uses database table statistics to estimate the size of unfiltered lists.
+
+    Filtered lists, small tables and databases without usable statistics fall
+    back to the ``fallback`` strategy.
+
+    """
+    def __init__(self, fallback=None, filtered=False):
+        """
+        Initialize with ``fallback`` strategy (default ``ExactCount``).
+
+        ``filtered`` should be True if the user has applied list filters.
+
+        """
+        self.fallback = fallback or ExactCount()
+        self.filtered = filtered
+
+
+    def count(self, queryset):
+        """Return tuple (total, estimated)."""
+        if not self.filtered and is_unfiltered(queryset):
+            estimate = estimate_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate, True
+        return self.fallback.count(queryset)
+
+
+
+def is_unfiltered(queryset):
+    """
+    Return True if ``queryset`` is a plain listing of its table.
+
+    The only restriction allowed is the implicit ``deleted_on IS NULL`` of the
+    default manager.
+
+    """
+    query = queryset.query
+    if query.distinct or query.low_mark or query.high_mark is not None:
+        return False
+    return _only_not_deleted(query.where)
+
+
+
+def _only_not_deleted(node):
+    """True if where-node ``node`` contains no constraint but not-deleted."""
+    if node.negated:
+        return False
+    for child in node.children:
+        if hasattr(child, "children"):
+            if not _only_not_deleted(child):
+                return False
+            continue
+        try:
+            constraint, lookup_type, annotation, value = child
+        except (TypeError, ValueError):
+            return False
+        if (getattr(constraint, "col", None) != "deleted_on"
+                or lookup_type != "isnull" or value is not True):
+            return False
+    return True
+
+
+
+def estimate_rows(model, using="default"):
+    """
+    Return the database's estimate of the row count of ``model``'s table.
+
+    Uses ``information_schema`` on MySQL and ``sqlite_stat1`` (populated by
+    ``ANALYZE``) on SQLite. Returns None if no estimate is available.
+
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    engine = connection.settings_dict["ENGINE"]
+    if "mysql" in engine:
+        sql = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+            )
+    elif "sqlite" in engine:
+        sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx IS NULL"
+    else:
+        return None
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    try:
+        return int(unicode(row[0]).split()[0])
+    except (IndexError, ValueError):
+        return None
+
+
+
 class Pager(object):
     """Handles pagination given queryset, page size, and page number."""
-    def __init__(self, queryset, pagesize, pagenumber):
-        """Initialize a ``Pager`` with queryset, page size, and page number."""
+    def __init__(self, queryset, pagesize, pagenumber, counter=None):
+        """
+        Initialize a ``Pager`` with queryset, page size, and page number.
+
+        ``counter`` is an optional count strategy (``ExactCount``,
+        ``CachedCount`` or ``EstimatedCount``); defaults to ``ExactCount``.
+
+        """
         self._queryset = queryset
         self._sliced_qs = None
         self._cached_total = None
+        self._estimated = False
+        self._counter = counter or ExactCount()
         self.pagesize = pagesize
         self.pagenumber = pagenumber
 
@@ -93,10 +349,18 @@ class Pager(object):
     def total(self):
         """The total number of objects."""
         if self._cached_total is None:
-            self._cached_total = self._queryset.count()
+            self._cached_total, self._estimated = self._counter.count(
+                self._queryset)
         return self._cached_total
 
 
+    @property
+    def estimated(self):
+        """True if ``total`` is an estimate rather than an exact count."""
+        self.total
+        return self._estimated
+
+
     @property
     def objects(self):
         """
@@ -16,20 +16,33 @@ register = Library()
 
 
 class Paginate(Tag):
-    """Paginate the given queryset, placing a Pager in the template context."""
+    """
+    Paginate the given queryset, placing a Pager in the template context.
+
+    An optional count strategy ("exact", "cached" or "estimated") may be given
+    after ``count``; otherwise the ``PAGINATION_COUNT`` setting applies.
+
+    """
     name = "paginate"
     options = Options(
         Argument("queryset"),
         "as",
         Argument("varname", resolve=False),
+        "count",
+        Argument("strategy", required=False, resolve=False),
         )
 
 
-    def render_tag(self, context, queryset, varname):
+    def render_tag(self, context, queryset, varname, strategy):
         """Place Pager for given ``queryset`` in context as ``varname``."""
         request = context["request"]
         pagesize, pagenum = pagination.from_request(request)
-        context[varname] = pagination.Pager(queryset, pagesize, pagenum)
+        context[varname] = pagination.Pager(
+            queryset,
+            pagesize,
+            pagenum,
+            counter=pagination.counter_from_request(request, strategy),
+            )
         return u""
 
 
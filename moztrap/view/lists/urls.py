@@ -0,0 +1,16 @@
+"""
+URLconf for list-page support views.
+
+"""
+from django.conf.urls.defaults import patterns, url
+
+
+
+urlpatterns = patterns(
+    "moztrap.view.lists.views",
+
+    url(r"^_filter_options/$",
+        "filter_options",
+        name="lists_filter_options"),
+
+)
@@ -0,0 +1,63 @@
+"""
+Views supporting list pages.
+
+"""
+import json
+
+from django.core.urlresolvers import resolve, Resolver404
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+from django.views.decorators.cache import never_cache
+
+from moztrap.view.utils.auth import login_maybe_required
+
+from .pagination import from_request
+
+
+
+@never_cache
+@login_maybe_required
+def filter_options(request):
+    """
+    Return a page of options for a lazy ModelFilter, in JSON format.
+
+    Expects querystring parameters ``path`` (the path of the list view whose
+    filter is searched), ``key`` (the filter key) and ``text`` (the prefix
+    typed so far), plus the usual ``pagesize`` and ``pagenumber``. Requires
+    the permission (if any) required by the list view itself.
+
+    """
+    path = request.GET.get("path", "")
+    key = request.GET.get("key")
+    text = request.GET.get("text", "")
+    try:
+        view_func = resolve(path).func
+    except Resolver404:
+        raise Http404
+    permission = getattr(view_func, "permission", None)
+    if permission and not request.user.has_perm(permission):
+        return HttpResponseForbidden(
+            "You do not have permission to view this list.")
+    filterset = getattr(view_func, "filterset", None)
+    if filterset is None:
+        raise Http404
+    for flt in filterset:
+        if flt.key == key and getattr(flt, "lazy", False):
+            break
+    else:
+        raise Http404
+
+    pagesize, pagenumber = from_request(request)
+    options, more = flt.search(text, pagenumber, pagesize)
+
+    return HttpResponse(
+        json.dumps(
+            {
+                "options": [
+                    {"value": value, "label": label}
+                    for value, label in options
+                    ],
+                "more": more,
+                }
+            ),
+        content_type="application/json",
+        )
@@ -8,6 +8,7 @@ from django.forms.models import inlineformset_factory, BaseInlineFormSet
 import floppyforms as forms
 
 from .... import model
+from ....model.mtmodel import bulk_insert, bump_generation
 
 from ...utils import mtforms
 
@@ -157,6 +158,100 @@ class BaseAddCaseForm(forms.Form):
         return self.cleaned_data
 
 
+    def create_cases(self, case_dicts):
+        """
+        Create a case for each of ``case_dicts``, with all called-for versions.
+
+        Each case dictionary has "name", "description" and "steps" keys; each
+        step is a dictionary with "instruction" and "expected" keys. Every new
+        case version gets the selected status, the tags in
+        ``cleaned_data["tags"]`` and its product version's environments. All
+        rows are inserted in bulk, so the number of queries doesn't grow with
+        the number of cases or versions. Returns list of new cases.
+
+        """
+        product = self.cleaned_data["product"]
+        productversions = [self.cleaned_data["productversion"]]
+        if self.cleaned_data.get("and_later_versions"):
+            productversions.extend(product.versions.filter(
+                    order__gt=productversions[0].order))
+        latest = max(productversions, key=lambda pv: pv.order)
+        tracking = {"created_by": self.user, "modified_by": self.user}
+
+        cases = bulk_insert(
+            model.Case(
+                product=product,
+                idprefix=self.cleaned_data["idprefix"],
+                **tracking)
+            for case_data in case_dicts
+            )
+
+        initial_suite = self.cleaned_data.get("initial_suite")
+        if initial_suite:
+            bulk_insert(
+                model.SuiteCase(case=case, suite=initial_suite, **tracking)
+                for case in cases
+                )
+
+        # (case data, CaseVersion) for each new case version
+        new = [
+            (
+                case_data,
+                model.CaseVersion(
+                    case=case,
+                    productversion=productversion,
+                    name=case_data["name"],
+                    description=case_data["description"],
+                    status=self.cleaned_data["status"],
+                    latest=(productversion == latest),
+                    **tracking)
+                )
+            for case, case_data in zip(cases, case_dicts)
+            for productversion in productversions
+            ]
+        caseversions = bulk_insert(cv for (case_data, cv) in new)
+
+        # new case versions inherit their product version's environments
+        environment_ids = {}
+        ProductVersionEnvironment = model.ProductVersion.environments.through
+        for pv_id, env_id in ProductVersionEnvironment.objects.filter(
+                productversion__in=productversions).values_list(
+                "productversion", "environment"):
+            environment_ids.setdefault(pv_id, []).append(env_id)
+        bulk_insert(
+            model.CaseVersion.environments.through(
+                caseversion=cv, environment_id=env_id)
+            for cv in caseversions
+            for env_id in environment_ids.get(cv.productversion_id, [])
+            )
+
+        bulk_insert(
+            model.CaseStep(
+                caseversion=cv,
+                number=i,
+                instruction=step_data["instruction"],
+                expected=step_data.get("expected", ""),
+                **tracking)
+            for (case_data, cv) in new
+            for i, step_data in enumerate(case_data["steps"], 1)
+            )
+
+        tags = self.cleaned_data.get("tags", set())
+        if tags:
+            bulk_insert(
+                model.CaseVersion.tags.through(caseversion=cv, tag_id=tag_id)
+                for cv in caseversions
+                for tag_id in tags
+                )
+            bump_generation(model.Tag)
+
+        model.CaseVersionTerm.objects.rebuild(
+            model.CaseVersion.everything.filter(
+                id__in=[cv.id for cv in caseversions]))
+
+        return cases
+
+
 
 class AddCaseForm(BaseAddCaseForm, BaseCaseVersionForm, BaseCaseForm):
     """Form for adding a new single case and some number of versions."""
@@ -178,44 +273,28 @@ class AddCaseForm(BaseAddCaseForm, BaseCaseVersionForm, BaseCaseForm):
         """Create new case and all called-for versions."""
         assert self.is_valid()
 
-        version_kwargs = self.cleaned_data.copy()
-        product = version_kwargs.pop("product")
-        idprefix = version_kwargs.pop("idprefix")
-
-        self.save_new_tags(product)
-
-        case = model.Case.objects.create(
-            product=product,
-            user=self.user,
-            idprefix=idprefix,
-            )
-
-        version_kwargs["case"] = case
-        version_kwargs["user"] = self.user
-
-        del version_kwargs["add_tags"]
-        del version_kwargs["add_attachment"]
-
-        initial_suite = version_kwargs.pop("initial_suite", None)
-        if initial_suite:
-            model.SuiteCase.objects.create(
-                case=case, suite=initial_suite, user=self.user)
-
-        productversions = [version_kwargs.pop("productversion")]
-        if version_kwargs.pop("and_later_versions"):
-            productversions.extend(product.versions.filter(
-                    order__gt=productversions[0].order))
-
-        for productversion in productversions:
-            this_version_kwargs = version_kwargs.copy()
-            this_version_kwargs["productversion"] = productversion
-            caseversion = model.CaseVersion.objects.create(
-                **this_version_kwargs)
-            steps_formset = StepFormSet(
-                data=self.data, instance=caseversion)
-            steps_formset.save(user=self.user)
-            self.save_tags(caseversion)
-            self.save_attachments(caseversion)
+        self.save_new_tags(self.cleaned_data["product"])
+
+        steps = [form.save(commit=False) for form in self.steps_formset.forms]
+        case = self.create_cases(
+            [
+                {
+                    "name": self.cleaned_data["name"],
+                    "description": self.cleaned_data["description"],
+                    "steps": [
+                        {
+                            "instruction": step.instruction,
+                            "expected": step.expected,
+                            }
+                        for step in steps
+                        ],
+                    },
+                ]
+            )[0]
+
+        if self.files:
+            for caseversion in case.versions.all():
+                self.save_attachments(caseversion)
 
         return case
 
@@ -227,12 +306,14 @@ class AddBulkCaseForm(BaseAddCaseForm, BaseCaseForm):
 
 
     def clean_cases(self):
-        """Validate the bulk cases text."""
-        data = model.BulkParser().parse(self.cleaned_data["cases"])
-
-        for d in data:
+        """Validate the bulk cases text, stopping at the first error."""
+        data = []
+        parser = model.BulkParser()
+        for d in parser.iter_parse(self.cleaned_data["cases"].splitlines()):
             if "error" in d:
-                raise forms.ValidationError(d["error"])
+                raise forms.ValidationError(
+                    "Line {0}: {1}".format(d["line"], d["error"]))
+            data.append(d)
 
         return data
 
@@ -257,54 +338,9 @@ class AddBulkCaseForm(BaseAddCaseForm, BaseCaseForm):
         """Create and return the new case(s) and version(s)."""
         assert self.is_valid()
 
-        product = self.cleaned_data["product"]
-        idprefix = self.cleaned_data["idprefix"]
-
-        self.save_new_tags(product)
-
-        productversions = [self.cleaned_data["productversion"]]
-        if self.cleaned_data.get("and_later_versions"):
-            productversions.extend(product.versions.filter(
-                    order__gt=productversions[0].order))
-
-        initial_suite = self.cleaned_data.get("initial_suite")
-
-        cases = []
-
-        for case_data in self.cleaned_data["cases"]:
-            case = model.Case.objects.create(
-                product=product,
-                user=self.user,
-                idprefix=idprefix,
-                )
-
-            version_kwargs = case_data.copy()
-            steps_data = version_kwargs.pop("steps")
-
-            version_kwargs["case"] = case
-            version_kwargs["status"] = self.cleaned_data["status"]
-            version_kwargs["user"] = self.user
+        self.save_new_tags(self.cleaned_data["product"])
 
-            if initial_suite:
-                model.SuiteCase.objects.create(
-                    case=case, suite=initial_suite, user=self.user)
-
-            for productversion in productversions:
-                this_version_kwargs = version_kwargs.copy()
-                this_version_kwargs["productversion"] = productversion
-                caseversion = model.CaseVersion.objects.create(
-                    **this_version_kwargs)
-                for i, step_kwargs in enumerate(steps_data, 1):
-                    model.CaseStep.objects.create(
-                        user=self.user,
-                        caseversion=caseversion,
-                        number=i,
-                        **step_kwargs)
-                self.save_tags(caseversion)
-
-            cases.append(case)
-
-        return cases
+        return self.create_cases(self.cleaned_data["cases"])
 
 
 
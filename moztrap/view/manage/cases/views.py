@@ -15,6 +15,7 @@ from moztrap import model
 
 from moztrap.view.filters import CaseVersionFilterSet
 from moztrap.view.lists import decorators as lists
+from moztrap.view.lists.cases import with_relevance
 from moztrap.view.users.decorators import permission_required
 from moztrap.view.utils.ajax import ajax
 from moztrap.view.utils.auth import login_maybe_required
@@ -46,7 +47,8 @@ def cases_list(request):
         request,
         "manage/case/cases.html",
         {
-            "caseversions": model.CaseVersion.objects.select_related("case"),
+            "caseversions": with_relevance(
+                model.CaseVersion.objects.select_related("case")),
             }
         )
 
@@ -14,6 +14,7 @@ from django.contrib.auth.views import redirect_to_login
 from django.contrib import messages
 
 from moztrap import model
+from moztrap.model import autocomplete
 
 from moztrap.view.filters import ProfileFilterSet, EnvironmentFilterSet
 from moztrap.view.lists import decorators as lists
@@ -197,19 +198,18 @@ def element_autocomplete(request):
     text = request.GET.get("text")
     elements = []
     if text is not None:
-        elements = model.Element.objects.filter(
-            name__icontains=text)
+        elements = autocomplete.elements.search(text)
     suggestions = []
     for e in elements:
-        start = e.name.lower().index(text.lower())
-        pre = e.name[:start]
-        post = e.name[start+len(text):]
+        start = e["name"].lower().index(text.lower())
+        pre = e["name"][:start]
+        post = e["name"][start+len(text):]
         suggestions.append({
                 "preText": pre,
                 "typedText": text,
                 "postText": post,
-                "id": e.id,
-                "name": e.name,
+                "id": e["id"],
+                "name": e["name"],
                 "type": "element",
                 })
     return HttpResponse(
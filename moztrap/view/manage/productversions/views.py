@@ -2,13 +2,16 @@
 Manage views for productversions.
 
 """
+from django.http import HttpResponse, Http404
 from django.shortcuts import get_object_or_404, redirect
+from django.template.defaultfilters import slugify
 from django.template.response import TemplateResponse
 from django.views.decorators.cache import never_cache
 
 from django.contrib import messages
 
 from moztrap import model
+from moztrap.model.library import exporter
 
 from moztrap.view.filters import ProductVersionFilterSet
 from moztrap.view.lists import decorators as lists
@@ -110,3 +113,31 @@ def productversion_edit(request, productversion_id):
             "productversion": productversion,
             }
         )
+
+
+
+@never_cache
+@login_maybe_required
+def productversion_export(request, productversion_id):
+    """
+    Download suites and cases of a productversion, in importable format.
+
+    The "format" query parameter may be "json" (the default) or "ndjson". The
+    response is generated as it is sent, a chunk of cases at a time.
+
+    """
+    productversion = get_object_or_404(
+        model.ProductVersion, pk=productversion_id)
+    file_format = request.GET.get("format", "json")
+    if file_format not in exporter.WRITERS:
+        raise Http404
+    response = HttpResponse(
+        exporter.WRITERS[file_format](
+            exporter.export_items(productversion)),
+        content_type=exporter.CONTENT_TYPES[file_format],
+        )
+    response["Content-Disposition"] = (
+        "attachment; filename={0}.{1}".format(
+            slugify(productversion.name), file_format)
+        )
+    return response
@@ -2,9 +2,12 @@
 Management forms for runs.
 
 """
+from django.core.urlresolvers import reverse
+
 import floppyforms as forms
 
 from moztrap import model
+from moztrap.model.mtmodel import sync_ordered
 from moztrap.view.lists import filters
 from moztrap.view.utils import mtforms
 
@@ -17,14 +20,20 @@ class RunForm(mtforms.NonFieldErrorsClassFormMixin, mtforms.MTModelForm):
         queryset=model.Suite.objects.all(),
         required=False,
         choice_attrs=mtforms.product_id_attrs,
-        widget=mtforms.FilteredSelectMultiple(
+        select_related=["created_by"],
+        widget=mtforms.LazyFilteredSelectMultiple(
+            url=lambda: reverse("manage_run_suite_options"),
+            product_trigger="#id_productversion",
             choice_template="manage/run/suite_select/_suite_select_item.html",
             listordering_template=(
                 "manage/run/suite_select/_suite_select_listordering.html"),
             filters=[
                 filters.KeywordFilter("name"),
                 filters.ModelFilter(
-                    "author", queryset=model.User.objects.all()),
+                    "author",
+                    lookup="created_by",
+                    queryset=model.User.objects.all(),
+                    ),
                 ],
             )
         )
@@ -49,10 +58,14 @@ class RunForm(mtforms.NonFieldErrorsClassFormMixin, mtforms.MTModelForm):
         user = user or self.user
         run = super(RunForm, self).save(user=user)
 
-        run.runsuites.all().delete(permanent=True)
-        for i, suite in enumerate(self.cleaned_data["suites"]):
-            model.RunSuite.objects.create(
-                run=run, suite=suite, order=i, user=user)
+        sync_ordered(
+            model.RunSuite,
+            "run",
+            run,
+            "suite",
+            self.cleaned_data["suites"],
+            user=user,
+            )
 
         return run
 
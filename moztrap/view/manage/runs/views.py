@@ -2,6 +2,9 @@
 Manage views for runs.
 
 """
+import json
+
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 from django.views.decorators.cache import never_cache
@@ -109,3 +112,26 @@ def run_edit(request, run_id):
             "run": run,
             }
         )
+
+
+
+@never_cache
+@permission_required("execution.manage_runs")
+def run_suite_options(request):
+    """
+    Return a page of suites available to add to a run, in JSON format.
+
+    Accepts the filter parameters of the form's ``suites`` widget, plus
+    ``product`` (a product ID) and ``pagesize`` and ``pagenumber``.
+
+    """
+    field = forms.RunForm.base_fields["suites"]
+    queryset = field.queryset.all()
+    try:
+        queryset = queryset.filter(product=int(request.GET["product"]))
+    except (KeyError, ValueError):
+        pass
+    return HttpResponse(
+        json.dumps(field.widget.options(field, queryset, request.GET)),
+        content_type="application/json",
+        )
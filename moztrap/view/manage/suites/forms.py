@@ -2,32 +2,55 @@
 Management forms for suites.
 
 """
+from django.core.urlresolvers import reverse
+
 import floppyforms as forms
 
 from moztrap import model
+from moztrap.model.mtmodel import sync_ordered
 from moztrap.view.lists import filters
 from moztrap.view.utils import mtforms
 
 
 
+# cases are listed, and so filtered, by their latest version
+LATEST_VERSION = {"versions__latest": True}
+
+
+
 class SuiteForm(mtforms.NonFieldErrorsClassFormMixin, mtforms.MTModelForm):
     """Base form for adding/editing suites."""
     cases = mtforms.MTModelMultipleChoiceField(
         queryset=model.Case.objects.all(),
         required=False,
         choice_attrs=mtforms.product_id_attrs,
-        widget=mtforms.FilteredSelectMultiple(
+        select_related=["created_by"],
+        prefetch=model.Case.preload_latest_versions,
+        widget=mtforms.LazyFilteredSelectMultiple(
+            url=lambda: reverse("manage_suite_case_options"),
             choice_template="manage/suite/case_select/_case_select_item.html",
             listordering_template=(
                 "manage/suite/case_select/_case_select_listordering.html"),
             filters=[
                 filters.ChoicesFilter(
-                    "status", choices=model.CaseVersion.STATUS),
-                filters.KeywordFilter("name"),
+                    "status",
+                    lookup="versions__status",
+                    within=LATEST_VERSION,
+                    choices=model.CaseVersion.STATUS,
+                    ),
+                filters.KeywordFilter(
+                    "name", lookup="versions__name", within=LATEST_VERSION),
                 filters.ModelFilter(
-                    "tag", lookup="tags", queryset=model.Tag.objects.all()),
+                    "tag",
+                    lookup="versions__tags",
+                    within=LATEST_VERSION,
+                    queryset=model.Tag.objects.all(),
+                    ),
                 filters.ModelFilter(
-                    "author", queryset=model.User.objects.all()),
+                    "author",
+                    lookup="created_by",
+                    queryset=model.User.objects.all(),
+                    ),
                 ],
             )
         )
@@ -50,10 +73,14 @@ class SuiteForm(mtforms.NonFieldErrorsClassFormMixin, mtforms.MTModelForm):
         user = user or self.user
         suite = super(SuiteForm, self).save(user=user)
 
-        suite.suitecases.all().delete(permanent=True)
-        for i, case in enumerate(self.cleaned_data["cases"]):
-            model.SuiteCase.objects.create(
-                suite=suite, case=case, order=i, user=user)
+        sync_ordered(
+            model.SuiteCase,
+            "suite",
+            suite,
+            "case",
+            self.cleaned_data["cases"],
+            user=user,
+            )
 
         return suite
 
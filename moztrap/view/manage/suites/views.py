@@ -2,6 +2,9 @@
 Manage views for suites.
 
 """
+import json
+
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 from django.views.decorators.cache import never_cache
@@ -110,3 +113,26 @@ def suite_edit(request, suite_id):
             "suite": suite,
             }
         )
+
+
+
+@never_cache
+@permission_required("library.manage_suites")
+def suite_case_options(request):
+    """
+    Return a page of cases available to add to a suite, in JSON format.
+
+    Accepts the filter parameters of the form's ``cases`` widget, plus
+    ``product`` (a product ID) and ``pagesize`` and ``pagenumber``.
+
+    """
+    field = forms.SuiteForm.base_fields["cases"]
+    queryset = field.queryset.all()
+    try:
+        queryset = queryset.filter(product=int(request.GET["product"]))
+    except (KeyError, ValueError):
+        pass
+    return HttpResponse(
+        json.dumps(field.widget.options(field, queryset, request.GET)),
+        content_type="application/json",
+        )
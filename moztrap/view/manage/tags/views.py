@@ -4,7 +4,6 @@ Manage views for tags.
 """
 import json
 
-from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
@@ -13,6 +12,7 @@ from django.views.decorators.cache import never_cache
 from django.contrib import messages
 
 from moztrap import model
+from moztrap.model import autocomplete
 
 from moztrap.view.filters import TagFilterSet
 from moztrap.view.lists import decorators as lists
@@ -105,25 +105,23 @@ def tag_autocomplete(request):
     text = request.GET.get("text")
     product_id = request.GET.get("product-id")
     if text is not None:
-        tags = model.Tag.objects.filter(name__icontains=text)
-        if product_id is not None:
-            tags = tags.filter(Q(product=product_id) | Q(product=None))
+        tags = autocomplete.tags.search(text, product_id=product_id)
     else:
         tags = []
     suggestions = []
     for tag in tags:
         # can't just use split due to case; we match "text" insensitively, but
         # want pre and post to be case-accurate
-        start = tag.name.lower().index(text.lower())
-        pre = tag.name[:start]
-        post = tag.name[start+len(text):]
+        start = tag["name"].lower().index(text.lower())
+        pre = tag["name"][:start]
+        post = tag["name"][start+len(text):]
         suggestions.append({
                 "preText": pre,
                 "typedText": text,
                 "postText": post,
-                "id": tag.id,
-                "product-id": tag.product.id if tag.product else None,
-                "name": tag.name,
+                "id": tag["id"],
+                "product-id": tag["product"],
+                "name": tag["name"],
                 "type": "tag",
                 })
     return HttpResponse(
@@ -27,6 +27,11 @@ urlpatterns = patterns(
         "users.views.user_edit",
         name="manage_user_edit"),
 
+    # autocomplete
+    url(r"^users/_autocomplete/$",
+        "users.views.user_autocomplete",
+        name="manage_users_autocomplete"),
+
     # product ---------------------------------------------------------------
     # manage
     url(r"^products/$",
@@ -69,6 +74,11 @@ urlpatterns = patterns(
         "productversions.views.productversion_edit",
         name="manage_productversion_edit"),
 
+    # export
+    url(r"^productversion/(?P<productversion_id>\d+)/export/$",
+        "productversions.views.productversion_export",
+        name="manage_productversion_export"),
+
     # run --------------------------------------------------------------------
     # manage
     url(r"^runs/$",
@@ -90,6 +100,11 @@ urlpatterns = patterns(
         "runs.views.run_edit",
         name="manage_run_edit"),
 
+    # ajax options for suites field of run form
+    url(r"^runs/_suites/$",
+        "runs.views.run_suite_options",
+        name="manage_run_suite_options"),
+
     # suite ------------------------------------------------------------------
     # manage
     url(r"^suites/$",
@@ -111,6 +126,11 @@ urlpatterns = patterns(
         "suites.views.suite_edit",
         name="manage_suite_edit"),
 
+    # ajax options for cases field of suite form
+    url(r"^suites/_cases/$",
+        "suites.views.suite_case_options",
+        name="manage_suite_case_options"),
+
     # testcase ---------------------------------------------------------------
     # manage
     url(r"^cases/$",
@@ -2,6 +2,9 @@
 Manage views for users.
 
 """
+import json
+
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 from django.views.decorators.cache import never_cache
@@ -9,6 +12,7 @@ from django.views.decorators.cache import never_cache
 from django.contrib import messages
 
 from moztrap import model
+from moztrap.model import autocomplete
 
 from moztrap.view.lists import decorators as lists
 from moztrap.view.users.decorators import permission_required
@@ -90,3 +94,35 @@ def user_edit(request, user_id):
             "subject": user,
             }
         )
+
+
+
+@never_cache
+@permission_required("core.manage_users")
+def user_autocomplete(request):
+    """Return autocomplete list of active usernames in JSON format."""
+    text = request.GET.get("text")
+    users = []
+    if text is not None:
+        users = autocomplete.users.search(text)
+    suggestions = []
+    for u in users:
+        start = u["name"].lower().index(text.lower())
+        pre = u["name"][:start]
+        post = u["name"][start+len(text):]
+        suggestions.append({
+                "preText": pre,
+                "typedText": text,
+                "postText": post,
+                "id": u["id"],
+                "name": u["name"],
+                "type": "user",
+                })
+    return HttpResponse(
+        json.dumps(
+            {
+                "suggestions": suggestions
+                }
+            ),
+        content_type="application/json",
+        )
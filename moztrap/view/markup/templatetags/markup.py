@@ -2,7 +2,12 @@
 Markup-related template tags and filters.
 
 """
+from collections import OrderedDict
+import hashlib
+import threading
+
 from django import template
+from django.core.cache import cache
 from django.utils.encoding import force_unicode
 from django.utils.safestring import mark_safe
 
@@ -13,10 +18,81 @@ import markdown2
 register = template.Library()
 
 
+# number of rendered texts kept in each process
+LRU_SIZE = 1000
+
+# seconds rendered texts are kept in the shared cache
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+
+class LRUCache(object):
+    """A thread-safe mapping of the ``size`` most recently used items."""
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key, default=None):
+        """Return value for ``key`` (now most recently used), or default."""
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+
+    def set(self, key, value):
+        """Set ``key`` to ``value``, evicting the least recently used."""
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+    def clear(self):
+        """Remove all items."""
+        with self._lock:
+            self._items.clear()
+
+
+    def __len__(self):
+        return len(self._items)
+
+
+
+rendered = LRUCache(LRU_SIZE)
+
+
+
+def render_markdown(text):
+    """
+    Return HTML rendered from markdown ``text``, with HTML in it escaped.
+
+    Rendered HTML is cached under a hash of the text, in this process and in
+    the shared cache, so text that has been rendered before is not rendered
+    again.
+
+    """
+    text = force_unicode(text)
+    key = "markdown-{0}".format(
+        hashlib.sha1(text.encode("utf-8")).hexdigest())
+    html = rendered.get(key)
+    if html is None:
+        html = cache.get(key)
+        if html is None:
+            html = force_unicode(markdown2.markdown(text, safe_mode="escape"))
+            cache.set(key, html, CACHE_TIMEOUT)
+        rendered.set(key, html)
+    return html
+
+
 
 @register.filter
 def markdown(text):
-    return mark_safe(
-        force_unicode(
-            markdown2.markdown(text, safe_mode="escape")))
+    return mark_safe(render_markdown(text))
 markdown.is_safe = True
@@ -0,0 +1,21 @@
+"""
+Request-wide middleware.
+
+"""
+from moztrap.model.mtmodel import bump_pending_generations
+
+
+
+class GenerationMiddleware(object):
+    """
+    Records model writes again once the request's transaction has committed.
+
+    Must come before ``TransactionMiddleware`` in ``MIDDLEWARE_CLASSES``, so
+    that its response processing runs after the commit; otherwise a concurrent
+    request could cache pre-commit data under the post-write generation.
+
+    """
+    def process_response(self, request, response):
+        """Bump generations of models written during this request."""
+        bump_pending_generations()
+        return response
@@ -0,0 +1,146 @@
+"""
+Results views comparing two runs, or two product versions.
+
+"""
+import json
+
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+
+from moztrap.view.utils.auth import login_maybe_required
+
+from moztrap import model
+from moztrap.model.execution import compare
+
+from moztrap.view.utils.querystring import update_querystring
+
+
+
+# most cells of one transition listed on the page; the JSON lists them all
+CELLS_SHOWN = 200
+
+
+
+@login_maybe_required
+def compare_runs(request):
+    """Compare latest results of the "before" and "after" runs."""
+    return _compare(request, model.Run)
+
+
+
+@login_maybe_required
+def compare_productversions(request):
+    """Compare latest results of the "before" and "after" productversions."""
+    return _compare(request, model.ProductVersion)
+
+
+
+def _compare(request, model_class):
+    """
+    Compare instances of ``model_class`` given by "before" and "after" ids.
+
+    A "transition" querystring parameter limits the cells listed to those
+    with that transition. With "format=json", returns the comparison as JSON,
+    with every cell, rather than a page.
+
+    """
+    before = _get_side(request, model_class, "before")
+    after = _get_side(request, model_class, "after")
+    transition = request.GET.get("transition")
+    if transition is not None and transition not in dict(compare.TRANSITION):
+        raise Http404
+
+    cells = compare.compare(before, after)
+    summary = compare.summarize(cells)
+
+    if request.GET.get("format") == "json":
+        data = {
+            "before": {"id": before.id, "name": unicode(before)},
+            "after": {"id": after.id, "name": unicode(after)},
+            "summary": summary,
+            "cells": [
+                {
+                    "case": c[0],
+                    "environment": c[1],
+                    "before": c[2],
+                    "after": c[3],
+                    "transition": c[4],
+                    }
+                for c in cells
+                if transition is None or c[4] == transition
+                ],
+            }
+        return HttpResponse(json.dumps(data), content_type="application/json")
+
+    transition = transition or compare.TRANSITION.newfail
+    shown = [c for c in cells if c[4] == transition]
+    url = request.get_full_path()
+    return TemplateResponse(
+        request,
+        "results/compare/compare.html",
+        {
+            "before": before,
+            "after": after,
+            "transition": transition,
+            "transitions": [
+                {
+                    "name": name,
+                    "label": label,
+                    "count": summary[name],
+                    "url": update_querystring(url, transition=name),
+                    }
+                for name, label in compare.TRANSITION
+                ],
+            "cells": _describe(shown[:CELLS_SHOWN], before, after),
+            "hidden": max(len(shown) - CELLS_SHOWN, 0),
+            "json_url": update_querystring(url, format="json"),
+            }
+        )
+
+
+
+def _get_side(request, model_class, param):
+    """Return the ``model_class`` instance whose id is GET ``param``."""
+    try:
+        pk = int(request.GET.get(param, ""))
+    except ValueError:
+        raise Http404
+    return get_object_or_404(model_class, pk=pk)
+
+
+
+def _describe(cells, before, after):
+    """
+    Return dicts describing ``cells`` by case and environment names.
+
+    Names are looked up with one query each for all the cells; a case is
+    named by its version in the "after" side, if it has one there.
+
+    """
+    before_pv, after_pv = [
+        getattr(side, "productversion", side) for side in [before, after]]
+    case_names = {}
+    for pv_id, case_id, name in model.CaseVersion.objects.filter(
+            case__in=set(c[0] for c in cells),
+            productversion__in=[before_pv, after_pv],
+            ).values_list("productversion", "case", "name"):
+        if case_id not in case_names or pv_id == after_pv.id:
+            case_names[case_id] = name
+
+    element_names = {}
+    elements = model.Environment.elements.through._default_manager.filter(
+        environment__in=set(c[1] for c in cells)).order_by(
+        "element__category__name")
+    for env_id, name in elements.values_list("environment", "element__name"):
+        element_names.setdefault(env_id, []).append(name)
+
+    return [
+        {
+            "case": case_names.get(c[0], u""),
+            "environment": u", ".join(element_names.get(c[1], [])),
+            "before": c[2],
+            "after": c[3],
+            }
+        for c in cells
+        ]
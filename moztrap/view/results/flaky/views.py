@@ -0,0 +1,63 @@
+"""
+Results view ranking flaky cases of a product.
+
+"""
+import json
+
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+
+from moztrap.view.utils.auth import login_maybe_required
+
+from moztrap import model
+from moztrap.model.execution import flaky
+
+from moztrap.view.utils.querystring import update_querystring
+
+
+
+# most cases listed on the page; the JSON lists them all
+CASES_SHOWN = 100
+
+
+
+@login_maybe_required
+def flaky_cases(request):
+    """
+    Rank cases of the "product" by how flaky their results are.
+
+    With "format=json", returns the whole ranking as JSON rather than a page.
+
+    """
+    try:
+        product_id = int(request.GET.get("product", ""))
+    except ValueError:
+        raise Http404
+    product = get_object_or_404(model.Product, pk=product_id)
+    ranking = flaky.rank(product)
+
+    if request.GET.get("format") == "json":
+        data = {
+            "product": {"id": product.id, "name": product.name},
+            "cases": ranking,
+            }
+        return HttpResponse(json.dumps(data), content_type="application/json")
+
+    shown = ranking[:CASES_SHOWN]
+    names = dict(
+        model.CaseVersion.objects.filter(
+            case__in=[c["case"] for c in shown]).order_by(
+            "productversion__order").values_list("case", "name")
+        )
+    return TemplateResponse(
+        request,
+        "results/flaky/flaky.html",
+        {
+            "product": product,
+            "cases": [dict(c, name=names.get(c["case"], u"")) for c in shown],
+            "hidden": max(len(ranking) - CASES_SHOWN, 0),
+            "json_url": update_querystring(
+                request.get_full_path(), format="json"),
+            }
+        )
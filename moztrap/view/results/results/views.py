@@ -12,6 +12,7 @@ from moztrap import model
 from moztrap.view.filters import ResultFilterSet
 from moztrap.view.lists import decorators as lists
 from moztrap.view.utils.ajax import ajax
+from moztrap.view.utils.querystring import update_querystring
 
 from ..finders import ResultsFinder
 
@@ -23,14 +24,32 @@ from ..finders import ResultsFinder
 @lists.sort("results")
 @ajax("results/result/list/_results_list.html")
 def results_list(request, rcv_id):
-    """List results for a given runcaseversion."""
+    """
+    List results for a given runcaseversion.
+
+    With an "archived" querystring parameter, lists its archived results
+    instead; they have the same fields, so filter, sort and pagination work
+    the same way.
+
+    """
     rcv = get_object_or_404(model.RunCaseVersion, pk=rcv_id)
+    archived = bool(request.GET.get("archived"))
+    if archived:
+        results = model.ArchivedResult.objects.filter(runcaseversion=rcv)
+    else:
+        results = model.Result.objects.filter(runcaseversion=rcv)
     return TemplateResponse(
         request,
         "results/result/results.html",
         {
-            "results": model.Result.objects.filter(
-                runcaseversion=rcv).select_related(),
+            "results": results.select_related(),
             "runcaseversion": rcv,
+            "archived": archived,
+            "archived_count": rcv.archivedresults.count(),
+            "archived_toggle_url": update_querystring(
+                request.get_full_path(),
+                archived=None if archived else "1",
+                pagenumber="1",
+                ),
             }
         )
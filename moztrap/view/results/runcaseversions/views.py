@@ -11,6 +11,7 @@ from moztrap import model
 
 from moztrap.view.filters import RunCaseVersionFilterSet
 from moztrap.view.lists import decorators as lists
+from moztrap.view.lists.cases import with_relevance
 from moztrap.view.utils.ajax import ajax
 
 from ..finders import ResultsFinder
@@ -28,7 +29,8 @@ def runcaseversions_list(request):
         request,
         "results/case/cases.html",
         {
-            "runcaseversions": model.RunCaseVersion.objects.select_related(),
+            "runcaseversions": with_relevance(
+                model.RunCaseVersion.objects.select_related()),
             }
         )
 
@@ -43,6 +43,10 @@ def run_details(request, run_id):
         request,
         "results/run/list/_run_details.html",
         {
-            "run": run
+            "run": run,
+            "other_runs": model.Run.objects.filter(
+                productversion__product=run.productversion.product).exclude(
+                pk=run.pk).select_related("productversion").order_by(
+                "-start"),
             }
         )
@@ -35,6 +35,25 @@ urlpatterns = patterns(
         "runcaseversions.views.runcaseversion_details",
         name="results_runcaseversion_details"),
 
+    # comparisons ------------------------------------------------------------
+
+    # two runs
+    url(r"^compare/runs/$",
+        "compare.views.compare_runs",
+        name="results_compare_runs"),
+
+    # two productversions
+    url(r"^compare/versions/$",
+        "compare.views.compare_productversions",
+        name="results_compare_productversions"),
+
+    # flaky cases ------------------------------------------------------------
+
+    # ranking of a product's cases
+    url(r"^flaky/$",
+        "flaky.views.flaky_cases",
+        name="results_flaky"),
+
     # results ----------------------------------------------------------------
 
     # list
@@ -19,6 +19,10 @@ class ResultFor(Tag):
     If no relevant Result exists, returns *unsaved* default Result for use in
     template (result will be saved when case is started.)
 
+    If the runcaseversion is annotated with its latest result (see
+    ``runtests.views.with_latest_result``), the Result is built from that
+    without a query, and has only its id, status and comment.
+
     """
     name = "result_for"
     options = Options(
@@ -36,19 +40,24 @@ class ResultFor(Tag):
             environment=environment,
             tester=user,
             runcaseversion=runcaseversion,
-            is_latest=True,
             )
+        if hasattr(runcaseversion, "latest_result_id"):
+            # annotated by runtests.views.with_latest_result; no query needed
+            result = model.Result(**result_kwargs)
+            if runcaseversion.latest_result_id is not None:
+                result.id = runcaseversion.latest_result_id
+                result.status = runcaseversion.latest_result_status
+                result.comment = runcaseversion.latest_result_comment
+            context[varname] = result
+            return u""
         try:
-            result = model.Result.objects.get(**result_kwargs)
+            result = model.Result.objects.get(
+                latest__environment=environment,
+                latest__tester=user,
+                latest__runcaseversion=runcaseversion,
+                )
         except model.Result.DoesNotExist:
             result = model.Result(**result_kwargs)
-        except model.Result.MultipleObjectsReturned:
-            # find the latest one and set it to latest, which will set all
-            # others to is_latest=False
-            result = model.Result.objects.filter(**result_kwargs).order_by(
-                "-modified_on")[0]
-            result.set_latest()
-            result.save()
 
         context[varname] = result
         return u""
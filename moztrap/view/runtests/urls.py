@@ -16,5 +16,15 @@ urlpatterns = patterns(
     url(r"^run/(?P<run_id>\d+)/env/(?P<env_id>\d+)/$",
         "run",
         name="runtests_run"),
+    url(r"^run/(?P<run_id>\d+)/env/(?P<env_id>\d+)/"
+        r"details/(?P<rcv_id>\d+)/$",
+        "details",
+        name="runtests_details"),
+    url(r"^run/(?P<run_id>\d+)/env/(?P<env_id>\d+)/package/$",
+        "package",
+        name="runtests_package"),
+    url(r"^run/(?P<run_id>\d+)/env/(?P<env_id>\d+)/upload/$",
+        "upload",
+        name="runtests_upload"),
 
 )
@@ -4,17 +4,24 @@ Views for test execution.
 """
 import json
 
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.db import connections
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, redirect
+from django.template.defaultfilters import slugify
+from django.template import RequestContext
+from django.template.loader import render_to_string
 from django.template.response import TemplateResponse
 from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
 
 from django.contrib import messages
 
 from ... import model
+from ...model.execution import offline
 
 from ..filters import RunTestsRunCaseVersionFilterSet
 from ..lists import decorators as lists
+from ..lists.cases import with_relevance
 from ..users.decorators import permission_required
 from ..utils.ajax import ajax
 
@@ -76,17 +83,127 @@ def set_environment(request, run_id):
 
 
 
+def with_latest_result(queryset, user, environment):
+    """
+    Annotate runcaseversions in ``queryset`` with ``user``'s latest result.
+
+    Adds the id, status and comment of the user's latest result in
+    ``environment`` as ``latest_result_id``, ``latest_result_status`` and
+    ``latest_result_comment`` (all None if there is no result), so a page of
+    runcaseversions and their results is fetched in a single query. The
+    ``result_for`` template tag uses these in preference to a query of its own.
+
+    """
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    opts = model.Result._meta
+    latest_opts = model.LatestResult._meta
+
+    def latest(field):
+        return (
+            "SELECT r.{0} FROM {1} r INNER JOIN {2} l ON l.{3} = r.{4} "
+            "WHERE l.{5} = {6}.{7} AND l.{8} = %s AND l.{9} = %s "
+            "AND r.{10} IS NULL".format(
+                qn(opts.get_field(field).column),
+                qn(opts.db_table),
+                qn(latest_opts.db_table),
+                qn(latest_opts.get_field("result").column),
+                qn(opts.pk.column),
+                qn(latest_opts.get_field("runcaseversion").column),
+                qn(queryset.model._meta.db_table),
+                qn(queryset.model._meta.pk.column),
+                qn(latest_opts.get_field("environment").column),
+                qn(latest_opts.get_field("tester").column),
+                qn(opts.get_field("deleted_on").column),
+                )
+            )
+
+    fields = ["id", "status", "comment"]
+    return queryset.extra(
+        select=dict(
+            ("latest_result_{0}".format(f), latest(f)) for f in fields),
+        # every subquery takes the same parameters, so their order is moot
+        select_params=[environment.id, user.id] * len(fields),
+        )
+
+
+
 # maps valid action names to default parameters
 ACTIONS = {
     "start": {},
     "result_pass": {},
     "result_invalid": {"comment": ""},
     "result_fail": {"stepnumber": None, "comment": "", "bug": ""},
-    "start": {},
     }
 
 
 
+def posted_actions(request, run):
+    """
+    Return list of (runcaseversion, action, kwargs) posted in ``request``.
+
+    Each ``action-<name>`` parameter names an action in ``ACTIONS``, and its
+    values are the ids of the runcaseversions of ``run`` to apply it to; so
+    many cases can be passed, failed etc. in a single POST. The parameters of
+    an action on a runcaseversion are posted as ``<param>-<rcv id>``, or just
+    ``<param>`` when only one case is acted on.
+
+    If any of the actions or ids is invalid, an error message is added and
+    no actions are returned (so that none are applied).
+
+    """
+    prefix = "action-"
+    posted = []
+    for key in request.POST:
+        if not key.startswith(prefix):
+            continue
+        action = key[len(prefix):]
+        if action not in ACTIONS:
+            messages.error(
+                request, "{0} is not a valid action.".format(action))
+            return []
+        for value in request.POST.getlist(key):
+            try:
+                posted.append((action, int(value)))
+            except ValueError:
+                messages.error(
+                    request,
+                    "{0} is not a valid run/caseversion ID.".format(value))
+                return []
+
+    ids = [rcv_id for action, rcv_id in posted]
+    rcvs = run.runcaseversions.select_related("caseversion").in_bulk(ids)
+    actions = []
+    for action, rcv_id in posted:
+        if rcv_id not in rcvs:
+            messages.error(
+                request,
+                "{0} is not a valid run/caseversion ID.".format(rcv_id))
+            return []
+        if ids.count(rcv_id) > 1:
+            messages.error(
+                request,
+                "{0} can only have one action at a time.".format(rcv_id))
+            return []
+
+        # take the values out of the POST so we can pass them in to the
+        # method call on the RunCaseVersion
+        kwargs = ACTIONS[action].copy()
+        for argname in kwargs.keys():
+            names = ["{0}-{1}".format(argname, rcv_id)]
+            # unsuffixed parameters are only unambiguous for a single case
+            if len(posted) == 1:
+                names.append(argname)
+            for name in names:
+                if name in request.POST:
+                    kwargs[argname] = request.POST[name]
+                    break
+        actions.append((rcvs[rcv_id], action, kwargs))
+
+    return actions
+
+
+
 @never_cache
 @permission_required("execution.execute")
 @lists.finder(RunTestsFinder)
@@ -111,71 +228,52 @@ def run(request, run_id, env_id):
         return redirect("runtests_environment", run_id=run_id)
 
     if request.method == "POST":
-        # Based on this action, create a new Result object with the values we
-        # get from the post.
-
-        prefix = "action-"
-        while True:
-            rcv = None
-
-            try:
-                action, rcv_id = [
-                    (k[len(prefix):], int(v)) for k, v in request.POST.items()
-                    if k.startswith(prefix)
-                    ][0]
-            except IndexError:
-                break
-
-            try:
-                defaults = ACTIONS[action].copy()
-            except KeyError:
-                messages.error(
-                    request, "{0} is not a valid action.".format(action))
-                break
-
-            try:
-                rcv = run.runcaseversions.get(pk=rcv_id)
-            except model.RunCaseVersion.DoesNotExist:
-                messages.error(
-                    request,
-                    "{0} is not a valid run/caseversion ID.".format(rcv_id))
-                break
-
-            # take the values out of the POST so we can pass them in to the
-            # method call on the Result object
-            for argname in defaults.keys():
-                try:
-                    defaults[argname] = request.POST[argname]
-                except KeyError:
-                    pass
-
-            # put the values specific to this run
-            defaults.update({
-                "environment": environment,
-                "user": request.user,
-                })
-
-            getattr(rcv, action)(**defaults)
-            break
+        # Based on the posted actions, create new Result objects with the
+        # values we get from the post.
+        actions = posted_actions(request, run)
+        if actions:
+            model.RunCaseVersion.bulk_result(
+                actions, environment=environment, user=request.user)
 
         if request.is_ajax():
-            # if we don't know the runcaseversion id, we return an empty
+            # if we don't know the runcaseversion ids, we return an empty
             # response.
-            if rcv is None:
+            if not actions:
                 return HttpResponse(
                     json.dumps({"html": "", "no_replace": True}),
                     content_type = "application/json",
                     )
             # by not returning a TemplateResponse, we skip the sort and finder
-            # decorators, which aren't applicable to a single case.
-            return render(
-                request,
-                "runtests/list/_runtest_list_item.html",
-                {
-                    "environment": environment,
-                    "runcaseversion": rcv
-                    }
+            # decorators, which aren't applicable to single cases.
+            rcvs = with_latest_result(
+                run.runcaseversions.select_related("caseversion").filter(
+                    pk__in=[rcv.id for rcv, action, kwargs in actions]),
+                request.user,
+                environment,
+                )
+            items = dict(
+                (
+                    rcv.id,
+                    render_to_string(
+                        "runtests/list/_runtest_list_item.html",
+                        {
+                            "environment": environment,
+                            "run": run,
+                            "runcaseversion": rcv,
+                            "details": True,
+                            },
+                        RequestContext(request),
+                        )
+                    )
+                for rcv in rcvs
                 )
+            data = {"items": items}
+            if len(items) == 1:
+                data["html"] = items.values()[0]
+            else:
+                data.update({"html": "", "no_replace": True})
+            return HttpResponse(
+                json.dumps(data), content_type="application/json")
         else:
             return redirect(request.get_full_path())
 
@@ -192,8 +290,13 @@ def run(request, run_id, env_id):
             "productversion": run.productversion,
             "run": run,
             "envform": envform,
-            "runcaseversions": run.runcaseversions.select_related(
-                "caseversion").filter(environments=environment),
+            "runcaseversions": with_latest_result(
+                with_relevance(
+                    run.runcaseversions.select_related(
+                        "caseversion").filter(environments=environment)),
+                request.user,
+                environment,
+                ),
             "finder": {
                 # finder decorator populates top column (products), we
                 # prepopulate the other two columns
@@ -205,3 +308,110 @@ def run(request, run_id, env_id):
                 },
             }
         )
+
+
+
+@never_cache
+@permission_required("execution.execute")
+def details(request, run_id, env_id, rcv_id):
+    """Get details snippet (steps and result forms) for a runcaseversion."""
+    run = get_object_or_404(model.Run, pk=run_id)
+    environment = get_object_or_404(run.environments.all(), pk=env_id)
+    runcaseversion = get_object_or_404(
+        run.runcaseversions.select_related("caseversion"), pk=rcv_id)
+    return TemplateResponse(
+        request,
+        "runtests/list/_runtest_details.html",
+        {
+            "environment": environment,
+            "run": run,
+            "runcaseversion": runcaseversion,
+            "caseversion": runcaseversion.caseversion,
+            }
+        )
+
+
+
+@never_cache
+@permission_required("execution.execute")
+def package(request, run_id, env_id):
+    """
+    Download a package of a run's cases in an environment, for offline use.
+
+    The package is JSON, with the steps of each case and the user's current
+    result of it (see ``model.execution.offline``), and is generated as it
+    is sent, a chunk of cases at a time.
+
+    """
+    run = get_object_or_404(
+        model.Run.objects.select_related(),
+        pk=run_id,
+        status=model.Run.STATUS.active,
+        )
+    environment = get_object_or_404(run.environments.all(), pk=env_id)
+    response = HttpResponse(
+        offline.package_chunks(run, environment, request.user),
+        content_type="application/json",
+        )
+    response["Content-Disposition"] = (
+        "attachment; filename={0}-{1}.json".format(
+            slugify(run.name), environment.id)
+        )
+    return response
+
+
+
+@never_cache
+@permission_required("execution.execute")
+@require_POST
+def upload(request, run_id, env_id):
+    """
+    Upload a batch of results recorded offline from a run package.
+
+    The batch is JSON, either the body of the request, which gets a JSON
+    response of the number of results recorded and any conflicts (or a 400
+    response of errors), or a file posted as "results" by the run-tests page,
+    which redirects back to it with messages.
+
+    """
+    run = get_object_or_404(
+        model.Run, pk=run_id, status=model.Run.STATUS.active)
+    environment = get_object_or_404(run.environments.all(), pk=env_id)
+    from_page = "results" in request.FILES
+
+    try:
+        if from_page:
+            data = json.load(request.FILES["results"])
+        else:
+            data = json.loads(request.raw_post_data)
+        summary = offline.upload_results(
+            run, environment, request.user, data)
+    except ValueError:
+        errors = ["Uploaded results are not valid JSON."]
+    except offline.UploadError as e:
+        errors = e.errors
+    else:
+        errors = []
+
+    if not from_page:
+        if errors:
+            return HttpResponseBadRequest(
+                json.dumps({"errors": errors}),
+                content_type="application/json",
+                )
+        return HttpResponse(
+            json.dumps(summary), content_type="application/json")
+
+    for error in errors:
+        messages.error(request, error)
+    if not errors:
+        messages.success(
+            request,
+            "Recorded {0} uploaded results.".format(summary["recorded"]))
+        if summary["conflicts"]:
+            messages.warning(
+                request,
+                "{0} uploaded results were not recorded, as newer results "
+                "of their cases have been recorded since the package was "
+                "downloaded.".format(len(summary["conflicts"])))
+    return redirect("runtests_run", run_id=run.id, env_id=environment.id)
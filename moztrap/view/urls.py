@@ -41,6 +41,9 @@ urlpatterns = patterns(
     # browserid --------------------------------------------------------------
     url(r"^browserid/", include("moztrap.view.users.browserid_urls")),
 
+    # lists ------------------------------------------------------------------
+    url(r"^lists/", include("moztrap.view.lists.urls")),
+
     # api --------------------------------------------------------------------
     url(r"^api/", include("moztrap.view.api.urls")),
 
@@ -36,5 +36,10 @@ def permission_required(perm):
                 settings.LOGIN_URL,
                 REDIRECT_FIELD_NAME,
                 )
+
+        # annotate wrapped view with required permission
+        # for introspection by e.g. filter_options
+        _wrapped_view.permission = perm
+
         return _wrapped_view
     return decorator
@@ -2,12 +2,16 @@
 Core form widgets, mixins, and fields for MozTrap.
 
 """
+import copy
 from functools import partial
+from itertools import chain
 
 from django import forms
+from django.db.models import ForeignKey
 from django.forms.forms import NON_FIELD_ERRORS
 from django.forms.models import ModelChoiceIterator
 from django.forms.util import ErrorList
+from django.template.loader import render_to_string
 from django.utils.datastructures import MultiValueDict
 from django.utils.encoding import force_unicode, StrAndUnicode
 from django.utils.html import conditional_escape
@@ -16,7 +20,7 @@ from django.utils.safestring import mark_safe
 import floppyforms
 
 from moztrap import model
-from ..lists import filters
+from ..lists import filters, pagination
 
 
 
@@ -217,14 +221,119 @@ class FilteredSelectMultiple(MTSelectMultiple):
 
 
 
+class LazyFilteredSelectMultiple(FilteredSelectMultiple):
+    """
+    A FilteredSelectMultiple that renders only the selected choices.
+
+    Available choices are fetched a page at a time from ``url`` (a URL, or a
+    callable returning one), which should return the result of ``options`` in
+    JSON format; they are filtered on the server with the widget's
+    ``filters``. The ``data-product-id`` of the selected option of the
+    ``product_trigger`` select is sent along as the ``product`` parameter.
+
+    """
+    template_name = (
+        "forms/widgets/filtered_select_multiple/"
+        "_lazy_filtered_select_multiple.html")
+
+
+    def __init__(self, *args, **kwargs):
+        self.url = kwargs.pop("url")
+        self.product_trigger = kwargs.pop("product_trigger", "#id_product")
+        super(LazyFilteredSelectMultiple, self).__init__(*args, **kwargs)
+
+
+    def get_context_data(self):
+        ctx = super(LazyFilteredSelectMultiple, self).get_context_data()
+        ctx["options_url"] = self.url() if callable(self.url) else self.url
+        ctx["product_trigger"] = self.product_trigger
+        return ctx
+
+
+    def render(self, name, value, attrs=None, choices=()):
+        """Render the widget, with only the selected choices loaded."""
+        selected = [v for v in value or [] if v not in ["", None]]
+        iterator = copy.copy(self.choices)
+        iterator.queryset = iterator.queryset.filter(pk__in=selected)
+        return floppyforms.widgets.Input.render(
+            self,
+            name,
+            value,
+            attrs=attrs,
+            extra_context={
+                "choices": [
+                    (force_unicode(option_value), option_label)
+                    for option_value, option_label in chain(iterator, choices)
+                    ],
+                },
+            )
+
+
+    def options(self, field, queryset, data):
+        """
+        Return a page of choices for ``field`` from ``queryset``, as a dict.
+
+        ``data`` (usually ``request.GET``) may contain filter values under the
+        keys used by the widget's filter inputs, and ``pagesize`` and
+        ``pagenumber``. The returned dictionary has keys "html", the rendered
+        choices, and "more", True if there are further pages.
+
+        """
+        queryset = filters.FilterSet(self.filters).bind(data).filter(queryset)
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+        pagesize = pagination.positive_integer(
+            data.get("pagesize"), pagination.DEFAULT_PAGESIZE)
+        pagenumber = pagination.positive_integer(data.get("pagenumber"), 1)
+        low = (pagenumber - 1) * pagesize
+        queryset = field.choice_queryset(queryset)
+        objs = list(queryset[low:low + pagesize + 1])
+        field.prefetch(objs[:pagesize])
+        iterator = MTModelChoiceIterator(field)
+        return {
+            "html": u"".join(
+                render_to_string(
+                    self.choice_template_name,
+                    {"choice": iterator.choice(obj)},
+                    )
+                for obj in objs[:pagesize]
+                ),
+            "more": len(objs) > pagesize,
+            }
+
+
+
 class MTModelChoiceIterator(ModelChoiceIterator):
     """
     ModelChoiceIterator for use with ``MTModelChoiceField````.
 
     Returns a ``SmartLabel`` for each choice, with attrs based on the
-    ``choice_attrs`` method of the field.
+    ``choice_attrs`` method of the field. The related objects the labels need
+    are loaded along with the choices (see ``MTModelChoiceField``), so the
+    number of queries doesn't depend on the number of choices.
 
     """
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield (u"", self.field.empty_label)
+        if self.field.cache_choices:
+            if self.field.choice_cache is None:
+                self.field.choice_cache = [
+                    self.choice(obj) for obj in self.objects()]
+            for choice in self.field.choice_cache:
+                yield choice
+        else:
+            for obj in self.objects():
+                yield self.choice(obj)
+
+
+    def objects(self):
+        """Return list of choice objects, with related data loaded in bulk."""
+        objs = list(self.field.choice_queryset(self.queryset.all()))
+        self.field.prefetch(objs)
+        return objs
+
+
     def choice(self, obj):
         """Return the choice tuple for the given object."""
         return (
@@ -265,7 +374,34 @@ class SmartLabel(StrAndUnicode):
 
 def product_id_attrs(obj):
     """A ``choice_attrs`` function to label each item with its product ID."""
-    return {"data-product-id": obj.product.id}
+    return {"data-product-id": obj.product_id}
+
+
+
+def cached_relations(obj, prefix=""):
+    """
+    Return ``select_related`` names of the related objects cached on ``obj``.
+
+    A foreign key's related object is cached on the instance once it has been
+    accessed, so this finds the relations followed since ``obj`` was loaded,
+    including those followed from the related objects themselves.
+
+    """
+    names = []
+    for field in obj._meta.fields:
+        if isinstance(field, ForeignKey) and hasattr(
+                obj, field.get_cache_name()):
+            name = prefix + field.name
+            names.append(name)
+            related = getattr(obj, field.get_cache_name())
+            if related is not None:
+                names.extend(cached_relations(related, name + "__"))
+    return names
+
+
+
+# map of (field class, model, label, attrs) to relations they follow
+_detected_relations = {}
 
 
 
@@ -278,6 +414,12 @@ class MTModelChoiceField(forms.ModelChoiceField):
     instance and returns suitable label text and a dictionary of choice
     attributes, respectively.
 
+    Foreign keys followed by the label and choice attributes are detected and
+    loaded with ``select_related``. Relations needed only by a widget's
+    templates can be named in the ``select_related`` keyword argument, and
+    ``prefetch`` can be a one-argument callable that takes the list of choice
+    objects and loads any other data they need in bulk.
+
     """
     widget = MTSelect
 
@@ -289,6 +431,10 @@ class MTModelChoiceField(forms.ModelChoiceField):
 
         self.custom_choice_attrs = kwargs.pop("choice_attrs", None)
 
+        self.select_related = kwargs.pop("select_related", [])
+
+        self.custom_prefetch = kwargs.pop("prefetch", None)
+
         super(MTModelChoiceField, self).__init__(*args, **kwargs)
 
 
@@ -317,6 +463,44 @@ class MTModelChoiceField(forms.ModelChoiceField):
         return {}
 
 
+    def prefetch(self, objs):
+        """Use custom prefetch callable, if provided, on list of objects."""
+        if self.custom_prefetch is not None:
+            self.custom_prefetch(objs)
+
+
+    def choice_relations(self, queryset):
+        """
+        Return names of relations to load along with choices from queryset.
+
+        These are the field's ``select_related`` and the relations its label
+        and choice attributes follow, found the first time by trying them on
+        one object from ``queryset``.
+
+        """
+        key = (
+            type(self),
+            queryset.model,
+            self.custom_label_from_instance,
+            self.custom_choice_attrs,
+            )
+        if key not in _detected_relations:
+            for obj in queryset[:1]:
+                self.label_from_instance(obj)
+                self.choice_attrs(obj)
+                _detected_relations[key] = cached_relations(obj)
+        return sorted(
+            set(self.select_related) | set(_detected_relations.get(key, [])))
+
+
+    def choice_queryset(self, queryset):
+        """Return ``queryset`` loading the relations the choices need."""
+        relations = self.choice_relations(queryset)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset
+
+
 
 class MTModelMultipleChoiceField(forms.ModelMultipleChoiceField,
                                  MTModelChoiceField):
@@ -34,16 +34,77 @@ var MT = (function (MT, $) {
         }
     };
 
+    // Add an option (from the filter-options endpoint) to a lazy filter-group
+    MT.addLazyFilterOption = function (group, option) {
+        var name = group.data('name'),
+            existing = group.find('.filter-item input[value="' + option.value + '"]'),
+            index = group.find('.filter-item').length + 1,
+            id = 'id-filter-' + name + '-' + index,
+            item;
+
+        if (existing.length) {
+            return existing;
+        }
+        item = $('<li class="filter-item">' +
+            '<input type="checkbox" class="check">' +
+            '<span class="onoff"><label class="onoffswitch"></label>' +
+            '<span class="content"></span></span></li>');
+        item.children('input').attr({
+            name: 'filter-' + name,
+            id: id,
+            value: option.value
+        }).data('name', name);
+        item.find('label').attr('for', id).text(option.label);
+        item.find('.content').text(option.label);
+        group.find('.filter-items').append(item);
+        return item.children('input');
+    };
+
+    // Lazy filter-groups fetch matching options from the server as you type
+    MT.lazyFilterOptions = function (context) {
+        $(context).on('keyup', '.filter-group.lazy .addterm input', function () {
+            var textbox = $(this),
+                group = textbox.closest('.filter-group');
+
+            $.doTimeout('lazy-filter-' + group.data('name'), 300, function () {
+                var text = textbox.val();
+                group.find('.filter-item input:not(:checked)').closest('.filter-item').remove();
+                if (!text) { return; }
+                $.get(textbox.data('options-url'), {text: text}, function (response) {
+                    $.each(response.options, function () {
+                        MT.addLazyFilterOption(group, this);
+                    });
+                });
+            });
+        });
+    };
+
     // Tags, suites, environments act as filter-links on list pages
     MT.directFilterLinks = function () {
         $('.listpage').on('click', '.filter-link', function (e) {
             var thisLink = $(this),
                 name = thisLink.text(),
-                type = thisLink.data('type');
-            $('#filterform').find('.filter-group[data-name="' + type + '"] .filter-item label').filter(function () {
-                return $(this).text() === name;
-            }).closest('.filter-item').children('input').click();
+                type = thisLink.data('type'),
+                group = $('#filterform').find('.filter-group[data-name="' + type + '"]'),
+                input = group.find('.filter-item label').filter(function () {
+                    return $(this).text() === name;
+                }).closest('.filter-item').children('input'),
+                textbox = group.find('.addterm input[data-options-url]');
+
             e.preventDefault();
+            if (input.length || !group.hasClass('lazy')) {
+                input.click();
+                return;
+            }
+            // option not loaded yet; look it up by name
+            $.get(textbox.data('options-url'), {text: name}, function (response) {
+                $.each(response.options, function () {
+                    if (this.label === name) {
+                        MT.addLazyFilterOption(group, this).click();
+                        return false;
+                    }
+                });
+            });
         });
     };
 
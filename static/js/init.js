@@ -19,6 +19,7 @@ var MT = (function (MT, $) {
             textbox: '#text-filter',
             inputList: '.visual .filter-group:not(.keyword)',
             newInputList: '.visual .filter-group.keyword',
+            lazyInputList: '.visual .filter-group.lazy',
             multipleCategories: true,
             allowNew: true,
             autoSubmit: true,
@@ -32,6 +33,7 @@ var MT = (function (MT, $) {
             textbox: '#text-filter',
             inputList: '.visual .filter-group:not(.keyword)',
             newInputList: '.visual .filter-group.keyword',
+            lazyInputList: '.visual .filter-group.lazy',
             multipleCategories: true,
             allowNew: true,
             newInputTextbox: 'input[type="text"]',
@@ -143,6 +145,7 @@ var MT = (function (MT, $) {
         MT.toggleAdvancedFiltering('.magicfilter');
         MT.preventCaching('#filter');
         MT.directFilterLinks();
+        MT.lazyFilterOptions('.magicfilter');
         MT.filterFormAjax('.manage, .results, .run');
         MT.clientSideFilter({container: '#envnarrowing'});
 
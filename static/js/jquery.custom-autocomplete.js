@@ -28,6 +28,7 @@
             suggestionList = context.find(options.suggestionList),
             inputList = context.find(options.inputList),
             newInputList = context.find(options.newInputList),
+            lazyInputList = context.find(options.lazyInputList),
             origInputs = inputList.html(),
             origNewInputs = newInputList.html(),
             inputs = inputList.add(newInputList).find(options.inputs),
@@ -176,6 +177,66 @@
                 }
 
                 newSuggestions = ich.autocomplete_suggestion(data);
+                showSuggestions();
+            },
+
+            // Add suggestions from the server for each group of lazyInputList
+            updateLazySuggestions = function () {
+                var text = typedText;
+                lazyInputList.each(function () {
+                    var group = $(this),
+                        type = group.data('name'),
+                        url = group.find('[data-options-url]').data('options-url'),
+                        key = url + '&' + $.param({text: text}),
+                        addSuggestions = function (response) {
+                            var data = {suggestions: []};
+                            // Ignore responses for text that has since changed
+                            if (text !== typedText || !newSuggestions) { return; }
+                            $.each(response.options, function () {
+                                var option = this,
+                                    typedIndex = option.label.toLowerCase().indexOf(text.toLowerCase()),
+                                    thisSuggestion = {
+                                        name: option.label,
+                                        id: option.value,
+                                        type: type,
+                                        typedText: '',
+                                        preText: option.label,
+                                        postText: ''
+                                    };
+                                if (newSuggestions.find('a:not(.new)').filter(function () { return String($(this).data('id')) === String(option.value) && $(this).data('type') === type; }).length) {
+                                    return;
+                                }
+                                if (typedIndex !== -1) {
+                                    thisSuggestion.typedText = text;
+                                    thisSuggestion.preText = option.label.substring(0, typedIndex);
+                                    thisSuggestion.postText = option.label.substring(typedIndex + text.length);
+                                }
+                                if (group.find('.category-title').length) {
+                                    thisSuggestion.displayType = group.find('.category-title').text();
+                                }
+                                data.suggestions.push(thisSuggestion);
+                            });
+                            if (data.suggestions.length) {
+                                newSuggestions = newSuggestions.add(ich.autocomplete_suggestion(data));
+                                showSuggestions();
+                            }
+                        };
+                    if (!url) { return; }
+                    if (cache[key]) {
+                        addSuggestions(cache[key]);
+                    } else {
+                        ajaxCalls = ajaxCalls + 1;
+                        $.get(url, {text: text}, function (response) {
+                            ajaxResponses = ajaxResponses + 1;
+                            cache[key] = response;
+                            addSuggestions(response);
+                        });
+                    }
+                });
+            },
+
+            // Show filtered suggestions, if there are any
+            showSuggestions = function () {
                 filterSuggestions();
                 suggestionList.html(filteredSuggestions);
 
@@ -252,6 +313,9 @@
                                 }
                             } else {
                                 updateSuggestions();
+                                if (lazyInputList.length) {
+                                    textbox.doTimeout('lazy-autocomplete', 200, updateLazySuggestions);
+                                }
                             }
                         } else {
                             suggestionList.empty().hide();
@@ -419,7 +483,7 @@
                     thisInput.prop('checked', true).change();
                 } else {
                     if (options.multipleCategories) {
-                        thisGroup = newInputList.filter(function () {
+                        thisGroup = newInputList.add(lazyInputList).filter(function () {
                             return $(this).data('name') === thisTypeName;
                         });
                     } else {
@@ -601,6 +665,9 @@
         newInputList: null,                             // Selector for list of new inputs (only needed if ``allowNew: true``
                                                         //      and ``multipleCategories: true``)
         newInputTextbox: null,                          // Selector for secondary textbox to enter new group-specific inputs
+        lazyInputList: null,                            // Selector for groups of inputs (only needed if ``multipleCategories: true``)
+                                                        //      whose suggestions are also fetched via Ajax from the
+                                                        //      data-options-url of an element in the group
         fakePlaceholder: false,                         // Set ``true`` to create fake placeholder text when using ``initialFocus: true``
         initialFocus: false,                            // Set ``true`` to give textbox focus on initial page load
         reset: '.reset',                                // Selector for button to reset all inputs to original state
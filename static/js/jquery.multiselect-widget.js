@@ -26,6 +26,10 @@
             form = $(options.formSel),
             headers = context.find(options.headerSel),
             bulkSelects = context.find(options.bulkSel),
+            optionsUrl = context.data('options-url'),
+            productTrigger = optionsUrl ? form.find(context.data('product-trigger')) : $(),
+            loadMore = context.find(options.loadMoreSel),
+            pagenumber = 1,
             items,
 
             updateBulkSel = function (select, list) {
@@ -76,9 +80,63 @@
                         thisItem.show();
                     }
                 });
+            },
+
+            // Lazy widgets fetch available items from the server, a page at a
+            // time, filtered by the checked filters and the selected product
+            loadAvailable = function (reset) {
+                var params = {pagenumber: reset ? 1 : pagenumber + 1},
+                    product = productTrigger.find('option:selected').data('product-id');
+
+                if (product) {
+                    params.product = product;
+                }
+                filterLists.find(options.filterSel + ':checked').each(function () {
+                    var name = $(this).attr('name');
+                    params[name] = (params[name] || []).concat($(this).val());
+                });
+                $.doTimeout('multiselect-load', 100, function () {
+                    availableList.loadingOverlay();
+                    $.ajax({
+                        url: optionsUrl,
+                        data: params,
+                        traditional: true,
+                        dataType: 'json',
+                        success: function (response) {
+                            var newItems = $(response.html).filter(options.itemSel).filter(function () {
+                                var id = $(this).find(options.inputSel).val();
+                                return !includedList.find(options.inputSel + '[value="' + id + '"]').length;
+                            });
+
+                            availableList.loadingOverlay('remove');
+                            if (reset) {
+                                availableList.find(options.itemSel).remove();
+                            }
+                            availableList.append(newItems);
+                            pagenumber = params.pagenumber;
+                            loadMore.toggle(response.more);
+                            updateBulkSel(availableList.closest('.itemlist').find(options.bulkSel), availableList);
+                        }
+                    });
+                });
             };
 
+        if (optionsUrl) {
+            loadAvailable(true);
+            productTrigger.change(function () {
+                loadAvailable(true);
+            });
+            loadMore.click(function (e) {
+                e.preventDefault();
+                loadAvailable(false);
+            });
+        }
+
         filterLists.on('change', options.filterSel, function () {
+            if (optionsUrl) {
+                loadAvailable(true);
+                return;
+            }
             filterItems();
             updateBulkSel(availableList.closest('.itemlist').find(options.bulkSel), availableList);
         });
@@ -251,7 +309,8 @@
         bulkExcludeSel: '.action-exclude',
         headerSel: '.listordering .sortlink',
         formSel: '.manage-form',
-        bulkSel: '.listordering .bybulk-value'
+        bulkSel: '.listordering .bybulk-value',
+        loadMoreSel: '.load-more'
     };
 
 }(jQuery));
\ No newline at end of file
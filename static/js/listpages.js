@@ -19,6 +19,7 @@ var MT = (function (MT, $) {
                 $.get(url, function (data) {
                     content.loadingOverlay('remove');
                     content.html(data.html);
+                    content.trigger('after-load', [content]);
                 });
             } else { content.css('min-height', '0px'); }
             $(this).blur();
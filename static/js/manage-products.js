@@ -78,7 +78,10 @@ var MT = (function (MT, $) {
                 if (options.multiselect_widget_bool) {
                     context.find('.visual .filter-group input[type="checkbox"]:checked').prop('checked', false).change();
                     context.find('.multiselected .select').empty();
-                    filterFilters(newopts);
+                    // lazy multiselects load only some items; can't filter filters
+                    if (!context.find('.multiselect[data-options-url]').length) {
+                        filterFilters(newopts);
+                    }
                 }
                 if (options.callback) {
                     options.callback(context);
@@ -88,7 +91,7 @@ var MT = (function (MT, $) {
             if (trigger.is('select') && !(context.find('.multiselected .select').find(options.option_sel).length)) {
                 doFilter();
                 trigger.change(doFilter);
-            } else if (options.multiselect_widget_bool) {
+            } else if (options.multiselect_widget_bool && !context.find('.multiselect[data-options-url]').length) {
                 filterFilters(target.add(context.find('.multiselected .select')).find(options.option_sel));
             }
         }
@@ -81,22 +81,37 @@ var MT = (function (MT, $) {
     MT.runTests = function (container) {
         var context = $(container),
             tests = context.find('.listitem'),
-            ajaxFormsInit = function (test) {
-                var forms = test.find('form');
-
-                forms.ajaxForm({
-                    beforeSubmit: function (arr, form, options) {
-                        test.loadingOverlay();
-                    },
-                    success: function (response) {
-                        var newTest = $(response.html);
-                        test.loadingOverlay('remove');
-                        if (response.html) {
-                            test.replaceWith(newTest);
-                            ajaxFormsInit(newTest);
-                            newTest.find('.details').html5accordion();
+            passQueue = [],
+            ajaxFormsInit,
+            // Replace each test re-rendered in the response (keyed by id)
+            replaceTests = function (response) {
+                $.each(response.items || {}, function (id, html) {
+                    var newTest = $(html);
+                    context.find('#test-id-' + id).replaceWith(newTest);
+                    ajaxFormsInit(newTest);
+                    newTest.find('.details').html5accordion();
+                });
+            },
+            // Passes clicked in quick succession are sent in a single request
+            queuePass = function (test, id) {
+                test.loadingOverlay();
+                passQueue.push(id);
+                $.doTimeout('runtests-pass', 500, function () {
+                    var ids = passQueue;
+                    passQueue = [];
+                    $.ajax({
+                        type: 'POST',
+                        url: window.location.href,
+                        data: {'action-result_pass': ids},
+                        traditional: true,
+                        dataType: 'json',
+                        success: replaceTests,
+                        complete: function () {
+                            $.each(ids, function (i, id) {
+                                context.find('#test-id-' + id).loadingOverlay('remove');
+                            });
                         }
-                    }
+                    });
                 });
             },
             ajaxifyTests = function () {
@@ -104,14 +119,47 @@ var MT = (function (MT, $) {
                     var thisTest = $(this);
                     ajaxFormsInit(thisTest);
                 });
+            },
+            // details of started tests are open, so load them straight away
+            openStartedTests = function () {
+                tests.filter('.started').find('.itembody.details > .item-summary[href]').click();
             };
 
+        ajaxFormsInit = function (test) {
+            var forms = test.find('form');
+
+            forms.ajaxForm({
+                beforeSubmit: function (arr, form, options) {
+                    var pass = $.grep(arr, function (field) {
+                        return field.name === 'action-result_pass';
+                    });
+                    if (pass.length) {
+                        queuePass(test, pass[0].value);
+                        return false;
+                    }
+                    test.loadingOverlay();
+                },
+                success: function (response) {
+                    test.loadingOverlay('remove');
+                    replaceTests(response);
+                }
+            });
+        };
+
         ajaxifyTests();
+        openStartedTests();
 
         // Re-attach ajax-form handlers after list is ajax-replaced (sorting/filtering called in listpages.js)
         context.on('after-replace', '.itemlist.action-ajax-replace', function (event, replacement) {
             tests = context.find('.listitem');
             ajaxifyTests();
+            openStartedTests();
+        });
+
+        // Attach ajax-form handlers to test details when ajax-loaded (called in listpages.js)
+        context.on('after-load', '.listitem .item-content', function (event, content) {
+            ajaxFormsInit(content.closest('.listitem'));
+            content.find('.details').html5accordion();
         });
     };
 
@@ -33,6 +33,25 @@ class DBMixin(object):
         return obj.__class__._base_manager.get(pk=obj.pk)
 
 
+    def count_queries(self, func, *args, **kwargs):
+        """
+        Return the number of queries made by calling ``func``.
+
+        Queries are recorded afresh at the start of each request, so only
+        those of the last request made by ``func`` are counted.
+
+        """
+        from django.db import connection, reset_queries
+        old = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        reset_queries()
+        try:
+            func(*args, **kwargs)
+        finally:
+            connection.use_debug_cursor = old
+        return len(connection.queries)
+
+
 
 
 class DBTestCase(DBMixin, django_test.TestCase):
@@ -0,0 +1,153 @@
+"""
+Tests for benchmarks.
+
+"""
+from mock import patch
+
+from tests import case
+
+
+
+class RunBenchmarksTest(case.DBTestCase):
+    """Tests for run_benchmarks."""
+    def setUp(self):
+        """Generate a small dataset."""
+        from moztrap.model.dataset import generate
+        generate(
+            versions=1,
+            cases=4,
+            steps=1,
+            suites=1,
+            categories=1,
+            elements=1,
+            runs=1,
+            results=4,
+            testers=1,
+            tags=1,
+            deleted=0,
+            )
+
+
+    def counts(self):
+        """Return list of numbers of objects of models benchmarks write."""
+        return [
+            m.everything.count()
+            for m in [
+                self.model.ProductVersion,
+                self.model.Case,
+                self.model.CaseVersion,
+                self.model.Suite,
+                self.model.Run,
+                self.model.RunCaseVersion,
+                self.model.Result,
+                self.model.Tag,
+                ]
+            ]
+
+
+    def test_all(self):
+        """Times every benchmark, leaving the data as it was."""
+        from moztrap.debug.benchmarks import BENCHMARKS, run_benchmarks
+        before = self.counts()
+
+        results = run_benchmarks(repeat=1)
+
+        self.assertEqual(
+            sorted(results), sorted(b.name for b in BENCHMARKS))
+        for name, result in results.items():
+            self.assertGreater(result["queries"], 0, name)
+            self.assertGreaterEqual(
+                result["seconds"], result["min_seconds"], name)
+        self.assertEqual(self.counts(), before)
+
+
+    def test_user_removed(self):
+        """The throwaway user making requests is deleted, with its API key."""
+        from moztrap.debug.benchmarks import run_benchmarks
+        users = self.model.User.objects.count()
+
+        run_benchmarks(names=["runtests"], repeat=1)
+
+        self.assertEqual(self.model.User.objects.count(), users)
+        self.assertEqual(self.model.ApiKey.everything.count(), 0)
+
+
+    def test_user_removed_on_error(self):
+        """The throwaway user is deleted even if a benchmark fails."""
+        from moztrap.debug.benchmarks import run_benchmarks
+        users = self.model.User.objects.count()
+
+        with patch("moztrap.debug.benchmarks.RunTests.run") as run:
+            run.side_effect = AssertionError(500)
+            with self.assertRaises(AssertionError):
+                run_benchmarks(names=["runtests"], repeat=1)
+
+        self.assertEqual(self.model.User.objects.count(), users)
+
+
+    def test_existing_benchmark_user_untouched(self):
+        """An existing "benchmark" account isn't used or promoted."""
+        from moztrap.debug.benchmarks import run_benchmarks
+        user = self.F.UserFactory.create(username="benchmark")
+
+        run_benchmarks(names=["runtests"], repeat=1)
+
+        self.assertFalse(self.refresh(user).is_superuser)
+
+
+    def test_named(self):
+        """Only the named benchmarks are run."""
+        from moztrap.debug.benchmarks import run_benchmarks
+
+        results = run_benchmarks(names=["runtests"], repeat=2)
+
+        self.assertEqual(results.keys(), ["runtests"])
+
+
+
+class RegressionsTest(case.TestCase):
+    """Tests for regressions."""
+    def regressions(self, results, baseline, **kwargs):
+        """Return regressions of ``results`` from ``baseline``."""
+        from moztrap.debug.benchmarks import regressions
+        return regressions(results, baseline, **kwargs)
+
+
+    def test_slower(self):
+        """Slowing down by more than the threshold is a regression."""
+        self.assertEqual(
+            self.regressions(
+                {"a": {"seconds": 1.3, "queries": 5}},
+                {"a": {"seconds": 1.0, "queries": 5}},
+                ),
+            ["a: 1.300s, was 1.000s"],
+            )
+
+
+    def test_within_threshold(self):
+        """Slowing down by less than the threshold is not a regression."""
+        self.assertEqual(
+            self.regressions(
+                {"a": {"seconds": 1.3, "queries": 5}},
+                {"a": {"seconds": 1.0, "queries": 5}},
+                threshold=0.5,
+                ),
+            [],
+            )
+
+
+    def test_more_queries(self):
+        """Making more queries is a regression."""
+        self.assertEqual(
+            self.regressions(
+                {"a": {"seconds": 1.0, "queries": 6}},
+                {"a": {"seconds": 1.0, "queries": 5}},
+                ),
+            ["a: 6 queries, was 5"],
+            )
+
+
+    def test_missing(self):
+        """Benchmarks not in the baseline are ignored."""
+        self.assertEqual(
+            self.regressions({"a": {"seconds": 1.0, "queries": 6}}, {}), [])
@@ -56,3 +56,172 @@ class AjaxTracebackMiddlewareTest(case.TestCase):
         request.is_ajax.return_value = False
 
         self.assertIs(m.process_exception(request), None)
+
+
+
+class FingerprintTest(case.TestCase):
+    """Tests for SQL fingerprinting."""
+    def fingerprint(self, sql):
+        """Return fingerprint of ``sql``."""
+        from moztrap.debug.middleware import fingerprint
+        return fingerprint(sql)
+
+
+    def test_literals(self):
+        """Numbers and quoted strings are replaced."""
+        self.assertEqual(
+            self.fingerprint(
+                "SELECT a FROM t1 WHERE id = 3 AND name = 'it''s 4'"),
+            "SELECT a FROM t1 WHERE id = ? AND name = ?",
+            )
+
+
+    def test_lists(self):
+        """Lists of values of any length are collapsed."""
+        self.assertEqual(
+            self.fingerprint("SELECT a FROM t WHERE id IN (1, 2, 3)"),
+            self.fingerprint("SELECT a FROM t WHERE id IN (4)"),
+            )
+
+
+
+class RequestMetricsMiddlewareTest(case.DBTestCase):
+    """Tests for RequestMetricsMiddleware."""
+    def middleware(self):
+        """Return an instance of the middleware under test."""
+        from moztrap.debug.middleware import RequestMetricsMiddleware
+        return RequestMetricsMiddleware()
+
+
+    def request(self, response, queries=0, **settings):
+        """
+        Pass a request to "/" through the middleware.
+
+        Returns tuple of the response and the mock logger. ``queries`` similar
+        queries are made by the "view", which returns ``response``.
+
+        """
+        from django.test import RequestFactory
+        from moztrap.view.views import home
+
+        settings.setdefault("REQUEST_METRICS", True)
+        with override_settings(**settings):
+            m = self.middleware()
+        request = RequestFactory().get("/")
+        with patch("moztrap.debug.middleware.logger") as logger:
+            m.process_request(request)
+            m.process_view(request, home, (), {})
+            for i in range(queries):
+                self.model.Product.objects.filter(pk=i).count()
+            if hasattr(response, "render"):
+                response = m.process_template_response(request, response)
+                response.render()
+            response = m.process_response(request, response)
+        return response, logger
+
+
+    @override_settings(REQUEST_METRICS=False)
+    def test_not_used_by_default(self):
+        """Not used unless the REQUEST_METRICS setting is True."""
+        with self.assertRaises(MiddlewareNotUsed):
+            self.middleware()
+
+
+    def test_logs_metrics(self):
+        """Logs view, queries, repeated queries and response size."""
+        from django.http import HttpResponse
+
+        res, logger = self.request(HttpResponse("hello"), queries=3)
+
+        message = logger.info.call_args[0][0]
+        self.assertIn("view=home ", message)
+        self.assertIn("status=200 ", message)
+        self.assertIn("queries=3 ", message)
+        self.assertIn("duplicates=2 ", message)
+        self.assertIn("render_ms=None ", message)
+        self.assertIn("size=5", message)
+        metrics = logger.info.call_args[1]["extra"]["metrics"]
+        self.assertEqual(metrics["queries"], 3)
+        self.assertFalse(logger.warning.called)
+        self.assertNotIn("Server-Timing", res)
+
+
+    def test_render_time(self):
+        """Times rendering of template responses."""
+        from django.template import Template
+        from django.template.response import SimpleTemplateResponse
+
+        res, logger = self.request(
+            SimpleTemplateResponse(Template("hello")))
+
+        metrics = logger.info.call_args[1]["extra"]["metrics"]
+        self.assertIsInstance(metrics["render_ms"], float)
+        self.assertEqual(metrics["size"], 5)
+
+
+    def test_restores_debug_cursor(self):
+        """Stops recording queries after the request, if it wasn't before."""
+        from django.db import connection
+        from django.http import HttpResponse
+
+        self.request(HttpResponse("hello"))
+
+        self.assertIs(connection.use_debug_cursor, None)
+
+
+    def test_budget_exceeded(self):
+        """Logs a warning if the view's query budget is exceeded."""
+        from django.http import HttpResponse
+
+        res, logger = self.request(
+            HttpResponse("hello"),
+            queries=3,
+            REQUEST_BUDGETS={"home": {"queries": 2}},
+            )
+
+        args = logger.warning.call_args[0]
+        message = args[0] % args[1:]
+        self.assertIn("home", message)
+        self.assertIn("queries 3 > 2", message)
+        self.assertIn("3x SELECT COUNT(*)", message)
+
+
+    def test_budget_by_view_path(self):
+        """Budgets can be given by the view's dotted path."""
+        from django.http import HttpResponse
+
+        res, logger = self.request(
+            HttpResponse("hello"),
+            queries=3,
+            REQUEST_BUDGETS={"moztrap.view.views.home": {"queries": 2}},
+            )
+
+        self.assertTrue(logger.warning.called)
+
+
+    def test_budget_not_exceeded(self):
+        """Logs no warning if the view's budget isn't exceeded."""
+        from django.http import HttpResponse
+
+        res, logger = self.request(
+            HttpResponse("hello"),
+            queries=2,
+            REQUEST_BUDGETS={"home": {"queries": 2}},
+            )
+
+        self.assertFalse(logger.warning.called)
+
+
+    def test_server_timing(self):
+        """Timings are sent in a Server-Timing header if configured."""
+        from django.http import HttpResponse
+
+        res, logger = self.request(
+            HttpResponse("hello"),
+            queries=1,
+            REQUEST_METRICS_SERVER_TIMING=True,
+            )
+
+        self.assertTrue(res["Server-Timing"].startswith("db;dur="))
+        self.assertIn('desc="1 queries"', res["Server-Timing"])
+        self.assertIn("total;dur=", res["Server-Timing"])
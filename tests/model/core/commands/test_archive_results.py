@@ -0,0 +1,58 @@
+"""
+Tests for management command to archive superseded results.
+
+"""
+from cStringIO import StringIO
+import datetime
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class ArchiveResultsTest(case.DBTestCase):
+    """Tests for archive_results management command."""
+    def create_results(self, on):
+        """Create a result superseded ``on`` date; return it."""
+        with patch("moztrap.model.mtmodel.utcnow") as mock_utcnow:
+            mock_utcnow.return_value = on
+            old = self.F.ResultFactory.create()
+            self.F.ResultFactory.create(
+                runcaseversion=old.runcaseversion,
+                environment=old.environment,
+                tester=old.tester,
+                )
+        return old
+
+
+    def call(self, **kwargs):
+        """Call the command at a fixed time; return its output."""
+        with patch("moztrap.model.core.management.commands."
+                   "archive_results.utcnow") as mock_utcnow:
+            mock_utcnow.return_value = datetime.datetime(2012, 6, 1)
+            with patch("sys.stdout", StringIO()) as stdout:
+                call_command("archive_results", **kwargs)
+        return stdout.getvalue()
+
+
+    def test_archive(self):
+        """Archives results superseded more than a year ago."""
+        old = self.create_results(datetime.datetime(2011, 5, 1))
+        self.create_results(datetime.datetime(2011, 7, 1))
+
+        self.assertEqual(self.call(), "Archived 1 results.\n")
+        self.assertEqual(
+            list(self.model.ArchivedResult.objects.values_list(
+                        "id", flat=True)),
+            [old.id],
+            )
+
+
+    def test_days(self):
+        """The age of results archived is given in days."""
+        self.create_results(datetime.datetime(2012, 5, 1))
+
+        self.assertEqual(self.call(days=7), "Archived 1 results.\n")
@@ -0,0 +1,102 @@
+"""
+Tests for management command to run benchmarks.
+
+"""
+from cStringIO import StringIO
+import json
+import os
+from tempfile import mkstemp
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class BenchmarkTest(case.TestCase):
+    """Tests for benchmark management command."""
+    def call_command(self, *args, **kwargs):
+        """
+        Run the command with run_benchmarks mocked; return (stdout, stderr).
+
+        The database is taken to be generated unless ``generated=False``.
+        Also patch ``sys.exit`` so a ``CommandError`` doesn't cause an exit.
+
+        """
+        generated = kwargs.pop("generated", True)
+        with patch("moztrap.debug.benchmarks.run_benchmarks") as mock_run:
+            mock_run.return_value = {
+                "runtests": {
+                    "seconds": 2.0, "min_seconds": 1.5, "queries": 10},
+                }
+            with patch("moztrap.model.dataset.is_generated") as is_generated:
+                is_generated.return_value = generated
+                with patch("sys.stdout", StringIO()) as stdout:
+                    with patch("sys.stderr", StringIO()) as stderr:
+                        with patch("sys.exit"):
+                            call_command("benchmark", *args, **kwargs)
+        self.run_args = mock_run.call_args
+        return stdout.getvalue(), stderr.getvalue()
+
+
+    def baseline(self, results):
+        """Write ``results`` to a temporary file; return its name."""
+        fd, filename = mkstemp()
+        self.addCleanup(os.remove, filename)
+        with os.fdopen(fd, "w") as fh:
+            json.dump(results, fh)
+        return filename
+
+
+    def test_output(self):
+        """Writes results as JSON to standard output."""
+        output, errors = self.call_command("runtests", repeat=1)
+
+        self.assertEqual(json.loads(output)["runtests"]["queries"], 10)
+        self.assertEqual(
+            self.run_args[1], {"names": ("runtests",), "repeat": 1})
+        self.assertEqual(errors, "")
+
+
+    def test_unknown(self):
+        """Unknown benchmark names are an error."""
+        output, errors = self.call_command("foo")
+
+        self.assertIn('Unknown benchmark "foo"', errors)
+
+
+    def test_regression(self):
+        """Regressions from the baseline are an error."""
+        filename = self.baseline(
+            {"runtests": {"seconds": 1.0, "queries": 10}})
+
+        output, errors = self.call_command(baseline=filename)
+
+        self.assertIn("runtests: 2.000s, was 1.000s", errors)
+
+
+    def test_no_regression(self):
+        """No error if within threshold of the baseline."""
+        filename = self.baseline(
+            {"runtests": {"seconds": 1.0, "queries": 10}})
+
+        output, errors = self.call_command(baseline=filename, threshold=1.5)
+
+        self.assertEqual(errors, "")
+
+
+    def test_bad_baseline(self):
+        """An unreadable baseline is an error."""
+        output, errors = self.call_command(baseline="/does/not/exist.json")
+
+        self.assertIn("Could not read baseline", errors)
+
+
+    def test_not_generated(self):
+        """Refuses to run against a database not built by generate_dataset."""
+        output, errors = self.call_command(generated=False)
+
+        self.assertIn("wasn't built by generate_dataset", errors)
+        self.assertIsNone(self.run_args)
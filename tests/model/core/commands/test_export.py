@@ -0,0 +1,119 @@
+"""
+Tests for management command to export cases.
+
+"""
+from cStringIO import StringIO
+import json
+import os
+from tempfile import mkstemp
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+
+class ExportCasesTest(case.DBTestCase):
+    """Tests for export management command."""
+
+    def call_command(self, *args, **kwargs):
+        """
+        Runs the management command and returns (stdout, stderr) output.
+
+        Also patch ``sys.exit`` so a ``CommandError`` doesn't cause an exit.
+
+        """
+        with patch("sys.stdout", StringIO()) as stdout:
+            with patch("sys.stderr", StringIO()) as stderr:
+                with patch("sys.exit"):
+                    call_command("export", *args, **kwargs)
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return (stdout.read(), stderr.read())
+
+
+    def create_case(self):
+        """Create a product version "Foo 1.0" with a case "Bar"."""
+        self.F.CaseVersionFactory.create(
+            productversion__product__name="Foo",
+            productversion__version="1.0",
+            name="Bar",
+            )
+
+
+    def test_no_args(self):
+        """Command shows usage."""
+        output = self.call_command()
+
+        self.assertEqual(
+            output,
+            (
+                "",
+                "Error: Usage: <product_name> <product_version> "
+                "[<filename>]\n",
+                )
+            )
+
+
+    def test_bad_product_version(self):
+        """Error if given non-existent product version."""
+        self.F.ProductFactory.create(name="Foo")
+
+        output = self.call_command("Foo", "1.0")
+
+        self.assertEqual(
+            output,
+            ("", 'Error: Version "1.0" of product "Foo" does not exist\n'),
+            )
+
+
+    def test_stdout(self):
+        """Writes JSON to stdout by default."""
+        self.create_case()
+
+        output = self.call_command("Foo", "1.0")
+
+        self.assertEqual(
+            json.loads(output[0]),
+            {"cases": [{"name": "Bar", "description": ""}]},
+            )
+
+
+    def test_ndjson(self):
+        """Writes NDJSON if asked."""
+        self.create_case()
+
+        output = self.call_command("Foo", "1.0", format="ndjson")
+
+        self.assertEqual(output[0], '{"name": "Bar", "description": ""}\n')
+
+
+    def test_file(self):
+        """Writes to the named file, in the format of its extension."""
+        self.create_case()
+        (fd, path) = mkstemp(suffix=".jsonl")
+        os.close(fd)
+
+        try:
+            output = self.call_command("Foo", "1.0", path)
+            with open(path) as fh:
+                contents = fh.read()
+        finally:
+            os.remove(path)
+
+        self.assertEqual(output, ("", ""))
+        self.assertEqual(contents, '{"name": "Bar", "description": ""}\n')
+
+
+    def test_bad_format(self):
+        """Error if the filename's format can't be exported."""
+        self.create_case()
+
+        output = self.call_command("Foo", "1.0", "cases.csv")
+
+        self.assertEqual(
+            output, ("", "Error: Cannot export CSV; use --format\n"))
@@ -0,0 +1,31 @@
+"""
+Tests for management command to generate a synthetic dataset.
+
+"""
+from cStringIO import StringIO
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class GenerateDatasetTest(case.DBTestCase):
+    """Tests for generate_dataset management command."""
+    def test_generates(self):
+        """Generates a dataset of the given size and reports counts."""
+        with patch("sys.stdout", StringIO()) as stdout:
+            call_command(
+                "generate_dataset",
+                products=1,
+                versions=1,
+                cases=3,
+                runs=1,
+                results=10,
+                deleted=0,
+                )
+
+        self.assertIn("Result: 10\n", stdout.getvalue())
+        self.assertEqual(self.model.Case.objects.count(), 3)
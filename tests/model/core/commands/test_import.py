@@ -20,7 +20,7 @@ from tests import case
 class ImportCasesTest(case.DBTestCase):
     """Tests for import_cases management command."""
 
-    def call_command(self, *args):
+    def call_command(self, *args, **kwargs):
         """
         Runs the management command and returns (stdout, stderr) output.
 
@@ -30,7 +30,7 @@ class ImportCasesTest(case.DBTestCase):
         with patch("sys.stdout", StringIO()) as stdout:
             with patch("sys.stderr", StringIO()) as stderr:
                 with patch("sys.exit"):
-                    call_command("import", *args)
+                    call_command("import", *args, **kwargs)
 
         stdout.seek(0)
         stderr.seek(0)
@@ -38,7 +38,7 @@ class ImportCasesTest(case.DBTestCase):
 
 
     @contextmanager
-    def tempfile(self, contents):
+    def tempfile(self, contents, suffix=""):
         """
         Write given contents to a temporary file, yielding its path.
 
@@ -46,7 +46,7 @@ class ImportCasesTest(case.DBTestCase):
         when context manager exits.
 
         """
-        (fd, path) = mkstemp()
+        (fd, path) = mkstemp(suffix=suffix)
         fh = os.fdopen(fd, "w")
         fh.write(contents)
         fh.close()
@@ -138,3 +138,150 @@ class ImportCasesTest(case.DBTestCase):
 
         self.assertEqual(output, ("Imported 1 cases\nImported 0 suites\n", ""))
         self.assertEqual(self.model.CaseVersion.objects.get().name, "Foo")
+
+
+    def test_bulk(self):
+        """Can import in bulk mode."""
+        from moztrap.model.library.importer import ImportResult
+        self.F.ProductVersionFactory.create(product__name="Foo", version="1.0")
+
+        data = {
+            "cases": [{"name": "Foo", "steps": [{"instruction": "do this"}]}]}
+
+        with patch(
+                "moztrap.model.library.importer.BulkCaseImporter.import_chunk",
+                ) as import_chunk:
+            import_chunk.return_value = ImportResult()
+            with self.tempfile(json.dumps(data)) as path:
+                self.call_command("Foo", "1.0", path, bulk=True)
+
+        self.assertEqual(import_chunk.call_count, 1)
+
+        with self.tempfile(json.dumps(data)) as path:
+            output = self.call_command("Foo", "1.0", path, bulk=True)
+
+        self.assertEqual(output, ("Imported 1 cases\nImported 0 suites\n", ""))
+        self.assertEqual(self.model.CaseVersion.objects.get().name, "Foo")
+
+
+    def test_ndjson(self):
+        """Newline-delimited JSON is detected from the file extension."""
+        self.F.ProductVersionFactory.create(product__name="Foo", version="1.0")
+
+        lines = [
+            {"suite": {"name": "S", "description": "desc"}},
+            {"name": "Foo", "suites": ["S"], "steps": []},
+            ]
+
+        with self.tempfile(
+                "\n".join(json.dumps(l) for l in lines), ".ndjson") as path:
+            output = self.call_command("Foo", "1.0", path, bulk=True)
+
+        self.assertIn("Imported 1 cases\nImported 1 suites\n", output[0])
+        cv = self.model.CaseVersion.objects.get()
+        self.assertEqual(cv.case.suites.get().description, "desc")
+
+
+    def test_bad_ndjson(self):
+        """Error with line number if NDJSON is malformed."""
+        self.F.ProductVersionFactory.create(product__name="Foo", version="1.0")
+
+        with self.tempfile('{"name": "Foo"}\n{') as path:
+            output = self.call_command("Foo", "1.0", path, format="ndjson")
+
+        self.assertIn("Error: Could not parse NDJSON: Line 2: ", output[1])
+
+
+    def test_checkpoint_resume(self):
+        """A bulk import resumes from its checkpoint file, then removes it."""
+        pv = self.F.ProductVersionFactory.create(
+            product__name="Foo", version="1.0")
+        self.F.CaseVersionFactory.create(productversion=pv, name="One")
+
+        data = {"cases": [{"name": "One"}, {"name": "Two"}]}
+
+        with self.tempfile(json.dumps(data)) as path:
+            with self.tempfile("") as checkpoint:
+                with open(checkpoint, "w") as fh:
+                    json.dump(
+                        {
+                            "args": ["Foo", "1.0", os.path.abspath(path)],
+                            "position": 1,
+                            "result": {
+                                "num_cases": 1,
+                                "num_suites": 0,
+                                "warnings": [
+                                    {
+                                        "reason": "Warning: Case has no steps",
+                                        "item": "One",
+                                        }
+                                    ],
+                                },
+                            },
+                        fh,
+                        )
+                output = self.call_command(
+                    "Foo", "1.0", path, bulk=True, checkpoint=checkpoint)
+
+                self.assertFalse(os.path.exists(checkpoint))
+                # recreate it for the tempfile context manager to remove
+                open(checkpoint, "w").close()
+
+        self.assertEqual(
+            output[0],
+            "Warning: Case has no steps: One\n"
+            "Warning: Case has no steps: Two\n"
+            "Imported 2 cases\n"
+            "Imported 0 suites\n",
+            )
+
+
+    def test_checkpoint_other_import(self):
+        """Error if the checkpoint file is for a different import."""
+        self.F.ProductVersionFactory.create(product__name="Foo", version="1.0")
+
+        with self.tempfile("{}") as path:
+            with self.tempfile(
+                    json.dumps({"args": ["Bar", "1.0", "x.json"]})) as cp:
+                output = self.call_command(
+                    "Foo", "1.0", path, bulk=True, checkpoint=cp)
+
+        self.assertIn(
+            "is for a different import: Bar 1.0 x.json", output[1])
+
+
+    def test_csv(self):
+        """CSV is detected from the file extension."""
+        self.F.ProductVersionFactory.create(product__name="Foo", version="1.0")
+
+        with self.tempfile("name,instruction\nFoo,do this\n", ".csv") as path:
+            output = self.call_command("Foo", "1.0", path, bulk=True)
+
+        self.assertEqual(output, ("Imported 1 cases\nImported 0 suites\n", ""))
+        cv = self.model.CaseVersion.objects.get()
+        self.assertEqual(cv.steps.get().instruction, "do this")
+
+
+    def test_text(self):
+        """Bulk text format is detected from the file contents."""
+        self.F.ProductVersionFactory.create(product__name="Foo", version="1.0")
+
+        with self.tempfile("Test that foo\nWhen I do\nThen I see\n") as path:
+            output = self.call_command("Foo", "1.0", path)
+
+        self.assertEqual(output, ("Imported 1 cases\nImported 0 suites\n", ""))
+        self.assertEqual(
+            self.model.CaseVersion.objects.get().name, "Test that foo")
+
+
+    def test_bad_text(self):
+        """Error if text format can't be parsed."""
+        self.F.ProductVersionFactory.create(product__name="Foo", version="1.0")
+
+        with self.tempfile("Test that foo\n") as path:
+            output = self.call_command("Foo", "1.0", path, format="text")
+
+        self.assertIn(
+            "Error: Could not parse TEXT: Line 1: Unexpected end of input",
+            output[1],
+            )
@@ -0,0 +1,28 @@
+"""
+Tests for management command to rebuild the search index.
+
+"""
+from cStringIO import StringIO
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class RebuildSearchIndexTest(case.DBTestCase):
+    def test_rebuild(self):
+        """Rebuilds the index and reports the number of case versions."""
+        cv = self.F.CaseVersionFactory.create(name="Open browser")
+        self.model.CaseVersionTerm.objects.all().delete()
+
+        with patch("sys.stdout", StringIO()) as stdout:
+            call_command("rebuild_search_index")
+
+        self.assertEqual(stdout.getvalue(), "Indexed 1 case versions.\n")
+        self.assertEqual(
+            set(cv.terms.values_list("term", flat=True)),
+            set(["open", "browser"]),
+            )
@@ -0,0 +1,69 @@
+"""
+Tests for management command to restore archived results.
+
+"""
+from cStringIO import StringIO
+import datetime
+
+from django.core.management import call_command
+
+from mock import patch
+
+from tests import case
+
+
+
+class RestoreResultsTest(case.DBTestCase):
+    """Tests for restore_results management command."""
+    def archived(self, **kwargs):
+        """Create and archive a superseded result; return its id."""
+        from moztrap.model.execution.archive import archive
+        old = self.F.ResultFactory.create(**kwargs)
+        self.F.ResultFactory.create(
+            runcaseversion=old.runcaseversion,
+            environment=old.environment,
+            tester=old.tester,
+            )
+        archive(datetime.datetime.max)
+        return old.id
+
+
+    def call(self, **kwargs):
+        """
+        Call the command; return its output.
+
+        Also patch ``sys.exit`` so a ``CommandError`` doesn't cause an exit.
+
+        """
+        with patch("sys.stdout", StringIO()) as stdout:
+            with patch("sys.stderr", StringIO()) as stderr:
+                with patch("sys.exit"):
+                    call_command("restore_results", **kwargs)
+        return stdout.getvalue() + stderr.getvalue()
+
+
+    def test_restore(self):
+        """Restores all archived results."""
+        ids = [self.archived(), self.archived()]
+
+        self.assertEqual(self.call(), "Restored 2 results.\n")
+        self.assertEqual(
+            self.model.Result.objects.filter(id__in=ids).count(), 2)
+        self.assertEqual(self.model.ArchivedResult.everything.count(), 0)
+
+
+    def test_run(self):
+        """Restores only archived results of the given run."""
+        rcv = self.F.RunCaseVersionFactory.create()
+        restored = self.archived(runcaseversion=rcv)
+        not_restored = self.archived()
+
+        self.assertEqual(self.call(run=rcv.run.id), "Restored 1 results.\n")
+        self.assertTrue(self.model.Result.objects.filter(id=restored))
+        self.assertFalse(self.model.Result.objects.filter(id=not_restored))
+
+
+    def test_bad_run(self):
+        """An unknown run is an error."""
+        self.assertEqual(
+            self.call(run=9999), "Error: There is no run with id 9999.\n")
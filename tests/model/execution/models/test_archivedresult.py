@@ -0,0 +1,53 @@
+"""
+Tests for ArchivedResult model.
+
+"""
+from tests import case
+
+
+
+class ArchivedResultTest(case.DBTestCase):
+    """Tests for ArchivedResult."""
+    def archived(self, **kwargs):
+        """Return an unsaved ArchivedResult."""
+        r = self.F.ResultFactory.create(
+            status="failed",
+            runcaseversion__run__name="FF10",
+            runcaseversion__caseversion__name="Open URL",
+            tester__username="tester",
+            )
+        kwargs.setdefault("id", r.id)
+        kwargs.setdefault("environment", r.environment)
+        return self.model.ArchivedResult(
+            tester=r.tester,
+            runcaseversion=r.runcaseversion,
+            status=r.status,
+            **kwargs)
+
+
+    def test_unicode(self):
+        env = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["OS X"], "Language": ["English"]})[0]
+
+        a = self.archived(environment=env)
+
+        self.assertEqual(
+            unicode(a),
+            u"Case 'Open URL' included in run 'FF10', "
+            "run by tester in English, OS X: failed (archived)")
+
+
+    def test_bug_urls(self):
+        """bug_urls are those kept when archived."""
+        a = self.archived(
+            bugs="http://www.example.com/1\nhttp://www.example.com/2")
+
+        self.assertEqual(
+            a.bug_urls(),
+            set(["http://www.example.com/1", "http://www.example.com/2"]),
+            )
+
+
+    def test_no_bug_urls(self):
+        """An archived result with no bugs has no bug URLs."""
+        self.assertEqual(self.archived().bug_urls(), set())
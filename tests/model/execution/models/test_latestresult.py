@@ -0,0 +1,132 @@
+"""
+Tests for LatestResult model and manager.
+
+"""
+from django.db import IntegrityError
+
+from tests import case
+
+
+
+class LatestResultTest(case.DBTestCase):
+    """Tests for LatestResult."""
+    def setUp(self):
+        """Most tests need a runcaseversion, an environment and a tester."""
+        self.rcv = self.F.RunCaseVersionFactory.create()
+        self.env = self.F.EnvironmentFactory.create()
+        self.user = self.F.UserFactory.create()
+
+
+    def create_result(self, **kwargs):
+        """Create a result of our runcaseversion by our tester in our env."""
+        kwargs.setdefault("runcaseversion", self.rcv)
+        kwargs.setdefault("environment", self.env)
+        kwargs.setdefault("tester", self.user)
+        return self.F.ResultFactory.create(**kwargs)
+
+
+    def latest(self):
+        """Return list of result ids pointed to, in order of id."""
+        return list(
+            self.model.LatestResult.objects.order_by(
+                "result").values_list("result", flat=True))
+
+
+    def test_unicode(self):
+        r = self.create_result()
+
+        self.assertEqual(
+            unicode(self.model.LatestResult.objects.get()),
+            u"Latest: {0}".format(r.id),
+            )
+
+
+    def test_new_result_is_latest(self):
+        """A new result is pointed to."""
+        r = self.create_result()
+
+        latest = self.model.LatestResult.objects.get()
+        self.assertEqual(latest.result, r)
+        self.assertEqual(latest.runcaseversion, self.rcv)
+        self.assertEqual(latest.environment, self.env)
+        self.assertEqual(latest.tester, self.user)
+
+
+    def test_replaces(self):
+        """A new result of the same tester, env and rcv replaces the old."""
+        self.create_result()
+        r = self.create_result()
+
+        self.assertEqual(self.latest(), [r.id])
+
+
+    def test_saving_old_result(self):
+        """Saving an existing result doesn't make it latest."""
+        r1 = self.create_result()
+        r2 = self.create_result()
+
+        r1.save()
+
+        self.assertEqual(self.latest(), [r2.id])
+
+
+    def test_others_unaffected(self):
+        """Results of other testers, envs and rcvs have their own latest."""
+        r1 = self.create_result()
+        r2 = self.create_result(tester=self.F.UserFactory.create())
+        r3 = self.create_result(environment=self.F.EnvironmentFactory.create())
+        r4 = self.create_result(
+            runcaseversion=self.F.RunCaseVersionFactory.create())
+
+        self.assertEqual(self.latest(), [r1.id, r2.id, r3.id, r4.id])
+
+
+    def test_point_last_wins(self):
+        """Of several results of the same key pointed to, the last wins."""
+        r1 = self.create_result()
+        r2 = self.create_result()
+        other = self.create_result(tester=self.F.UserFactory.create())
+
+        self.model.LatestResult.objects.point([r2, other, r1])
+
+        self.assertEqual(self.latest(), [r1.id, other.id])
+
+
+    def test_point_none(self):
+        """Pointing to no results does nothing."""
+        self.model.LatestResult.objects.point([])
+
+        self.assertEqual(self.latest(), [])
+
+
+    def test_set_latest(self):
+        """Result.set_latest makes an older result latest again."""
+        r1 = self.create_result()
+        self.create_result()
+
+        r1.set_latest()
+
+        self.assertEqual(self.latest(), [r1.id])
+
+
+    def test_permanent_delete(self):
+        """Permanently deleting the latest result deletes its pointer."""
+        r = self.create_result()
+
+        r.delete(permanent=True)
+
+        self.assertEqual(self.latest(), [])
+
+
+    def test_unique(self):
+        """There can only be one latest result of a tester, env and rcv."""
+        self.create_result()
+        other = self.F.ResultFactory.create()
+
+        with self.assertRaises(IntegrityError):
+            self.model.LatestResult.objects.create(
+                runcaseversion=self.rcv,
+                environment=self.env,
+                tester=self.user,
+                result=other,
+                )
@@ -52,10 +52,10 @@ class ResultTest(case.DBTestCase):
         u = self.F.UserFactory.create()
 
         rcv.result_pass(envs[0], user=u)
-        r1 = rcv.results.get(is_latest=True)
+        r1 = rcv.results.get(latest__isnull=False)
 
         rcv.result_fail(envs[0], user=u)
-        r2 = rcv.results.get(is_latest=True)
+        r2 = rcv.results.get(latest__isnull=False)
 
         r1 = self.refresh(r1)
         r1.comment="this is it"
@@ -65,5 +65,4 @@ class ResultTest(case.DBTestCase):
         r2 = self.refresh(r2)
 
         self.assertEqual(r2.status, "failed")
-        self.assertEqual(r2.is_latest, True)
-        self.assertEqual(r1.is_latest, False)
+        self.assertEqual(rcv.results.get(latest__isnull=False), r2)
@@ -220,7 +220,8 @@ class RunCaseVersionTest(case.DBTestCase):
 
         rcv.start(environment=envs[0], user=u)
 
-        r = rcv.results.get(environment=envs[0], tester=u, is_latest=True)
+        r = rcv.results.get(
+            environment=envs[0], tester=u, latest__isnull=False)
         self.assertEqual(r.status, "started")
 
 
@@ -234,7 +235,8 @@ class RunCaseVersionTest(case.DBTestCase):
 
         rcv.start(environment=envs[0], user=u)
 
-        r = rcv.results.get(environment=envs[0], tester=u, is_latest=True)
+        r = rcv.results.get(
+            environment=envs[0], tester=u, latest__isnull=False)
         self.assertEqual(r.modified_by, u)
 
 
@@ -248,7 +250,8 @@ class RunCaseVersionTest(case.DBTestCase):
 
         rcv.result_pass(envs[0], user=u)
 
-        r = rcv.results.get(environment=envs[0], tester=u, is_latest=True)
+        r = rcv.results.get(
+            environment=envs[0], tester=u, latest__isnull=False)
         self.assertEqual(r.status, "passed")
 
 
@@ -263,7 +266,8 @@ class RunCaseVersionTest(case.DBTestCase):
         rcv.start(envs[0], user=u)
         rcv.result_pass(envs[0], user=u)
 
-        r = rcv.results.get(environment=envs[0], tester=u, is_latest=True)
+        r = rcv.results.get(
+            environment=envs[0], tester=u, latest__isnull=False)
         self.assertEqual(r.status, "passed")
 
 
@@ -292,7 +296,7 @@ class RunCaseVersionTest(case.DBTestCase):
         rcv.start(environment=envs[0], user=u)
         rcv.result_invalid(environment=envs[0], user=u)
 
-        r = rcv.results.get(is_latest=True)
+        r = rcv.results.get(latest__isnull=False)
         self.assertEqual(r.status, "invalidated")
 
 
@@ -311,7 +315,8 @@ class RunCaseVersionTest(case.DBTestCase):
             comment="and this is why",
             )
 
-        r = rcv.results.get(environment=envs[0], tester=u, is_latest=True)
+        r = rcv.results.get(
+            environment=envs[0], tester=u, latest__isnull=False)
         self.assertEqual(self.refresh(r).comment, "and this is why")
 
 
@@ -340,7 +345,7 @@ class RunCaseVersionTest(case.DBTestCase):
         rcv.start(environment=envs[0], user=u)
         rcv.result_fail(environment=envs[0], user=u)
 
-        r = rcv.results.get(is_latest=True)
+        r = rcv.results.get(latest__isnull=False)
         self.assertEqual(r.status, "failed")
 
 
@@ -359,7 +364,8 @@ class RunCaseVersionTest(case.DBTestCase):
             comment="and this is why",
             )
 
-        r = rcv.results.get(environment=envs[0], tester=u, is_latest=True)
+        r = rcv.results.get(
+            environment=envs[0], tester=u, latest__isnull=False)
 
         self.assertEqual(self.refresh(r).comment, "and this is why")
 
@@ -383,7 +389,7 @@ class RunCaseVersionTest(case.DBTestCase):
             stepnumber=1,
             )
 
-        r = rcv.results.get(is_latest=True)
+        r = rcv.results.get(latest__isnull=False)
 
         sr = r.stepresults.get()
         self.assertEqual(sr.step, step)
@@ -404,7 +410,7 @@ class RunCaseVersionTest(case.DBTestCase):
 
         rcv.result_pass(environment=envs[0], user=u)
 
-        pass_r = rcv.results.get(is_latest=True)
+        pass_r = rcv.results.get(latest__isnull=False)
         sr = self.F.StepResultFactory.create(result=pass_r, step=step, status="passed")
 
         rcv.result_fail(
@@ -413,7 +419,7 @@ class RunCaseVersionTest(case.DBTestCase):
             stepnumber=1,
             )
 
-        fail_r = rcv.results.get(is_latest=True)
+        fail_r = rcv.results.get(latest__isnull=False)
         new_sr = fail_r.stepresults.get()
         self.assertNotEqual(new_sr, sr)
         self.assertEqual(new_sr.step, step)
@@ -439,7 +445,7 @@ class RunCaseVersionTest(case.DBTestCase):
             bug="http://www.example.com/",
             )
 
-        r = rcv.results.get(is_latest=True)
+        r = rcv.results.get(latest__isnull=False)
         sr = r.stepresults.get()
         self.assertEqual(sr.bug_url, "http://www.example.com/")
 
@@ -462,5 +468,172 @@ class RunCaseVersionTest(case.DBTestCase):
             stepnumber="2",
             )
 
-        r = rcv.results.get(is_latest=True)
+        r = rcv.results.get(latest__isnull=False)
         self.assertEqual(r.stepresults.count(), 0)
+
+
+
+class RunCaseVersionBulkResultTest(case.DBTestCase):
+    """Tests for RunCaseVersion.bulk_result."""
+    def setUp(self):
+        """All tests need a run with an environment, and a user."""
+        self.env = self.F.EnvironmentFactory.create()
+        self.run = self.F.RunFactory.create(environments=[self.env])
+        self.user = self.F.UserFactory.create()
+
+
+    def create_rcv(self, steps=0):
+        """Create a runcaseversion in this run, with ``steps`` steps."""
+        rcv = self.F.RunCaseVersionFactory.create(run=self.run)
+        for number in range(1, steps + 1):
+            self.F.CaseStepFactory.create(
+                caseversion=rcv.caseversion, number=number)
+        return rcv
+
+
+    def bulk_result(self, actions):
+        """Call bulk_result with ``actions`` in our env as our user."""
+        return self.model.RunCaseVersion.bulk_result(
+            actions, environment=self.env, user=self.user)
+
+
+    def latest(self, rcv):
+        """Return the user's latest result for ``rcv``."""
+        return rcv.results.get(
+            environment=self.env, tester=self.user, latest__isnull=False)
+
+
+    def test_statuses(self):
+        """Each action records a result with the method's status."""
+        rcvs = [self.create_rcv() for i in range(4)]
+
+        results = self.bulk_result(
+            [
+                (rcvs[0], "start", {}),
+                (rcvs[1], "result_pass", {}),
+                (rcvs[2], "result_invalid", {"comment": "unclear"}),
+                (rcvs[3], "result_fail", {"comment": "broken"}),
+                ]
+            )
+
+        self.assertEqual(
+            [self.latest(rcv) for rcv in rcvs], results)
+        self.assertEqual(
+            [(r.status, r.comment) for r in results],
+            [
+                ("started", ""),
+                ("passed", ""),
+                ("invalidated", "unclear"),
+                ("failed", "broken"),
+                ],
+            )
+
+
+    def test_audit_fields(self):
+        """Results are created and modified by the user."""
+        rcv = self.create_rcv()
+
+        self.bulk_result([(rcv, "result_pass", {})])
+
+        r = self.latest(rcv)
+        self.assertEqual(r.created_by, self.user)
+        self.assertEqual(r.modified_by, self.user)
+
+
+    def test_replaces_latest(self):
+        """Previous latest results of the user in the env are not latest."""
+        rcv = self.create_rcv()
+        old = self.F.ResultFactory.create(
+            runcaseversion=rcv, environment=self.env, tester=self.user)
+        other = self.F.ResultFactory.create(runcaseversion=rcv)
+
+        new = self.bulk_result([(rcv, "result_pass", {})])[0]
+
+        self.assertEqual(self.latest(rcv), new)
+        latest = self.model.LatestResult.objects.values_list(
+            "result", flat=True)
+        self.assertEqual(set(latest), set([new.id, other.id]))
+
+
+    def test_same_rcv_twice(self):
+        """Of two actions on one runcaseversion, the last is latest."""
+        rcv = self.create_rcv()
+
+        first, second = self.bulk_result(
+            [(rcv, "start", {}), (rcv, "result_pass", {})])
+
+        self.assertEqual(self.latest(rcv), second)
+        self.assertEqual(rcv.results.count(), 2)
+
+
+    def test_fail_with_stepnumber_and_bug(self):
+        """Failures can mark a particular failed step, with a bug."""
+        rcv = self.create_rcv(steps=2)
+
+        self.bulk_result(
+            [
+                (
+                    rcv,
+                    "result_fail",
+                    {"stepnumber": "2", "bug": "http://www.example.com/"},
+                    ),
+                ]
+            )
+
+        sr = self.latest(rcv).stepresults.get()
+        self.assertEqual(sr.step, rcv.caseversion.steps.get(number=2))
+        self.assertEqual(sr.status, "failed")
+        self.assertEqual(sr.bug_url, "http://www.example.com/")
+        self.assertEqual(sr.created_by, self.user)
+
+
+    def test_fail_bad_stepnumber_ignored(self):
+        """Failures ignore a stepnumber that isn't a step of the case."""
+        rcv = self.create_rcv(steps=1)
+
+        self.bulk_result(
+            [
+                (rcv, "result_fail", {"stepnumber": "2"}),
+                (rcv, "result_fail", {"stepnumber": "two"}),
+                ]
+            )
+
+        self.assertEqual(self.model.StepResult.objects.count(), 0)
+
+
+    def test_fail_touches_rcv(self):
+        """Failures mark the runcaseversion modified by the user."""
+        rcv = self.create_rcv()
+
+        self.bulk_result([(rcv, "result_fail", {})])
+
+        self.assertEqual(self.refresh(rcv).modified_by, self.user)
+
+
+    def test_empty(self):
+        """No actions records no results, without a query."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.bulk_result([]), [])
+
+
+    def test_constant_queries(self):
+        """Takes the same queries however many actions there are."""
+        def actions(n):
+            acts = []
+            for i in range(n):
+                acts.append((self.create_rcv(), "result_pass", {}))
+                acts.append(
+                    (
+                        self.create_rcv(steps=1),
+                        "result_fail",
+                        {"stepnumber": "1"},
+                        )
+                    )
+            return acts
+
+        few = actions(1)
+        many = actions(4)
+
+        queries = self.count_queries(self.bulk_result, few)
+
+        self.assertEqual(self.count_queries(self.bulk_result, many), queries)
@@ -0,0 +1,211 @@
+"""
+Tests for archiving and restoring superseded results.
+
+"""
+import datetime
+
+from mock import patch
+
+from tests import case
+
+
+
+class ArchiveTestCase(case.DBTestCase):
+    """Base for archive tests; a runcaseversion, env and tester."""
+    def setUp(self):
+        self.rcv = self.F.RunCaseVersionFactory.create()
+        self.F.CaseStepFactory.create(
+            caseversion=self.rcv.caseversion, number=1)
+        self.env = self.F.EnvironmentFactory.create()
+        self.rcv.environments.add(self.env)
+        self.user = self.F.UserFactory.create()
+
+
+    def create_result(self, on=datetime.datetime(2011, 1, 1), **kwargs):
+        """Create a result of our rcv by our tester in our env ``on`` date."""
+        kwargs.setdefault("runcaseversion", self.rcv)
+        kwargs.setdefault("environment", self.env)
+        kwargs.setdefault("tester", self.user)
+        with patch("moztrap.model.mtmodel.utcnow") as mock_utcnow:
+            mock_utcnow.return_value = on
+            return self.F.ResultFactory.create(**kwargs)
+
+
+    def fail_step(self, result, bug=""):
+        """Create a failed step result of ``result`` with ``bug``."""
+        return self.F.StepResultFactory.create(
+            result=result,
+            step=self.rcv.caseversion.steps.get(),
+            status="failed",
+            bug_url=bug,
+            )
+
+
+    def archive(self, before=datetime.datetime(2012, 1, 1), **kwargs):
+        """Archive results superseded before ``before``; return count."""
+        from moztrap.model.execution.archive import archive
+        return archive(before, **kwargs)
+
+
+    def restore(self, **kwargs):
+        """Restore all archived results; return count."""
+        from moztrap.model.execution.archive import restore
+        return restore(self.model.ArchivedResult.everything.all(), **kwargs)
+
+
+
+class ArchiveTest(ArchiveTestCase):
+    """Tests for archive."""
+    def test_archive(self):
+        """A superseded result is moved to the archive."""
+        old = self.create_result(status="failed", comment="broken")
+        self.create_result(status="passed")
+
+        self.assertEqual(self.archive(), 1)
+
+        self.assertFalse(self.model.Result.everything.filter(pk=old.pk))
+        archived = self.model.ArchivedResult.objects.get()
+        self.assertEqual(archived.id, old.id)
+        self.assertEqual(archived.status, "failed")
+        self.assertEqual(archived.comment, "broken")
+        self.assertEqual(archived.tester, self.user)
+        self.assertEqual(archived.created_on, old.created_on)
+
+
+    def test_latest_not_archived(self):
+        """The latest result is never archived, however old."""
+        r = self.create_result()
+
+        self.assertEqual(self.archive(), 0)
+
+        self.assertEqual(self.model.Result.objects.get(), r)
+
+
+    def test_recent_not_archived(self):
+        """A result modified since the cutoff is not archived."""
+        self.create_result(on=datetime.datetime(2012, 2, 1))
+        self.create_result(on=datetime.datetime(2012, 3, 1))
+
+        self.assertEqual(self.archive(), 0)
+
+        self.assertEqual(self.model.Result.objects.count(), 2)
+
+
+    def test_stepresults(self):
+        """Step results are archived with their result, with bug URLs."""
+        old = self.create_result(status="failed")
+        self.fail_step(old, bug="http://www.example.com/1")
+        self.create_result()
+
+        self.archive()
+
+        self.assertEqual(self.model.StepResult.everything.count(), 0)
+        archived = self.model.ArchivedResult.objects.get()
+        self.assertEqual(archived.bugs, "http://www.example.com/1")
+        self.assertEqual(
+            archived.bug_urls(), set(["http://www.example.com/1"]))
+
+
+    def test_deleted(self):
+        """A deleted result is archived, and stays deleted."""
+        old = self.create_result()
+        self.create_result()
+        old.delete()
+
+        self.assertEqual(self.archive(), 1)
+
+        self.assertEqual(self.model.ArchivedResult.objects.count(), 0)
+        self.assertEqual(self.model.ArchivedResult.everything.count(), 1)
+
+
+    def test_chunks(self):
+        """Results are archived a chunk at a time."""
+        for i in range(5):
+            self.create_result()
+
+        self.assertEqual(self.archive(chunk_size=2), 4)
+
+        self.assertEqual(self.model.ArchivedResult.objects.count(), 4)
+
+
+    def test_bug_urls(self):
+        """Bug URLs of archived results are still bug URLs of the case."""
+        old = self.create_result(status="failed")
+        self.fail_step(old, bug="http://www.example.com/1")
+        new = self.create_result(status="failed")
+        self.fail_step(new, bug="http://www.example.com/2")
+
+        self.archive()
+
+        bugs = set(["http://www.example.com/1", "http://www.example.com/2"])
+        self.assertEqual(self.rcv.bug_urls(), bugs)
+        self.assertEqual(self.rcv.caseversion.bug_urls(), bugs)
+
+
+    def test_completion(self):
+        """Archiving a completed result doesn't change completion."""
+        self.create_result(status="passed")
+        self.create_result(status="started")
+
+        self.archive()
+
+        self.assertEqual(self.rcv.completion(), 1)
+        self.assertEqual(self.rcv.run.completion(), 1)
+
+
+
+class RestoreTest(ArchiveTestCase):
+    """Tests for restore."""
+    def test_restore(self):
+        """An archived result is restored as it was, with its steps."""
+        old = self.create_result(status="failed", comment="broken")
+        step = self.fail_step(old, bug="http://www.example.com/1")
+        self.create_result()
+        self.archive()
+
+        self.assertEqual(self.restore(), 1)
+
+        self.assertEqual(self.model.ArchivedResult.everything.count(), 0)
+        restored = self.model.Result.objects.get(pk=old.pk)
+        for field in ["status", "comment", "created_on", "modified_on",
+                      "tester", "runcaseversion", "environment"]:
+            self.assertEqual(
+                getattr(restored, field), getattr(old, field), field)
+        stepresult = restored.stepresults.get()
+        self.assertEqual(stepresult.id, step.id)
+        self.assertEqual(stepresult.bug_url, "http://www.example.com/1")
+        self.assertEqual(stepresult.status, "failed")
+        self.assertEqual(stepresult.created_on, step.created_on)
+
+
+    def test_restored_not_latest(self):
+        """A restored result doesn't replace the latest result."""
+        self.create_result()
+        new = self.create_result()
+        self.archive()
+
+        self.restore()
+
+        self.assertEqual(
+            self.model.Result.objects.get(latest__isnull=False), new)
+
+
+    def test_restore_queryset(self):
+        """Only the given archived results are restored."""
+        self.create_result()
+        other = self.create_result(
+            runcaseversion=self.F.RunCaseVersionFactory.create())
+        self.create_result(runcaseversion=other.runcaseversion)
+        self.create_result()
+        self.archive()
+
+        from moztrap.model.execution.archive import restore
+        count = restore(
+            self.model.ArchivedResult.everything.filter(
+                runcaseversion=self.rcv))
+
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            list(self.model.ArchivedResult.everything.all()),
+            list(self.model.ArchivedResult.everything.filter(pk=other.pk)),
+            )
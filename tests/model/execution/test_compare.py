@@ -0,0 +1,204 @@
+"""
+Tests for comparison of the results of two runs or product versions.
+
+"""
+from tests import case
+
+
+
+class CompareTestCase(case.DBTestCase):
+    """Base for compare tests; two runs of a product version, an env."""
+    def setUp(self):
+        self.env = self.F.EnvironmentFactory.create()
+        self.pv = self.F.ProductVersionFactory.create(environments=[self.env])
+        self.before = self.F.RunFactory.create(productversion=self.pv)
+        self.after = self.F.RunFactory.create(productversion=self.pv)
+        self.cv = self.F.CaseVersionFactory.create(productversion=self.pv)
+
+
+    def create_rcv(self, run, caseversion=None, **kwargs):
+        """Create a runcaseversion of ``caseversion`` in ``run``."""
+        kwargs.setdefault("environments", [self.env])
+        return self.F.RunCaseVersionFactory.create(
+            run=run, caseversion=caseversion or self.cv, **kwargs)
+
+
+    def create_result(self, rcv, status, **kwargs):
+        """Create a result of ``rcv`` with ``status``."""
+        kwargs.setdefault("environment", self.env)
+        return self.F.ResultFactory.create(
+            runcaseversion=rcv, status=status, **kwargs)
+
+
+    def compare(self, before=None, after=None):
+        """Compare ``before`` and ``after``, by default our two runs."""
+        from moztrap.model.execution.compare import compare
+        return compare(before or self.before, after or self.after)
+
+
+    def transition(self, before_status, after_status):
+        """Return the compared transition of one cell with given statuses."""
+        for run, status in [
+                (self.before, before_status), (self.after, after_status)]:
+            rcv = self.create_rcv(run)
+            if status is not None:
+                self.create_result(rcv, status)
+        cells = self.compare()
+        self.assertEqual(len(cells), 1)
+        return cells[0][4]
+
+
+
+class CompareTest(CompareTestCase):
+    """Tests for compare."""
+    def test_cell(self):
+        """A cell is described by case, environment and its statuses."""
+        self.transition("passed", "failed")
+
+        self.assertEqual(
+            self.compare(),
+            [(self.cv.case.id, self.env.id, "passed", "failed", "newfail")],
+            )
+
+
+    def test_newly_failing(self):
+        self.assertEqual(self.transition("passed", "failed"), "newfail")
+
+
+    def test_newly_failing_not_run(self):
+        """A cell not run before is newly failing."""
+        self.assertEqual(self.transition(None, "failed"), "newfail")
+
+
+    def test_fixed(self):
+        self.assertEqual(self.transition("failed", "passed"), "fixed")
+
+
+    def test_still_failing(self):
+        self.assertEqual(self.transition("failed", "failed"), "stillfail")
+
+
+    def test_not_run(self):
+        """A cell with no completed result after is not run."""
+        self.assertEqual(self.transition("passed", "started"), "notrun")
+
+
+    def test_not_run_no_result(self):
+        self.assertEqual(self.transition("failed", None), "notrun")
+
+
+    def test_invalidated(self):
+        self.assertEqual(
+            self.transition("passed", "invalidated"), "invalidated")
+
+
+    def test_newly_passing(self):
+        self.assertEqual(self.transition("invalidated", "passed"), "newpass")
+
+
+    def test_still_passing(self):
+        self.assertEqual(self.transition("passed", "passed"), "stillpass")
+
+
+    def test_added_and_removed(self):
+        """Cells in only one side are absent from the other."""
+        other = self.F.CaseVersionFactory.create(productversion=self.pv)
+        self.create_result(self.create_rcv(self.before), "passed")
+        self.create_result(self.create_rcv(self.after, other), "failed")
+
+        self.assertEqual(
+            self.compare(),
+            sorted([
+                (self.cv.case.id, self.env.id, "passed", "absent", "removed"),
+                (other.case.id, self.env.id, "absent", "failed", "newfail"),
+                ]),
+            )
+
+
+    def test_latest_of_testers(self):
+        """A cell's status is of the most recent of its latest results."""
+        before = self.create_rcv(self.before)
+        self.create_result(before, "failed")
+        self.create_result(before, "passed")
+        after = self.create_rcv(self.after)
+        self.create_result(after, "failed")
+        self.create_result(after, "passed", tester=self.F.UserFactory.create())
+
+        self.assertEqual(
+            self.compare()[0][2:], ("passed", "passed", "stillpass"))
+
+
+    def test_deleted_result(self):
+        """A deleted result doesn't count."""
+        self.create_rcv(self.before)
+        after = self.create_rcv(self.after)
+        self.create_result(after, "failed").delete()
+
+        self.assertEqual(self.compare()[0][2:], ("notrun", "notrun", "notrun"))
+
+
+    def test_environments(self):
+        """Each environment of a runcaseversion is a cell of its own."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux", "Windows"]})
+        rcv = self.create_rcv(self.before, environments=envs)
+        self.create_result(rcv, "failed", environment=envs[0])
+        rcv = self.create_rcv(self.after, environments=envs)
+        self.create_result(rcv, "passed", environment=envs[0])
+        self.create_result(rcv, "failed", environment=envs[1])
+
+        self.assertEqual(
+            [c[1:] for c in self.compare()],
+            sorted([
+                (envs[0].id, "failed", "passed", "fixed"),
+                (envs[1].id, "notrun", "failed", "newfail"),
+                ]),
+            )
+
+
+    def test_productversions(self):
+        """Productversions compare the latest results of all their runs."""
+        later = self.F.ProductVersionFactory.create(
+            product=self.pv.product, version="2", environments=[self.env])
+        self.create_result(self.create_rcv(self.before), "failed")
+        self.create_result(self.create_rcv(self.after), "passed")
+        run = self.F.RunFactory.create(productversion=later)
+        cv = self.F.CaseVersionFactory.create(
+            productversion=later, case=self.cv.case)
+        self.create_result(self.create_rcv(run, cv), "passed")
+
+        self.assertEqual(
+            self.compare(self.pv, later),
+            [(self.cv.case.id, self.env.id, "passed", "passed", "stillpass")],
+            )
+
+
+    def test_queries(self):
+        """Comparing takes the same queries however many cells."""
+        def add():
+            cv = self.F.CaseVersionFactory.create(productversion=self.pv)
+            for run in [self.before, self.after]:
+                self.create_result(self.create_rcv(run, cv), "passed")
+
+        add()
+        queries = self.count_queries(self.compare)
+
+        for i in range(3):
+            add()
+
+        self.assertEqual(self.count_queries(self.compare), queries)
+
+
+
+class SummarizeTest(CompareTestCase):
+    """Tests for summarize."""
+    def test_summarize(self):
+        """Counts cells of each transition, including those with none."""
+        from moztrap.model.execution.compare import summarize
+        self.transition("passed", "failed")
+
+        summary = summarize(self.compare())
+
+        self.assertEqual(summary["newfail"], 1)
+        self.assertEqual(summary["fixed"], 0)
+        self.assertEqual(len(summary), 8)
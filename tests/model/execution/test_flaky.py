@@ -0,0 +1,198 @@
+"""
+Tests for flaky case analytics.
+
+"""
+import datetime
+
+from django.core.cache import cache
+
+from tests import case
+
+
+
+class FlakyTestCase(case.DBTestCase):
+    """Base for flaky tests; a product version, an env and a caseversion."""
+    def setUp(self):
+        # product ids are reused between tests, so rankings may be cached
+        cache.clear()
+        self.env = self.F.EnvironmentFactory.create()
+        self.pv = self.F.ProductVersionFactory.create(environments=[self.env])
+        self.product = self.pv.product
+        self.cv = self.F.CaseVersionFactory.create(productversion=self.pv)
+        self.days = 0
+
+
+    def results(self, *statuses, **kwargs):
+        """
+        Create a run (each starting later) with a result of each status.
+
+        Results are of our caseversion in our env unless ``caseversion`` or
+        ``environment`` kwargs are given; a status of None is skipped.
+
+        """
+        caseversion = kwargs.get("caseversion", self.cv)
+        environment = kwargs.get("environment", self.env)
+        for status in statuses:
+            self.days += 1
+            run = self.F.RunFactory.create(
+                productversion=caseversion.productversion,
+                start=datetime.date(2012, 1, 1) + datetime.timedelta(
+                    days=self.days),
+                )
+            if status is None:
+                continue
+            rcv = self.F.RunCaseVersionFactory.create(
+                run=run, caseversion=caseversion, environments=[environment])
+            self.F.ResultFactory.create(
+                runcaseversion=rcv, environment=environment, status=status)
+
+
+    def rank(self):
+        """Return the flaky ranking of our product."""
+        from moztrap.model.execution.flaky import rank
+        return rank(self.product)
+
+
+
+class RankTest(FlakyTestCase):
+    """Tests for rank."""
+    def test_statistics(self):
+        """A flaky case's results, failures and flips are reported."""
+        self.results("passed", "failed", "failed", "passed")
+
+        ranking = self.rank()
+
+        self.assertEqual(len(ranking), 1)
+        flaky = ranking[0]
+        self.assertEqual(flaky["case"], self.cv.case.id)
+        self.assertEqual(flaky["results"], 4)
+        self.assertEqual(flaky["failures"], 2)
+        self.assertEqual(flaky["flips"], 2)
+        self.assertEqual(flaky["failure_rate"], 0.5)
+        self.assertAlmostEqual(flaky["flip_rate"], 2.0 / 3)
+        self.assertGreater(flaky["confidence"], 0)
+        self.assertLess(flaky["confidence"], flaky["flip_rate"])
+
+
+    def test_stable_left_out(self):
+        """Cases that never flip are not ranked."""
+        self.results("failed", "failed", "failed")
+
+        self.assertEqual(self.rank(), [])
+
+
+    def test_run_order(self):
+        """Results are in order of run start, not of creation."""
+        self.results("passed", "failed")
+        run = self.F.RunFactory.create(
+            productversion=self.pv, start=datetime.date(2011, 1, 1))
+        rcv = self.F.RunCaseVersionFactory.create(
+            run=run, caseversion=self.cv, environments=[self.env])
+        self.F.ResultFactory.create(
+            runcaseversion=rcv, environment=self.env, status="failed")
+
+        # failed, passed, failed
+        self.assertEqual(self.rank()[0]["flips"], 2)
+
+
+    def test_environments_separate(self):
+        """Consecutive results in different environments aren't a flip."""
+        other = self.F.EnvironmentFactory.create()
+        self.pv.environments.add(other)
+        self.results("passed", "passed")
+        self.results("failed", "failed", environment=other)
+
+        self.assertEqual(self.rank(), [])
+
+
+    def test_other_statuses_ignored(self):
+        """Only passed and failed results count."""
+        self.results("passed", "invalidated", "started", None, "passed")
+
+        self.assertEqual(self.rank(), [])
+
+
+    def test_superseded_ignored(self):
+        """Only latest results count."""
+        self.results("passed")
+        result = self.model.Result.objects.get()
+        for status in ["failed", "passed"]:
+            self.F.ResultFactory.create(
+                runcaseversion=result.runcaseversion,
+                environment=self.env,
+                tester=result.tester,
+                status=status,
+                )
+
+        self.assertEqual(self.rank(), [])
+
+
+    def test_other_product_ignored(self):
+        """Results of other products don't count."""
+        cv = self.F.CaseVersionFactory.create()
+        self.results("passed", "failed", caseversion=cv)
+
+        self.assertEqual(self.rank(), [])
+
+
+    def test_ranked_by_confidence(self):
+        """Cases flipping as often over more results rank higher."""
+        often = self.F.CaseVersionFactory.create(productversion=self.pv)
+        self.results("passed", "failed", "passed", "failed", "passed")
+        self.results(*["passed", "failed"] * 4, caseversion=often)
+
+        self.assertEqual(
+            [c["case"] for c in self.rank()],
+            [often.case.id, self.cv.case.id],
+            )
+
+
+    def test_cached(self):
+        """The ranking is cached until results are next written."""
+        self.results("passed", "failed")
+        self.rank()
+
+        self.assertEqual(self.count_queries(self.rank), 0)
+
+        self.results("passed")
+
+        self.assertEqual(self.rank()[0]["flips"], 2)
+
+
+
+class BincountTest(case.TestCase):
+    """Tests for bincount."""
+    def bincount(self, *args):
+        from moztrap.model.execution.flaky import bincount
+        return bincount(*args)
+
+
+    def test_weights(self):
+        """Sums weights by index."""
+        self.assertEqual(self.bincount([0, 2, 0], [1, 2, 3], 4), [4, 0, 2, 0])
+
+
+    def test_count(self):
+        """Without weights, counts each index."""
+        self.assertEqual(self.bincount([0, 2, 0], None, 3), [2, 0, 1])
+
+
+
+class WilsonLowerBoundTest(case.TestCase):
+    """Tests for wilson_lower_bound."""
+    def bound(self, *args):
+        from moztrap.model.execution.flaky import wilson_lower_bound
+        return wilson_lower_bound(*args)
+
+
+    def test_no_trials(self):
+        self.assertEqual(self.bound(0, 0), 0)
+
+
+    def test_more_trials(self):
+        """The same proportion over more trials has a higher bound."""
+        self.assertGreater(self.bound(10, 20), self.bound(1, 2))
+
+
+    def test_value(self):
+        self.assertAlmostEqual(self.bound(5, 10), 0.2366, places=4)
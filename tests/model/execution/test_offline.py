@@ -0,0 +1,372 @@
+"""
+Tests for offline run packages and upload of results.
+
+"""
+import datetime
+import json
+
+from mock import patch
+
+from tests import case
+
+
+
+class OfflineTestCase(case.DBTestCase):
+    """Base for offline tests; a run with an environment, and a tester."""
+    def setUp(self):
+        self.env = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux"], "Browser": ["Firefox"]})[0]
+        self.run = self.F.RunFactory.create(
+            name="FF 10", environments=[self.env])
+        self.user = self.F.UserFactory.create(username="tester")
+
+
+    def create_rcv(self, **kwargs):
+        """Create a runcaseversion in this run and environment."""
+        kwargs.setdefault("environments", [self.env])
+        return self.F.RunCaseVersionFactory.create(run=self.run, **kwargs)
+
+
+    def create_result(self, rcv, **kwargs):
+        """Create a latest result of ``rcv`` by our tester in our env."""
+        kwargs.setdefault("tester", self.user)
+        kwargs.setdefault("environment", self.env)
+        return self.F.ResultFactory.create(runcaseversion=rcv, **kwargs)
+
+
+
+class PackageTest(OfflineTestCase):
+    """Tests for package_chunks."""
+    def package(self, **kwargs):
+        """Return the parsed package of our run and env for our tester."""
+        from moztrap.model.execution.offline import package_chunks
+        return json.loads(
+            "".join(package_chunks(self.run, self.env, self.user, **kwargs)))
+
+
+    def test_header(self):
+        """The package describes the run, environment and tester."""
+        with patch("moztrap.model.execution.offline.utcnow") as mock_utcnow:
+            mock_utcnow.return_value = datetime.datetime(2012, 3, 24, 10)
+            package = self.package()
+
+        self.assertEqual(
+            package["run"],
+            {
+                "id": self.run.id,
+                "name": "FF 10",
+                "description": self.run.description,
+                "product": self.run.productversion.product.name,
+                "version": self.run.productversion.version,
+                },
+            )
+        self.assertEqual(
+            package["environment"],
+            {"id": self.env.id, "elements": ["Firefox", "Linux"]},
+            )
+        self.assertEqual(package["tester"], "tester")
+        self.assertEqual(package["exported_on"], "2012-03-24T10:00:00")
+        self.assertEqual(package["cases"], [])
+
+
+    def test_case(self):
+        """A case is packaged with its steps."""
+        rcv = self.create_rcv(
+            caseversion__name="Foo", caseversion__description="Foo desc")
+        self.F.CaseStepFactory.create(
+            caseversion=rcv.caseversion,
+            number=2,
+            instruction="Two",
+            expected="",
+            )
+        self.F.CaseStepFactory.create(
+            caseversion=rcv.caseversion,
+            number=1,
+            instruction="One",
+            expected="Yes",
+            )
+
+        self.assertEqual(
+            self.package()["cases"],
+            [
+                {
+                    "id": rcv.id,
+                    "order": rcv.order,
+                    "case": rcv.caseversion.case.id,
+                    "name": "Foo",
+                    "description": "Foo desc",
+                    "steps": [
+                        {"number": 1, "instruction": "One", "expected": "Yes"},
+                        {"number": 2, "instruction": "Two", "expected": ""},
+                        ],
+                    "result": None,
+                    },
+                ],
+            )
+
+
+    def test_result(self):
+        """A case is packaged with the tester's latest result in the env."""
+        rcv = self.create_rcv()
+        self.create_result(rcv, status="passed")
+        r = self.create_result(rcv, status="failed", comment="broken")
+        self.create_result(rcv, tester=self.F.UserFactory.create())
+        self.create_result(rcv, environment=self.F.EnvironmentFactory.create())
+
+        result = self.package()["cases"][0]["result"]
+
+        self.assertEqual(
+            result,
+            {
+                "id": r.id,
+                "status": "failed",
+                "comment": "broken",
+                "modified_on": self.refresh(r).modified_on.isoformat(),
+                },
+            )
+
+
+    def test_environment_narrowed(self):
+        """Only cases of the run in the environment are packaged."""
+        rcv = self.create_rcv()
+        self.create_rcv(environments=[])
+        self.F.RunCaseVersionFactory.create(environments=[self.env])
+
+        self.assertEqual(
+            [c["id"] for c in self.package()["cases"]], [rcv.id])
+
+
+    def test_chunks(self):
+        """Cases are read a chunk at a time, in order of id."""
+        rcvs = [self.create_rcv() for i in range(3)]
+
+        package = self.package(chunk_size=2)
+
+        self.assertEqual(
+            [c["id"] for c in package["cases"]], [rcv.id for rcv in rcvs])
+
+
+    def test_queries_per_chunk(self):
+        """Each chunk of cases takes the same queries however large."""
+        from moztrap.model.execution.offline import package_chunks
+
+        def consume():
+            list(package_chunks(self.run, self.env, self.user))
+
+        def add():
+            rcv = self.create_rcv()
+            self.F.CaseStepFactory.create(caseversion=rcv.caseversion)
+            self.create_result(rcv)
+
+        add()
+        queries = self.count_queries(consume)
+
+        for i in range(3):
+            add()
+
+        self.assertEqual(self.count_queries(consume), queries)
+
+
+
+class UploadResultsTest(OfflineTestCase):
+    """Tests for upload_results."""
+    def upload(self, results):
+        """Upload ``results`` for our run and env as our tester."""
+        from moztrap.model.execution.offline import upload_results
+        return upload_results(
+            self.run, self.env, self.user, {"results": results})
+
+
+    def assertUploadError(self, results, *errors):
+        """Assert upload of ``results`` raises UploadError with ``errors``."""
+        from moztrap.model.execution.offline import UploadError
+        with self.assertRaises(UploadError) as cm:
+            self.upload(results)
+        self.assertEqual(cm.exception.errors, list(errors))
+        self.assertEqual(self.model.Result.objects.count(), 0)
+
+
+    def latest(self, rcv):
+        """Return our tester's latest result of ``rcv`` in our env."""
+        return rcv.results.get(
+            tester=self.user, environment=self.env, latest__isnull=False)
+
+
+    def test_record(self):
+        """Uploaded results are recorded as the tester's latest."""
+        rcvs = [self.create_rcv() for i in range(3)]
+        self.F.CaseStepFactory.create(
+            caseversion=rcvs[2].caseversion, number=1)
+
+        summary = self.upload(
+            [
+                {"id": rcvs[0].id, "result": None, "status": "passed"},
+                {
+                    "id": rcvs[1].id,
+                    "status": "invalidated",
+                    "comment": "unclear",
+                    },
+                {
+                    "id": rcvs[2].id,
+                    "result": None,
+                    "status": "failed",
+                    "comment": "broken",
+                    "stepnumber": 1,
+                    "bug": "http://www.example.com/",
+                    },
+                ]
+            )
+
+        self.assertEqual(summary, {"recorded": 3, "conflicts": []})
+        self.assertEqual(self.latest(rcvs[0]).status, "passed")
+        self.assertEqual(self.latest(rcvs[1]).comment, "unclear")
+        failed = self.latest(rcvs[2])
+        self.assertEqual(failed.status, "failed")
+        self.assertEqual(
+            failed.stepresults.get().bug_url, "http://www.example.com/")
+
+
+    def test_based_on_latest(self):
+        """A result based on the server's latest result replaces it."""
+        rcv = self.create_rcv()
+        old = self.create_result(rcv, status="started")
+
+        summary = self.upload(
+            [{"id": rcv.id, "result": old.id, "status": "passed"}])
+
+        self.assertEqual(summary, {"recorded": 1, "conflicts": []})
+        self.assertEqual(self.latest(rcv).status, "passed")
+
+
+    def test_conflict(self):
+        """A result not based on the server's latest result is a conflict."""
+        rcv = self.create_rcv()
+        other = self.create_rcv()
+        self.create_result(rcv, status="started")
+        newer = self.create_result(rcv, status="failed", comment="broken")
+
+        summary = self.upload(
+            [
+                {"id": rcv.id, "result": None, "status": "passed"},
+                {"id": other.id, "result": None, "status": "passed"},
+                ]
+            )
+
+        self.assertEqual(summary["recorded"], 1)
+        self.assertEqual(
+            summary["conflicts"],
+            [
+                {
+                    "id": rcv.id,
+                    "result": {
+                        "id": newer.id,
+                        "status": "failed",
+                        "comment": "broken",
+                        "modified_on":
+                            self.refresh(newer).modified_on.isoformat(),
+                        },
+                    },
+                ],
+            )
+        self.assertEqual(self.latest(rcv), newer)
+        self.assertEqual(self.latest(other).status, "passed")
+
+
+    def test_others_results_no_conflict(self):
+        """Results of other testers or environments aren't conflicts."""
+        rcv = self.create_rcv()
+        self.create_result(rcv, tester=self.F.UserFactory.create())
+        self.create_result(rcv, environment=self.F.EnvironmentFactory.create())
+
+        summary = self.upload(
+            [{"id": rcv.id, "result": None, "status": "passed"}])
+
+        self.assertEqual(summary, {"recorded": 1, "conflicts": []})
+
+
+    def test_unknown_case(self):
+        """A case not in the run and environment is an error."""
+        rcv = self.create_rcv()
+        other = self.create_rcv(environments=[])
+
+        self.assertUploadError(
+            [
+                {"id": rcv.id, "status": "passed"},
+                {"id": other.id, "status": "passed"},
+                ],
+            "{0} is not a case of this run and environment.".format(other.id),
+            )
+
+
+    def test_no_results(self):
+        """Data with no results is an error."""
+        from moztrap.model.execution.offline import upload_results, UploadError
+        with self.assertRaises(UploadError) as cm:
+            upload_results(self.run, self.env, self.user, [])
+
+        self.assertEqual(
+            cm.exception.errors, ["Uploaded data has no results."])
+
+
+    def test_results_not_list(self):
+        """Results that aren't a list are an error."""
+        self.assertUploadError({}, "Uploaded results must be a list.")
+
+
+    def test_invalid_results(self):
+        """Each invalid result is an error."""
+        rcv = self.create_rcv()
+
+        self.assertUploadError(
+            [
+                "passed",
+                {"status": "passed"},
+                {"id": rcv.id, "status": "passed", "result": "foo"},
+                {"id": rcv.id, "status": "done"},
+                ],
+            "Result 0 is not an object.",
+            "Result 1 has no case id.",
+            "Result 2: result must be an id or null.",
+            "Result 3: case {0} has more than one result.".format(rcv.id),
+            'Result 3: "done" is not a valid status.',
+            )
+
+
+    def test_invalid_comment(self):
+        """A comment that isn't a string is an error."""
+        rcv = self.create_rcv()
+
+        self.assertUploadError(
+            [{"id": rcv.id, "status": "invalidated", "comment": None}],
+            "Result 0: comment must be a string.",
+            )
+
+
+    def test_invalid_bug(self):
+        """A bug that isn't a string is an error."""
+        rcv = self.create_rcv()
+
+        self.assertUploadError(
+            [{"id": rcv.id, "status": "failed", "bug": 12}],
+            "Result 0: bug must be a string.",
+            )
+
+
+    def test_invalid_stepnumber(self):
+        """A stepnumber that isn't a number or null is an error."""
+        rcv = self.create_rcv()
+
+        self.assertUploadError(
+            [{"id": rcv.id, "status": "failed", "stepnumber": "2"}],
+            "Result 0: stepnumber must be a number or null.",
+            )
+
+
+    def test_null_stepnumber(self):
+        """A null stepnumber fails no particular step."""
+        rcv = self.create_rcv()
+
+        self.upload(
+            [{"id": rcv.id, "status": "failed", "stepnumber": None}])
+
+        self.assertEqual(self.latest(rcv).status, "failed")
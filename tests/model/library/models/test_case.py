@@ -311,6 +311,28 @@ class CaseVersionTest(case.DBTestCase):
         self.assertEqual(c.latest_version(), cv)
 
 
+    def test_preload_latest_versions(self):
+        """Preloaded latest versions and their tags need no more queries."""
+        t1 = self.F.TagFactory.create(name="b")
+        t2 = self.F.TagFactory.create(name="a")
+        t3 = self.F.TagFactory.create(name="c")
+        cv1 = self.F.CaseVersionFactory.create()
+        cv1.tags.add(t1, t2, t3)
+        t3.delete()
+        cv2 = self.F.CaseVersionFactory.create()
+        cases = list(self.model.Case.objects.filter(
+            pk__in=[cv1.case.id, cv2.case.id]).order_by("id"))
+
+        with self.assertNumQueries(2):
+            self.model.Case.preload_latest_versions(cases)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [c.latest_version() for c in cases], [cv1, cv2])
+            self.assertEqual(cases[0].latest_version().tag_list, [t2, t1])
+            self.assertEqual(cases[1].latest_version().tag_list, [])
+
+
     def test_bug_urls(self):
         """bug_urls aggregates bug urls from all results, sans dupes."""
         cv = self.F.CaseVersionFactory.create()
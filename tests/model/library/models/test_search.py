@@ -0,0 +1,83 @@
+"""
+Tests for the case full-text search index.
+
+"""
+from tests import case
+
+
+
+class TokenizeTest(case.TestCase):
+    @property
+    def func(self):
+        from moztrap.model.library.search import tokenize
+        return tokenize
+
+
+    def test_lowercases_and_splits(self):
+        """Text is split on non-word characters and lowercased."""
+        self.assertEqual(
+            self.func(u"Open the Browser-window."),
+            [u"open", u"the", u"browser", u"window"],
+            )
+
+
+    def test_empty(self):
+        """None or empty text gives no terms."""
+        self.assertEqual(self.func(None), [])
+        self.assertEqual(self.func(u""), [])
+
+
+    def test_truncates_long_terms(self):
+        """Terms are truncated to the maximum indexed length."""
+        self.assertEqual(len(self.func(u"a" * 80)[0]), 50)
+
+
+
+class CaseVersionTermTest(case.DBTestCase):
+    def terms(self, cv, field=None):
+        qs = self.model.CaseVersionTerm.objects.filter(caseversion=cv)
+        if field is not None:
+            qs = qs.filter(field=field)
+        return dict(qs.values_list("term", "weight"))
+
+
+    def test_index_on_save(self):
+        """Saving a case version indexes its name and description."""
+        cv = self.F.CaseVersionFactory.create(
+            name="Open browser", description="Open it twice")
+
+        self.assertEqual(self.terms(cv, "name"), {"open": 1, "browser": 1})
+        self.assertEqual(
+            self.terms(cv, "description"), {"open": 1, "it": 1, "twice": 1})
+
+
+    def test_reindex_on_change(self):
+        """Changing the name replaces the old terms."""
+        cv = self.F.CaseVersionFactory.create(name="Open browser")
+        cv.name = "Close tab"
+        cv.save()
+
+        self.assertEqual(self.terms(cv, "name"), {"close": 1, "tab": 1})
+
+
+    def test_index_step(self):
+        """Saving a step indexes its instruction and expected result."""
+        step = self.F.CaseStepFactory.create(
+            instruction="click click", expected="page loads")
+
+        self.assertEqual(
+            self.terms(step.caseversion, "instruction"), {"click": 2})
+        self.assertEqual(
+            self.terms(step.caseversion, "expected"), {"page": 1, "loads": 1})
+
+
+    def test_rebuild(self):
+        """Rebuild restores a missing index and returns the count."""
+        step = self.F.CaseStepFactory.create(instruction="click")
+        self.model.CaseVersionTerm.objects.all().delete()
+
+        count = self.model.CaseVersionTerm.objects.rebuild()
+
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            self.terms(step.caseversion, "instruction"), {"click": 1})
@@ -275,3 +275,71 @@ class ParseBulkTest(case.TestCase):
                     },
                 ]
             )
+
+
+
+class IterParseBulkTest(case.TestCase):
+    """Tests for BulkParser.iter_parse."""
+    @property
+    def parser(self):
+        from moztrap.model.library.bulk import BulkParser
+        return BulkParser
+
+
+    def test_lazy(self):
+        """Each case is yielded as soon as the next one begins."""
+        consumed = []
+        def lines():
+            for line in [
+                    "Test that one", "When I do", "Then I see",
+                    "Test that two", "When I do", "Then I see",
+                    ]:
+                consumed.append(line)
+                yield line
+
+        cases = self.parser().iter_parse(lines())
+
+        self.assertEqual(cases.next()["name"], "Test that one")
+        self.assertEqual(len(consumed), 4)
+        self.assertEqual(cases.next()["name"], "Test that two")
+        self.assertEqual(list(cases), [])
+
+
+    def test_file(self):
+        """Accepts a file object."""
+        from cStringIO import StringIO
+        fh = StringIO("Test that one\nWhen I do\nThen I see\n")
+
+        self.assertEqual(
+            list(self.parser().iter_parse(fh)),
+            [
+                {
+                    "name": "Test that one",
+                    "description": "",
+                    "steps": [
+                        {"instruction": "When I do", "expected": "Then I see"},
+                        ],
+                    },
+                ]
+            )
+
+
+    def test_error_line(self):
+        """Errors give the line number, and end parsing."""
+        cases = list(
+            self.parser().iter_parse(
+                ["", "", "Foo", "Test that one", "When I do", "Then I see"])
+            )
+
+        self.assertEqual(
+            cases,
+            [{"error": "Expected 'Test that ...', not 'Foo'", "line": 3}],
+            )
+
+
+    def test_end_error_line(self):
+        """Unexpected end of input gives the last line number."""
+        cases = list(self.parser().iter_parse(["Test that one", ""]))
+
+        self.assertEqual(cases[0]["line"], 2)
+        self.assertTrue(cases[0]["error"].startswith("Unexpected end"))
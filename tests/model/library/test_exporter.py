@@ -0,0 +1,165 @@
+"""
+Tests for exporting suites and cases.
+
+"""
+from cStringIO import StringIO
+import json
+
+from tests import case
+
+
+
+class ExportItemsTest(case.DBTestCase):
+    """Tests for export_items."""
+    def setUp(self):
+        """All export tests need a product version."""
+        self.pv = self.F.ProductVersionFactory.create()
+
+
+    def items(self, **kwargs):
+        from moztrap.model.library.exporter import export_items
+        return list(export_items(self.pv, **kwargs))
+
+
+    def test_case(self):
+        """A case is exported with its steps, tags, suites and creator."""
+        user = self.F.UserFactory.create(email="foo@example.com")
+        cv = self.F.CaseVersionFactory.create(
+            productversion=self.pv,
+            name="Foo",
+            description="Foo desc",
+            user=user,
+            )
+        self.F.CaseStepFactory.create(
+            caseversion=cv, number=2, instruction="Two", expected="")
+        self.F.CaseStepFactory.create(
+            caseversion=cv, number=1, instruction="One", expected="Yes")
+        cv.tags.add(self.F.TagFactory.create(name="b"))
+        cv.tags.add(self.F.TagFactory.create(name="a"))
+        suite = self.F.SuiteFactory.create(
+            product=self.pv.product, name="S", description="S desc")
+        self.F.SuiteCaseFactory.create(suite=suite, case=cv.case)
+
+        self.assertEqual(
+            self.items(),
+            [
+                ("suite", {"name": "S", "description": "S desc"}),
+                ("case", {
+                        "name": "Foo",
+                        "description": "Foo desc",
+                        "created_by": "foo@example.com",
+                        "tags": ["a", "b"],
+                        "suites": ["S"],
+                        "steps": [
+                            {"instruction": "One", "expected": "Yes"},
+                            {"instruction": "Two", "expected": ""},
+                            ],
+                        }),
+                ],
+            )
+
+
+    def test_only_productversion(self):
+        """Only cases of the given product version are exported."""
+        self.F.CaseVersionFactory.create(productversion=self.pv, name="Foo")
+        self.F.CaseVersionFactory.create(name="Bar")
+
+        self.assertEqual(
+            self.items(), [("case", {"name": "Foo", "description": ""})])
+
+
+    def test_deleted(self):
+        """Deleted cases, steps, tags and suites are not exported."""
+        cv = self.F.CaseVersionFactory.create(productversion=self.pv, name="Foo")
+        self.F.CaseStepFactory.create(caseversion=cv).delete()
+        tag = self.F.TagFactory.create()
+        cv.tags.add(tag)
+        tag.delete()
+        suite = self.F.SuiteFactory.create(product=self.pv.product)
+        self.F.SuiteCaseFactory.create(suite=suite, case=cv.case)
+        suite.delete()
+        self.F.CaseVersionFactory.create(productversion=self.pv).delete()
+
+        self.assertEqual(
+            self.items(), [("case", {"name": "Foo", "description": ""})])
+
+
+    def test_chunks(self):
+        """Cases are read a chunk at a time, with a few queries per chunk."""
+        for i in range(5):
+            self.F.CaseVersionFactory.create(
+                productversion=self.pv, name="Case {0}".format(i))
+
+        # suites, then cases/steps/tags/suites for each of three chunks
+        with self.assertNumQueries(13):
+            items = self.items(chunk_size=2)
+
+        self.assertEqual(
+            [data["name"] for kind, data in items],
+            ["Case {0}".format(i) for i in range(5)],
+            )
+
+
+
+class WritersTest(case.DBTestCase):
+    """Tests for json_chunks and ndjson_chunks."""
+    items = [
+        ("suite", {"name": "S", "description": ""}),
+        ("suite", {"name": "T", "description": ""}),
+        ("case", {"name": "Foo", "description": "", "suites": ["S"]}),
+        ("case", {"name": "Bar", "description": ""}),
+        ]
+
+
+    def test_json(self):
+        """JSON output is in the format read by json_items."""
+        from moztrap.model.library.exporter import json_chunks
+        from moztrap.model.library.readers import json_items
+        text = "".join(json_chunks(self.items))
+
+        self.assertEqual(
+            json.loads(text),
+            {
+                "suites": [d for (k, d) in self.items if k == "suite"],
+                "cases": [d for (k, d) in self.items if k == "case"],
+                },
+            )
+        self.assertEqual(list(json_items(StringIO(text))), self.items)
+
+
+    def test_json_empty(self):
+        """With no items, JSON output is an empty object."""
+        from moztrap.model.library.exporter import json_chunks
+
+        self.assertEqual(json.loads("".join(json_chunks([]))), {})
+
+
+    def test_ndjson(self):
+        """NDJSON output is in the format read by ndjson_items."""
+        from moztrap.model.library.exporter import ndjson_chunks
+        from moztrap.model.library.readers import ndjson_items
+        text = "".join(ndjson_chunks(self.items))
+
+        self.assertEqual(len(text.splitlines()), 4)
+        self.assertEqual(list(ndjson_items(StringIO(text))), self.items)
+
+
+    def test_round_trip(self):
+        """Exported cases can be imported into another product version."""
+        from moztrap.model.library.exporter import export_items, json_chunks
+        from moztrap.model.library.importer import Importer
+        from moztrap.model.library.readers import json_items
+        cv = self.F.CaseVersionFactory.create(name="Foo")
+        self.F.CaseStepFactory.create(caseversion=cv, instruction="Do it")
+        cv.tags.add(self.F.TagFactory.create(name="t"))
+        pv = self.F.ProductVersionFactory.create(
+            product=cv.productversion.product, version="2.0")
+
+        text = "".join(json_chunks(export_items(cv.productversion)))
+        Importer(bulk=True).import_items(pv, json_items(StringIO(text)))
+
+        new = pv.caseversions.get()
+        self.assertEqual(new.name, "Foo")
+        self.assertEqual(
+            [s.instruction for s in new.steps.all()], ["Do it"])
+        self.assertEqual([t.name for t in new.tags.all()], ["t"])
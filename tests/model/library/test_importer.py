@@ -1,4 +1,6 @@
 """Tests for suite/case importer."""
+import json
+
 from tests import case
 
 from mock import patch
@@ -135,7 +137,8 @@ class ImporterTest(ImporterTestBase, case.DBTestCase):
         Two caseversions that both use the same user.  Test that import caches
         the user and doesn't have to query for it a second time.
 
-        Expect 17 queries for this import:
+        Expect 21 queries for this import: the 17 below, plus one insert of
+        search index terms after each caseversion and each step is saved.
 
         Query 1: Ensure this caseversion does not already exist for this
         productversion::
@@ -327,7 +330,7 @@ class ImporterTest(ImporterTestBase, case.DBTestCase):
                 ]
             }
 
-        with self.assertNumQueries(17):
+        with self.assertNumQueries(21):
            result = self.import_data(case_data)
 
         cv1 = self.model.CaseVersion.objects.get(name="Foo")
@@ -639,3 +642,284 @@ class ImporterTransactionTest(ImporterTestBase, case.TransactionTestCase):
             ImportResult.SKIP_STEP_NO_INSTRUCTION,
             )
 
+
+
+
+class BulkImporterTest(ImporterTest):
+    """Runs all ``Importer`` tests in bulk mode, plus bulk-specific tests."""
+    def import_data(self, case_data):
+        """Call ``import_data`` of a bulk ``Importer`` and return result."""
+        from moztrap.model.library.importer import Importer
+        return Importer(bulk=True).import_data(self.pv, case_data)
+
+
+    def test_create_two_caseversions_same_user(self):
+        """Queries don't increase with the number of cases."""
+        user = self.F.UserFactory.create(email="sumbudee@mozilla.com")
+
+        def cases(n):
+            return {
+                "cases": [
+                    {
+                        "created_by": "sumbudee@mozilla.com",
+                        "name": "Foo {0}".format(i),
+                        "steps": [{"instruction": "do this"}],
+                        "tags": ["tag"],
+                        "suites": ["suite"],
+                        }
+                    for i in range(n)
+                    ]
+                }
+
+        with self.assertNumQueries(17):
+            result = self.import_data(cases(10))
+
+        self.assertEqual(result.num_cases, 10)
+        cv = self.model.CaseVersion.objects.get(name="Foo 9")
+        self.assertEqual(cv.created_by, user)
+        self.assertEqual(cv.tags.get().name, "tag")
+        self.assertEqual(cv.case.suites.get().name, "suite")
+
+
+    def test_chunks(self):
+        """Cases are imported in chunks of ``chunk_size``."""
+        from moztrap.model.library.importer import BulkCaseImporter
+        chunks = []
+
+        class RecordingImporter(BulkCaseImporter):
+            def import_chunk(self, case_dicts):
+                chunks.append(len(case_dicts))
+                return super(RecordingImporter, self).import_chunk(case_dicts)
+
+        result = RecordingImporter(self.pv, chunk_size=2).import_cases(
+            {"name": "Foo {0}".format(i)} for i in range(5))
+
+        self.assertEqual(chunks, [2, 2, 1])
+        self.assertEqual(result.num_cases, 5)
+        self.assertEqual(self.model.CaseVersion.objects.count(), 5)
+
+
+    def test_duplicate_names(self):
+        """A name repeated in the data is a conflict, even across chunks."""
+        from moztrap.model.library.importer import BulkCaseImporter
+        result = BulkCaseImporter(self.pv, chunk_size=1).import_cases(
+            [{"name": "Foo", "steps": []}, {"name": "Foo", "steps": []}])
+
+        self.assertEqual(result.num_cases, 1)
+        self.assertEqual(
+            [w["reason"] for w in result.warnings],
+            [ImportResult.SKIP_CASE_NAME_CONFLICT],
+            )
+
+
+    def test_duplicate_names_case_insensitive(self):
+        """Names differing only in case conflict, as under MySQL collation."""
+        from moztrap.model.library.importer import BulkCaseImporter
+        result = BulkCaseImporter(self.pv, chunk_size=1).import_cases(
+            [{"name": "Login", "steps": []}, {"name": "login", "steps": []}])
+
+        self.assertEqual(result.num_cases, 1)
+        self.assertEqual(
+            [w["reason"] for w in result.warnings],
+            [ImportResult.SKIP_CASE_NAME_CONFLICT],
+            )
+        self.assertEqual(result.warnings[0]["item"]["name"], "login")
+
+
+    def test_step_no_instruction_skip(self):
+        """A case with a step without instruction is not created at all."""
+        result = self.import_data(
+            {
+                "cases": [
+                    {
+                        "name": "Foo",
+                        "steps": [{"expected": "did this"}]
+                        }
+                    ]
+                }
+            )
+
+        self.assertEqual(self.model.CaseVersion.objects.count(), 0)
+        self.assertEqual(result.num_cases, 0)
+        self.assertEqual(
+            result.warnings[0]["reason"],
+            ImportResult.SKIP_STEP_NO_INSTRUCTION,
+            )
+
+
+    def test_latest_and_environments(self):
+        """New versions are latest and inherit product version envs."""
+        envs = self.F.EnvironmentFactory.create_full_set({"OS": ["OS X"]})
+        self.pv.add_envs(*envs)
+
+        self.import_data({"cases": [{"name": "Foo", "steps": []}]})
+
+        cv = self.model.CaseVersion.objects.get()
+        self.assertTrue(cv.latest)
+        self.assertEqual(set(cv.environments.all()), set(envs))
+
+
+    def test_global_tag(self):
+        """An existing global tag is used when there is no product tag."""
+        tag = self.F.TagFactory.create(name="FooTag")
+
+        self.import_data(
+            {"cases": [{"name": "Foo", "steps": [], "tags": ["FooTag"]}]})
+
+        cv = self.model.CaseVersion.objects.get()
+        self.assertEqual(cv.tags.get(), tag)
+
+
+    def test_search_index(self):
+        """Imported cases are added to the search index."""
+        self.import_data(
+            {
+                "cases": [
+                    {
+                        "name": "Open browser",
+                        "steps": [{"instruction": "click"}],
+                        }
+                    ]
+                }
+            )
+
+        cv = self.model.CaseVersion.objects.get()
+        self.assertEqual(
+            set(cv.terms.values_list("field", "term")),
+            set(
+                [
+                    ("name", "open"),
+                    ("name", "browser"),
+                    ("instruction", "click"),
+                    ]
+                )
+            )
+
+
+    def test_same_warnings(self):
+        """Reports the same warnings as a non-bulk import."""
+        from moztrap.model.library.importer import Importer
+        self.F.UserFactory.create(email="exists@example.com")
+        data = {
+            "cases": [
+                {"name": "One", "created_by": "missing@example.com"},
+                {"description": "no name"},
+                {"name": "Two", "steps": [{"expected": "x"}]},
+                {"name": "One", "steps": []},
+                {"name": "Three", "created_by": "missing@example.com"},
+                {"name": "Four", "created_by": "exists@example.com"},
+                ]
+            }
+
+        other_pv = self.F.ProductVersionFactory.create(product=self.pv.product)
+        expected = Importer().import_data(other_pv, data).get_as_list()
+
+        self.assertEqual(self.import_data(data).get_as_list(), expected)
+
+
+
+class ImportItemsTest(ImporterTestBase, case.DBTestCase):
+    """Tests for ``Importer.import_items``."""
+    def import_items(self, items, bulk=True, **kwargs):
+        from moztrap.model.library.importer import Importer
+        return Importer(bulk=bulk).import_items(self.pv, items, **kwargs)
+
+
+    @property
+    def items(self):
+        return [
+            ("suite", {"name": "S", "description": "desc"}),
+            ("case", {"name": "C1", "suites": ["S"], "steps": []}),
+            ("case", {"name": "C2", "steps": []}),
+            ("case", {"description": "no name"}),
+            ("case", {"name": "C3", "steps": []}),
+            ]
+
+
+    def test_not_bulk(self):
+        """Without bulk mode, items are imported with ``import_data``."""
+        result = self.import_items(self.items, bulk=False)
+
+        self.assertEqual(result.num_cases, 3)
+        self.assertEqual(
+            self.model.Suite.objects.get().description, "desc")
+
+
+    def test_checkpoints(self):
+        """In bulk mode, checkpoint is called after each chunk of cases."""
+        checkpoints = []
+
+        def checkpoint(position, result):
+            checkpoints.append(
+                (position, result.num_cases, result.num_suites,
+                 len(result.warnings)))
+
+        result = self.import_items(
+            self.items, checkpoint=checkpoint, chunk_size=2)
+
+        self.assertEqual(checkpoints, [(3, 2, 1, 0), (5, 3, 1, 1)])
+        self.assertEqual(result.num_cases, 3)
+        self.assertEqual(
+            self.model.Suite.objects.get().description, "desc")
+        cv = self.model.CaseVersion.objects.get(name="C1")
+        self.assertEqual(cv.case.suites.get().name, "S")
+
+
+    def test_resume(self):
+        """Resuming skips items already imported, and extends the result."""
+        from moztrap.model.library.importer import ImportResult
+        previous = ImportResult()
+        previous.num_cases = 2
+
+        result = self.import_items(
+            self.items, start=3, result=previous, chunk_size=2)
+
+        self.assertEqual(
+            [cv.name for cv in self.model.CaseVersion.objects.all()], ["C3"])
+        self.assertIs(result, previous)
+        self.assertEqual(result.num_cases, 3)
+        self.assertEqual(
+            [w["reason"] for w in result.warnings],
+            [ImportResult.SKIP_CASE_NO_NAME],
+            )
+
+
+    def test_generator(self):
+        """Items may be any iterable, consumed lazily."""
+        consumed = []
+
+        def items():
+            for item in self.items:
+                consumed.append(item)
+                yield item
+
+        checkpoints = []
+        self.import_items(
+            items(),
+            checkpoint=lambda p, r: checkpoints.append(len(consumed)),
+            chunk_size=2,
+            )
+
+        self.assertEqual(checkpoints, [3, 5])
+
+
+
+class ImportResultTest(case.TestCase):
+    """Tests for ``ImportResult``."""
+    def test_dict_round_trip(self):
+        """Result survives conversion to and from a dictionary."""
+        from moztrap.model.library.importer import ImportResult
+        from moztrap.model import CaseVersion
+        result = ImportResult()
+        result.num_cases = 2
+        result.num_suites = 1
+        result.warn(ImportResult.SKIP_CASE_NO_NAME, {"description": u"d"})
+        result.warn(
+            ImportResult.WARN_NO_STEPS,
+            CaseVersion(name=u"caf\xe9"),
+            )
+
+        restored = ImportResult.from_dict(
+            json.loads(json.dumps(result.as_dict())))
+
+        self.assertEqual(restored.get_as_list(), result.get_as_list())
@@ -0,0 +1,252 @@
+"""Tests for import file readers."""
+from cStringIO import StringIO
+import json
+
+from tests import case
+
+
+
+class JSONItemsTest(case.TestCase):
+    """Tests for json_items."""
+    def items(self, text, bufsize=65536):
+        from moztrap.model.library.readers import json_items
+        return list(json_items(StringIO(text), bufsize))
+
+
+    @property
+    def data(self):
+        return {
+            "suites": [{"name": "S1", "description": "d"}, {"name": "S2"}],
+            "other": {"ignored": [1, 2]},
+            "cases": [
+                {"name": u"C\xe91", "steps": [{"instruction": "do"}]},
+                {"name": "C2", "tags": ["t"], "number": 12345},
+                ],
+            }
+
+
+    def expected(self):
+        data = self.data
+        return (
+            [("suite", s) for s in data["suites"]] +
+            [("case", c) for c in data["cases"]]
+            )
+
+
+    def test_items(self):
+        """Yields suites and cases in order, ignoring other keys."""
+        self.assertEqual(self.items(json.dumps(self.data)), self.expected())
+
+
+    def test_small_reads(self):
+        """Values split across reads are decoded correctly."""
+        text = json.dumps(self.data, indent=2)
+
+        for bufsize in [1, 2, 7]:
+            self.assertEqual(self.items(text, bufsize), self.expected())
+
+
+    def test_empty(self):
+        """Empty object or arrays yield nothing."""
+        self.assertEqual(self.items("{}"), [])
+        self.assertEqual(self.items('{"cases": [], "suites": []}'), [])
+
+
+    def test_incomplete(self):
+        """Truncated input raises ParseError."""
+        from moztrap.model.library.readers import ParseError
+        for text in ["{", '{"cases": [{"name": "F"}', '{"cases": [{"na']:
+            with self.assertRaises(ParseError):
+                self.items(text)
+
+
+    def test_not_object(self):
+        """Top-level value must be an object."""
+        from moztrap.model.library.readers import ParseError
+        with self.assertRaises(ParseError):
+            self.items("[]")
+
+
+    def test_lazy(self):
+        """Items are yielded before the whole input is parsed."""
+        from moztrap.model.library.readers import json_items
+        items = json_items(StringIO('{"cases": [{"name": "Foo"}, {"na'))
+
+        self.assertEqual(items.next(), ("case", {"name": "Foo"}))
+
+
+
+class NDJSONItemsTest(case.TestCase):
+    """Tests for ndjson_items."""
+    def items(self, text):
+        from moztrap.model.library.readers import ndjson_items
+        return list(ndjson_items(StringIO(text)))
+
+
+    def test_items(self):
+        """Each line is a case, or a suite if it has just a "suite" key."""
+        self.assertEqual(
+            self.items(
+                '{"suite": {"name": "S"}}\n'
+                '\n'
+                '{"name": "C", "suites": ["S"]}\n'
+                ),
+            [
+                ("suite", {"name": "S"}),
+                ("case", {"name": "C", "suites": ["S"]}),
+                ],
+            )
+
+
+    def test_error_line_number(self):
+        """Parse errors report the line number."""
+        from moztrap.model.library.readers import ParseError
+        with self.assertRaises(ParseError) as cm:
+            self.items('{"name": "C"}\n{"name": \n')
+
+        self.assertTrue(str(cm.exception).startswith("Line 2: "))
+
+
+    def test_not_object(self):
+        """Each line must be an object."""
+        from moztrap.model.library.readers import ParseError
+        with self.assertRaises(ParseError):
+            self.items('["C"]\n')
+
+
+
+class CSVItemsTest(case.TestCase):
+    """Tests for csv_items."""
+    def items(self, text):
+        from moztrap.model.library.readers import csv_items
+        return list(csv_items(StringIO(text)))
+
+
+    def test_items(self):
+        """Rows with a name start a case; others add steps."""
+        text = (
+            "Name,Description,Tags,Suites,Created_By,Instruction,Expected,X\n"
+            "Foo,desc,\"t1, t2\",S,a@example.com,do,see,ignored\n"
+            ",,,,,do more,see more\n"
+            "\n"
+            "Bar\n"
+            "Caf\xc3\xa9,,,,,,only expected\n"
+            )
+
+        self.assertEqual(
+            self.items(text),
+            [
+                ("case", {
+                        "name": u"Foo",
+                        "description": u"desc",
+                        "tags": [u"t1", u"t2"],
+                        "suites": [u"S"],
+                        "created_by": u"a@example.com",
+                        "steps": [
+                            {"instruction": u"do", "expected": u"see"},
+                            {
+                                "instruction": u"do more",
+                                "expected": u"see more",
+                                },
+                            ],
+                        }),
+                ("case", {"name": u"Bar"}),
+                ("case", {
+                        "name": u"Caf\xe9",
+                        "steps": [{"expected": u"only expected"}],
+                        }),
+                ],
+            )
+
+
+    def test_empty(self):
+        """Empty input yields nothing."""
+        self.assertEqual(self.items(""), [])
+
+
+    def test_no_name_column(self):
+        """A name column is required."""
+        from moztrap.model.library.readers import ParseError
+        with self.assertRaises(ParseError):
+            self.items("description\nfoo\n")
+
+
+    def test_step_before_case(self):
+        """A row with no name before any case is an error."""
+        from moztrap.model.library.readers import ParseError
+        with self.assertRaises(ParseError) as cm:
+            self.items("name,instruction\n,do\n")
+
+        self.assertEqual(str(cm.exception), "Line 2: Expecting a name")
+
+
+
+class TextItemsTest(case.TestCase):
+    """Tests for text_items."""
+    def items(self, text):
+        from moztrap.model.library.readers import text_items
+        return list(text_items(StringIO(text)))
+
+
+    def test_items(self):
+        """Yields cases parsed by BulkParser."""
+        self.assertEqual(
+            self.items("Test that foo\nWhen I do\nThen I see\n"),
+            [
+                ("case", {
+                        "name": u"Test that foo",
+                        "description": u"",
+                        "steps": [{"instruction": u"When I do",
+                                   "expected": u"Then I see"}],
+                        }),
+                ],
+            )
+
+
+    def test_error(self):
+        """Parse errors are raised, with the line number."""
+        from moztrap.model.library.readers import ParseError
+        with self.assertRaises(ParseError) as cm:
+            self.items("\n\nFoo\n")
+        self.assertEqual(
+            str(cm.exception), "Line 3: Expected 'Test that ...', not 'Foo'")
+
+
+    def test_end_error(self):
+        """Unexpected end of input is an error."""
+        from moztrap.model.library.readers import ParseError
+        with self.assertRaises(ParseError):
+            self.items("Test that foo\n")
+
+
+
+class GuessFormatTest(case.TestCase):
+    """Tests for guess_format."""
+    @property
+    def func(self):
+        from moztrap.model.library.readers import guess_format
+        return guess_format
+
+
+    def test_guess(self):
+        """Format is guessed from extension, defaulting to JSON."""
+        self.assertEqual(self.func("cases.json"), "json")
+        self.assertEqual(self.func("cases.NDJSON"), "ndjson")
+        self.assertEqual(self.func("cases.jsonl"), "ndjson")
+        self.assertEqual(self.func("cases.csv"), "csv")
+        self.assertEqual(self.func("cases.txt"), "text")
+        self.assertEqual(self.func("cases"), "json")
+
+
+    def test_sniff(self):
+        """Format is guessed from contents if extension is unknown."""
+        for text, expected in [
+                ('{\n "cases": []}', "json"),
+                ('{"cases": []}', "json"),
+                ('{"name": "Foo"}\n{"name": "Bar"}\n', "ndjson"),
+                ("  test that foo\nwhen I do\n", "text"),
+                ("name,description\n", "csv"),
+                ]:
+            fh = StringIO(text)
+            self.assertEqual(self.func("cases.dat", fh), expected)
+            self.assertEqual(fh.tell(), 0)
@@ -0,0 +1,230 @@
+"""
+Tests for autocomplete indexes.
+
+"""
+# @@@ import from Django in 1.4
+from djangosecure.test_utils import override_settings
+from mock import Mock, patch
+
+from tests import case
+
+
+
+class AutocompleteIndexTest(case.DBTestCase):
+    @property
+    def index(self):
+        """A fresh tag index."""
+        from moztrap.model.autocomplete import TagIndex
+        return TagIndex()
+
+
+    def names(self, items):
+        return [i["name"] for i in items]
+
+
+    def test_substring(self):
+        """Matches case-insensitive substrings of any length."""
+        self.F.TagFactory.create(name="Foobar")
+        self.F.TagFactory.create(name="baz")
+        index = self.index
+
+        self.assertEqual(self.names(index.search("o")), ["Foobar"])
+        self.assertEqual(self.names(index.search("OBA")), ["Foobar"])
+        self.assertEqual(self.names(index.search("oobar")), ["Foobar"])
+        self.assertEqual(self.names(index.search("obaz")), [])
+
+
+    def test_ranked_by_usage(self):
+        """More-used tags come first."""
+        self.F.TagFactory.create(name="tag1")
+        t2 = self.F.TagFactory.create(name="tag2")
+        self.F.CaseVersionFactory.create().tags.add(t2)
+
+        self.assertEqual(
+            self.names(self.index.search("tag")), ["tag2", "tag1"])
+
+
+    def test_limit(self):
+        """Returns at most ``limit`` matches."""
+        self.F.TagFactory.create(name="tag1")
+        self.F.TagFactory.create(name="tag2")
+
+        self.assertEqual(self.names(self.index.search("tag", 1)), ["tag1"])
+
+
+    def test_product(self):
+        """Can limit to global tags and tags of one product."""
+        p = self.F.ProductFactory.create()
+        self.F.TagFactory.create(name="tag1", product=p)
+        self.F.TagFactory.create(name="tag2", product=self.F.ProductFactory())
+        self.F.TagFactory.create(name="tag3")
+
+        self.assertEqual(
+            self.names(self.index.search("tag", product_id=str(p.id))),
+            ["tag1", "tag3"],
+            )
+
+
+    def test_invalidated_by_write(self):
+        """A write to the model is seen by the next search."""
+        t = self.F.TagFactory.create(name="foo")
+        index = self.index
+        index.search("foo")
+
+        t.name = "bar"
+        t.save()
+
+        self.assertEqual(self.names(index.search("foo")), [])
+        self.assertEqual(self.names(index.search("bar")), ["bar"])
+
+
+    def test_no_rebuild_without_write(self):
+        """Repeated searches do not query the database."""
+        self.F.TagFactory.create(name="foo")
+        index = self.index
+        index.search("foo")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(index.search("fo")), ["foo"])
+
+
+    def test_tagging_invalidates(self):
+        """Tagging a case version updates usage ranking."""
+        self.F.TagFactory.create(name="tag1")
+        t2 = self.F.TagFactory.create(name="tag2")
+        index = self.index
+        index.search("tag")
+
+        self.F.CaseVersionFactory.create().tags.add(t2)
+
+        self.assertEqual(self.names(index.search("tag")), ["tag2", "tag1"])
+
+
+    @override_settings(AUTOCOMPLETE_REBUILD="background")
+    @patch("moztrap.model.autocomplete.threading.Thread")
+    def test_first_build_in_request(self, thread):
+        """With background rebuilds, the first search still builds first."""
+        self.F.TagFactory.create(name="foo")
+
+        self.assertEqual(self.names(self.index.search("foo")), ["foo"])
+        self.assertFalse(thread.called)
+
+
+    @override_settings(AUTOCOMPLETE_REBUILD="background")
+    @patch("moztrap.model.autocomplete.threading.Thread")
+    def test_background_rebuild(self, thread):
+        """After a write, searches use the old index while a thread rebuilds."""
+        from moztrap.model.mtmodel import generation
+        t = self.F.TagFactory.create(name="foo")
+        index = self.index
+        index.search("foo")
+
+        t.name = "bar"
+        t.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(index.search("foo")), ["foo"])
+        thread.assert_called_once_with(
+            target=index._refresh_thread,
+            args=((generation(self.model.Tag),),))
+        self.assertEqual(thread.return_value.start.call_count, 1)
+
+
+    @override_settings(AUTOCOMPLETE_REBUILD="background")
+    @patch("moztrap.model.autocomplete.threading.Thread")
+    def test_one_rebuild_at_a_time(self, thread):
+        """No second rebuild thread is started while one is running."""
+        t = self.F.TagFactory.create(name="foo")
+        index = self.index
+        index.search("foo")
+
+        t.save()
+        index.search("foo")
+        t.save()
+        index.search("foo")
+
+        self.assertEqual(thread.call_count, 1)
+
+
+    @patch("moztrap.model.autocomplete.connections")
+    def test_rebuild_thread(self, connections):
+        """The rebuild thread refreshes, closes its connections and unlocks."""
+        connection = Mock()
+        connections.all.return_value = [connection]
+        self.F.TagFactory.create(name="foo")
+        index = self.index
+        index._rebuilding.acquire()
+
+        index._refresh_thread("key")
+
+        self.assertEqual(index._key, "key")
+        self.assertEqual(
+            [item["name"] for lowered, item in index._index[0]], ["foo"])
+        connection.close.assert_called_once_with()
+        self.assertTrue(index._rebuilding.acquire(False))
+
+
+
+class UserIndexTest(case.DBTestCase):
+    @property
+    def index(self):
+        """A fresh user index."""
+        from moztrap.model.autocomplete import UserIndex
+        return UserIndex()
+
+
+    def test_active_users(self):
+        """Matches usernames of active users."""
+        u = self.F.UserFactory.create(username="foobar")
+        self.F.UserFactory.create(username="foobaz", is_active=False)
+
+        self.assertEqual(
+            self.index.search("oob"), [{"id": u.id, "name": "foobar"}])
+
+
+    def test_user_save_invalidates(self):
+        """Saving a user is seen by the next search."""
+        u = self.F.UserFactory.create(username="foobar")
+        index = self.index
+        index.search("foo")
+
+        u.deactivate()
+
+        self.assertEqual(index.search("foo"), [])
+
+
+    def test_proxy_create_invalidates(self):
+        """A user created through the User proxy is seen by the next search."""
+        index = self.index
+        index.search("foo")
+
+        u = self.model.User.objects.create(username="foobar")
+
+        self.assertEqual(index.search("foo"), [{"id": u.id, "name": "foobar"}])
+
+
+    def test_proxy_generation_invalidates(self):
+        """Writes recorded against the User proxy are seen by the next search."""
+        from moztrap.model.mtmodel import bump_generation
+        u = self.F.UserFactory.create(username="foobar")
+        index = self.index
+        index.search("foo")
+
+        self.model.User.objects.filter(pk=u.pk).update(is_active=False)
+        bump_generation(self.model.User)
+
+        self.assertEqual(index.search("foo"), [])
+
+
+    def test_base_user_save_invalidates(self):
+        """Saving a user through the auth User model is also seen."""
+        from django.contrib.auth.models import User as BaseUser
+        u = self.F.UserFactory.create(username="foobar")
+        index = self.index
+        index.search("foo")
+
+        base = BaseUser.objects.get(pk=u.pk)
+        base.is_active = False
+        base.save()
+
+        self.assertEqual(index.search("foo"), [])
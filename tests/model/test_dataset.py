@@ -0,0 +1,150 @@
+"""
+Tests for synthetic dataset generation.
+
+"""
+from tests import case
+
+
+
+SMALL = {
+    "products": 1,
+    "versions": 2,
+    "cases": 6,
+    "steps": 2,
+    "suites": 2,
+    "categories": 2,
+    "elements": 2,
+    "runs": 1,
+    "results": 30,
+    "testers": 2,
+    "tags": 3,
+    "deleted": 0,
+    }
+
+
+
+class GenerateTest(case.DBTestCase):
+    """Tests for generate."""
+    def generate(self, **kwargs):
+        """Generate a small dataset, with given overrides."""
+        from moztrap.model.dataset import generate
+        return generate(**dict(SMALL, **kwargs))
+
+
+    def test_counts(self):
+        """Generates the requested numbers of objects, and reports them."""
+        counts = self.generate()
+
+        self.assertEqual(counts["Product"], 1)
+        self.assertEqual(counts["ProductVersion"], 2)
+        self.assertEqual(counts["Environment"], 4)
+        self.assertEqual(counts["Case"], 6)
+        self.assertEqual(counts["CaseVersion"], 12)
+        self.assertEqual(counts["CaseStep"], 24)
+        self.assertEqual(counts["SuiteCase"], 6)
+        self.assertEqual(counts["Run"], 2)
+        self.assertEqual(counts["Result"], 60)
+        self.assertEqual(self.model.Result.objects.count(), 60)
+        self.assertEqual(
+            self.model.Environment.objects.get(
+                pk=self.model.Environment.objects.all()[0].pk
+                ).elements.count(),
+            2,
+            )
+
+
+    def test_deterministic(self):
+        """The same seed generates the same data."""
+        def data():
+            return [
+                (cv.name, cv.status, [t.name for t in cv.tags.all()])
+                for cv in self.model.CaseVersion.objects.order_by("id")
+                ]
+
+        self.generate(seed=3)
+        first = data()
+        self.model.CaseVersion.everything.all().delete(permanent=True)
+        self.generate(seed=3)
+
+        self.assertEqual(data(), first)
+
+
+    def test_latest_results(self):
+        """Exactly one result per case/env/tester in each run is latest."""
+        self.generate(results=100)
+
+        combos = self.model.Result.objects.values_list(
+            "runcaseversion", "environment", "tester").distinct()
+        self.assertEqual(
+            self.model.Result.objects.filter(latest__isnull=False).count(),
+            len(combos),
+            )
+
+
+    def test_runs_include_active_cases(self):
+        """Runs include the active case versions of their product version."""
+        self.generate()
+
+        run = self.model.Run.objects.all()[0]
+        self.assertEqual(
+            set(run.runcaseversions.values_list("caseversion", flat=True)),
+            set(
+                self.model.CaseVersion.objects.filter(
+                    productversion=run.productversion,
+                    status="active",
+                    ).values_list("id", flat=True)
+                ),
+            )
+
+
+    def test_deleted(self):
+        """The given fraction of cases, suites and runs are soft-deleted."""
+        self.generate(deleted=1)
+
+        self.assertEqual(self.model.Case.objects.count(), 0)
+        self.assertEqual(self.model.CaseVersion.objects.count(), 0)
+        self.assertEqual(self.model.Suite.objects.count(), 0)
+        self.assertEqual(self.model.Run.objects.count(), 0)
+        self.assertEqual(self.model.Case.everything.count(), 6)
+
+
+    def test_search_index(self):
+        """Generated case versions are searchable."""
+        self.generate()
+
+        cv = self.model.CaseVersion.objects.all()[0]
+        self.assertTrue(cv.terms.exists())
+
+
+    def test_unknown_size(self):
+        """Unknown size parameters are rejected."""
+        with self.assertRaises(TypeError):
+            self.generate(widgets=3)
+
+
+
+class IsGeneratedTest(case.DBTestCase):
+    """Tests for is_generated."""
+    def is_generated(self):
+        from moztrap.model.dataset import is_generated
+        return is_generated()
+
+
+    def test_generated(self):
+        from moztrap.model.dataset import generate
+        generate(**SMALL)
+
+        self.assertTrue(self.is_generated())
+
+
+    def test_real_product(self):
+        """A database with any product not generated isn't generated."""
+        from moztrap.model.dataset import generate
+        generate(**SMALL)
+        self.F.ProductFactory.create(name="Firefox")
+
+        self.assertFalse(self.is_generated())
+
+
+    def test_empty(self):
+        self.assertFalse(self.is_generated())
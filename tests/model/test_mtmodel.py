@@ -8,7 +8,7 @@ a test-only model.
 """
 import datetime
 
-from mock import patch
+from mock import Mock, patch
 
 from tests import case
 
@@ -762,3 +762,333 @@ class OptimisticLockingTest(case.DBTestCase):
 
         with self.assertRaises(self.model.ConcurrencyError):
             p.save()
+
+
+
+class GenerationTest(MTModelTestCase):
+    """Tests for per-model write generations."""
+    @property
+    def generation(self):
+        """The function under test."""
+        from moztrap.model.mtmodel import generation
+        return generation
+
+
+    def test_save_bumps(self):
+        """Saving an instance changes its model's generation."""
+        p = self.F.ProductFactory.create()
+        before = self.generation(self.model.Product)
+
+        p.save()
+
+        self.assertNotEqual(self.generation(self.model.Product), before)
+
+
+    def test_create_bumps(self):
+        """Creating an instance changes its model's generation."""
+        before = self.generation(self.model.Product)
+
+        self.F.ProductFactory.create()
+
+        self.assertNotEqual(self.generation(self.model.Product), before)
+
+
+    def test_queryset_update_bumps(self):
+        """Bulk update changes the generation."""
+        self.F.ProductFactory.create()
+        before = self.generation(self.model.Product)
+
+        self.model.Product.objects.update(name="Foo")
+
+        self.assertNotEqual(self.generation(self.model.Product), before)
+
+
+    def test_cascade_delete_bumps(self):
+        """Soft-delete changes generation of every cascaded model."""
+        s = self.F.SuiteFactory.create()
+        self.F.SuiteCaseFactory.create(suite=s)
+        before = self.generation(self.model.SuiteCase)
+
+        s.product.delete()
+
+        self.assertNotEqual(self.generation(self.model.SuiteCase), before)
+
+
+    def test_read_does_not_bump(self):
+        """Reading the generation does not change it."""
+        before = self.generation(self.model.Product)
+
+        list(self.model.Product.objects.all())
+
+        self.assertEqual(self.generation(self.model.Product), before)
+
+
+    def test_evicted(self):
+        """An evicted generation is reseeded rather than reset to zero."""
+        from django.core.cache import cache
+        from moztrap.model.mtmodel import _generation_key
+        cache.delete(_generation_key(self.model.Product))
+
+        self.assertNotEqual(self.generation(self.model.Product), 0)
+
+
+    def test_bumped_again_after_commit(self):
+        """A write in a managed transaction is recorded again after commit."""
+        from moztrap.model.mtmodel import bump_pending_generations
+        self.F.ProductFactory.create()
+        during = self.generation(self.model.Product)
+
+        bump_pending_generations()
+
+        self.assertNotEqual(self.generation(self.model.Product), during)
+
+
+    def test_unmanaged_not_pending(self):
+        """A write outside a managed transaction is not recorded again."""
+        from moztrap.model.mtmodel import bump_pending_generations
+        bump_pending_generations()
+        with patch("moztrap.model.mtmodel.transaction.is_managed") as managed:
+            managed.return_value = False
+            self.F.ProductFactory.create()
+        after = self.generation(self.model.Product)
+
+        bump_pending_generations()
+
+        self.assertEqual(self.generation(self.model.Product), after)
+
+
+
+class BulkInsertTest(MTModelTestCase):
+    """Tests for bulk_insert."""
+    @property
+    def bulk_insert(self):
+        """The function under test."""
+        from moztrap.model.mtmodel import bulk_insert
+        return bulk_insert
+
+
+    def test_insert(self):
+        """Inserts all instances and sets their primary keys."""
+        products = [
+            self.model.Product(name="P{0}".format(i), created_by=self.user)
+            for i in range(5)]
+
+        self.bulk_insert(products)
+
+        self.assertEqual(
+            [(p.id, p.name) for p in self.model.Product.objects.order_by("id")],
+            [(p.id, p.name) for p in products],
+            )
+
+
+    def test_chunks(self):
+        """Inserts in chunks of the given size."""
+        products = [self.model.Product(name=str(i)) for i in range(5)]
+
+        with self.assertNumQueries(3):
+            self.bulk_insert(products, chunk_size=2)
+
+        self.assertEqual(self.model.Product.objects.count(), 5)
+        self.assertEqual(len(set(p.id for p in products)), 5)
+
+
+    def test_empty(self):
+        """Inserting nothing does nothing."""
+        with self.assertNumQueries(0):
+            self.assertEqual(self.bulk_insert([]), [])
+
+
+    def test_defaults(self):
+        """Field defaults are saved."""
+        p = self.bulk_insert([self.model.Product(name="Foo")])[0]
+
+        p = self.refresh(p)
+        self.assertEqual(p.cc_version, 0)
+        self.assertEqual(p.deleted_on, None)
+
+
+    def test_keep_pks(self):
+        """With keep_pks, the instances' own primary keys are inserted."""
+        products = [
+            self.model.Product(id=i, name="P{0}".format(i))
+            for i in [7, 3]]
+
+        self.bulk_insert(products, keep_pks=True)
+
+        self.assertEqual(
+            list(self.model.Product.objects.values_list("id", "name")),
+            [(3, "P3"), (7, "P7")],
+            )
+
+
+    def test_bumps_generation(self):
+        """Inserting changes the model's generation."""
+        from moztrap.model.mtmodel import generation
+        before = generation(self.model.Product)
+
+        self.bulk_insert([self.model.Product(name="Foo")])
+
+        self.assertNotEqual(generation(self.model.Product), before)
+
+
+    @patch("moztrap.model.mtmodel.consecutive_ids")
+    def test_not_consecutive(self, consecutive_ids):
+        """Without consecutive ids, rows are inserted one at a time."""
+        consecutive_ids.return_value = False
+        products = [self.model.Product(name=str(i)) for i in range(3)]
+
+        with self.assertNumQueries(3):
+            self.bulk_insert(products)
+
+        self.assertEqual(
+            [(p.id, p.name) for p in self.model.Product.objects.order_by("id")],
+            [(p.id, p.name) for p in products],
+            )
+
+
+
+class ConsecutiveIdsTest(case.TestCase):
+    """Tests for consecutive_ids."""
+    def consecutive_ids(self, connection):
+        """Call the function under test, with a fresh lookup cache."""
+        from moztrap.model.mtmodel import consecutive_ids
+        with patch.dict("moztrap.model.mtmodel._consecutive_ids", clear=True):
+            return consecutive_ids(connection)
+
+
+    def connection(self, vendor, lock_mode=None):
+        """Return a mock connection of ``vendor`` with autoinc lock mode."""
+        connection = Mock()
+        connection.alias = "default"
+        connection.vendor = vendor
+        connection.cursor.return_value.fetchone.return_value = (lock_mode,)
+        return connection
+
+
+    def test_sqlite(self):
+        self.assertTrue(self.consecutive_ids(self.connection("sqlite")))
+
+
+    def test_mysql_consecutive(self):
+        """MySQL ids are consecutive with lock mode 0 or 1."""
+        self.assertTrue(self.consecutive_ids(self.connection("mysql", 1)))
+
+
+    def test_mysql_interleaved(self):
+        """MySQL ids may not be consecutive with lock mode 2."""
+        self.assertFalse(self.consecutive_ids(self.connection("mysql", 2)))
+
+
+    def test_other(self):
+        self.assertFalse(self.consecutive_ids(self.connection("postgresql")))
+
+
+    def test_looked_up_once(self):
+        """The lock mode is looked up once per connection."""
+        from moztrap.model.mtmodel import consecutive_ids
+        connection = self.connection("mysql", 2)
+
+        with patch.dict("moztrap.model.mtmodel._consecutive_ids", clear=True):
+            consecutive_ids(connection)
+            consecutive_ids(connection)
+
+        self.assertEqual(connection.cursor.return_value.execute.call_count, 1)
+
+
+
+class SyncOrderedTest(MTModelTestCase):
+    """Tests for sync_ordered."""
+    def setUp(self):
+        """Create a suite with three cases."""
+        super(SyncOrderedTest, self).setUp()
+        self.suite = self.F.SuiteFactory.create()
+        self.cases = [
+            self.F.CaseFactory.create(product=self.suite.product)
+            for i in range(3)
+            ]
+        self.suitecases = [
+            self.F.SuiteCaseFactory.create(
+                suite=self.suite, case=case, order=i)
+            for i, case in enumerate(self.cases)
+            ]
+
+
+    def sync(self, cases):
+        """Sync suite's cases to ``cases``."""
+        from moztrap.model.mtmodel import sync_ordered
+        sync_ordered(
+            self.model.SuiteCase, "suite", self.suite, "case", cases,
+            user=self.user)
+
+
+    def members(self):
+        """Return list of (suitecase id, case, order) for the suite."""
+        return [
+            (sc.id, sc.case, sc.order)
+            for sc in self.model.SuiteCase.everything.filter(
+                suite=self.suite).order_by("order")
+            ]
+
+
+    def test_unchanged(self):
+        """Syncing the same list only reads the existing rows."""
+        with self.assertNumQueries(1):
+            self.sync(self.cases)
+
+        self.assertEqual(
+            self.members(),
+            [(sc.id, sc.case, sc.order) for sc in self.suitecases],
+            )
+
+
+    def test_reorder(self):
+        """Moved members keep their rows, updated with one query."""
+        a, b, c = self.cases
+        sa, sb, sc = self.suitecases
+
+        with self.assertNumQueries(2):
+            self.sync([c, a, b])
+
+        self.assertEqual(
+            self.members(), [(sc.id, c, 0), (sa.id, a, 1), (sb.id, b, 2)])
+        moved = self.refresh(sc)
+        self.assertEqual(moved.modified_by, self.user)
+        self.assertEqual(moved.cc_version, sc.cc_version + 1)
+        self.assertEqual(moved.created_on, sc.created_on)
+
+
+    def test_add_and_remove(self):
+        """Removed rows are deleted and new ones inserted."""
+        a, b, c = self.cases
+        sa, sb, sc = self.suitecases
+        d = self.F.CaseFactory.create(product=self.suite.product)
+
+        self.sync([a, d, c])
+
+        members = self.members()
+        self.assertEqual(
+            [(m[1], m[2]) for m in members], [(a, 0), (d, 1), (c, 2)])
+        self.assertEqual(members[0][0], sa.id)
+        self.assertEqual(members[2][0], sc.id)
+        self.assertEqual(self.refresh(sa).modified_by, None)
+        self.assertEqual(
+            self.model.SuiteCase.everything.get(case=d).created_by, self.user)
+
+
+    def test_duplicate_member(self):
+        """A member listed twice is included once, at its first position."""
+        a, b, c = self.cases
+
+        self.sync([b, a, b])
+
+        self.assertEqual([m[1:] for m in self.members()], [(b, 0), (a, 1)])
+
+
+    def test_generation(self):
+        """Syncing changes the write generation of the model."""
+        from moztrap.model.mtmodel import generation
+        before = generation(self.model.SuiteCase)
+
+        self.sync(list(reversed(self.cases)))
+
+        self.assertNotEqual(generation(self.model.SuiteCase), before)
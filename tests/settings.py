@@ -8,3 +8,5 @@ DEFAULT_FILE_STORAGE = "tests.storage.MemoryStorage"
 ALLOW_ANONYMOUS_ACCESS = False
 SITE_URL = "http://localhost:80"
 USE_BROWSERID = True
+# other threads can't see the data of a test's uncommitted transaction
+AUTOCOMPLETE_REBUILD = "request"
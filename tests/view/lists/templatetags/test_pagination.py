@@ -33,6 +33,23 @@ class PaginateTest(case.DBTestCase):
         self.assertEqual(output, "4 5 6 ")
 
 
+    def test_count_strategy(self):
+        """Count strategy can be selected in the tag."""
+        from moztrap.view.lists.pagination import EstimatedCount
+
+        tpl = template.Template(
+            "{% load pagination %}"
+            "{% paginate queryset as pager count estimated %}")
+
+        request = Mock()
+        request.path = "/"
+        request.GET = {}
+        ctx = template.Context({"request": request, "queryset": Mock()})
+        tpl.render(ctx)
+
+        self.assertIsInstance(ctx["pager"]._counter, EstimatedCount)
+
+
 class FilterTest(case.TestCase):
     """Tests for template filters."""
     def test_pagenumber_url(self):
@@ -99,3 +99,97 @@ class PrefixIDFilterTest(case.DBTestCase):
             Set([x.name for x in res.all()]),
             Set(["CV 3", "CV 4"]),
             )
+
+
+
+class SearchFilterTest(case.DBTestCase):
+    """Tests for SearchFilter."""
+    @property
+    def filter_class(self):
+        from moztrap.view.lists.cases import SearchFilter
+        return SearchFilter
+
+
+    def filter(self, values, field="name"):
+        from moztrap.view.lists.cases import with_relevance
+        f = self.filter_class(field, field)
+        return f.filter(
+            with_relevance(self.model.CaseVersion.objects.all()), values)
+
+
+    def test_word_prefix(self):
+        """Matches case versions with a word starting with the value."""
+        cv = self.F.CaseVersionFactory.create(name="Open browser")
+        self.F.CaseVersionFactory.create(name="Close tab")
+
+        self.assertEqual(list(self.filter([u"brow"])), [cv])
+
+
+    def test_all_terms(self):
+        """Every term of a multi-word value must match."""
+        cv = self.F.CaseVersionFactory.create(name="Open browser")
+        self.F.CaseVersionFactory.create(name="Open tab")
+
+        self.assertEqual(list(self.filter([u"open brow"])), [cv])
+
+
+    def test_step_field(self):
+        """Can search step instructions."""
+        step = self.F.CaseStepFactory.create(instruction="Click the button")
+        self.F.CaseStepFactory.create(instruction="Type some text")
+
+        self.assertEqual(
+            list(self.filter([u"button"], "instruction")),
+            [step.caseversion],
+            )
+
+
+    def test_terms_across_steps(self):
+        """Terms of a step field may match in different steps."""
+        step = self.F.CaseStepFactory.create(instruction="Click the button")
+        self.F.CaseStepFactory.create(
+            caseversion=step.caseversion, number=2, instruction="Type text")
+
+        self.assertEqual(
+            list(self.filter([u"button text"], "instruction")),
+            [step.caseversion],
+            )
+
+
+    def test_deleted_step(self):
+        """Terms of deleted steps don't match."""
+        step = self.F.CaseStepFactory.create(instruction="Click the button")
+        step.delete()
+
+        self.assertEqual(list(self.filter([u"button"], "instruction")), [])
+
+
+    def test_deleted_step_relevance(self):
+        """Terms of deleted steps don't add to relevance."""
+        step = self.F.CaseStepFactory.create(instruction="Click the button")
+        self.F.CaseStepFactory.create(
+            caseversion=step.caseversion, number=2, instruction="button"
+            ).delete()
+
+        res = self.filter([u"button"], "instruction")
+
+        self.assertEqual([r.relevance for r in res], [1])
+
+
+    def test_no_terms_falls_back(self):
+        """A value with no word characters falls back to substring match."""
+        cv = self.F.CaseVersionFactory.create(name="a -- b")
+        self.F.CaseVersionFactory.create(name="a b")
+
+        self.assertEqual(list(self.filter([u"--"])), [cv])
+
+
+    def test_relevance(self):
+        """Results are annotated with the summed weight of matching terms."""
+        cv1 = self.F.CaseVersionFactory.create(name="tab")
+        cv2 = self.F.CaseVersionFactory.create(name="tab tab tabs")
+
+        res = self.filter([u"tab"]).order_by("-relevance")
+
+        self.assertEqual(list(res), [cv2, cv1])
+        self.assertEqual([r.relevance for r in res], [3, 1])
@@ -456,14 +456,15 @@ class FilterTest(FiltersTestCase):
 
     def test_filter(self):
         """Filters queryset so ``self.lookup`` field value is in ``values``."""
+        from moztrap.model import Product
         f = self.filters.Filter("name", lookup="lookup")
 
         qs = Mock()
+        qs.model = Product
         qs2 = f.filter(qs, ["1", "2"])
 
         qs.filter.assert_called_with(lookup__in=["1", "2"])
-        qs.filter.return_value.distinct.assert_called_with()
-        self.assertEqual(qs2, qs.filter.return_value.distinct.return_value)
+        self.assertEqual(qs2, qs.filter.return_value)
 
 
     def test_options(self):
@@ -573,6 +574,94 @@ class ModelFilterTest(FiltersTestCase):
 
 
 
+class LazyModelFilterTest(case.DBTestCase):
+    """Tests for ModelFilter in lazy mode."""
+    def filter(self, **kwargs):
+        """Return a lazy tag ModelFilter."""
+        from moztrap.view.lists.filters import ModelFilter
+        kwargs.setdefault("queryset", self.model.Tag.objects.all())
+        return ModelFilter("tag", lazy=True, **kwargs)
+
+
+    def test_cls(self):
+        """Lazy filters have a distinct CSS class."""
+        self.assertEqual(self.filter().cls, "lazy")
+
+
+    def test_values_only_queries_selected(self):
+        """Values are validated against the selected objects only."""
+        t = self.F.TagFactory.create()
+
+        f = self.filter()
+        with self.assertNumQueries(1):
+            values = f.values({"tag": [str(t.id), "foo", str(t.id + 100)]})
+
+        self.assertEqual(values, [t.id])
+
+
+    def test_no_values_no_query(self):
+        """With no selected values, no queries are made."""
+        f = self.filter()
+        with self.assertNumQueries(0):
+            self.assertEqual(f.values({}), [])
+            self.assertEqual(f.options([]), [])
+
+
+    def test_options_only_selected(self):
+        """Options displayed are only the selected objects."""
+        t = self.F.TagFactory.create(name="one")
+        self.F.TagFactory.create(name="two")
+
+        self.assertEqual(self.filter().options([t.id]), [(t.id, "one")])
+
+
+    def test_search(self):
+        """Search matches search field by case-insensitive prefix, ordered."""
+        t2 = self.F.TagFactory.create(name="foo2")
+        t1 = self.F.TagFactory.create(name="foo1")
+        self.F.TagFactory.create(name="bar foo")
+
+        self.assertEqual(
+            self.filter().search("FO"),
+            ([(t1.id, "foo1"), (t2.id, "foo2")], False),
+            )
+
+
+    def test_search_multiple_fields(self):
+        """Can search on several fields."""
+        u = self.F.UserFactory.create(username="xyz", email="abc@example.com")
+
+        f = self.filter(
+            queryset=self.model.User.objects.all(),
+            search=["username", "email"])
+
+        self.assertEqual(f.search("abc"), ([(u.id, "xyz")], False))
+
+
+    def test_search_page(self):
+        """Search results are paginated."""
+        tags = [self.F.TagFactory.create(name="t{0}".format(i))
+                for i in range(5)]
+
+        self.assertEqual(
+            self.filter().search("t", pagenumber=2, pagesize=2),
+            ([(tags[2].id, "t2"), (tags[3].id, "t3")], True),
+            )
+
+
+    def test_bound_filter(self):
+        """A bound lazy filter lists only the selected option."""
+        from moztrap.view.lists.filters import BoundFilter
+        t = self.F.TagFactory.create(name="one")
+        self.F.TagFactory.create(name="two")
+
+        bf = BoundFilter(self.filter(), {"tag": [str(t.id)]})
+
+        self.assertEqual(
+            [(o.value, o.label, o.selected) for o in bf], [(t.id, "one", True)])
+
+
+
 class KeywordExactFilterTest(FiltersTestCase):
     """Tests for KeywordExactFilter."""
     def test_options(self):
@@ -590,15 +679,15 @@ class KeywordFilterTest(FiltersTestCase):
         """Filters queryset by 'contains' all values."""
         f = self.filters.KeywordFilter("name")
 
+        from moztrap.model import Product
         qs = Mock()
+        qs.model = Product
+        qs.filter.return_value.model = Product
         qs2 = f.filter(qs, ["one", "two"])
 
         qs.filter.assert_called_with(name__icontains="one")
         qs.filter.return_value.filter.assert_called_with(name__icontains="two")
-        qs.filter.return_value.filter.return_value.distinct.assert_called_with()
-        self.assertIs(
-            qs2,
-            qs.filter.return_value.filter.return_value.distinct.return_value)
+        self.assertIs(qs2, qs.filter.return_value.filter.return_value)
 
 
     def test_filter_doesnt_touch_queryset_if_no_values(self):
@@ -609,4 +698,137 @@ class KeywordFilterTest(FiltersTestCase):
         f.filter(qs, [])
 
         self.assertEqual(qs.filter.call_count, 0)
-        self.assertEqual(qs.distinct.call_count, 0)
\ No newline at end of file
+        self.assertEqual(qs.distinct.call_count, 0)
+
+
+class IsMultivaluedTest(FiltersTestCase):
+    """Tests for ``is_multivalued`` function."""
+    @property
+    def model(self):
+        """The data model."""
+        from moztrap import model
+        return model
+
+
+    def _check(self, model, lookup, expected):
+        """Assert ``lookup`` on ``model`` is (not) multi-valued."""
+        self.assertEqual(
+            self.filters.is_multivalued(model, lookup), expected)
+
+
+    def test_local_field(self):
+        """A lookup on a local field is single-valued."""
+        self._check(self.model.CaseVersion, "name__icontains", False)
+
+
+    def test_foreign_key_chain(self):
+        """A lookup through foreign keys is single-valued."""
+        self._check(self.model.CaseVersion, "case__product__in", False)
+
+
+    def test_many_to_many(self):
+        """A lookup through a many-to-many is multi-valued."""
+        self._check(self.model.CaseVersion, "tags__in", True)
+
+
+    def test_reverse_foreign_key(self):
+        """A lookup through a reverse foreign key is multi-valued."""
+        self._check(
+            self.model.CaseVersion, "steps__instruction__icontains", True)
+
+
+    def test_multivalued_after_foreign_key(self):
+        """A multi-valued relation after a foreign key is multi-valued."""
+        self._check(self.model.RunCaseVersion, "caseversion__tags__in", True)
+
+
+    def test_pk(self):
+        """A lookup on pk is single-valued."""
+        self._check(self.model.CaseVersion, "pk__in", False)
+
+
+
+class FilterLookupTest(case.DBTestCase):
+    """Tests for ``filter_lookup`` function."""
+    @property
+    def func(self):
+        """The function under test."""
+        from moztrap.view.lists.filters import filter_lookup
+        return filter_lookup
+
+
+    def test_multivalued_subquery(self):
+        """A multi-valued lookup becomes a subquery, without DISTINCT."""
+        qs = self.func(
+            self.model.CaseVersion.objects.all(),
+            "steps__instruction__icontains",
+            "foo")
+
+        sql = str(qs.query)
+        self.assertIn("IN (SELECT", sql)
+        self.assertNotIn("DISTINCT", sql)
+
+
+    def test_single_valued_direct(self):
+        """A single-valued lookup filters directly."""
+        qs = self.func(
+            self.model.CaseVersion.objects.all(), "case__product__in", [1])
+
+        self.assertNotIn("IN (SELECT", str(qs.query))
+
+
+    def test_no_duplicates(self):
+        """Matching several related rows doesn't duplicate objects."""
+        cv = self.F.CaseVersionFactory.create()
+        self.F.CaseStepFactory.create(
+            caseversion=cv, number=1, instruction="foo one")
+        self.F.CaseStepFactory.create(
+            caseversion=cv, number=2, instruction="foo two")
+
+        qs = self.func(
+            self.model.CaseVersion.objects.all(),
+            "steps__instruction__icontains",
+            "foo")
+
+        self.assertEqual(list(qs), [cv])
+
+
+    def test_combined_filters(self):
+        """Several multi-valued filters combine without row explosion."""
+        envs = self.F.EnvironmentFactory.create_set(["OS"], ["Linux"])
+        t1 = self.F.TagFactory.create()
+        t2 = self.F.TagFactory.create()
+        cv = self.F.CaseVersionFactory.create(environments=envs)
+        cv.tags.add(t1, t2)
+        self.F.CaseStepFactory.create(caseversion=cv, instruction="foo")
+        self.F.CaseStepFactory.create(
+            caseversion=cv, number=2, instruction="foo")
+        self.F.CaseVersionFactory.create()
+
+        qs = self.model.CaseVersion.objects.all()
+        qs = self.func(qs, "tags__in", [t1.id, t2.id])
+        qs = self.func(qs, "steps__instruction__icontains", "foo")
+        qs = self.func(
+            qs, "environments__elements__in", [envs[0].elements.get().id])
+
+        self.assertEqual(list(qs), [cv])
+
+
+    def test_within(self):
+        """Lookups ``within`` constrain the same related row."""
+        cv = self.F.CaseVersionFactory.create(
+            status="draft", productversion__version="1.0")
+        self.F.CaseVersionFactory.create(
+            status="active",
+            case=cv.case,
+            productversion__product=cv.productversion.product,
+            productversion__version="2.0")
+        qs = self.model.Case.objects.all()
+        within = {"versions__latest": True}
+
+        self.assertEqual(
+            list(self.func(qs, "versions__status__in", ["draft"], within)),
+            [])
+        self.assertEqual(
+            list(self.func(qs, "versions__status__in", ["active"], within)),
+            [cv.case])
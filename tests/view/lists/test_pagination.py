@@ -2,7 +2,9 @@
 Tests for pagination utilities.
 
 """
-from mock import Mock
+from mock import Mock, patch
+
+from django.utils.datastructures import MultiValueDict
 
 from tests import case
 
@@ -222,6 +224,11 @@ class TestPager(case.DBTestCase):
         self.assertEqual(qs.count.call_count, 1)
 
 
+    def test_not_estimated(self):
+        """Default exact count is not an estimate."""
+        self.assertFalse(self.pager(self.qs(10), 20, 1).estimated)
+
+
     def test_objects(self):
         """.objects is list of objects on current page."""
         products = [
@@ -342,6 +349,294 @@ class TestPager(case.DBTestCase):
 
 
 
+class TestCountKey(case.TestCase):
+    """Tests for ``count_key`` function."""
+    @property
+    def func(self):
+        """The function under test."""
+        from moztrap.view.lists.pagination import count_key
+        return count_key
+
+
+    def _request(self, path, GET):
+        """Return mock request for ``path`` with ``GET`` params."""
+        request = Mock()
+        request.path = path
+        request.GET = MultiValueDict(GET)
+        return request
+
+
+    def test_ignores_paging_and_sorting(self):
+        """Only filter parameters are included in the key."""
+        self.assertEqual(
+            self.func(self._request(
+                    "/manage/cases/",
+                    {
+                        "pagenumber": ["2"],
+                        "sortfield": ["name"],
+                        "filter-name": ["foo"],
+                        })),
+            u"/manage/cases/?filter-name=foo")
+
+
+    def test_normalized(self):
+        """Equivalent filter querystrings give the same key."""
+        self.assertEqual(
+            self.func(self._request(
+                    "/", {"filter-b": ["2", "1"], "filter-a": ["x"]})),
+            self.func(self._request(
+                    "/", {"filter-a": ["x"], "filter-b": ["1", "2"]})),
+            )
+
+
+    def test_path(self):
+        """Different views give different keys."""
+        self.assertNotEqual(
+            self.func(self._request("/manage/cases/", {})),
+            self.func(self._request("/manage/suites/", {})),
+            )
+
+
+
+class TestCounterFromRequest(case.TestCase):
+    """Tests for ``counter_from_request`` function."""
+    @property
+    def pagination(self):
+        """The module under test."""
+        from moztrap.view.lists import pagination
+        return pagination
+
+
+    def _request(self, GET=None):
+        """Return mock request with ``GET`` params."""
+        request = Mock()
+        request.path = "/"
+        request.GET = MultiValueDict(GET or {})
+        return request
+
+
+    def test_exact(self):
+        """Can select exact counting."""
+        self.assertIsInstance(
+            self.pagination.counter_from_request(self._request(), "exact"),
+            self.pagination.ExactCount)
+
+
+    def test_cached(self):
+        """Can select cached counting."""
+        self.assertIsInstance(
+            self.pagination.counter_from_request(self._request(), "cached"),
+            self.pagination.CachedCount)
+
+
+    def test_estimated_filtered(self):
+        """Estimated counting knows whether the list is filtered."""
+        counter = self.pagination.counter_from_request(
+            self._request({"filter-name": ["foo"]}), "estimated")
+
+        self.assertIsInstance(counter, self.pagination.EstimatedCount)
+        self.assertTrue(counter.filtered)
+
+
+    def test_default_from_settings(self):
+        """Defaults to ``PAGINATION_COUNT`` setting."""
+        with patch("moztrap.view.lists.pagination.settings") as settings:
+            settings.PAGINATION_COUNT = "cached"
+            counter = self.pagination.counter_from_request(self._request())
+
+        self.assertIsInstance(counter, self.pagination.CachedCount)
+
+
+    def test_default(self):
+        """Without a ``PAGINATION_COUNT`` setting, counts exactly."""
+        with patch("moztrap.view.lists.pagination.settings", object()):
+            counter = self.pagination.counter_from_request(self._request())
+
+        self.assertIsInstance(counter, self.pagination.ExactCount)
+        self.assertNotIsInstance(counter, self.pagination.CachedCount)
+
+
+    def test_unknown(self):
+        """Unknown strategy raises ValueError."""
+        with self.assertRaises(ValueError):
+            self.pagination.counter_from_request(self._request(), "bogus")
+
+
+
+class TestCachedCount(case.DBTestCase):
+    """Tests for ``CachedCount`` strategy."""
+    @property
+    def counter(self):
+        """The class under test."""
+        from moztrap.view.lists.pagination import CachedCount
+        return CachedCount
+
+
+    def setUp(self):
+        """Clear the cache."""
+        from django.core.cache import cache
+        cache.clear()
+
+
+    def test_cached(self):
+        """Second count for the same key doesn't query."""
+        self.F.ProductFactory.create()
+        qs = self.model.Product.objects.all()
+        self.counter("key").count(qs)
+
+        with self.assertNumQueries(0):
+            total, estimated = self.counter("key").count(qs)
+
+        self.assertEqual(total, 1)
+        self.assertFalse(estimated)
+
+
+    def test_invalidated_by_write(self):
+        """A write to the model invalidates the cached count."""
+        self.F.ProductFactory.create()
+        qs = self.model.Product.objects.all()
+        self.counter("key").count(qs)
+
+        self.F.ProductFactory.create()
+
+        self.assertEqual(self.counter("key").count(qs), (2, False))
+
+
+    def test_invalidated_by_joined_write(self):
+        """A write to a table joined by the filters invalidates the count."""
+        pv = self.F.ProductVersionFactory.create()
+        qs = self.model.ProductVersion.objects.filter(product__name="Foo")
+        self.counter("key").count(qs)
+
+        pv.product.name = "Foo"
+        pv.product.save()
+
+        self.assertEqual(self.counter("key").count(qs), (1, False))
+
+
+    def test_invalidated_by_subquery_write(self):
+        """A write to a table read by a subquery invalidates the count."""
+        pv = self.F.ProductVersionFactory.create()
+        qs = self.model.ProductVersion.objects.filter(
+            product__in=self.model.Product.objects.filter(name="Foo"))
+        self.counter("key").count(qs)
+
+        pv.product.name = "Foo"
+        pv.product.save()
+
+        self.assertEqual(self.counter("key").count(qs), (1, False))
+
+
+    def test_invalidated_by_m2m_write(self):
+        """A write to a many-to-many relation invalidates the count."""
+        tag = self.F.TagFactory.create()
+        cv = self.F.CaseVersionFactory.create()
+        qs = self.model.CaseVersion.objects.filter(tags=tag)
+        self.counter("key").count(qs)
+
+        cv.tags.add(tag)
+
+        self.assertEqual(self.counter("key").count(qs), (1, False))
+
+
+    def test_invalidated_by_proxy_write(self):
+        """A write through a proxy of the model invalidates the count."""
+        from django.contrib.auth.models import User as BaseUser
+        self.F.UserFactory.create()
+        qs = self.model.User.objects.all()
+        self.counter("key").count(qs)
+
+        BaseUser.objects.create(username="other")
+
+        self.assertEqual(self.counter("key").count(qs), (2, False))
+
+
+    def test_keyed(self):
+        """Different keys are counted separately."""
+        p = self.F.ProductFactory.create(name="One")
+        self.F.ProductFactory.create(name="Two")
+        self.counter("one").count(self.model.Product.objects.filter(pk=p.pk))
+
+        total, estimated = self.counter("all").count(
+            self.model.Product.objects.all())
+
+        self.assertEqual(total, 2)
+
+
+
+class TestEstimatedCount(case.DBTestCase):
+    """Tests for ``EstimatedCount`` strategy."""
+    @property
+    def counter(self):
+        """The class under test."""
+        from moztrap.view.lists.pagination import EstimatedCount
+        return EstimatedCount
+
+
+    @patch("moztrap.view.lists.pagination.estimate_rows")
+    def test_unfiltered(self, estimate_rows):
+        """An unfiltered list of a large table uses the estimate."""
+        estimate_rows.return_value = 50000
+
+        total, estimated = self.counter().count(
+            self.model.Product.objects.all())
+
+        self.assertEqual(total, 50000)
+        self.assertTrue(estimated)
+
+
+    @patch("moztrap.view.lists.pagination.estimate_rows")
+    def test_small_table(self, estimate_rows):
+        """Small tables are counted exactly."""
+        estimate_rows.return_value = 12
+        self.F.ProductFactory.create()
+
+        self.assertEqual(
+            self.counter().count(self.model.Product.objects.all()), (1, False))
+
+
+    @patch("moztrap.view.lists.pagination.estimate_rows")
+    def test_filtered_queryset(self, estimate_rows):
+        """A filtered queryset falls back to an exact count."""
+        estimate_rows.return_value = 50000
+
+        self.assertEqual(
+            self.counter().count(
+                self.model.Product.objects.filter(name="foo")),
+            (0, False))
+
+
+    @patch("moztrap.view.lists.pagination.estimate_rows")
+    def test_filtered_request(self, estimate_rows):
+        """A request with filter parameters falls back to an exact count."""
+        estimate_rows.return_value = 50000
+
+        self.assertEqual(
+            self.counter(filtered=True).count(
+                self.model.Product.objects.all()),
+            (0, False))
+
+
+    def test_no_statistics(self):
+        """Without database statistics, falls back to an exact count."""
+        self.F.ProductFactory.create()
+
+        self.assertEqual(
+            self.counter().count(self.model.Product.objects.all()), (1, False))
+
+
+    def test_pager(self):
+        """Pager reports when its total is an estimate."""
+        from moztrap.view.lists.pagination import Pager
+        with patch("moztrap.view.lists.pagination.estimate_rows") as est:
+            est.return_value = 50000
+            p = Pager(self.model.Product.objects.all(), 20, 1, self.counter())
+
+            self.assertTrue(p.estimated)
+            self.assertEqual(p.num_pages, 2500)
+
+
+
 class TestPositiveInteger(case.TestCase):
     """Tests for ``positive_integer`` function."""
     @property
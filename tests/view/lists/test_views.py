@@ -0,0 +1,132 @@
+"""
+Tests for list-page support views.
+
+"""
+from django.core.urlresolvers import reverse
+
+from tests import case
+
+
+
+class FilterOptionsTest(case.view.AuthenticatedViewTestCase,
+                        case.view.NoCacheTest,
+                        ):
+    """Tests for filter_options view."""
+    @property
+    def url(self):
+        """Shortcut for filter-options url."""
+        return reverse("lists_filter_options")
+
+
+    def get(self, params=None, status=200):
+        """Get filter-options url authenticated, with given params."""
+        if params is None:
+            params = {"path": reverse("manage_cases"), "key": "tag"}
+        return self.app.get(
+            self.url, user=self.user, params=params, status=status)
+
+
+    def test_prefix_search(self):
+        """Returns options whose search field starts with given text."""
+        t = self.F.TagFactory.create(name="foo")
+        self.F.TagFactory.create(name="bar")
+
+        res = self.get(
+            {"path": reverse("manage_cases"), "key": "tag", "text": "fo"})
+
+        self.assertEqual(
+            res.json,
+            {"options": [{"value": t.id, "label": "foo"}], "more": False},
+            )
+
+
+    def test_paginated(self):
+        """Options are paginated, with a flag for further pages."""
+        for name in ["a1", "a2", "a3"]:
+            self.F.TagFactory.create(name=name)
+
+        res = self.get(
+            {
+                "path": reverse("manage_cases"),
+                "key": "tag",
+                "text": "a",
+                "pagesize": 2,
+                "pagenumber": 2,
+                }
+            )
+
+        self.assertEqual(
+            [o["label"] for o in res.json["options"]], ["a3"])
+        self.assertFalse(res.json["more"])
+
+
+    def test_more(self):
+        """If there are more options, ``more`` is true."""
+        for name in ["a1", "a2", "a3"]:
+            self.F.TagFactory.create(name=name)
+
+        res = self.get(
+            {
+                "path": reverse("manage_cases"),
+                "key": "tag",
+                "text": "a",
+                "pagesize": 2,
+                }
+            )
+
+        self.assertTrue(res.json["more"])
+
+
+    def test_user_search_field(self):
+        """User filters search by username."""
+        u = self.F.UserFactory.create(username="someone")
+
+        res = self.get(
+            {"path": reverse("manage_cases"), "key": "creator", "text": "some"})
+
+        self.assertEqual(
+            res.json["options"], [{"value": u.id, "label": "someone"}])
+
+
+    @property
+    def run_path(self):
+        """Path of a list view that requires the execute permission."""
+        return reverse("runtests_run", kwargs={"run_id": 1, "env_id": 1})
+
+
+    def test_list_permission_required(self):
+        """Searching a list's filter requires that list's permission."""
+        self.F.UserFactory.create(username="someone")
+
+        self.get(
+            {"path": self.run_path, "key": "creator", "text": "some"},
+            status=403)
+
+
+    def test_list_permission(self):
+        """With the list's permission, its filters can be searched."""
+        self.add_perm("execute")
+        u = self.F.UserFactory.create(username="someone")
+
+        res = self.get(
+            {"path": self.run_path, "key": "creator", "text": "some"})
+
+        self.assertEqual(
+            res.json["options"], [{"value": u.id, "label": "someone"}])
+
+
+    def test_not_lazy(self):
+        """Filters that are not lazy can't be searched."""
+        self.get(
+            {"path": reverse("manage_cases"), "key": "product", "text": "a"},
+            status=404)
+
+
+    def test_bad_path(self):
+        """A path that doesn't resolve gives a 404."""
+        self.get({"path": "/nonexistent/", "key": "tag"}, status=404)
+
+
+    def test_path_without_filters(self):
+        """A path for a view without filters gives a 404."""
+        self.get({"path": reverse("home"), "key": "tag"}, status=404)
@@ -308,7 +308,8 @@ class AddBulkCasesFormTest(case.DBTestCase):
 
         self.assertFalse(form.is_valid())
         self.assertEqual(
-            form.errors["cases"], [u"Expected 'Test that ...', not 'Foo'"])
+            form.errors["cases"],
+            [u"Line 1: Expected 'Test that ...', not 'Foo'"])
 
 
     def test_created_by(self):
@@ -455,6 +456,79 @@ class AddBulkCasesFormTest(case.DBTestCase):
 
 
 
+    def test_latest_and_environments(self):
+        """New versions inherit environments; the newest one is latest."""
+        envs = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Windows", "Linux"]})
+        self.productversion.add_envs(*envs)
+        newer_version = self.F.ProductVersionFactory.create(
+            product=self.product, version="1.1")
+        newer_version.add_envs(envs[0])
+
+        data = self.get_form_data()
+        data["and_later_versions"] = 1
+
+        case = self.form(data=data).save()[0]
+
+        old, new = case.versions.all()
+        self.assertFalse(old.latest)
+        self.assertTrue(new.latest)
+        self.assertEqual(set(old.environments.all()), set(envs))
+        self.assertEqual(list(new.environments.all()), [envs[0]])
+
+
+    def test_search_index(self):
+        """New versions are indexed for search."""
+        cv = self.form(data=self.get_form_data()).save()[0].versions.get()
+
+        self.assertEqual(
+            set(
+                self.model.CaseVersionTerm.objects.filter(
+                    caseversion=cv).values_list("field", "term")
+                ),
+            set(
+                [("name", t) for t in ["test", "that", "i", "can", "register"]]
+                + [("description", t) for t in ["this", "is", "the"]]
+                + [("description", "description")]
+                + [("instruction", t)
+                   for t in ["when", "i", "fill", "in", "form", "and", "submit"]]
+                + [("expected", t)
+                   for t in ["then", "i", "get", "a", "welcome", "email"]]
+                ),
+            )
+
+
+    def test_constant_queries(self):
+        """Number of queries doesn't depend on number of cases or versions."""
+        self.F.ProductVersionFactory.create(
+            product=self.product, version="1.1")
+        tag = self.F.TagFactory.create()
+        data = self.get_form_data()
+        data["and_later_versions"] = 1
+        data.setlist("tag-tag", [tag.id])
+        data["cases"] = "".join(
+            "Test that {0} works\n"
+            "When I do {0}\n"
+            "Then it works\n"
+            "And when I do it again\n"
+            "Then it still works\n".format(i)
+            for i in range(20)
+            )
+        form = self.form(data=data, user=self.user)
+        self.assertTrue(form.is_valid())
+
+        with self.assertNumQueries(11):
+            cases = form.save()
+
+        self.assertEqual(len(cases), 20)
+        cv = cases[-1].versions.all()[1]
+        self.assertEqual(cv.name, "Test that 19 works")
+        self.assertEqual(cv.steps.count(), 2)
+        self.assertEqual(list(cv.tags.all()), [tag])
+        self.assertEqual(cv.created_by, self.user)
+
+
+
 class EditCaseVersionFormTest(case.DBTestCase):
     """Tests for EditCaseVersionForm."""
     @property
@@ -163,6 +163,30 @@ class CasesTest(case.view.manage.ListViewTestCase,
         self.assertNotInList(res, "Case 2")
 
 
+    def test_filter_by_removed_step(self):
+        """A step removed by editing the case is no longer searched."""
+        from moztrap.view.manage.cases.forms import StepFormSet
+        step = self.F.CaseStepFactory.create(
+            caseversion__name="Case 1", instruction="do this")
+        self.F.CaseStepFactory.create(
+            caseversion=step.caseversion, number=2, instruction="do that")
+        fs = StepFormSet(
+            instance=step.caseversion,
+            data={
+                "steps-TOTAL_FORMS": "1",
+                "steps-INITIAL_FORMS": "1",
+                "steps-0-id": str(step.id),
+                "steps-0-instruction": "do this",
+                "steps-0-expected": "",
+                },
+            )
+        fs.save()
+
+        res = self.get(params={"filter-instruction": "that"})
+
+        self.assertNotInList(res, "Case 1")
+
+
     def test_filter_by_env_elements(self):
         """Can filter by environment elements."""
         envs = self.F.EnvironmentFactory.create_full_set(
@@ -161,6 +161,68 @@ class ProductVersionDetailTest(case.view.AuthenticatedViewTestCase,
         res.mustcontain("somebody")
 
 
+    def test_details_export(self):
+        """Details links to export."""
+        res = self.get(headers={"X-Requested-With": "XMLHttpRequest"})
+
+        res.mustcontain(
+            reverse(
+                "manage_productversion_export",
+                kwargs=dict(productversion_id=self.productversion.id)
+                )
+            )
+
+
+
+class ExportProductVersionTest(case.view.AuthenticatedViewTestCase,
+                               case.view.NoCacheTest,
+                               ):
+    """Test for productversion export view."""
+    def setUp(self):
+        """Setup for export tests; create a productversion with a case."""
+        super(ExportProductVersionTest, self).setUp()
+        self.productversion = self.F.ProductVersionFactory.create(
+            product__name="Foo", version="1.0")
+        self.F.CaseVersionFactory.create(
+            productversion=self.productversion, name="Bar")
+
+
+    @property
+    def url(self):
+        """Shortcut for product version export url."""
+        return reverse(
+            "manage_productversion_export",
+            kwargs=dict(productversion_id=self.productversion.id)
+            )
+
+
+    def test_json(self):
+        """Downloads JSON by default."""
+        res = self.get()
+
+        self.assertEqual(res.headers["Content-Type"], "application/json")
+        self.assertEqual(
+            res.headers["Content-Disposition"],
+            "attachment; filename=foo-10.json",
+            )
+        self.assertEqual(
+            res.json, {"cases": [{"name": "Bar", "description": ""}]})
+
+
+    def test_ndjson(self):
+        """Downloads NDJSON if asked."""
+        res = self.get(params={"format": "ndjson"})
+
+        self.assertEqual(
+            res.headers["Content-Type"], "application/x-ndjson")
+        self.assertEqual(res.body, '{"name": "Bar", "description": ""}\n')
+
+
+    def test_bad_format(self):
+        """Unknown format is a 404."""
+        self.get(params={"format": "csv"}, status=404)
+
+
 
 class AddProductVersionTest(case.view.FormViewTestCase,
                             case.view.NoCacheTest,
@@ -94,6 +94,38 @@ class EditRunFormTest(case.DBTestCase):
         self.assertEqual(set(run.suites.all()), set([s]))
 
 
+    def test_edit_suites_keeps_rows(self):
+        """Editing suites keeps the associations of suites still included."""
+        pv = self.F.ProductVersionFactory.create()
+        r = self.F.RunFactory.create(productversion=pv)
+        self.F.RunSuiteFactory.create(
+            run=r, suite__product=pv.product, order=0)
+        rs = self.F.RunSuiteFactory.create(
+            run=r, suite__product=pv.product, order=1)
+        s = self.F.SuiteFactory.create(product=pv.product)
+
+        f = self.form(
+            {
+                "productversion": str(pv.id),
+                "name": r.name,
+                "description": r.description,
+                "start": r.start.strftime("%m/%d/%Y"),
+                "end": "",
+                "suites": [str(rs.suite.id), str(s.id)],
+                "cc_version": str(r.cc_version),
+                },
+            instance=r,
+            )
+
+        run = f.save()
+
+        self.assertEqual(
+            list(run.runsuites.values_list("suite", "order")),
+            [(rs.suite.id, 0), (s.id, 1)],
+            )
+        self.assertEqual(run.runsuites.get(suite=rs.suite).id, rs.id)
+
+
     def test_no_change_product_option(self):
         """No option to change to a version of a different product."""
         self.F.ProductVersionFactory.create()
@@ -250,3 +250,62 @@ class EditRunTest(case.view.FormViewTestCase,
         res = form.submit(status=200)
 
         res.mustcontain("Another user saved changes to this object")
+
+
+    def test_constant_queries(self):
+        """Version and suite choosers take the same queries however long."""
+        def add():
+            pv = self.F.ProductVersionFactory.create(
+                product=self.testrun.productversion.product)
+            self.F.RunSuiteFactory.create(
+                run=self.testrun,
+                suite=self.F.SuiteFactory.create(product=pv.product),
+                )
+
+        add()
+        self.get()
+        queries = self.count_queries(self.get)
+
+        for i in range(3):
+            add()
+
+        self.assertEqual(self.count_queries(self.get), queries)
+
+
+
+class RunSuiteOptionsTest(case.view.AuthenticatedViewTestCase,
+                          case.view.NoCacheTest,
+                          ):
+    """Tests for ajax view returning suites available to a run."""
+    @property
+    def url(self):
+        """Shortcut for run-suite-options url."""
+        return reverse("manage_run_suite_options")
+
+
+    def setUp(self):
+        """Add manage-runs permission."""
+        super(RunSuiteOptionsTest, self).setUp()
+        self.add_perm("manage_runs")
+
+
+    def test_requires_manage_runs_permission(self):
+        """Requires manage-runs permission."""
+        res = self.app.get(
+            self.url, user=self.F.UserFactory.create(), status=302)
+
+        self.assertRedirects(res, "/")
+
+
+    def test_product_and_filter(self):
+        """Returns suites of the given product, filtered by name."""
+        s = self.F.SuiteFactory.create(name="Foo Suite")
+        self.F.SuiteFactory.create(name="Bar Suite", product=s.product)
+        self.F.SuiteFactory.create(name="Foo Other")
+
+        res = self.get(
+            params={"product": s.product.id, "filter-name": "foo"})
+
+        self.assertIn("Foo Suite", res.json["html"])
+        self.assertNotIn("Bar Suite", res.json["html"])
+        self.assertNotIn("Foo Other", res.json["html"])
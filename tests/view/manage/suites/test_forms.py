@@ -126,6 +126,36 @@ class EditSuiteFormTest(case.DBTestCase):
         self.assertEqual(set(suite.cases.all()), set([c]))
 
 
+    def test_edit_cases_keeps_rows(self):
+        """Editing cases of a suite keeps the rows of cases still in it."""
+        s = self.F.SuiteFactory.create()
+        sc1 = self.F.SuiteCaseFactory.create(suite=s, order=0)
+        sc2 = self.F.SuiteCaseFactory.create(
+            suite=s, case__product=s.product, order=1)
+        c = self.F.CaseFactory.create(product=s.product)
+
+        f = self.form(
+            {
+                "product": str(s.product.id),
+                "name": s.name,
+                "description": s.description,
+                "status": s.status,
+                "cases": [str(sc2.case.id), str(c.id)],
+                "cc_version": str(s.cc_version),
+                },
+            instance=s,
+            )
+
+        self.assertTrue(f.is_valid())
+        suite = f.save()
+
+        self.assertEqual(
+            list(suite.suitecases.values_list("case", "order")),
+            [(sc2.case.id, 0), (c.id, 1)],
+            )
+        self.assertEqual(suite.suitecases.get(case=sc2.case).id, sc2.id)
+
+
 
 class AddSuiteFormTest(case.DBTestCase):
     """Tests for AddSuiteForm."""
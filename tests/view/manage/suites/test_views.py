@@ -344,3 +344,128 @@ class EditSuiteTest(case.view.FormViewTestCase,
         res = form.submit(status=200)
 
         res.mustcontain("Another user saved changes to this object")
+
+
+    def test_renders_only_included_cases(self):
+        """Only included cases are rendered; others are loaded via ajax."""
+        self.F.CaseVersionFactory.create(
+            case__product=self.suite.product, name="Other Case")
+        cv = self.F.CaseVersionFactory.create(
+            case__product=self.suite.product, name="Included Case")
+        self.F.SuiteCaseFactory.create(suite=self.suite, case=cv.case)
+
+        res = self.get()
+
+        res.mustcontain("Included Case")
+        self.assertNotIn("Other Case", res.body)
+        res.mustcontain(
+            'data-options-url="{0}"'.format(
+                reverse("manage_suite_case_options")))
+
+
+    def include_case(self, name):
+        """Create a tagged case with given name and include it in suite."""
+        cv = self.F.CaseVersionFactory.create(
+            case__product=self.suite.product, name=name)
+        cv.tags.add(self.F.TagFactory.create())
+        self.F.SuiteCaseFactory.create(suite=self.suite, case=cv.case)
+
+
+    def test_constant_queries(self):
+        """Rendering included cases takes the same queries however many."""
+        self.include_case("Case 0")
+        self.get()
+        queries = self.count_queries(self.get)
+
+        for i in range(1, 4):
+            self.include_case("Case {0}".format(i))
+
+        self.assertEqual(self.count_queries(self.get), queries)
+
+
+
+class SuiteCaseOptionsTest(case.view.AuthenticatedViewTestCase,
+                           case.view.NoCacheTest,
+                           ):
+    """Tests for ajax view returning cases available to a suite."""
+    @property
+    def url(self):
+        """Shortcut for suite-case-options url."""
+        return reverse("manage_suite_case_options")
+
+
+    def setUp(self):
+        """Add manage-suites permission."""
+        super(SuiteCaseOptionsTest, self).setUp()
+        self.add_perm("manage_suites")
+
+
+    def test_requires_manage_suites_permission(self):
+        """Requires manage-suites permission."""
+        res = self.app.get(
+            self.url, user=self.F.UserFactory.create(), status=302)
+
+        self.assertRedirects(res, "/")
+
+
+    def test_product(self):
+        """Returns cases of the given product."""
+        cv = self.F.CaseVersionFactory.create(name="Foo Case")
+        self.F.CaseVersionFactory.create(name="Bar Case")
+
+        res = self.get(params={"product": cv.case.product.id})
+
+        self.assertIn("Foo Case", res.json["html"])
+        self.assertNotIn("Bar Case", res.json["html"])
+        self.assertFalse(res.json["more"])
+
+
+    def test_filter(self):
+        """Cases are filtered with the suite form's case filters."""
+        self.F.CaseVersionFactory.create(name="Foo Case", status="active")
+        self.F.CaseVersionFactory.create(name="Bar Case", status="draft")
+
+        res = self.get(params={"filter-status": "draft"})
+
+        self.assertIn("Bar Case", res.json["html"])
+        self.assertNotIn("Foo Case", res.json["html"])
+
+
+    def test_filter_latest_version(self):
+        """Cases are filtered by their latest version only."""
+        cv = self.F.CaseVersionFactory.create(
+            name="Old Name", productversion__version="1.0")
+        self.F.CaseVersionFactory.create(
+            name="New Name",
+            case=cv.case,
+            productversion__product=cv.productversion.product,
+            productversion__version="2.0")
+
+        res = self.get(params={"filter-name": "Old"})
+
+        self.assertNotIn("New Name", res.json["html"])
+
+
+    def test_paginated(self):
+        """Cases are returned a page at a time."""
+        for i in range(3):
+            self.F.CaseVersionFactory.create(name="Case {0}".format(i))
+
+        res = self.get(params={"pagesize": 2, "pagenumber": 2})
+
+        self.assertIn("Case 2", res.json["html"])
+        self.assertNotIn("Case 1", res.json["html"])
+        self.assertFalse(res.json["more"])
+
+
+    def test_constant_queries(self):
+        """A page of cases takes the same number of queries however long."""
+        self.F.CaseVersionFactory.create().tags.add(self.F.TagFactory.create())
+        self.get()
+        queries = self.count_queries(self.get)
+
+        for i in range(3):
+            self.F.CaseVersionFactory.create().tags.add(
+                self.F.TagFactory.create())
+
+        self.assertEqual(self.count_queries(self.get), queries)
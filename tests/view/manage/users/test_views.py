@@ -269,3 +269,69 @@ class EditUserTest(case.view.FormViewTestCase,
         res = form.submit(status=200)
 
         res.mustcontain("This field is required.")
+
+
+
+class UsersAutocompleteTest(case.view.AuthenticatedViewTestCase,
+                            case.view.NoCacheTest,
+                            ):
+    """Test for users autocomplete view."""
+    @property
+    def url(self):
+        """Shortcut for user-autocomplete url."""
+        return reverse("manage_users_autocomplete")
+
+
+    def setUp(self):
+        """Add manage-users permission to user."""
+        super(UsersAutocompleteTest, self).setUp()
+        self.add_perm("manage_users")
+
+
+    def get(self, query=None):
+        """Shortcut for getting user-autocomplete url authenticated."""
+        url = self.url
+        if query is not None:
+            url = url + "?text=" + query
+        return self.app.get(url, user=self.user)
+
+
+    def test_matching_users_json(self):
+        """Returns list of matching users in JSON."""
+        u = self.F.UserFactory.create(username="FooBar")
+
+        res = self.get("oB")
+
+        self.assertEqual(
+            res.json,
+            {
+                "suggestions": [
+                    {
+                        "id": u.id,
+                        "name": "FooBar",
+                        "postText": "ar",
+                        "preText": "Fo",
+                        "type": "user",
+                        "typedText": "oB",
+                        }
+                    ]
+                }
+            )
+
+
+    def test_no_query(self):
+        """If no query is provided, no users are returned."""
+        res = self.get()
+
+        self.assertEqual(res.json, {"suggestions": []})
+
+
+    def test_requires_manage_users_permission(self):
+        """Requires manage-users permission."""
+        res = self.app.get(
+            self.url + "?text=foo",
+            user=self.F.UserFactory.create(),
+            status=302,
+            )
+
+        self.assertRedirects(res, "/")
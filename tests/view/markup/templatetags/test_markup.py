@@ -1,9 +1,11 @@
 """
-Tests for URL-related template filters.
+Tests for markup-related template filters.
 
 """
 from django.utils.safestring import SafeData
 
+from mock import patch
+
 from tests import case
 
 
@@ -32,3 +34,65 @@ class FilterTest(case.TestCase):
         """Markdown filter escapes HTML."""
         self.assertEqual(
             self.markup.markdown("<script>"), "<p>&lt;script&gt;</p>\n")
+
+
+    def test_markdown_renders_unchanged_text_once(self):
+        """Text that has been rendered before isn't rendered again."""
+        target = "moztrap.view.markup.templatetags.markup.markdown2.markdown"
+        with patch(target) as mock_markdown:
+            mock_markdown.return_value = "<p>rendered</p>\n"
+            first = self.markup.markdown("_rendered once_")
+            second = self.markup.markdown("_rendered once_")
+
+        self.assertEqual(first, "<p>rendered</p>\n")
+        self.assertEqual(second, "<p>rendered</p>\n")
+        self.assertEqual(mock_markdown.call_count, 1)
+
+
+    def test_markdown_uses_shared_cache(self):
+        """Text rendered in another process is taken from the shared cache."""
+        self.markup.markdown("_shared_")
+        self.markup.rendered.clear()
+
+        target = "moztrap.view.markup.templatetags.markup.markdown2.markdown"
+        with patch(target) as mock_markdown:
+            html = self.markup.markdown("_shared_")
+
+        self.assertEqual(html, "<p><em>shared</em></p>\n")
+        self.assertEqual(mock_markdown.call_count, 0)
+
+
+
+class LRUCacheTest(case.TestCase):
+    """Tests for LRUCache."""
+    def cache(self, size):
+        """Return an LRUCache of the given size."""
+        from moztrap.view.markup.templatetags.markup import LRUCache
+        return LRUCache(size)
+
+
+    def test_get(self):
+        """Returns the value set for a key."""
+        c = self.cache(2)
+        c.set("a", 1)
+
+        self.assertEqual(c.get("a"), 1)
+
+
+    def test_get_default(self):
+        """Returns the default for a missing key."""
+        self.assertEqual(self.cache(2).get("a", 3), 3)
+
+
+    def test_evicts_least_recently_used(self):
+        """Holds at most ``size`` items, evicting the least recently used."""
+        c = self.cache(2)
+        c.set("a", 1)
+        c.set("b", 2)
+        c.get("a")
+        c.set("c", 3)
+
+        self.assertEqual(len(c), 2)
+        self.assertEqual(c.get("a"), 1)
+        self.assertEqual(c.get("b"), None)
+        self.assertEqual(c.get("c"), 3)
@@ -0,0 +1,196 @@
+"""
+Tests for results comparison views.
+
+"""
+from django.core.urlresolvers import reverse
+
+from mock import patch
+
+from tests import case
+
+
+
+class CompareRunsTest(case.view.AuthenticatedViewTestCase):
+    """Tests for the view comparing two runs."""
+    def setUp(self):
+        """Create two runs of a case in an environment."""
+        super(CompareRunsTest, self).setUp()
+        self.env = self.F.EnvironmentFactory.create_full_set(
+            {"OS": ["Linux"], "Browser": ["Firefox"]})[0]
+        self.pv = self.F.ProductVersionFactory.create(environments=[self.env])
+        self.before = self.F.RunFactory.create(
+            name="Week 1", productversion=self.pv)
+        self.after = self.F.RunFactory.create(
+            name="Week 2", productversion=self.pv)
+        self.cv = self.F.CaseVersionFactory.create(
+            productversion=self.pv, name="Foo")
+
+
+    @property
+    def url(self):
+        """Shortcut for run comparison url."""
+        return reverse("results_compare_runs")
+
+
+    def get(self, status=200, **params):
+        """Get the comparison of our runs, with extra querystring params."""
+        params.setdefault("before", self.before.id)
+        params.setdefault("after", self.after.id)
+        return super(CompareRunsTest, self).get(params=params, status=status)
+
+
+    def result(self, run, status, caseversion=None):
+        """Create a result with ``status`` of a case in ``run``."""
+        rcv = self.F.RunCaseVersionFactory.create(
+            run=run,
+            caseversion=caseversion or self.cv,
+            environments=[self.env],
+            )
+        return self.F.ResultFactory.create(
+            runcaseversion=rcv, environment=self.env, status=status)
+
+
+    def test_summary(self):
+        """Page shows the count of cells of each transition."""
+        self.result(self.before, "passed")
+        self.result(self.after, "failed")
+
+        res = self.get()
+
+        res.mustcontain("Week 1", "Week 2")
+        self.assertEqual(
+            res.html.find("li", "newfail").find("a").contents[0].strip(), "1")
+        self.assertEqual(
+            res.html.find("li", "fixed").find("a").contents[0].strip(), "0")
+
+
+    def test_cells(self):
+        """Cells of the selected transition are listed by name."""
+        other = self.F.CaseVersionFactory.create(
+            productversion=self.pv, name="Bar")
+        self.result(self.before, "passed")
+        self.result(self.after, "failed")
+        self.result(self.before, "failed", other)
+        self.result(self.after, "passed", other)
+
+        res = self.get()
+
+        self.assertElement(res.html, "td", "case", count=1)
+        self.assertEqual(res.html.find("td", "case").string, "Foo")
+        self.assertEqual(
+            res.html.find("td", "environment").string, "Firefox, Linux")
+
+        res = self.get(transition="fixed")
+
+        self.assertEqual(res.html.find("td", "case").string, "Bar")
+
+
+    def test_cells_limited(self):
+        """Only so many cells are listed; the rest are counted."""
+        self.result(self.after, "failed")
+        self.result(
+            self.after,
+            "failed",
+            self.F.CaseVersionFactory.create(productversion=self.pv),
+            )
+
+        with patch("moztrap.view.results.compare.views.CELLS_SHOWN", 1):
+            res = self.get()
+
+        self.assertElement(res.html, "td", "case", count=1)
+        res.mustcontain("and 1 more")
+
+
+    def test_json(self):
+        """With format=json, returns the comparison as JSON."""
+        self.result(self.before, "passed")
+        self.result(self.after, "failed")
+
+        res = self.get(format="json")
+
+        self.assertEqual(res.json["before"]["name"], "Week 1")
+        self.assertEqual(res.json["after"]["id"], self.after.id)
+        self.assertEqual(res.json["summary"]["newfail"], 1)
+        self.assertEqual(
+            res.json["cells"],
+            [
+                {
+                    "case": self.cv.case.id,
+                    "environment": self.env.id,
+                    "before": "passed",
+                    "after": "failed",
+                    "transition": "newfail",
+                    },
+                ],
+            )
+
+
+    def test_json_transition(self):
+        """The JSON cells can be limited to one transition."""
+        self.result(self.before, "passed")
+        self.result(self.after, "failed")
+
+        res = self.get(format="json", transition="fixed")
+
+        self.assertEqual(res.json["cells"], [])
+        self.assertEqual(res.json["summary"]["newfail"], 1)
+
+
+    def test_bad_transition(self):
+        """An unknown transition is a 404."""
+        self.get(transition="foo", status=404)
+
+
+    def test_bad_id(self):
+        """A missing or non-numeric run id is a 404."""
+        self.app.get(
+            self.url, params={"before": "foo"}, user=self.user, status=404)
+
+
+    def test_no_such_run(self):
+        """A nonexistent run is a 404."""
+        self.app.get(
+            self.url,
+            params={"before": self.before.id, "after": self.after.id + 1},
+            user=self.user,
+            status=404,
+            )
+
+
+
+class CompareProductVersionsTest(case.view.AuthenticatedViewTestCase):
+    """Tests for the view comparing two productversions."""
+    @property
+    def url(self):
+        """Shortcut for productversion comparison url."""
+        return reverse("results_compare_productversions")
+
+
+    def test_json(self):
+        """Compares the latest results of each productversion's runs."""
+        env = self.F.EnvironmentFactory.create()
+        before = self.F.ProductVersionFactory.create(environments=[env])
+        after = self.F.ProductVersionFactory.create(
+            product=before.product, version="2", environments=[env])
+        c = self.F.CaseFactory.create(product=before.product)
+        for pv, status in [(before, "failed"), (after, "passed")]:
+            rcv = self.F.RunCaseVersionFactory.create(
+                run__productversion=pv,
+                caseversion__productversion=pv,
+                caseversion__case=c,
+                environments=[env],
+                )
+            self.F.ResultFactory.create(
+                runcaseversion=rcv, environment=env, status=status)
+
+        res = self.app.get(
+            self.url,
+            params={"before": before.id, "after": after.id, "format": "json"},
+            user=self.user,
+            )
+
+        self.assertEqual(res.json["before"]["name"], unicode(before))
+        self.assertEqual(
+            [(cell["case"], cell["transition"]) for cell in res.json["cells"]],
+            [(c.id, "fixed")],
+            )
@@ -0,0 +1,100 @@
+"""
+Tests for flaky cases results view.
+
+"""
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+
+from mock import patch
+
+from tests import case
+
+
+
+class FlakyCasesTest(case.view.AuthenticatedViewTestCase):
+    """Tests for the flaky cases view."""
+    def setUp(self):
+        """Create a product version, with an environment."""
+        super(FlakyCasesTest, self).setUp()
+        # product ids are reused between tests, so rankings may be cached
+        cache.clear()
+        self.env = self.F.EnvironmentFactory.create()
+        self.pv = self.F.ProductVersionFactory.create(
+            product__name="Firefox", environments=[self.env])
+
+
+    @property
+    def url(self):
+        """Shortcut for flaky cases url."""
+        return reverse("results_flaky")
+
+
+    def get(self, status=200, **params):
+        """Get flaky cases of our product, with extra querystring params."""
+        params.setdefault("product", self.pv.product.id)
+        return super(FlakyCasesTest, self).get(params=params, status=status)
+
+
+    def flaky(self, name):
+        """Create a case ``name`` that failed and then passed."""
+        cv = self.F.CaseVersionFactory.create(
+            productversion=self.pv, name=name)
+        for status in ["failed", "passed"]:
+            rcv = self.F.RunCaseVersionFactory.create(
+                run__productversion=self.pv,
+                caseversion=cv,
+                environments=[self.env],
+                )
+            self.F.ResultFactory.create(
+                runcaseversion=rcv, environment=self.env, status=status)
+        return cv
+
+
+    def test_ranking(self):
+        """Lists flaky cases by name, with their rates."""
+        self.flaky("Foo")
+
+        res = self.get()
+
+        res.mustcontain("Firefox")
+        self.assertEqual(res.html.find("td", "case").string, "Foo")
+        self.assertEqual(res.html.find("td", "flip-rate").string, "100%")
+        self.assertEqual(res.html.find("td", "failure-rate").string, "50%")
+
+
+    def test_empty(self):
+        res = self.get()
+
+        self.assertElement(res.html, "p", "empty")
+
+
+    def test_limited(self):
+        """Only so many cases are listed; the rest are counted."""
+        self.flaky("Foo")
+        self.flaky("Bar")
+
+        with patch("moztrap.view.results.flaky.views.CASES_SHOWN", 1):
+            res = self.get()
+
+        self.assertElement(res.html, "td", "case", count=1)
+        res.mustcontain("and 1 more")
+
+
+    def test_json(self):
+        """With format=json, returns the whole ranking as JSON."""
+        cv = self.flaky("Foo")
+
+        res = self.get(format="json")
+
+        self.assertEqual(
+            res.json["product"], {"id": self.pv.product.id, "name": "Firefox"})
+        self.assertEqual(
+            [(c["case"], c["flips"]) for c in res.json["cases"]],
+            [(cv.case.id, 1)],
+            )
+
+
+    def test_bad_product(self):
+        """A missing or nonexistent product is a 404."""
+        self.get(product="foo", status=404)
+        self.get(product=self.pv.product.id + 1, status=404)
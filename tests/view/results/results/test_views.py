@@ -2,6 +2,8 @@
 Tests for results-list view.
 
 """
+import datetime
+
 from django.core.urlresolvers import reverse
 
 from tests import case
@@ -128,3 +130,55 @@ class ResultsViewTest(case.view.ListViewTestCase,
             )
 
         self.assertOrderInList(res, "Tester 2", "Tester 1")
+
+
+    def archived(self, **kwargs):
+        """Create and archive a superseded result of this test case's rcv."""
+        from moztrap.model.execution.archive import archive
+        old = self.factory(**kwargs)
+        self.factory(
+            tester=old.tester, environment=old.environment, status="passed")
+        archive(datetime.datetime.max)
+        return old
+
+
+    def test_archived_link(self):
+        """Links to archived results, if there are any."""
+        self.archived()
+
+        res = self.get()
+
+        self.assertElement(
+            res.html, "a", href="{0}?archived=1&pagenumber=1".format(self.url))
+        res.mustcontain("show 1 archived result<")
+
+
+    def test_no_archived_link(self):
+        """No link to archived results if there are none."""
+        self.factory()
+
+        res = self.get()
+
+        self.assertElement(res.html, "p", "archived-results", count=0)
+
+
+    def test_archived(self):
+        """Lists archived results, which can be filtered and sorted."""
+        self.archived(tester__username="Tester 1", status="failed")
+        self.archived(tester__username="Tester 2", status="failed")
+        self.archived(tester__username="Tester 3", status="started")
+
+        res = self.get(
+            params={
+                "archived": "1",
+                "filter-status": "failed",
+                "sortfield": "tester__username",
+                "sortdirection": "desc",
+                }
+            )
+
+        self.assertOrderInList(res, "Tester 2", "Tester 1")
+        self.assertNotInList(res, "Tester 3")
+        res.mustcontain("Showing archived results.")
+        self.assertEqual(
+            res.forms["filterform"].fields["archived"][0].value, "1")
@@ -83,3 +83,28 @@ class RunDetailTest(case.view.AuthenticatedViewTestCase):
             "{0}?filter-run={1}".format(
                 reverse("results_runcaseversions"), self.testrun.id)
             )
+
+
+    def test_details_compare(self):
+        """Details has a form comparing with other runs of the product."""
+        other = self.F.RunFactory.create(
+            productversion__product=self.testrun.productversion.product)
+        self.F.RunFactory.create()
+
+        form = self.get().forms[0]
+        self.assertEqual(form.action, reverse("results_compare_runs"))
+        self.assertEqual(form["after"].value, str(self.testrun.id))
+        self.assertEqual(
+            [o[0] for o in form["before"].options], [str(other.id)])
+
+
+    def test_details_flaky(self):
+        """Details contains link to flaky cases of the run's product."""
+        res = self.get(headers={"X-Requested-With": "XMLHttpRequest"})
+
+        res.mustcontain(
+            "{0}?product={1}".format(
+                reverse("results_flaky"),
+                self.testrun.productversion.product.id,
+                )
+            )
@@ -76,29 +76,17 @@ class ResultForTest(case.DBTestCase):
         self.assertEqual(self.model.Result.objects.count(), 2)
 
 
-    def test_dupe_latest_results_sets_non_latest_to_false(self):
-        """If dupe latest results exists, keep the last-modified."""
-
-        with mock.patch("moztrap.model.mtmodel.utcnow") as mock_utcnow:
-            mock_utcnow.return_value = datetime.datetime(2012, 3, 24)
-            res1 = self.F.ResultFactory(
-                status="passed",
+    def test_latest_result(self):
+        """The latest result is found, even if an older one was modified."""
+        res1 = self.F.ResultFactory(status="passed")
+        res2 = self.F.ResultFactory(
+            tester=res1.tester,
+            runcaseversion=res1.runcaseversion,
+            environment=res1.environment,
+            status="passed",
             )
-            mock_utcnow.return_value = datetime.datetime(2012, 3, 25)
-            res2 = self.F.ResultFactory(
-                tester=res1.tester,
-                runcaseversion=res1.runcaseversion,
-                environment=res1.environment,
-                status="passed",
-                )
-
-            # manually set a non-latest result to is_latest=True
-            # since res1 has already been saved, and has a pk assigned,
-            # it will not try to set all the other results to NOT latest.
-            mock_utcnow.return_value = datetime.datetime(2012, 3, 24)
-            self.model.Result.objects.filter(pk=res1.pk).update(
-                is_latest=True,
-                )
+        res1.comment = "edited"
+        res1.save()
 
         self.assertEqual(self.result_for(
                 res1.runcaseversion,
@@ -106,9 +94,6 @@ class ResultForTest(case.DBTestCase):
                 res1.environment,
                 "{{ result.id }}",
                 ), str(res2.id))
-        self.assertEqual(self.model.Result.objects.count(), 2)
-        self.assertEqual(
-            self.model.Result.objects.get(is_latest=True).pk, res2.pk)
 
 
     def test_result_does_not_exist(self):
@@ -128,6 +113,65 @@ class ResultForTest(case.DBTestCase):
             )
 
 
+    def annotated(self, rcv, user, env):
+        """Return ``rcv`` annotated with ``user``'s latest result in ``env``."""
+        from moztrap.view.runtests.views import with_latest_result
+        return with_latest_result(
+            self.model.RunCaseVersion.objects.filter(pk=rcv.pk), user, env,
+            ).get()
+
+
+    def test_annotated_result_exists(self):
+        """An annotated runcaseversion's result is had without a query."""
+        r = self.F.ResultFactory(status="failed", comment="broken")
+        rcv = self.annotated(r.runcaseversion, r.tester, r.environment)
+
+        with self.assertNumQueries(0):
+            rendered = self.result_for(
+                rcv,
+                r.tester,
+                r.environment,
+                "{{ result.id }} {{ result.status }} {{ result.comment }}",
+                )
+
+        self.assertEqual(rendered, "{0} failed broken".format(r.id))
+
+
+    def test_annotated_result_does_not_exist(self):
+        """An annotated runcaseversion with no result gets an unsaved one."""
+        rcv = self.F.RunCaseVersionFactory.create()
+        env = self.F.EnvironmentFactory.create()
+        user = self.F.UserFactory.create()
+        self.F.ResultFactory(runcaseversion=rcv, environment=env)
+        rcv = self.annotated(rcv, user, env)
+
+        with self.assertNumQueries(0):
+            rendered = self.result_for(
+                rcv, user, env, "{{ result.id }} {{ result.status }}")
+
+        self.assertEqual(rendered, "None assigned")
+
+
+    def test_annotated_finds_latest(self):
+        """The annotation is of the latest result, not the last-modified."""
+        r = self.F.ResultFactory(status="passed")
+        r2 = self.F.ResultFactory(
+            tester=r.tester,
+            runcaseversion=r.runcaseversion,
+            environment=r.environment,
+            status="failed",
+            )
+        r.comment = "edited"
+        r.save()
+        rcv = self.annotated(r.runcaseversion, r.tester, r.environment)
+
+        self.assertEqual(
+            self.result_for(
+                rcv, r.tester, r.environment, "{{ result.id }}"),
+            str(r2.id),
+            )
+
+
 
 class StepResultForTest(case.DBTestCase):
     """Tests for the step_result_for template tag."""
@@ -3,6 +3,7 @@ Tests for runtests views.
 
 """
 from datetime import datetime
+import json
 
 from django.core.urlresolvers import reverse
 
@@ -248,6 +249,43 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         return self.F.ResultFactory.create(**defaults)
 
 
+    def details_form(self, rcv, form_id, action=None):
+        """
+        Get form ``form_id`` from details of ``rcv``.
+
+        The form posts to the runtests page (at ``action``, by default this
+        test's url), as it does when the details are ajax-loaded into it.
+
+        """
+        form = self.app.get(
+            reverse(
+                "runtests_details",
+                kwargs={
+                    "run_id": self.testrun.id,
+                    "env_id": self.envs[0].id,
+                    "rcv_id": rcv.id,
+                    },
+                ),
+            user=self.user,
+            ).forms[form_id]
+        form.action = action or self.url
+        return form
+
+
+    def post(self, params, ajax=False, **kwargs):
+        """POST list of ``params`` pairs to the runtests page."""
+        token = self.get().forms["runtests-environment-form"][
+            "csrfmiddlewaretoken"].value
+        if ajax:
+            kwargs["headers"] = {"X-Requested-With": "XMLHttpRequest"}
+        return self.app.post(
+            self.url,
+            [("csrfmiddlewaretoken", token)] + list(params),
+            user=self.user,
+            **kwargs
+            )
+
+
     def test_ajax_get(self):
         """Getting page via ajax returns just itemlist."""
         res = self.get(ajax=True, status=200)
@@ -266,33 +304,6 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         self.assertRedirects(res, "/")
 
 
-    def test_markdown_safe(self):
-        """Raw HTML and markdown attributes are escaped."""
-        rcv = self.create_rcv(caseversion__description="<script>")
-        self.F.CaseStepFactory.create(
-            caseversion=rcv.caseversion,
-            instruction="<script>alert(foo);</script>",
-            expected="{@onclick=alert(1)}paragraph",
-            )
-
-        res = self.get()
-
-        self.assertEqual(
-            unicode(res.html.find("div", "description").find("p")),
-            "<p>&lt;script&gt;</p>"
-            )
-
-        step = res.html.find("li", {"data-step-number": "1"})
-        self.assertEqual(
-            unicode(step.find("div", "instruction").find("p")),
-            "<p>&lt;script&gt;alert(foo);&lt;/script&gt;</p>"
-            )
-        self.assertEqual(
-            unicode(step.find("div", "outcome").find("p")),
-            "<p>{@onclick=alert(1)}paragraph</p>",
-            )
-
-
     def test_bad_run_id_404(self):
         """Bad run id returns 404."""
         url = reverse("runtests_environment", kwargs={"run_id": 9999})
@@ -378,6 +389,79 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         res.mustcontain("Foo Case")
 
 
+    def test_index_status(self):
+        """Lists the status of the user's latest result in this env."""
+        rcv = self.create_rcv(caseversion__name="Foo Case")
+        self.create_result(runcaseversion=rcv, status="passed")
+        self.create_result(
+            runcaseversion=rcv, status="failed", comment="it broke")
+        self.create_result(
+            runcaseversion=rcv, status="invalidated", environment=self.envs[1])
+        self.create_result(
+            runcaseversion=rcv,
+            status="invalidated",
+            tester=self.F.UserFactory.create(),
+            )
+
+        res = self.get(status=200)
+
+        item = res.html.find("article", id="test-id-{0}".format(rcv.id))
+        self.assertEqual(item.find("span", "result").string.strip(), "failed")
+        self.assertEqual(item.find("p", "failed-note").string, "it broke")
+
+
+    def test_index_status_pending(self):
+        """A case the user has no result for is pending."""
+        rcv = self.create_rcv()
+
+        res = self.get(status=200)
+
+        item = res.html.find("article", id="test-id-{0}".format(rcv.id))
+        self.assertEqual(item.find("span", "result").string.strip(), "pending")
+
+
+    def test_index_details_loaded_on_demand(self):
+        """Lists link to details for each case, rather than the details."""
+        rcv = self.create_rcv()
+        self.F.CaseStepFactory.create(caseversion=rcv.caseversion)
+
+        res = self.get(status=200)
+
+        self.assertElement(
+            res.html,
+            "a",
+            attrs={
+                "href": reverse(
+                    "runtests_details",
+                    kwargs={
+                        "run_id": self.testrun.id,
+                        "env_id": self.envs[0].id,
+                        "rcv_id": rcv.id,
+                        },
+                    )
+                },
+            )
+        self.assertElement(res.html, "ol", "steps", count=0)
+
+
+    def test_index_constant_queries(self):
+        """The index takes the same queries however many cases it lists."""
+        def add():
+            rcv = self.create_rcv()
+            self.F.CaseStepFactory.create(caseversion=rcv.caseversion)
+            self.create_result(runcaseversion=rcv, status="failed")
+
+        add()
+        self.get()
+        queries = self.count_queries(self.get)
+
+        for i in range(3):
+            add()
+        self.get()
+
+        self.assertEqual(self.count_queries(self.get), queries)
+
+
     def test_runcaseversions_env_narrowed(self):
         """Lists only correct env runcaseversions."""
         self.create_rcv(
@@ -397,9 +481,11 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         """Redirect after non-Ajax post preserves sort params."""
         rcv = self.create_rcv()
 
-        form = self.get(
-            params={"sortfield": "name"}, status=200).forms[
-            "test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(
+            rcv,
+            "test-status-form-{0}".format(rcv.id),
+            action=self.url + "?sortfield=name",
+            )
 
         res = form.submit(name="action-result_pass", index=0, status=302)
 
@@ -414,7 +500,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
             caseversion__description="_Valmorphanize_",
             )
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         res = form.submit(
             name="action-result_pass",
@@ -425,11 +511,29 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
 
         res.mustcontain("<em>Valmorphanize</em>")
 
+
+    def test_post_ajax_includes_details(self):
+        """Ajax post returns the case with its details already loaded."""
+        rcv = self.create_rcv()
+        self.F.CaseStepFactory.create(caseversion=rcv.caseversion)
+
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
+
+        res = form.submit(
+            name="action-result_pass",
+            index=0,
+            headers={"X-Requested-With": "XMLHttpRequest"},
+            status=200
+            )
+
+        self.assertElement(res.json["html"], "ol", "steps")
+
+
     def test_post_no_action_redirect(self):
         """POST with no action does nothing and redirects."""
         rcv = self.create_rcv()
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         res = form.submit(status=302)
 
@@ -440,7 +544,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         """Ajax POST with no action does nothing and returns no HTML."""
         rcv = self.create_rcv()
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         res = form.submit(
             headers={"X-Requested-With": "XMLHttpRequest"}, status=200)
@@ -454,7 +558,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         """POST with bad action does nothing but message and redirects."""
         rcv = self.create_rcv()
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         # we patched the actions dictionary so "result_pass" will not be valid
         res = form.submit(name="action-result_pass", index=0, status=302)
@@ -469,7 +573,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         """Ajax POST with bad action sets message and returns no HTML."""
         rcv = self.create_rcv()
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         # we patched the actions dictionary so "result_pass" will not be valid
         res = form.submit(
@@ -486,7 +590,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         """POST with bad rcv id does nothing but message and redirects."""
         rcv = self.create_rcv()
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         rcv.delete()
 
@@ -501,7 +605,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         """Ajax POST with bad rcv id sets message and returns no HTML."""
         rcv = self.create_rcv()
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         rcv.delete()
 
@@ -522,7 +626,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = self.create_result(status="started")
         rcv = result.runcaseversion
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         result.delete()
 
@@ -540,7 +644,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = self.create_result(status="started")
         rcv = result.runcaseversion
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         result.delete()
 
@@ -557,7 +661,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = self.create_result(status="started")
         rcv = result.runcaseversion
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         res = form.submit(name="action-result_pass", index=0, status=302)
 
@@ -566,7 +670,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = rcv.results.get(
             tester=self.user,
             environment=self.envs[0],
-            is_latest=True)
+            latest__isnull=False)
 
         self.assertEqual(result.status, result.STATUS.passed)
 
@@ -576,7 +680,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = self.create_result(status="started")
         rcv = result.runcaseversion
 
-        form = self.get(status=200).forms["test-status-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-status-form-{0}".format(rcv.id))
 
         res = form.submit(
             name="action-result_pass",
@@ -594,8 +698,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = self.create_result(status="started")
         rcv = result.runcaseversion
 
-        form = self.get(status=200).forms[
-            "test-invalid-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-invalid-form-{0}".format(rcv.id))
 
         form["comment"] = "it ain't valid"
 
@@ -607,7 +710,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = rcv.results.get(
             tester=self.user,
             environment=self.envs[0],
-            is_latest=True)
+            latest__isnull=False)
 
         self.assertEqual(result.status, result.STATUS.invalidated)
         self.assertEqual(result.comment, "it ain't valid")
@@ -618,8 +721,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = self.create_result(status="started")
         rcv = result.runcaseversion
 
-        form = self.get(status=200).forms[
-            "test-invalid-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-invalid-form-{0}".format(rcv.id))
 
         form["comment"] = "it ain't valid"
 
@@ -640,8 +742,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         rcv = self.create_rcv(caseversion=step.caseversion)
         self.create_result(status="started", runcaseversion=rcv)
 
-        form = self.get(status=200).forms[
-            "test-fail-form-{0}-1".format(rcv.id)]
+        form = self.details_form(rcv, "test-fail-form-{0}-1".format(rcv.id))
 
         form["comment"] = "it didn't pass"
 
@@ -653,7 +754,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = rcv.results.get(
             tester=self.user,
             environment=self.envs[0],
-            is_latest=True)
+            latest__isnull=False)
 
         self.assertEqual(result.status, result.STATUS.failed)
         self.assertEqual(result.comment, "it didn't pass")
@@ -665,8 +766,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         rcv = self.create_rcv(caseversion=step.caseversion)
         self.create_result(status="started", runcaseversion=rcv)
 
-        form = self.get(status=200).forms[
-            "test-fail-form-{0}-1".format(rcv.id)]
+        form = self.details_form(rcv, "test-fail-form-{0}-1".format(rcv.id))
 
         form["comment"] = "it didn't pass"
 
@@ -695,7 +795,7 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
         result = rcv.results.get(
             tester=self.user,
             environment=self.envs[0],
-            is_latest=True,
+            latest__isnull=False,
             )
 
         self.assertEqual(result.status, result.STATUS.started)
@@ -719,13 +819,142 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
             res.json["html"], "button", attrs={"name": "action-result_pass"})
 
 
+    def test_batch(self):
+        """Many actions, with per-case parameters, can be posted at once."""
+        rcvs = [self.create_rcv() for i in range(4)]
+        step = self.F.CaseStepFactory.create(
+            caseversion=rcvs[3].caseversion, number=1)
+
+        res = self.post(
+            [
+                ("action-result_pass", rcvs[0].id),
+                ("action-result_pass", rcvs[1].id),
+                ("action-result_invalid", rcvs[2].id),
+                ("comment-{0}".format(rcvs[2].id), "unclear"),
+                ("action-result_fail", rcvs[3].id),
+                ("comment-{0}".format(rcvs[3].id), "broken"),
+                ("stepnumber-{0}".format(rcvs[3].id), "1"),
+                ],
+            status=302,
+            )
+
+        self.assertRedirects(res, self.url)
+        results = [
+            rcv.results.get(
+                tester=self.user,
+                environment=self.envs[0],
+                latest__isnull=False,
+                )
+            for rcv in rcvs
+            ]
+        self.assertEqual(
+            [(r.status, r.comment) for r in results],
+            [
+                ("passed", ""),
+                ("passed", ""),
+                ("invalidated", "unclear"),
+                ("failed", "broken"),
+                ],
+            )
+        self.assertEqual(results[3].stepresults.get().step, step)
+
+
+    def test_batch_comments_separate(self):
+        """Unsuffixed parameters don't apply to every case of a batch."""
+        rcvs = [self.create_rcv() for i in range(2)]
+
+        self.post(
+            [
+                ("action-result_fail", rcvs[0].id),
+                ("action-result_fail", rcvs[1].id),
+                ("comment-{0}".format(rcvs[0].id), "broken"),
+                ("comment", "unsuffixed"),
+                ],
+            status=302,
+            )
+
+        self.assertEqual(
+            [
+                rcv.results.get(
+                    tester=self.user,
+                    environment=self.envs[0],
+                    latest__isnull=False,
+                    ).comment
+                for rcv in rcvs
+                ],
+            ["broken", ""],
+            )
+
+
+    def test_batch_ajax(self):
+        """Ajax batch post returns re-rendered HTML of each case."""
+        rcvs = [self.create_rcv() for i in range(2)]
+
+        res = self.post(
+            [("action-result_pass", rcv.id) for rcv in rcvs],
+            ajax=True,
+            status=200,
+            )
+
+        self.assertEqual(
+            sorted(res.json["items"]), sorted(str(rcv.id) for rcv in rcvs))
+        for rcv in rcvs:
+            self.assertElement(
+                res.json["items"][str(rcv.id)],
+                "article",
+                "listitem passed",
+                id="test-id-{0}".format(rcv.id),
+                )
+        self.assertTrue(res.json["no_replace"])
+
+
+    def test_batch_bad_rcv_id_applies_none(self):
+        """If any case in a batch is invalid, no action is applied."""
+        rcv = self.create_rcv()
+
+        res = self.post(
+            [("action-result_pass", rcv.id), ("action-result_pass", 9999)],
+            status=302,
+            ).follow()
+
+        res.mustcontain("9999 is not a valid run/caseversion ID.")
+        self.assertEqual(rcv.results.count(), 0)
+
+
+    def test_batch_repeated_rcv_applies_none(self):
+        """A case can have only one action in a batch."""
+        rcv = self.create_rcv()
+
+        res = self.post(
+            [("action-start", rcv.id), ("action-result_pass", rcv.id)],
+            status=302,
+            ).follow()
+
+        res.mustcontain(
+            "{0} can only have one action at a time.".format(rcv.id))
+        self.assertEqual(rcv.results.count(), 0)
+
+
+    def test_batch_constant_queries(self):
+        """A batch takes the same queries however many cases are in it."""
+        def post(n):
+            return self.post(
+                [("action-result_pass", self.create_rcv().id)
+                 for i in range(n)],
+                status=302,
+                )
+
+        queries = self.count_queries(post, 1)
+
+        self.assertEqual(self.count_queries(post, 4), queries)
+
+
     def test_parameter_defaults(self):
         """Action parameters have defaults and are not required."""
         result = self.create_result(status="started")
         rcv = result.runcaseversion
 
-        form = self.get(status=200).forms[
-            "test-invalid-form-{0}".format(rcv.id)]
+        form = self.details_form(rcv, "test-invalid-form-{0}".format(rcv.id))
 
         # prevents any comment parameter from being submitted
         del form.fields["comment"]
@@ -734,7 +963,383 @@ class RunTestsTest(case.view.AuthenticatedViewTestCase,
 
         self.assertRedirects(res, self.url)
 
-        result = rcv.results.get(is_latest=True)
+        result = rcv.results.get(latest__isnull=False)
 
         self.assertEqual(result.status, result.STATUS.invalidated)
         self.assertEqual(result.comment, "")
+
+
+
+class RunTestsDetailsTest(case.view.AuthenticatedViewTestCase,
+                          case.view.NoCacheTest,
+                          ):
+    """Tests for runtests details view."""
+    def setUp(self):
+        """These tests all require a test run, case and env; execute perm."""
+        super(RunTestsDetailsTest, self).setUp()
+        self.testrun = self.F.RunFactory.create(status="active")
+        self.env = self.F.EnvironmentFactory.create()
+        self.testrun.environments.add(self.env)
+        self.rcv = self.F.RunCaseVersionFactory.create(
+            run=self.testrun,
+            caseversion__productversion=self.testrun.productversion,
+            caseversion__case__product=self.testrun.productversion.product,
+            environments=[self.env],
+            )
+        self.add_perm("execute")
+
+
+    def details_url(self, rcv):
+        """Return details url for ``rcv``."""
+        return reverse(
+            "runtests_details",
+            kwargs={
+                "run_id": self.testrun.id,
+                "env_id": self.env.id,
+                "rcv_id": rcv.id,
+                },
+            )
+
+
+    @property
+    def url(self):
+        """Shortcut for runtests_details url."""
+        return self.details_url(self.rcv)
+
+
+    def get(self, rcv=None, **kwargs):
+        """Get details of ``rcv`` (default this test's)."""
+        kwargs.setdefault("user", self.user)
+        return self.app.get(self.details_url(rcv or self.rcv), **kwargs)
+
+
+    def test_requires_execute_permission(self):
+        """Requires execute permission."""
+        res = self.app.get(
+            self.url, user=self.F.UserFactory.create(), status=302)
+
+        self.assertRedirects(res, "/")
+
+
+    def test_steps(self):
+        """Returns the case's steps, with result forms."""
+        self.F.CaseStepFactory.create(
+            caseversion=self.rcv.caseversion, instruction="Do it")
+        self.F.ResultFactory.create(
+            runcaseversion=self.rcv,
+            tester=self.user,
+            environment=self.env,
+            status="started",
+            )
+
+        res = self.get(status=200)
+
+        res.mustcontain("Do it")
+        self.assertIn(
+            "test-fail-form-{0}-1".format(self.rcv.id), res.forms)
+
+
+    def test_tags_and_suites(self):
+        """Returns the case's tags and the run's suites containing it."""
+        self.rcv.caseversion.tags.add(self.F.TagFactory.create(name="foo"))
+        self.rcv.suites.add(self.F.SuiteFactory.create(name="bar"))
+
+        res = self.get(status=200)
+
+        self.assertElement(res.html, "a", "filter-link tag")
+        self.assertElement(res.html, "a", "filter-link suite")
+
+
+    def test_ajax(self):
+        """Ajax get returns the details snippet as JSON."""
+        res = self.get(
+            headers={"X-Requested-With": "XMLHttpRequest"}, status=200)
+
+        self.assertElement(res.json["html"], "ol", "steps")
+
+
+    def test_rcv_from_other_run_404(self):
+        """Details of a runcaseversion from another run is 404."""
+        rcv = self.F.RunCaseVersionFactory.create()
+
+        self.get(rcv, status=404)
+
+
+    def test_bad_environment_404(self):
+        """Details in an environment not of the run is 404."""
+        url = reverse(
+            "runtests_details",
+            kwargs={
+                "run_id": self.testrun.id,
+                "env_id": self.F.EnvironmentFactory.create().id,
+                "rcv_id": self.rcv.id,
+                },
+            )
+
+        self.app.get(url, user=self.user, status=404)
+
+
+    def test_markdown_safe(self):
+        """Raw HTML and markdown attributes are escaped."""
+        self.rcv.caseversion.description = "<script>"
+        self.rcv.caseversion.save()
+        self.F.CaseStepFactory.create(
+            caseversion=self.rcv.caseversion,
+            instruction="<script>alert(foo);</script>",
+            expected="{@onclick=alert(1)}paragraph",
+            )
+
+        res = self.get()
+
+        self.assertEqual(
+            unicode(res.html.find("div", "description").find("p")),
+            "<p>&lt;script&gt;</p>"
+            )
+
+        step = res.html.find("li", {"data-step-number": "1"})
+        self.assertEqual(
+            unicode(step.find("div", "instruction").find("p")),
+            "<p>&lt;script&gt;alert(foo);&lt;/script&gt;</p>"
+            )
+        self.assertEqual(
+            unicode(step.find("div", "outcome").find("p")),
+            "<p>{@onclick=alert(1)}paragraph</p>",
+            )
+
+
+
+class PackageTest(case.view.AuthenticatedViewTestCase,
+                  case.view.NoCacheTest,
+                  ):
+    """Tests for run package download view."""
+    def setUp(self):
+        """These tests all require an active run, an env and execute perm."""
+        super(PackageTest, self).setUp()
+        self.testrun = self.F.RunFactory.create(
+            status="active", name="FF 10")
+        self.env = self.F.EnvironmentFactory.create()
+        self.testrun.environments.add(self.env)
+        self.add_perm("execute")
+
+
+    @property
+    def url(self):
+        """Shortcut for runtests_package url."""
+        return reverse(
+            "runtests_package",
+            kwargs={"run_id": self.testrun.id, "env_id": self.env.id})
+
+
+    def test_requires_execute_permission(self):
+        """Requires execute permission."""
+        res = self.app.get(
+            self.url, user=self.F.UserFactory.create(), status=302)
+
+        self.assertRedirects(res, "/")
+
+
+    def test_package(self):
+        """Downloads the run package as a JSON attachment."""
+        rcv = self.F.RunCaseVersionFactory.create(
+            run=self.testrun, environments=[self.env])
+        self.F.ResultFactory.create(
+            runcaseversion=rcv,
+            tester=self.user,
+            environment=self.env,
+            status="passed",
+            )
+
+        res = self.get(status=200)
+
+        self.assertEqual(res.headers["Content-Type"], "application/json")
+        self.assertEqual(
+            res.headers["Content-Disposition"],
+            "attachment; filename=ff-10-{0}.json".format(self.env.id),
+            )
+        self.assertEqual(res.json["run"]["id"], self.testrun.id)
+        self.assertEqual(
+            [(c["id"], c["result"]["status"]) for c in res.json["cases"]],
+            [(rcv.id, "passed")],
+            )
+
+
+    def test_inactive_run_404(self):
+        """There is no package of a run that isn't active."""
+        self.testrun.status = "draft"
+        self.testrun.save()
+
+        self.get(status=404)
+
+
+    def test_bad_environment_404(self):
+        """There is no package of a run in an environment not of the run."""
+        url = reverse(
+            "runtests_package",
+            kwargs={
+                "run_id": self.testrun.id,
+                "env_id": self.F.EnvironmentFactory.create().id,
+                },
+            )
+
+        self.app.get(url, user=self.user, status=404)
+
+
+
+class UploadTest(case.view.AuthenticatedViewTestCase):
+    """Tests for offline results upload view."""
+    def setUp(self):
+        """These tests all require an active run, an env and execute perm."""
+        super(UploadTest, self).setUp()
+        self.testrun = self.F.RunFactory.create(status="active")
+        self.env = self.F.EnvironmentFactory.create()
+        self.testrun.environments.add(self.env)
+        self.rcv = self.F.RunCaseVersionFactory.create(
+            run=self.testrun, environments=[self.env])
+        self.add_perm("execute")
+
+
+    @property
+    def url(self):
+        """Shortcut for runtests_upload url."""
+        return reverse(
+            "runtests_upload",
+            kwargs={"run_id": self.testrun.id, "env_id": self.env.id})
+
+
+    @property
+    def run_url(self):
+        """Shortcut for runtests_run url."""
+        return reverse(
+            "runtests_run",
+            kwargs={"run_id": self.testrun.id, "env_id": self.env.id})
+
+
+    def upload_form(self):
+        """Return the results upload form of the run-tests page."""
+        return self.app.get(self.run_url, user=self.user).forms[
+            "upload-results-form"]
+
+
+    def post_json(self, body, **kwargs):
+        """POST ``body`` as JSON, with CSRF token header, as an API would."""
+        token = self.upload_form()["csrfmiddlewaretoken"].value
+        return self.app.post(
+            self.url,
+            body,
+            headers={"X-CSRFToken": str(token)},
+            content_type="application/json",
+            user=self.user,
+            **kwargs
+            )
+
+
+    def latest(self):
+        """Return the user's latest result of the runcaseversion."""
+        return self.rcv.results.get(
+            tester=self.user, environment=self.env, latest__isnull=False)
+
+
+    def test_requires_execute_permission(self):
+        """Requires execute permission."""
+        res = self.app.get(
+            self.url, user=self.F.UserFactory.create(), status=302)
+
+        self.assertRedirects(res, "/")
+
+
+    def test_requires_post(self):
+        """Only POST is allowed."""
+        self.get(status=405)
+
+
+    def test_json(self):
+        """A JSON upload gets a JSON summary."""
+        res = self.post_json(
+            json.dumps(
+                {"results": [{"id": self.rcv.id, "status": "passed"}]}),
+            status=200,
+            )
+
+        self.assertEqual(res.json, {"recorded": 1, "conflicts": []})
+        self.assertEqual(self.latest().status, "passed")
+
+
+    def test_json_invalid(self):
+        """An invalid JSON upload gets a 400 response of the errors."""
+        res = self.post_json(
+            json.dumps({"results": [{"id": 9999, "status": "passed"}]}),
+            status=400,
+            )
+
+        self.assertEqual(
+            res.json,
+            {"errors": ["9999 is not a case of this run and environment."]},
+            )
+
+
+    def test_json_null_comment(self):
+        """A null comment gets a 400 response, not a server error."""
+        res = self.post_json(
+            json.dumps(
+                {
+                    "results": [
+                        {"id": self.rcv.id, "status": "failed", "comment": None}
+                        ]
+                    }
+                ),
+            status=400,
+            )
+
+        self.assertEqual(
+            res.json, {"errors": ["Result 0: comment must be a string."]})
+
+
+    def test_not_json(self):
+        """An upload that isn't JSON gets a 400 response."""
+        res = self.post_json("{results", status=400)
+
+        self.assertEqual(
+            res.json, {"errors": ["Uploaded results are not valid JSON."]})
+
+
+    def test_file(self):
+        """A file uploaded from the run-tests page redirects back to it."""
+        form = self.upload_form()
+        form["results"] = (
+            "results.json",
+            json.dumps(
+                {"results": [{"id": self.rcv.id, "status": "failed"}]}),
+            )
+
+        res = form.submit(status=302)
+
+        self.assertRedirects(res, self.run_url)
+        res.follow().mustcontain("Recorded 1 uploaded results.")
+        self.assertEqual(self.latest().status, "failed")
+
+
+    def test_file_conflicts(self):
+        """Conflicts in an uploaded file are reported."""
+        self.F.ResultFactory.create(
+            runcaseversion=self.rcv, tester=self.user, environment=self.env)
+        form = self.upload_form()
+        form["results"] = (
+            "results.json",
+            json.dumps(
+                {"results": [{"id": self.rcv.id, "status": "failed"}]}),
+            )
+
+        res = form.submit(status=302).follow()
+
+        res.mustcontain("Recorded 0 uploaded results.")
+        res.mustcontain("1 uploaded results were not recorded")
+
+
+    def test_file_invalid(self):
+        """Errors in an uploaded file are reported."""
+        form = self.upload_form()
+        form["results"] = ("results.json", "{results")
+
+        res = form.submit(status=302).follow()
+
+        res.mustcontain("Uploaded results are not valid JSON.")
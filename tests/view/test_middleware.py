@@ -0,0 +1,41 @@
+"""
+Tests for request-wide middleware.
+
+"""
+from django.http import HttpResponse
+
+from tests import case
+
+
+
+class GenerationMiddlewareTest(case.DBTestCase):
+    """Tests for GenerationMiddleware."""
+    @property
+    def middleware(self):
+        """The middleware under test."""
+        from moztrap.view.middleware import GenerationMiddleware
+        return GenerationMiddleware()
+
+
+    def test_process_response(self):
+        """Generations of models written in the request change again."""
+        from moztrap.model.mtmodel import generation
+        self.F.ProductFactory.create()
+        during = generation(self.model.Product)
+        response = HttpResponse()
+
+        res = self.middleware.process_response(None, response)
+
+        self.assertIs(res, response)
+        self.assertNotEqual(generation(self.model.Product), during)
+
+
+    def test_after_transaction(self):
+        """Response processing runs after the transaction is committed."""
+        from django.conf import settings
+        classes = settings.MIDDLEWARE_CLASSES
+
+        self.assertLess(
+            classes.index("moztrap.view.middleware.GenerationMiddleware"),
+            classes.index(
+                "django.middleware.transaction.TransactionMiddleware"))
@@ -81,6 +81,38 @@ class ProductIdAttrsTest(MTFormsTestCase):
             )
 
 
+    def test_no_query(self):
+        """Uses the product's ID without loading the product."""
+        pv = self.F.ProductVersionFactory.create()
+        pv = self.model.ProductVersion.objects.get(pk=pv.pk)
+
+        with self.assertNumQueries(0):
+            self.mtforms.product_id_attrs(pv)
+
+
+
+class CachedRelationsTest(MTFormsTestCase):
+    """Tests for cached_relations."""
+    def test_none(self):
+        """No relations have been followed on a freshly-loaded instance."""
+        pv = self.F.ProductVersionFactory.create()
+        pv = self.model.ProductVersion.objects.get(pk=pv.pk)
+
+        self.assertEqual(self.mtforms.cached_relations(pv), [])
+
+
+    def test_nested(self):
+        """Relations followed from related objects are found too."""
+        cv = self.F.CaseVersionFactory.create()
+        cv = self.model.CaseVersion.objects.get(pk=cv.pk)
+        cv.productversion.product
+
+        self.assertEqual(
+            self.mtforms.cached_relations(cv),
+            ["productversion", "productversion__product"],
+            )
+
+
 
 class MTModelFormTest(MTFormsTestCase):
     """Tests for MTModelForm."""
@@ -407,6 +439,60 @@ class MTModelChoiceFieldTest(MTFormsTestCase):
         self.assertIn(">Foo<", s, s)
 
 
+    def versions_form(self, **kwargs):
+        """A form with a productversion field with given extra kwargs."""
+        class VersionForm(forms.Form):
+            """Sample form using MTModelChoiceField."""
+            productversion = self.mtforms.MTModelChoiceField(
+                self.model.ProductVersion.objects.all(), **kwargs)
+
+        return VersionForm
+
+
+    def test_detects_relations(self):
+        """Relations followed by label and attrs are loaded with choices."""
+        for name in ["Foo", "Bar", "Baz"]:
+            self.F.ProductVersionFactory.create(product__name=name)
+        form = self.versions_form(
+            label_from_instance=lambda pv: pv.product.name,
+            choice_attrs=lambda pv: {"data-owner": pv.product.created_by},
+            )
+
+        # one object and its product are loaded to detect relations
+        with self.assertNumQueries(3):
+            s = unicode(form()["productversion"])
+        with self.assertNumQueries(1):
+            unicode(form()["productversion"])
+
+        self.assertIn(">Baz<", s, s)
+
+
+    def test_select_related(self):
+        """Relations named in select_related are loaded with choices."""
+        for name in ["Foo", "Bar"]:
+            self.F.ProductVersionFactory.create(product__name=name)
+        field = self.versions_form(
+            select_related=["product"])().fields["productversion"]
+        list(field.choices)
+
+        with self.assertNumQueries(1):
+            names = [l.obj.product.name for v, l in field.choices if v]
+
+        self.assertEqual(sorted(names), ["Bar", "Foo"])
+
+
+    def test_prefetch(self):
+        """The prefetch callable is called with the list of choices."""
+        pv = self.F.ProductVersionFactory.create()
+        calls = []
+        field = self.versions_form(
+            prefetch=calls.append)().fields["productversion"]
+
+        list(field.choices)
+
+        self.assertEqual(calls, [[pv]])
+
+
 
 class AutocompleteInputTest(MTFormsTestCase):
     """Tests for AutocompleteInput."""
@@ -450,3 +536,81 @@ class FilteredSelectMultipleTest(MTFormsTestCase):
         fsm = self.mtforms.FilteredSelectMultiple(listordering_template="foo")
 
         self.assertEqual(fsm.get_context_data()["listordering_template"], "foo")
+
+
+
+class LazyFilteredSelectMultipleTest(MTFormsTestCase):
+    """Tests for LazyFilteredSelectMultiple."""
+    @property
+    def form(self):
+        """A sample form using the widget under test."""
+        from moztrap.view.lists import filters
+
+        class ProductsForm(forms.Form):
+            """Sample form using LazyFilteredSelectMultiple."""
+            products = self.mtforms.MTModelMultipleChoiceField(
+                self.model.Product.objects.all(),
+                widget=self.mtforms.LazyFilteredSelectMultiple(
+                    url=lambda: "/foo/",
+                    filters=[filters.KeywordFilter("name")],
+                    ),
+                )
+
+        return ProductsForm
+
+
+    def test_still_validates(self):
+        """Choices that weren't rendered can still be submitted."""
+        p = self.F.ProductFactory.create(name="Foo")
+
+        form = self.form({"products": [str(p.id)]})
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(list(form.cleaned_data["products"]), [p])
+
+
+    def options(self, **data):
+        """Return options page for products, given querystring data."""
+        from django.http import QueryDict
+        from urllib import urlencode
+        field = self.form.base_fields["products"]
+        return field.widget.options(
+            field, field.queryset, QueryDict(urlencode(data, doseq=True)))
+
+
+    def test_options(self):
+        """Renders a page of choices with the choice template."""
+        p = self.F.ProductFactory.create(name="Foo")
+
+        options = self.options()
+
+        self.assertIn(">Foo<", options["html"])
+        self.assertIn('value="{0}"'.format(p.id), options["html"])
+        self.assertFalse(options["more"])
+
+
+    def test_options_filtered(self):
+        """Choices are filtered by the widget's filters."""
+        self.F.ProductFactory.create(name="Foo")
+        self.F.ProductFactory.create(name="Bar")
+
+        options = self.options(**{"filter-name": "ba"})
+
+        self.assertIn(">Bar<", options["html"])
+        self.assertNotIn(">Foo<", options["html"])
+
+
+    def test_options_paginated(self):
+        """Choices are returned a page at a time, in pk order."""
+        for name in ["A", "B", "C"]:
+            self.F.ProductFactory.create(name=name)
+
+        first = self.options(pagesize=2)
+        second = self.options(pagesize=2, pagenumber=2)
+
+        self.assertIn(">A<", first["html"])
+        self.assertIn(">B<", first["html"])
+        self.assertTrue(first["more"])
+        self.assertEqual(second["html"].count("selectitem"), 1)
+        self.assertIn(">C<", second["html"])
+        self.assertFalse(second["more"])